@@ -0,0 +1,152 @@
+from algopy import Account, Bytes, Global, OpUpFeeSource, UInt64, ensure_budget, op, subroutine
+from algopy.arc4 import Address, DynamicBytes, UInt16, emit
+
+from folks_contracts.library import BytesUtils
+from ...types import ARC4UInt8, ARC4UInt64, Bytes20, Bytes32
+from ..request.interfaces.IExecutor import REQUEST_FOR_EXECUTION_V2_VERSION, RequestForExecution, RequestForExecutionV2
+from ..request.interfaces.ITokenPaymentExecutor import CUSTOM_TOKEN_FEE_PREFIX
+
+QUOTE_SIGNATURE_LENGTH = 65
+ECDSA_PK_RECOVER_BUDGET = 2_500
+
+
+@subroutine
+def check_quote(signed_quote_bytes: Bytes, our_chain: UInt16, dst_chain: UInt16) -> None:
+    """Checks the signed quote header is for the requested route and has not expired.
+
+    Args:
+        signed_quote_bytes: The signed quote from the executor.
+        our_chain: The chain the request is made on.
+        dst_chain: The destination chain of the request.
+    """
+    quote_src_chain = op.extract_uint16(signed_quote_bytes, 56)
+    quote_dst_chain = op.extract_uint16(signed_quote_bytes, 58)
+    expiry_time = op.extract_uint64(signed_quote_bytes, 60)
+
+    assert quote_src_chain == our_chain.as_uint64(), "Quote source chain mismatch"
+    assert quote_dst_chain == dst_chain.as_uint64(), "Quote destination chain mismatch"
+    assert Global.latest_timestamp < expiry_time, "Quote expired"
+
+
+@subroutine
+def get_payee(signed_quote_bytes: Bytes) -> Account:
+    """Gets the payee from the signed quote header.
+
+    Args:
+        signed_quote_bytes: The signed quote from the executor.
+
+    Returns:
+        The account to pay the executor fee to.
+    """
+    return Account(op.extract(signed_quote_bytes, 24, 32))
+
+
+@subroutine
+def get_payment_asset_id(signed_quote_bytes: Bytes) -> UInt64:
+    """Gets the asset to pay the executor fee in from a custom token fee quote.
+
+    Args:
+        signed_quote_bytes: The signed quote from the executor.
+
+    Returns:
+        The asset id of the token the quote is priced in.
+    """
+    prefix = op.extract(signed_quote_bytes, 0, 4)
+    assert prefix == CUSTOM_TOKEN_FEE_PREFIX, "Prefix mismatch"
+
+    universal_token_address = Bytes32.from_bytes(op.extract(signed_quote_bytes, 100, 32))
+    return BytesUtils.safe_convert_bytes32_to_uint64(universal_token_address)
+
+
+@subroutine
+def get_quote_digest(signed_quote_bytes: Bytes) -> Bytes32:
+    """Gets the digest the quoter signed, the keccak256 hash of the quote without its signature.
+
+    Args:
+        signed_quote_bytes: The signed quote from the executor.
+
+    Returns:
+        The quote digest.
+    """
+    assert signed_quote_bytes.length > QUOTE_SIGNATURE_LENGTH, "Quote too short"
+    return Bytes32.from_bytes(op.keccak256(
+        op.extract(signed_quote_bytes, 0, signed_quote_bytes.length - QUOTE_SIGNATURE_LENGTH)
+    ))
+
+
+@subroutine
+def verify_quote_signature(signed_quote_bytes: Bytes, digest: Bytes32) -> None:
+    """Checks the quote signature recovers to the quoter address in the quote header.
+
+    The signature is the last 65 bytes of the quote as r, s and v, where v may be offset by 27.
+
+    Args:
+        signed_quote_bytes: The signed quote from the executor.
+        digest: The quote digest from get_quote_digest.
+    """
+    signature = op.extract(
+        signed_quote_bytes,
+        signed_quote_bytes.length - QUOTE_SIGNATURE_LENGTH,
+        QUOTE_SIGNATURE_LENGTH
+    )
+    r = op.extract(signature, 0, 32)
+    s = op.extract(signature, 32, 32)
+    v = op.getbyte(signature, 64)
+    if v >= 27:
+        v -= 27
+    assert v <= 1, "Invalid quote signature"
+
+    ensure_budget(ECDSA_PK_RECOVER_BUDGET, OpUpFeeSource.GroupCredit)
+    pubkey_x, pubkey_y = op.ecdsa_pk_recover(op.ECDSA.Secp256k1, digest.bytes, v, r, s)
+    signer = op.extract(op.keccak256(pubkey_x + pubkey_y), 12, 20)
+    assert signer == op.extract(signed_quote_bytes, 4, 20), "Invalid quote signature"
+
+
+@subroutine
+def emit_request_for_execution(
+    amt_paid: UInt64,
+    dst_chain: UInt16,
+    dst_addr: Bytes32,
+    refund_addr: Address,
+    signed_quote_bytes: Bytes,
+    request_bytes: Bytes,
+    relay_instructions: Bytes,
+    compact: bool,
+) -> None:
+    """Emits the RequestForExecution event which relayers listen for.
+
+    The compact RequestForExecutionV2 layout omits the quoter address and destination chain, which are already
+    in the signed quote header.
+
+    Args:
+        amt_paid: The ALGO amount paid for the execution.
+        dst_chain: The destination chain.
+        dst_addr: The destination address.
+        refund_addr: Where to refund unspent ALGO.
+        signed_quote_bytes: The signed quote from the executor.
+        request_bytes: The request to execute.
+        relay_instructions: The relay instructions.
+        compact: Whether to emit RequestForExecutionV2 instead.
+    """
+    if compact:
+        emit(RequestForExecutionV2(
+            ARC4UInt8(REQUEST_FOR_EXECUTION_V2_VERSION),
+            ARC4UInt64(amt_paid),
+            dst_addr,
+            refund_addr,
+            DynamicBytes(signed_quote_bytes),
+            DynamicBytes(request_bytes),
+            DynamicBytes(relay_instructions),
+        ))
+        return
+
+    emit(RequestForExecution(
+        Bytes20.from_bytes(op.extract(signed_quote_bytes, 4, 20)),
+        ARC4UInt64(amt_paid),
+        dst_chain,
+        dst_addr,
+        refund_addr,
+        DynamicBytes(signed_quote_bytes),
+        DynamicBytes(request_bytes),
+        DynamicBytes(relay_instructions),
+    ))
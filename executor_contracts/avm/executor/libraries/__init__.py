@@ -1 +1 @@
-__all__ = ["ExecutorMessages", "RelayInstructions"]
+__all__ = ["ExecutorMessages", "ExecutorRequests", "MathsUtils", "RelayInstructions"]
@@ -1,12 +1,37 @@
-from algopy import OnCompleteAction, gtxn, op
-from algopy.arc4 import Bool, DynamicBytes, abimethod, arc4_signature,emit
+from algopy import Account, BoxMap, Bytes, Global, GlobalState, OnCompleteAction, Txn, UInt64, gtxn, itxn, op, subroutine, urange
+from algopy.arc4 import Address, Bool, DynamicArray, DynamicBytes, abimethod, arc4_signature, emit
 
-from ...types import Bytes32
+from ...types import ARC4UInt64, Bytes32
 from .interfaces.IVaaV1Receiver import IVaaV1Receiver
-from .interfaces.IVaaV1ReceiveWithGasDropOff import IVaaV1ReceiveWithGasDropOff, VAAMessageReceived
+from .interfaces.IVaaV1ReceiveWithGasDropOff import (
+    DELIVERY_BOX_MIN_BALANCE,
+    DELIVERY_RETENTION,
+    ERROR_REASON_TRUNCATION_THRESHOLD,
+    Delivery,
+    ErrorReport,
+    IVaaV1ReceiveWithGasDropOff,
+    VAAMessageReceived,
+    VaaV1MessageGroupIndices,
+)
+
+# Constants
+WORMHOLE_CORE_VERIFY_SIGS = b"verifySigs"
+WORMHOLE_CORE_VERIFY_VAA = b"verifyVAA"
+VAA_SIGNATURES_OFFSET = 6
+VAA_SIGNATURE_LENGTH = 66
 
 
 class VaaV1ReceiveWithGasDropOff(IVaaV1ReceiveWithGasDropOff):
+    def __init__(self) -> None:
+        self.wormhole_core = GlobalState(UInt64)
+        self.track_deliveries = GlobalState(Bool)
+        self.deliveries = BoxMap(Bytes32, Delivery, key_prefix=b"deliveries_")
+
+    @abimethod(create="require")
+    def create(self, wormhole_core: UInt64, track_deliveries: Bool) -> None:
+        self.wormhole_core.value = wormhole_core
+        self.track_deliveries.value = track_deliveries
+
     @abimethod
     def receive_message(
         self,
@@ -17,6 +42,142 @@ class VaaV1ReceiveWithGasDropOff(IVaaV1ReceiveWithGasDropOff):
         gas_drop_off: gtxn.PaymentTransaction,
         request_for_execution_id: Bytes32
     ) -> None:
+        self._check_verify_calls(verify_sigs.group_index, verify_vaa)
+        self._check_message(gas, execute_vaa)
+        if self.track_deliveries.value.native:
+            # the payment directly precedes the transactions of the call so no other call can count it
+            deliveries_payment = gtxn.PaymentTransaction(gas.group_index - 1)
+            self._check_deliveries_payment(deliveries_payment, UInt64(1))
+            self._mark_delivered(deliveries_payment.sender, verify_vaa, execute_vaa)
+
+        # gas drop off can be arbitrary so not checked
+
+        emit(VAAMessageReceived(request_for_execution_id, Bool(True), DynamicBytes(b"")))
+
+    @abimethod
+    def receive_messages(self, messages: DynamicArray[VaaV1MessageGroupIndices]) -> None:
+        # the payment directly precedes the call so no other call can count it, the messages come before it
+        track_deliveries = self.track_deliveries.value.native
+        funder = Global.zero_address
+        if track_deliveries:
+            deliveries_payment = gtxn.PaymentTransaction(Txn.group_index - 1)
+            self._check_deliveries_payment(deliveries_payment, messages.length)
+            funder = deliveries_payment.sender
+
+        next_index = UInt64(0)
+        for message in messages:
+            # indices increase within and across messages so each transaction belongs to a single message
+            gas_index = message.gas.as_uint64()
+            verify_sigs_index = message.verify_sigs.as_uint64()
+            verify_vaa_index = message.verify_vaa.as_uint64()
+            execute_vaa_index = message.execute_vaa.as_uint64()
+            gas_drop_off_index = message.gas_drop_off.as_uint64()
+            assert next_index <= gas_index and gas_index < verify_sigs_index, "Group indices out of order"
+            assert execute_vaa_index < gas_drop_off_index, "Group indices out of order"
+            next_index = gas_drop_off_index + 1
+
+            # the verify_sigs calls directly precede the verify_vaa call, which is passed to the execute_vaa call
+            verify_sigs_count = message.verify_sigs_count.as_uint64()
+            assert verify_sigs_count, "Missing verify sigs"
+            assert verify_sigs_index + verify_sigs_count == verify_vaa_index, "Verify sigs not before verify vaa"
+            assert verify_vaa_index + 1 == execute_vaa_index, "Verify vaa not before execute vaa"
+
+            # check the transaction types at the given group indices
+            gas = gtxn.PaymentTransaction(gas_index)
+            verify_vaa = gtxn.ApplicationCallTransaction(verify_vaa_index)
+            execute_vaa = gtxn.ApplicationCallTransaction(execute_vaa_index)
+            gas_drop_off = gtxn.PaymentTransaction(gas_drop_off_index)
+
+            self._check_verify_calls(verify_sigs_index, verify_vaa)
+            self._check_message(gas, execute_vaa)
+            if track_deliveries:
+                self._mark_delivered(funder, verify_vaa, execute_vaa)
+
+            # gas drop off can be arbitrary so not checked
+
+            emit(VAAMessageReceived(message.request_for_execution_id, Bool(True), DynamicBytes(b"")))
+
+        if track_deliveries:
+            assert next_index < Txn.group_index, "Group indices out of order"
+
+    @abimethod
+    def report_error(self, request_for_execution_id: Bytes32, error_reason: DynamicBytes) -> None:
+        self._report_error(request_for_execution_id, error_reason.native)
+
+    @abimethod
+    def report_errors(self, reports: DynamicArray[ErrorReport]) -> None:
+        for report in reports:
+            self._report_error(report.request_for_execution_id, report.error_reason.native)
+
+    @abimethod
+    def report_errors_with_reason(
+        self,
+        request_for_execution_ids: DynamicArray[Bytes32],
+        error_reason: DynamicBytes
+    ) -> None:
+        for request_for_execution_id in request_for_execution_ids:
+            self._report_error(request_for_execution_id, error_reason.native)
+
+    @abimethod
+    def prune_deliveries(self, delivery_ids: DynamicArray[Bytes32]) -> None:
+        # entries which are unknown or still retained are skipped, one inner transaction per entry deleted
+        for delivery_id in delivery_ids:
+            delivery, exists = self.deliveries.maybe(delivery_id)
+            if exists and Global.latest_timestamp >= delivery.timestamp.native + DELIVERY_RETENTION:
+                del self.deliveries[delivery_id]
+                itxn.Payment(receiver=delivery.funder.native, amount=DELIVERY_BOX_MIN_BALANCE, fee=0).submit()
+
+    @abimethod(readonly=True)
+    def is_delivered(self, delivery_ids: DynamicArray[Bytes32]) -> DynamicArray[Bool]:
+        delivered = DynamicArray[Bool]()
+        for delivery_id in delivery_ids:
+            delivered.append(Bool(delivery_id in self.deliveries))
+        return delivered
+
+    @subroutine
+    def _check_deliveries_payment(self, payment: gtxn.PaymentTransaction, count: UInt64) -> None:
+        # the caller funds the box min balance of each delivery
+        assert payment.receiver == Global.current_application_address, "Unknown deliveries payment receiver"
+        assert payment.amount == count * DELIVERY_BOX_MIN_BALANCE, "Incorrect deliveries payment amount"
+
+    @subroutine
+    def _mark_delivered(
+        self,
+        funder: Account,
+        verify_vaa: gtxn.ApplicationCallTransaction,
+        execute_vaa: gtxn.ApplicationCallTransaction
+    ) -> None:
+        # keyed by the contract and the hash of the VAA body verified by Wormhole Core, which the contract checks it
+        # executes, so a delivery to another contract does not count
+        vaa = verify_vaa.app_args(1)
+        body_offset = VAA_SIGNATURES_OFFSET + VAA_SIGNATURE_LENGTH * op.getbyte(vaa, VAA_SIGNATURES_OFFSET - 1)
+        delivery_id = Bytes32.from_bytes(op.sha256(
+            op.itob(execute_vaa.app_id.id) + op.extract(vaa, body_offset, vaa.length - body_offset)
+        ))
+        assert delivery_id not in self.deliveries, "Already delivered"
+        self.deliveries[delivery_id] = Delivery(ARC4UInt64(Global.latest_timestamp), Address(funder))
+
+    @subroutine
+    def _report_error(self, request_for_execution_id: Bytes32, error_reason: Bytes) -> None:
+        # bound the log size as the EVM receivers bound the revert data
+        if error_reason.length > ERROR_REASON_TRUNCATION_THRESHOLD:
+            error_reason = op.extract(error_reason, 0, ERROR_REASON_TRUNCATION_THRESHOLD)
+        emit(VAAMessageReceived(request_for_execution_id, Bool(False), DynamicBytes(error_reason)))
+
+    @subroutine
+    def _check_verify_calls(self, verify_sigs_index: UInt64, verify_vaa: gtxn.ApplicationCallTransaction) -> None:
+        # the indices are chosen by the caller so check they are the Wormhole Core calls the message needs
+        assert verify_vaa.app_id.id == self.wormhole_core.value, "Unknown verify vaa app"
+        assert verify_vaa.on_completion == OnCompleteAction.NoOp, "Incorrect app on completion"
+        assert verify_vaa.app_args(0) == WORMHOLE_CORE_VERIFY_VAA, "Incorrect verify vaa method"
+        for i in urange(verify_sigs_index, verify_vaa.group_index):
+            verify_sigs = gtxn.ApplicationCallTransaction(i)
+            assert verify_sigs.app_id == verify_vaa.app_id, "Unknown verify sigs app"
+            assert verify_sigs.on_completion == OnCompleteAction.NoOp, "Incorrect app on completion"
+            assert verify_sigs.app_args(0) == WORMHOLE_CORE_VERIFY_SIGS, "Incorrect verify sigs method"
+
+    @subroutine
+    def _check_message(self, gas: gtxn.PaymentTransaction, execute_vaa: gtxn.ApplicationCallTransaction) -> None:
         # check the gas instruction sends ALGO to contract
         contract_address, exists = op.AppParamsGet.app_address(execute_vaa.app_id)
         assert exists, "Contract address unknown"
@@ -28,11 +189,3 @@ class VaaV1ReceiveWithGasDropOff(IVaaV1ReceiveWithGasDropOff):
         # check the execute_vaa call
         assert execute_vaa.on_completion == OnCompleteAction.NoOp, "Incorrect app on completion"
         assert execute_vaa.app_args(0) == arc4_signature(IVaaV1Receiver.execute_vaa_v1), "Incorrect method"
-
-        # gas drop off can be arbitrary so not checked
-
-        emit(VAAMessageReceived(request_for_execution_id, Bool(True), DynamicBytes(b"")))
-
-    @abimethod
-    def report_error(self, request_for_execution_id: Bytes32, error_reason: DynamicBytes) -> None:
-        emit(VAAMessageReceived(request_for_execution_id, Bool(False), error_reason))
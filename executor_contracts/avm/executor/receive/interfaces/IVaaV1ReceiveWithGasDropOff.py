@@ -1,8 +1,32 @@
 from abc import ABC, abstractmethod
 from algopy import ARC4Contract, gtxn
-from algopy.arc4 import Bool, DynamicBytes, Struct, abimethod
+from algopy.arc4 import Address, Bool, DynamicArray, DynamicBytes, Struct, abimethod
 
-from ....types import Bytes32
+from ....types import ARC4UInt8, ARC4UInt64, Bytes32
+
+# Constants
+ERROR_REASON_TRUNCATION_THRESHOLD = 132 # As RETURN_DATA_TRUNCATION_THRESHOLD of the EVM receivers.
+DELIVERY_BOX_MIN_BALANCE = 35_700 # 2500 + 400 * (11 + 32 + 40) for the prefix, key and value.
+DELIVERY_RETENTION = 86_400 # A day in seconds, after which a delivery can be pruned.
+
+
+# Structs
+class VaaV1MessageGroupIndices(Struct, frozen=True):
+    gas: ARC4UInt8
+    verify_sigs: ARC4UInt8 # First of verify_sigs_count consecutive transactions.
+    verify_sigs_count: ARC4UInt8
+    verify_vaa: ARC4UInt8
+    execute_vaa: ARC4UInt8
+    gas_drop_off: ARC4UInt8
+    request_for_execution_id: Bytes32
+
+class Delivery(Struct, frozen=True):
+    timestamp: ARC4UInt64
+    funder: Address # Refunded the box min balance when pruned.
+
+class ErrorReport(Struct, frozen=True):
+    request_for_execution_id: Bytes32
+    error_reason: DynamicBytes
 
 
 # Events
@@ -26,6 +50,8 @@ class IVaaV1ReceiveWithGasDropOff(ARC4Contract, ABC):
     ) -> None:
         """Receive an attested message from the executor.
 
+        When tracking deliveries, the transaction before gas pays the box min balance of the delivery.
+
         Args:
             gas: The ALGO amount to send to contract.
             verify_sigs: The call to Wormhole Core to verify the guardian signatures.
@@ -35,3 +61,17 @@ class IVaaV1ReceiveWithGasDropOff(ARC4Contract, ABC):
             request_for_execution_id: The request for execution id.
         """
         pass
+
+    @abstractmethod
+    @abimethod
+    def receive_messages(self, messages: DynamicArray[VaaV1MessageGroupIndices]) -> None:
+        """Receive multiple messages in the same group, each referencing its transactions by group index.
+
+        When tracking deliveries, the transaction before this call pays the box min balance of every delivery and the
+        transactions of the messages come before it.
+
+        Args:
+            messages: For each message, the group indices of its gas, verify_sigs, verify_vaa, execute_vaa and
+                gas_drop_off transactions, and its request for execution id.
+        """
+        pass
@@ -1,21 +1,48 @@
-from algopy import Account, Bytes, Global, GlobalState, String, Txn, UInt64, gtxn, itxn, op
-from algopy.arc4 import Address, DynamicBytes, UInt16, abimethod, emit
+from algopy import Account, BoxMap, Bytes, Global, GlobalState, String, Txn, UInt64, gtxn, itxn, op, subroutine, urange
+from algopy.arc4 import Address, Bool, DynamicArray, DynamicBytes, UInt16, abimethod, emit
 
-from ...types import ARC4UInt64, Bytes20, Bytes32
-from .interfaces.IExecutor import IExecutor, RequestForExecution
+from ...types import ARC4UInt8, ARC4UInt64, Bytes20, Bytes32
+from ..libraries import ExecutorRequests
+from .interfaces.IExecutor import (
+    ACCRUED_FEES_BOX_MIN_BALANCE, BOX_BYTE_MIN_BALANCE, INDEXED_REQUEST_BOX_MIN_BALANCE, MAX_REGISTERED_QUOTE_LIFETIME,
+    MAX_VERIFIED_QUOTE_LIFETIME, REGISTERED_QUOTE_BOX_MIN_BALANCE, REQUEST_STATUS_EXECUTED, REQUEST_STATUS_FAILED,
+    REQUEST_STATUS_REQUESTED, VERIFIED_QUOTE_BOX_MIN_BALANCE, AccruedFeesKey, AccruedFeesSettled, ExecutionRequest,
+    FeesAccrued, IExecutor, IndexedRequest, QuoteRegistered, RegisteredQuote, RequestForExecutionWithQuoteId,
+    VerifiedQuote
+)
 
 # Constants
 EXECUTOR_VERSION = "Executor-0.0.1"
+ALGO_ASSET_ID = 0
 
 
 class Executor(IExecutor):
     def __init__(self) -> None:
         self.executor_version = String(EXECUTOR_VERSION)
         self.our_chain = GlobalState(UInt16)
+        self.accrue_fees = GlobalState(Bool)
+        self.compact_events = GlobalState(Bool)
+        self.verify_quote_signatures = GlobalState(Bool)
+        self.index_requests = GlobalState(Bool)
+        self.accrued_fees = BoxMap(AccruedFeesKey, UInt64, key_prefix=b"accrued_fees_")
+        self.verified_quotes = BoxMap(Bytes32, VerifiedQuote, key_prefix=b"verified_quotes_")
+        self.registered_quotes = BoxMap(Bytes32, RegisteredQuote, key_prefix=b"registered_quotes_")
+        self.request_index = BoxMap(Bytes32, IndexedRequest, key_prefix=b"request_index_")
 
     @abimethod(create="require")
-    def create(self, our_chain: UInt16) -> None:
+    def create(
+        self,
+        our_chain: UInt16,
+        accrue_fees: Bool,
+        compact_events: Bool,
+        verify_quote_signatures: Bool,
+        index_requests: Bool,
+    ) -> None:
         self.our_chain.value = our_chain
+        self.accrue_fees.value = accrue_fees
+        self.compact_events.value = compact_events
+        self.verify_quote_signatures.value = verify_quote_signatures
+        self.index_requests.value = index_requests
 
     @abimethod
     def request_execution(
@@ -28,29 +55,325 @@ class Executor(IExecutor):
         request_bytes: Bytes,
         relay_instructions: Bytes,
     ) -> None:
-        quote_src_chain = op.extract_uint16(signed_quote_bytes, 56)
-        quote_dst_chain = op.extract_uint16(signed_quote_bytes, 58)
-        expiry_time = op.extract_uint64(signed_quote_bytes, 60)
+        ExecutorRequests.check_quote(signed_quote_bytes, self.our_chain.value, dst_chain)
+        self._verify_quote(signed_quote_bytes)
 
-        assert quote_src_chain == self.our_chain.value, "Quote source chain mismatch"
-        assert quote_dst_chain == dst_chain.as_uint64(), "Quote destination chain mismatch"
-        assert Global.latest_timestamp < expiry_time, "Quote expired"
+        self._index_request(request_bytes, dst_chain, fee_payment.amount, signed_quote_bytes)
+        self._collect_fee(fee_payment, ExecutorRequests.get_payee(signed_quote_bytes))
 
-        quoter_address = Bytes20.from_bytes(op.extract(signed_quote_bytes, 4, 20))
-        universal_payee_address = op.extract(signed_quote_bytes, 24, 32)
+        ExecutorRequests.emit_request_for_execution(
+            fee_payment.amount,
+            dst_chain,
+            dst_addr,
+            refund_addr,
+            signed_quote_bytes,
+            request_bytes,
+            relay_instructions,
+            self.compact_events.value.native,
+        )
 
-        # forward payment to payee, amount is not checked
+    @abimethod
+    def request_execution_batch(
+        self,
+        fee_payment: gtxn.PaymentTransaction,
+        requests: DynamicArray[ExecutionRequest],
+    ) -> None:
+        # fee may be paid directly to the payee when every request shares it and none is indexed
         assert fee_payment.sender == Txn.sender, "Fee txn must be from same sender"
-        assert fee_payment.receiver == Global.current_application_address, "Unknown fee payment receiver"
-        itxn.Payment(receiver=Account(universal_payee_address), amount=fee_payment.amount, fee=0).submit()
+        pay_direct = fee_payment.receiver != Global.current_application_address
+        index_reserve = self._get_request_index_reserve()
+        assert not pay_direct or not index_reserve, "Fee must be paid to executor to index request"
+
+        # check each quote and emit its request, individual amounts are not checked
+        total_amt_paid = UInt64(0)
+        for request in requests:
+            ExecutorRequests.check_quote(request.signed_quote_bytes.native, self.our_chain.value, request.dst_chain)
+            self._verify_quote(request.signed_quote_bytes.native)
+            if pay_direct:
+                payee = ExecutorRequests.get_payee(request.signed_quote_bytes.native)
+                assert fee_payment.receiver == payee, "Unknown fee payment receiver"
+            total_amt_paid += request.amt_paid.native
+            self._index_request(
+                request.request_bytes.native,
+                request.dst_chain,
+                request.amt_paid.native,
+                request.signed_quote_bytes.native,
+            )
+            ExecutorRequests.emit_request_for_execution(
+                request.amt_paid.native,
+                request.dst_chain,
+                request.dst_addr,
+                request.refund_addr,
+                request.signed_quote_bytes.native,
+                request.request_bytes.native,
+                request.relay_instructions.native,
+                self.compact_events.value.native,
+            )
+        assert total_amt_paid == fee_payment.amount, "Incorrect fee payment amount"
+        if pay_direct:
+            return
+
+        # forward payment to each distinct payee once
+        for i in urange(requests.length):
+            payee = ExecutorRequests.get_payee(requests[i].signed_quote_bytes.native)
+            if self._is_first_request_to_payee(requests, i, payee):
+                payee_amount = UInt64(0)
+                for j in urange(i, requests.length):
+                    if ExecutorRequests.get_payee(requests[j].signed_quote_bytes.native) == payee:
+                        payee_amount += requests[j].amt_paid.native - index_reserve
+                self._pay_payee(payee, payee_amount)
+
+    @abimethod
+    def register_quote(self, mbr_payment: gtxn.PaymentTransaction, signed_quote_bytes: Bytes) -> Bytes32:
+        # destination chain is not known until the request so the quote is checked against its own
+        quote_dst_chain = UInt16(op.extract_uint16(signed_quote_bytes, 58))
+        ExecutorRequests.check_quote(signed_quote_bytes, self.our_chain.value, quote_dst_chain)
+        expiry_time = op.extract_uint64(signed_quote_bytes, 60)
+        assert expiry_time <= Global.latest_timestamp + MAX_REGISTERED_QUOTE_LIFETIME, "Quote expiry too far"
+        self._verify_quote(signed_quote_bytes)
+
+        quote_id = ExecutorRequests.get_quote_digest(signed_quote_bytes)
+        assert quote_id not in self.registered_quotes, "Quote already registered"
+
+        # box min balance paid by the caller, returned to them when the quote is pruned
+        box_min_balance = REGISTERED_QUOTE_BOX_MIN_BALANCE + BOX_BYTE_MIN_BALANCE * signed_quote_bytes.length
+        assert mbr_payment.sender == Txn.sender, "Min balance txn must be from same sender"
+        assert mbr_payment.receiver == Global.current_application_address, "Unknown min balance payment receiver"
+        assert mbr_payment.amount >= box_min_balance, "Insufficient min balance payment"
+
+        self.registered_quotes[quote_id] = RegisteredQuote(
+            Address(Txn.sender),
+            ARC4UInt64(mbr_payment.amount),
+            DynamicBytes(signed_quote_bytes),
+        )
+        emit(QuoteRegistered(quote_id, DynamicBytes(signed_quote_bytes)))
+        return quote_id
 
-        emit(RequestForExecution(
-            quoter_address,
+    @abimethod
+    def request_execution_with_quote_id(
+        self,
+        fee_payment: gtxn.PaymentTransaction,
+        dst_chain: UInt16,
+        dst_addr: Bytes32,
+        refund_addr: Address,
+        quote_id: Bytes32,
+        request_bytes: Bytes,
+        relay_instructions: Bytes,
+    ) -> None:
+        # the event has no compact form, it already omits the quote bytes logged once on registration
+        assert not self.compact_events.value.native, "Quote id requests not supported with compact events"
+        registered_quote, exists = self.registered_quotes.maybe(quote_id)
+        assert exists, "Unknown quote"
+        signed_quote_bytes = registered_quote.signed_quote_bytes.native
+        ExecutorRequests.check_quote(signed_quote_bytes, self.our_chain.value, dst_chain)
+        self._verify_quote(signed_quote_bytes)
+
+        self._index_request(request_bytes, dst_chain, fee_payment.amount, signed_quote_bytes)
+        self._collect_fee(fee_payment, ExecutorRequests.get_payee(signed_quote_bytes))
+
+        emit(RequestForExecutionWithQuoteId(
+            Bytes20.from_bytes(op.extract(signed_quote_bytes, 4, 20)),
             ARC4UInt64(fee_payment.amount),
             dst_chain,
             dst_addr,
             refund_addr,
-            DynamicBytes(signed_quote_bytes),
+            quote_id,
             DynamicBytes(request_bytes),
             DynamicBytes(relay_instructions),
         ))
+
+    @abimethod
+    def prune_registered_quotes(self, quote_ids: DynamicArray[Bytes32]) -> None:
+        # entries which are unknown or not yet expired are skipped, one inner transaction per entry deleted
+        for quote_id in quote_ids:
+            registered_quote, exists = self.registered_quotes.maybe(quote_id)
+            if exists and Global.latest_timestamp >= op.extract_uint64(registered_quote.signed_quote_bytes.native, 60):
+                del self.registered_quotes[quote_id]
+                itxn.Payment(
+                    receiver=registered_quote.funder.native,
+                    amount=registered_quote.deposit.native,
+                    fee=0,
+                ).submit()
+
+    @abimethod(readonly=True)
+    def get_registered_quote(self, quote_id: Bytes32) -> Bytes:
+        registered_quote, exists = self.registered_quotes.maybe(quote_id)
+        assert exists, "Unknown quote"
+        return registered_quote.signed_quote_bytes.native
+
+    @abimethod
+    def settle_accrued_fees(self, payee: Address) -> None:
+        key = AccruedFeesKey(payee, ARC4UInt64(ALGO_ASSET_ID))
+        amount, exists = self.accrued_fees.maybe(key)
+        assert exists, "No accrued fees"
+
+        # the freed box min balance was reserved from the accrued fees so the full amount is paid out
+        del self.accrued_fees[key]
+        itxn.Payment(receiver=payee.native, amount=amount, fee=0).submit()
+        emit(AccruedFeesSettled(payee, ARC4UInt64(ALGO_ASSET_ID), ARC4UInt64(amount)))
+
+    @abimethod(readonly=True)
+    def get_accrued_fees(self, payee: Address) -> UInt64:
+        return self.accrued_fees.get(AccruedFeesKey(payee, ARC4UInt64(ALGO_ASSET_ID)), default=UInt64(0))
+
+    @abimethod
+    def verify_quote(self, mbr_payment: gtxn.PaymentTransaction, signed_quote_bytes: Bytes) -> Bytes32:
+        assert self.verify_quote_signatures.value.native, "Quote signatures not verified"
+
+        # destination chain is not known until the request so the quote is checked against its own
+        quote_dst_chain = UInt16(op.extract_uint16(signed_quote_bytes, 58))
+        ExecutorRequests.check_quote(signed_quote_bytes, self.our_chain.value, quote_dst_chain)
+        expiry_time = op.extract_uint64(signed_quote_bytes, 60)
+        assert expiry_time <= Global.latest_timestamp + MAX_VERIFIED_QUOTE_LIFETIME, "Quote expiry too far"
+
+        digest = ExecutorRequests.get_quote_digest(signed_quote_bytes)
+        assert digest not in self.verified_quotes, "Quote already verified"
+        ExecutorRequests.verify_quote_signature(signed_quote_bytes, digest)
+
+        # box min balance paid by the caller, returned to them when the quote is pruned
+        assert mbr_payment.sender == Txn.sender, "Min balance txn must be from same sender"
+        assert mbr_payment.receiver == Global.current_application_address, "Unknown min balance payment receiver"
+        assert mbr_payment.amount == VERIFIED_QUOTE_BOX_MIN_BALANCE, "Incorrect min balance payment amount"
+
+        self.verified_quotes[digest] = VerifiedQuote(Address(Txn.sender), ARC4UInt64(expiry_time))
+        return digest
+
+    @abimethod
+    def prune_verified_quotes(self, digests: DynamicArray[Bytes32]) -> None:
+        # entries which are unknown or not yet expired are skipped, one inner transaction per entry deleted
+        for digest in digests:
+            verified_quote, exists = self.verified_quotes.maybe(digest)
+            if exists and Global.latest_timestamp >= verified_quote.expiry_time.native:
+                del self.verified_quotes[digest]
+                itxn.Payment(
+                    receiver=verified_quote.funder.native,
+                    amount=VERIFIED_QUOTE_BOX_MIN_BALANCE,
+                    fee=0,
+                ).submit()
+
+    @abimethod(readonly=True)
+    def is_quote_verified(self, digest: Bytes32) -> bool:
+        verified_quote, exists = self.verified_quotes.maybe(digest)
+        return exists and Global.latest_timestamp < verified_quote.expiry_time.native
+
+    @abimethod
+    def update_request_status(self, request_id: Bytes32, status: ARC4UInt8) -> None:
+        indexed_request, exists = self.request_index.maybe(request_id)
+        assert exists, "Unknown request"
+        assert Txn.sender == indexed_request.payee.native, "Caller must be payee"
+        new_status = status.as_uint64()
+        assert new_status == REQUEST_STATUS_EXECUTED or new_status == REQUEST_STATUS_FAILED, "Invalid request status"
+        self.request_index[request_id] = indexed_request._replace(status=status)
+
+    @abimethod
+    def remove_indexed_requests(self, request_ids: DynamicArray[Bytes32]) -> None:
+        amount = UInt64(0)
+        for request_id in request_ids:
+            indexed_request, exists = self.request_index.maybe(request_id)
+            assert exists, "Unknown request"
+            assert Txn.sender == indexed_request.payee.native, "Caller must be payee"
+            assert indexed_request.status.as_uint64() != REQUEST_STATUS_REQUESTED, "Request pending"
+            del self.request_index[request_id]
+            amount += INDEXED_REQUEST_BOX_MIN_BALANCE
+
+        # the box min balance reserved from the fee of each request is paid out to the payee
+        itxn.Payment(receiver=Txn.sender, amount=amount, fee=0).submit()
+
+    @abimethod(readonly=True)
+    def get_indexed_request(self, request_id: Bytes32) -> IndexedRequest:
+        indexed_request, exists = self.request_index.maybe(request_id)
+        assert exists, "Unknown request"
+        return indexed_request
+
+    @abimethod(readonly=True)
+    def get_indexed_requests(self, request_ids: DynamicArray[Bytes32]) -> DynamicArray[IndexedRequest]:
+        # requests which are not indexed are returned zeroed so one call covers any set of ids
+        indexed_requests = DynamicArray[IndexedRequest]()
+        for request_id in request_ids:
+            indexed_requests.append(self.request_index.get(request_id, default=IndexedRequest(
+                UInt16(0), ARC4UInt64(0), Address(), ARC4UInt64(0), ARC4UInt8(0)
+            )))
+        return indexed_requests
+
+    @subroutine
+    def _verify_quote(self, signed_quote_bytes: Bytes) -> None:
+        if not self.verify_quote_signatures.value.native:
+            return
+
+        # quote expiry already checked and is part of the digest so cached entry is valid, quotes are only cached
+        # through verify_quote which the caller funds
+        digest = ExecutorRequests.get_quote_digest(signed_quote_bytes)
+        if digest in self.verified_quotes:
+            return
+
+        ExecutorRequests.verify_quote_signature(signed_quote_bytes, digest)
+
+    @subroutine
+    def _index_request(
+        self,
+        request_bytes: Bytes,
+        dst_chain: UInt16,
+        amt_paid: UInt64,
+        signed_quote_bytes: Bytes,
+    ) -> None:
+        if not self.index_requests.value.native:
+            return
+
+        # keyed by the caller and quote too so another account can't index the same request bytes first, box min balance
+        # reserved from the fee until the payee removes the entry
+        request_id = Bytes32.from_bytes(op.sha256(
+            Txn.sender.bytes + ExecutorRequests.get_quote_digest(signed_quote_bytes).bytes + request_bytes
+        ))
+        assert request_id not in self.request_index, "Request already indexed"
+        assert amt_paid >= INDEXED_REQUEST_BOX_MIN_BALANCE, "Fee below request index box min balance"
+        self.request_index[request_id] = IndexedRequest(
+            dst_chain,
+            ARC4UInt64(amt_paid),
+            Address.from_bytes(op.extract(signed_quote_bytes, 24, 32)),
+            ARC4UInt64(Global.latest_timestamp),
+            ARC4UInt8(REQUEST_STATUS_REQUESTED),
+        )
+
+    @subroutine
+    def _get_request_index_reserve(self) -> UInt64:
+        if self.index_requests.value.native:
+            return UInt64(INDEXED_REQUEST_BOX_MIN_BALANCE)
+        return UInt64(0)
+
+    @subroutine
+    def _collect_fee(self, fee_payment: gtxn.PaymentTransaction, payee: Account) -> None:
+        # forward payment to payee unless paid directly, amount is not checked
+        assert fee_payment.sender == Txn.sender, "Fee txn must be from same sender"
+        index_reserve = self._get_request_index_reserve()
+        if fee_payment.receiver == payee:
+            assert not index_reserve, "Fee must be paid to executor to index request"
+            return
+
+        assert fee_payment.receiver == Global.current_application_address, "Unknown fee payment receiver"
+        self._pay_payee(payee, fee_payment.amount - index_reserve)
+
+    @subroutine
+    def _pay_payee(self, payee: Account, amount: UInt64) -> None:
+        if not self.accrue_fees.value.native:
+            itxn.Payment(receiver=payee, amount=amount, fee=0).submit()
+        elif amount:
+            # box min balance reserved from the first accrual to payee until the fees are settled
+            key = AccruedFeesKey(Address(payee), ARC4UInt64(ALGO_ASSET_ID))
+            if key in self.accrued_fees:
+                self.accrued_fees[key] = self.accrued_fees[key] + amount
+            else:
+                assert amount >= ACCRUED_FEES_BOX_MIN_BALANCE, "Fee below accrued fees box min balance"
+                self.accrued_fees[key] = amount
+            emit(FeesAccrued(Address(payee), ARC4UInt64(ALGO_ASSET_ID), ARC4UInt64(amount)))
+
+    @subroutine
+    def _is_first_request_to_payee(
+        self,
+        requests: DynamicArray[ExecutionRequest],
+        index: UInt64,
+        payee: Account
+    ) -> bool:
+        for i in urange(index):
+            if ExecutorRequests.get_payee(requests[i].signed_quote_bytes.native) == payee:
+                return False
+        return True
@@ -1,17 +1,20 @@
-from algopy import Account, Bytes, Global, GlobalState, OnCompleteAction, String, Txn, UInt64, gtxn, itxn, subroutine, op
-from algopy.arc4 import UInt16, abi_call, abimethod, arc4_signature
+from algopy import Account, Asset, BoxMap, Bytes, Global, GlobalState, OnCompleteAction, String, Txn, UInt64, gtxn, itxn, op, subroutine
+from algopy.arc4 import Address, Bool, DynamicArray, UInt16, abi_call, abimethod, arc4_signature
 
 from folks_contracts.library import BytesUtils
 from ntt_contracts.ntt_manager.interfaces.INttManager import INttManager
 from ... import constants as const
-from ...types import Bytes32
-from ..libraries import ExecutorMessages, MathsUtils
-from .interfaces.ITokenPaymentExecutor import ITokenPaymentExecutor
+from ...types import ARC4UInt64, Bytes32
+from ..libraries import ExecutorMessages, ExecutorRequests, MathsUtils
+from .interfaces.ITokenPaymentExecutor import (
+    WHITELISTED_TOKEN_BOX_MIN_BALANCE, WHITELISTED_TOKEN_KEY_PREFIX, ITokenPaymentExecutor, WhitelistedToken
+)
 from .interfaces.INttManagerWithTokenPaymentExecutor import ExecutorArgs, FeeArgs, INttManagerWithTokenPaymentExecutor
 
 
 # Constants
 EXECUTOR_VERSION = "NttManagerWithTokenPaymentExecutor-0.0.1"
+TOKEN_PAYMENT_EXECUTOR_ACCRUE_FEES_KEY = b"accrue_fees"
 
 
 class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
@@ -19,6 +22,7 @@ class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
         self.executor_version = String(EXECUTOR_VERSION)
         self.our_chain = GlobalState(UInt16)
         self.executor = GlobalState(UInt64)
+        self.whitelisted_tokens = BoxMap(UInt64, WhitelistedToken, key_prefix=WHITELISTED_TOKEN_KEY_PREFIX)
 
     @abimethod(create="require")
     def create(self, our_chain: UInt16, executor: UInt64) -> None:
@@ -26,14 +30,36 @@ class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
         self.executor.value = executor
 
     @abimethod
-    def whitelist_token_for_payment(self, asset_id: UInt64) -> None:
-        # ALGO min balance implicitly required
-        itxn.AssetTransfer(
-            xfer_asset=asset_id,
-            asset_receiver=Global.current_application_address,
-            asset_amount=0,
-            fee=0,
-        ).submit()
+    def whitelist_token_for_payment(self, mbr_payment: gtxn.PaymentTransaction, asset_id: UInt64) -> None:
+        self._check_min_balance_payment(mbr_payment, self._whitelist_token(asset_id))
+
+    @abimethod
+    def whitelist_tokens_for_payment(
+        self,
+        mbr_payment: gtxn.PaymentTransaction,
+        asset_ids: DynamicArray[ARC4UInt64]
+    ) -> None:
+        # one inner transaction per token not yet whitelisted, so bounded by the inner transaction limit of the group
+        deposits = UInt64(0)
+        for asset_id in asset_ids:
+            deposits += self._whitelist_token(asset_id.native)
+        self._check_min_balance_payment(mbr_payment, deposits)
+
+    @abimethod
+    def unwhitelist_tokens_for_payment(self, asset_ids: DynamicArray[ARC4UInt64]) -> None:
+        refund = UInt64(0)
+        for asset_id in asset_ids:
+            refund += self._unwhitelist_token(asset_id.native)
+
+        # return the deposits to the funder
+        itxn.Payment(receiver=Txn.sender, amount=refund, fee=0).submit()
+
+    @abimethod(readonly=True)
+    def is_whitelisted_for_payment(self, asset_ids: DynamicArray[ARC4UInt64]) -> DynamicArray[Bool]:
+        whitelisted = DynamicArray[Bool]()
+        for asset_id in asset_ids:
+            whitelisted.append(Bool(asset_id.native in self.whitelisted_tokens))
+        return whitelisted
 
     @abimethod
     def transfer(
@@ -70,9 +96,7 @@ class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
         assert pay_referrer.asset_amount == referrer_fee_amount, "Incorrect pay referrer amount"
         assert op.btoi(ntt_transfer.app_args(1)) == amount - referrer_fee_amount, "Incorrect ntt transfer amount"
 
-        # prepare request_execution call
-        executor_address, exists = op.AppParamsGet.app_address(self.executor.value)
-        assert exists, "Executor address unknown"
+        # prepare request
         src_manager = BytesUtils.convert_uint64_to_bytes32(ntt_transfer.app_id.id)
         ntt_manager_peer, txn = abi_call(
             INttManager.get_ntt_manager_peer,
@@ -80,12 +104,19 @@ class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
             app_id=ntt_transfer.app_id,
             fee=0
         )
+        request_bytes = ExecutorMessages.make_ntt_v1_request(self.our_chain.value, src_manager, message_id)
+
+        # pay the quote payee directly when the token payment executor would only forward the fee to them
+        fee_receiver, exists = op.AppParamsGet.app_address(self.executor.value)
+        assert exists, "Executor address unknown"
+        if self._is_forwarding_executor():
+            fee_receiver = ExecutorRequests.get_payee(executor_args.signed_quote_bytes.native)
 
         abi_call(
             ITokenPaymentExecutor.request_execution_with_token_payment,
             itxn.AssetTransfer(
                 xfer_asset=pay_executor.xfer_asset,
-                asset_receiver=executor_address,
+                asset_receiver=fee_receiver,
                 asset_amount=pay_executor.asset_amount,
                 fee=0
             ),
@@ -93,8 +124,61 @@ class NttManagerWithTokenPaymentExecutor(INttManagerWithTokenPaymentExecutor):
             ntt_manager_peer.peer_contract,
             executor_args.refund_address,
             executor_args.signed_quote_bytes,
-            ExecutorMessages.make_ntt_v1_request(self.our_chain.value, src_manager, message_id),
+            request_bytes,
             executor_args.relay_instructions,
             app_id=self.executor.value,
             fee=0
         )
+
+    @subroutine
+    def _is_forwarding_executor(self) -> bool:
+        # the token payment executor forwards each fee to the payee unless it accrues fees
+        accrue_fees, exists = op.AppGlobal.get_ex_bytes(self.executor.value, TOKEN_PAYMENT_EXECUTOR_ACCRUE_FEES_KEY)
+        return exists and not Bool.from_bytes(accrue_fees).native
+
+    @subroutine
+    def _whitelist_token(self, asset_id: UInt64) -> UInt64:
+        if asset_id in self.whitelisted_tokens:
+            return UInt64(0)
+
+        # the ALGO and box min balance is deposited by the funder and returned when the token is unwhitelisted
+        deposit = Global.asset_opt_in_min_balance + WHITELISTED_TOKEN_BOX_MIN_BALANCE
+        self.whitelisted_tokens[asset_id] = WhitelistedToken(Address(Txn.sender), ARC4UInt64(deposit))
+        itxn.AssetTransfer(
+            xfer_asset=asset_id,
+            asset_receiver=Global.current_application_address,
+            asset_amount=0,
+            fee=0,
+        ).submit()
+        return deposit
+
+    @subroutine
+    def _check_min_balance_payment(self, mbr_payment: gtxn.PaymentTransaction, deposits: UInt64) -> None:
+        assert mbr_payment.sender == Txn.sender, "Min balance txn must be from same sender"
+        assert mbr_payment.receiver == Global.current_application_address, "Unknown min balance payment receiver"
+        assert mbr_payment.amount >= deposits, "Insufficient min balance payment"
+
+        # only the deposits are held, any excess is returned straight away
+        if mbr_payment.amount > deposits:
+            itxn.Payment(receiver=Txn.sender, amount=mbr_payment.amount - deposits, fee=0).submit()
+
+    @subroutine
+    def _unwhitelist_token(self, asset_id: UInt64) -> UInt64:
+        whitelisted_token, exists = self.whitelisted_tokens.maybe(asset_id)
+        assert exists, "Token not whitelisted"
+        assert whitelisted_token.funder.native == Txn.sender, "Caller must be funder"
+
+        # a token with a balance still has payments to forward or fees to settle
+        balance, opted_in = op.AssetHoldingGet.asset_balance(Global.current_application_address, asset_id)
+        assert balance == 0, "Token in use"
+
+        del self.whitelisted_tokens[asset_id]
+        creator = Asset(asset_id).creator
+        itxn.AssetTransfer(
+            xfer_asset=asset_id,
+            asset_receiver=creator,
+            asset_close_to=creator,
+            asset_amount=0,
+            fee=0,
+        ).submit()
+        return whitelisted_token.deposit.native
@@ -1,33 +1,66 @@
-from algopy import Account, Bytes, Global, GlobalState, String, Txn, UInt64, itxn, gtxn, op
-from algopy.arc4 import Address, UInt16, abi_call, abimethod, emit
+from algopy import Account, Asset, BoxMap, Bytes, Global, GlobalState, String, Txn, UInt64, itxn, gtxn, op, subroutine
+from algopy.arc4 import Address, Bool, DynamicArray, UInt16, abi_call, abimethod, emit
 
-from folks_contracts.library import BytesUtils
 from ...types import ARC4UInt64, Bytes32
-from .interfaces.IExecutor import IExecutor
-from .interfaces.ITokenPaymentExecutor import CUSTOM_TOKEN_FEE_PREFIX, ITokenPaymentExecutor, PaymentInToken
+from ..libraries import ExecutorRequests
+from .interfaces.IExecutor import AccruedFeesKey, AccruedFeesSettled, FeesAccrued, IExecutor
+from .interfaces.ITokenPaymentExecutor import (
+    WHITELISTED_TOKEN_BOX_MIN_BALANCE, WHITELISTED_TOKEN_KEY_PREFIX, ITokenPaymentExecutor, PaymentInToken, WhitelistedToken
+)
 
 # Constants
 EXECUTOR_VERSION = "TokenPaymentExecutor-0.0.1"
+EXECUTOR_INDEX_REQUESTS_KEY = b"index_requests"
 
 
 class TokenPaymentExecutor(ITokenPaymentExecutor):
     def __init__(self) -> None:
         self.executor_version = String(EXECUTOR_VERSION)
         self.executor = GlobalState(UInt64)
+        self.accrue_fees = GlobalState(Bool)
+        self.accrued_fees = BoxMap(AccruedFeesKey, UInt64, key_prefix=b"accrued_fees_")
+        self.whitelisted_tokens = BoxMap(UInt64, WhitelistedToken, key_prefix=WHITELISTED_TOKEN_KEY_PREFIX)
 
     @abimethod(create="require")
-    def create(self, executor: UInt64) -> None:
+    def create(self, executor: UInt64, accrue_fees: Bool) -> None:
+        # token payments pass no ALGO to the executor so can't cover the box min balance of an indexed request
+        index_requests, exists = op.AppGlobal.get_ex_bytes(executor, EXECUTOR_INDEX_REQUESTS_KEY)
+        assert not exists or not Bool.from_bytes(index_requests).native, "Executor indexes requests"
+
         self.executor.value = executor
+        self.accrue_fees.value = accrue_fees
 
     @abimethod
-    def whitelist_token_for_payment(self, asset_id: UInt64) -> None:
-        # ALGO min balance implicitly required
-        itxn.AssetTransfer(
-            xfer_asset=asset_id,
-            asset_receiver=Global.current_application_address,
-            asset_amount=0,
-            fee=0,
-        ).submit()
+    def whitelist_token_for_payment(self, mbr_payment: gtxn.PaymentTransaction, asset_id: UInt64) -> None:
+        self._check_min_balance_payment(mbr_payment, self._whitelist_token(asset_id))
+
+    @abimethod
+    def whitelist_tokens_for_payment(
+        self,
+        mbr_payment: gtxn.PaymentTransaction,
+        asset_ids: DynamicArray[ARC4UInt64]
+    ) -> None:
+        # one inner transaction per token not yet whitelisted, so bounded by the inner transaction limit of the group
+        deposits = UInt64(0)
+        for asset_id in asset_ids:
+            deposits += self._whitelist_token(asset_id.native)
+        self._check_min_balance_payment(mbr_payment, deposits)
+
+    @abimethod
+    def unwhitelist_tokens_for_payment(self, asset_ids: DynamicArray[ARC4UInt64]) -> None:
+        refund = UInt64(0)
+        for asset_id in asset_ids:
+            refund += self._unwhitelist_token(asset_id.native)
+
+        # return the deposits to the funder
+        itxn.Payment(receiver=Txn.sender, amount=refund, fee=0).submit()
+
+    @abimethod(readonly=True)
+    def is_whitelisted_for_payment(self, asset_ids: DynamicArray[ARC4UInt64]) -> DynamicArray[Bool]:
+        whitelisted = DynamicArray[Bool]()
+        for asset_id in asset_ids:
+            whitelisted.append(Bool(asset_id.native in self.whitelisted_tokens))
+        return whitelisted
 
     @abimethod
     def request_execution_with_token_payment(
@@ -40,27 +73,20 @@ class TokenPaymentExecutor(ITokenPaymentExecutor):
         request_bytes: Bytes,
         relay_instructions: Bytes,
     ) -> None:
-        prefix = op.extract(signed_quote_bytes, 0, 4)
-        assert prefix == CUSTOM_TOKEN_FEE_PREFIX, "Prefix mismatch"
+        asset_id = ExecutorRequests.get_payment_asset_id(signed_quote_bytes)
+        payee = ExecutorRequests.get_payee(signed_quote_bytes)
 
-        universal_payee_address = op.extract(signed_quote_bytes, 24, 32)
-        universal_token_address = Bytes32.from_bytes(op.extract(signed_quote_bytes, 100, 32))
-
-        # forward payment to payee, amount is not checked
-        asset_id = BytesUtils.safe_convert_bytes32_to_uint64(universal_token_address)
+        # forward payment to payee unless paid directly, amount is not checked
         assert fee_payment.sender == Txn.sender, "Fee txn must be from same sender"
-        assert fee_payment.asset_receiver == Global.current_application_address, "Unknown fee payment receiver"
         assert fee_payment.xfer_asset.id == asset_id, "Unknown asset id"
-        itxn.AssetTransfer(
-            xfer_asset=asset_id,
-            asset_receiver=Account(universal_payee_address),
-            asset_amount=fee_payment.asset_amount,
-            fee=0,
-        ).submit()
+        if fee_payment.asset_receiver != payee:
+            assert fee_payment.asset_receiver == Global.current_application_address, "Unknown fee payment receiver"
+            self._pay_payee(payee, asset_id, fee_payment.asset_amount)
 
         emit(PaymentInToken(ARC4UInt64(asset_id), ARC4UInt64(fee_payment.asset_amount)))
 
-        # zero algo payment used because token payment covers entire cost
+        # zero algo payment used because token payment covers entire cost, the request is never emitted here so it is
+        # verified, indexed and logged by the executor relayers follow
         executor_address, exists = op.AppParamsGet.app_address(self.executor.value)
         assert exists, "Executor address unknown"
         abi_call(
@@ -75,3 +101,89 @@ class TokenPaymentExecutor(ITokenPaymentExecutor):
             app_id=self.executor.value,
             fee=0
         )
+
+    @abimethod
+    def settle_accrued_fees(self, payee: Address, asset_id: UInt64) -> None:
+        key = AccruedFeesKey(payee, ARC4UInt64(asset_id))
+        amount, exists = self.accrued_fees.maybe(key)
+        assert exists, "No accrued fees"
+
+        del self.accrued_fees[key]
+        itxn.AssetTransfer(
+            xfer_asset=asset_id,
+            asset_receiver=payee.native,
+            asset_amount=amount,
+            fee=0,
+        ).submit()
+        emit(AccruedFeesSettled(payee, ARC4UInt64(asset_id), ARC4UInt64(amount)))
+
+    @abimethod(readonly=True)
+    def get_accrued_fees(self, payee: Address, asset_id: UInt64) -> UInt64:
+        return self.accrued_fees.get(AccruedFeesKey(payee, ARC4UInt64(asset_id)), default=UInt64(0))
+
+    @subroutine
+    def _whitelist_token(self, asset_id: UInt64) -> UInt64:
+        if asset_id in self.whitelisted_tokens:
+            return UInt64(0)
+
+        # the ALGO and box min balance is deposited by the funder and returned when the token is unwhitelisted
+        deposit = Global.asset_opt_in_min_balance + WHITELISTED_TOKEN_BOX_MIN_BALANCE
+        self.whitelisted_tokens[asset_id] = WhitelistedToken(Address(Txn.sender), ARC4UInt64(deposit))
+        itxn.AssetTransfer(
+            xfer_asset=asset_id,
+            asset_receiver=Global.current_application_address,
+            asset_amount=0,
+            fee=0,
+        ).submit()
+        return deposit
+
+    @subroutine
+    def _check_min_balance_payment(self, mbr_payment: gtxn.PaymentTransaction, deposits: UInt64) -> None:
+        assert mbr_payment.sender == Txn.sender, "Min balance txn must be from same sender"
+        assert mbr_payment.receiver == Global.current_application_address, "Unknown min balance payment receiver"
+        assert mbr_payment.amount >= deposits, "Insufficient min balance payment"
+
+        # only the deposits are held, any excess is returned straight away
+        if mbr_payment.amount > deposits:
+            itxn.Payment(receiver=Txn.sender, amount=mbr_payment.amount - deposits, fee=0).submit()
+
+    @subroutine
+    def _unwhitelist_token(self, asset_id: UInt64) -> UInt64:
+        whitelisted_token, exists = self.whitelisted_tokens.maybe(asset_id)
+        assert exists, "Token not whitelisted"
+        assert whitelisted_token.funder.native == Txn.sender, "Caller must be funder"
+
+        # a token with a balance still has payments to forward or fees to settle
+        balance, opted_in = op.AssetHoldingGet.asset_balance(Global.current_application_address, asset_id)
+        assert balance == 0, "Token in use"
+
+        del self.whitelisted_tokens[asset_id]
+        creator = Asset(asset_id).creator
+        itxn.AssetTransfer(
+            xfer_asset=asset_id,
+            asset_receiver=creator,
+            asset_close_to=creator,
+            asset_amount=0,
+            fee=0,
+        ).submit()
+        return whitelisted_token.deposit.native
+
+    @subroutine
+    def _pay_payee(self, payee: Account, asset_id: UInt64, amount: UInt64) -> None:
+        if not self.accrue_fees.value.native:
+            itxn.AssetTransfer(
+                xfer_asset=asset_id,
+                asset_receiver=payee,
+                asset_amount=amount,
+                fee=0,
+            ).submit()
+        elif amount:
+            # a box is only opened for a payee opted into the asset, so it can always be settled and its min balance freed
+            key = AccruedFeesKey(Address(payee), ARC4UInt64(asset_id))
+            if key in self.accrued_fees:
+                self.accrued_fees[key] = self.accrued_fees[key] + amount
+            else:
+                balance, opted_in = op.AssetHoldingGet.asset_balance(payee, asset_id)
+                assert opted_in, "Payee not opted into asset"
+                self.accrued_fees[key] = amount
+            emit(FeesAccrued(Address(payee), ARC4UInt64(asset_id), ARC4UInt64(amount)))
@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
 from algopy import ARC4Contract, Bytes, gtxn
-from algopy.arc4 import Address, DynamicBytes, Struct, UInt16, abimethod
+from algopy.arc4 import Address, DynamicArray, DynamicBytes, Struct, UInt16, abimethod
 
-from ....types import ARC4UInt16, ARC4UInt64, Bytes4, Bytes20, Bytes32
+from ....types import ARC4UInt8, ARC4UInt16, ARC4UInt64, Bytes4, Bytes20, Bytes32
+
+# Constants
+REQUEST_FOR_EXECUTION_V2_VERSION = 2
+ACCRUED_FEES_BOX_MIN_BALANCE = 26_900 # 2500 + 400 * (13 byte prefix + 40 byte key + 8 byte amount)
+INDEXED_REQUEST_BOX_MIN_BALANCE = 41_300 # 2500 + 400 * (14 byte prefix + 32 byte key + 51 byte value)
+REGISTERED_QUOTE_BOX_MIN_BALANCE = 40_100 # 2500 + 400 * (18 byte prefix + 32 byte key + 44 byte value head)
+VERIFIED_QUOTE_BOX_MIN_BALANCE = 37_700 # 2500 + 400 * (16 byte prefix + 32 byte key + 40 byte value)
+BOX_BYTE_MIN_BALANCE = 400
+MAX_REGISTERED_QUOTE_LIFETIME = 86_400 # 1 day
+MAX_VERIFIED_QUOTE_LIFETIME = 86_400 # 1 day
+
+# Request index statuses, zero for requests which are not indexed.
+REQUEST_STATUS_REQUESTED = 1
+REQUEST_STATUS_EXECUTED = 2
+REQUEST_STATUS_FAILED = 3
 
 
 # Structs
@@ -14,6 +29,35 @@ class SignedQuoteHeader(Struct, frozen=True):
     dst_chain: ARC4UInt16
     expiry_time: ARC4UInt64
 
+class ExecutionRequest(Struct, frozen=True):
+    amt_paid: ARC4UInt64
+    dst_chain: ARC4UInt16
+    dst_addr: Bytes32
+    refund_addr: Address
+    signed_quote_bytes: DynamicBytes
+    request_bytes: DynamicBytes
+    relay_instructions: DynamicBytes
+
+class AccruedFeesKey(Struct, frozen=True):
+    payee: Address
+    asset_id: ARC4UInt64 # Zero for ALGO.
+
+class RegisteredQuote(Struct, frozen=True):
+    funder: Address
+    deposit: ARC4UInt64 # Returned to the funder when pruned.
+    signed_quote_bytes: DynamicBytes
+
+class VerifiedQuote(Struct, frozen=True):
+    funder: Address # Refunded the box min balance when pruned.
+    expiry_time: ARC4UInt64
+
+class IndexedRequest(Struct, frozen=True):
+    dst_chain: ARC4UInt16
+    amt_paid: ARC4UInt64
+    payee: Address
+    timestamp: ARC4UInt64
+    status: ARC4UInt8
+
 
 # Events
 class RequestForExecution(Struct):
@@ -26,6 +70,41 @@ class RequestForExecution(Struct):
     request_bytes: DynamicBytes
     relay_instructions: DynamicBytes
 
+# Quoter address and destination chain are read from the signed quote header, fixed width fields come first.
+class RequestForExecutionV2(Struct):
+    version: ARC4UInt8
+    amt_paid: ARC4UInt64
+    dst_addr: Bytes32
+    refund_addr: Address
+    signed_quote_bytes: DynamicBytes
+    request_bytes: DynamicBytes
+    relay_instructions: DynamicBytes
+
+# Signed quote bytes are logged once in QuoteRegistered.
+class RequestForExecutionWithQuoteId(Struct):
+    quoter_address: Bytes20
+    amt_paid: ARC4UInt64
+    dst_chain: ARC4UInt16
+    dst_addr: Bytes32
+    refund_addr: Address
+    quote_id: Bytes32
+    request_bytes: DynamicBytes
+    relay_instructions: DynamicBytes
+
+class QuoteRegistered(Struct):
+    quote_id: Bytes32
+    signed_quote_bytes: DynamicBytes
+
+class FeesAccrued(Struct):
+    payee: Address
+    asset_id: ARC4UInt64
+    amount: ARC4UInt64
+
+class AccruedFeesSettled(Struct):
+    payee: Address
+    asset_id: ARC4UInt64
+    amount: ARC4UInt64
+
 
 class IExecutor(ARC4Contract, ABC):
     @abstractmethod
@@ -43,7 +122,7 @@ class IExecutor(ARC4Contract, ABC):
         """Request execution of Wormhole message.
 
         Args:
-            fee_payment: The ALGO payment for the execution
+            fee_payment: The ALGO payment for the execution, to the executor or directly to the quote payee
             dst_chain: The destination chain
             dst_addr: The destination address
             refund_addr: Where to refund unspent ALGO
@@ -52,3 +131,21 @@ class IExecutor(ARC4Contract, ABC):
             relay_instructions: The relay instructions
         """
         pass
+
+    @abstractmethod
+    @abimethod
+    def request_execution_batch(
+        self,
+        fee_payment: gtxn.PaymentTransaction,
+        requests: DynamicArray[ExecutionRequest],
+    ) -> None:
+        """Request execution of multiple Wormhole messages using a single ALGO payment.
+
+        The payment must equal the sum of the amounts paid for each request. It is forwarded once to each distinct
+        payee.
+
+        Args:
+            fee_payment: The combined ALGO payment for the executions, to the executor or directly to a shared payee
+            requests: The requests to execute, each with the portion of the payment for it
+        """
+        pass
@@ -34,7 +34,7 @@ class INttManagerWithTokenPaymentExecutor(ARC4Contract, ABC):
         Args:
             ntt_send_token: Part of the call to NttManager to transfer token. Added here for visibility.
             ntt_transfer: The call to NttManager to transfer token.
-            pay_executor: The token payment for the execution.
+            pay_executor: The token payment for the execution, to this app.
             pay_referrer: Percentage of token transfer amount to pay to referrer.
             amount: The total amount combining the ntt transfer and referrer pay.
             executor_args: The arguments to be passed into the Executor.
@@ -6,6 +6,14 @@ from ....types import ARC4UInt64, Bytes32
 
 # Constants
 CUSTOM_TOKEN_FEE_PREFIX = b"EQC1"
+WHITELISTED_TOKEN_KEY_PREFIX = b"whitelisted_token_"
+WHITELISTED_TOKEN_BOX_MIN_BALANCE = 28_900 # 2500 + 400 * (18 byte prefix + 8 byte asset id + 40 byte entry)
+
+
+# Structs
+class WhitelistedToken(Struct, frozen=True):
+    funder: Address
+    deposit: ARC4UInt64 # Returned to the funder when unwhitelisted.
 
 
 # Events
@@ -30,7 +38,7 @@ class ITokenPaymentExecutor(ARC4Contract, ABC):
         """Request execution of Wormhole message.
 
         Args:
-            fee_payment: The token payment for the execution
+            fee_payment: The token payment for the execution, to the executor or directly to the quote payee
             dst_chain: The destination chain
             dst_addr: The destination address
             refund_addr: Where to refund unspent ALGO
@@ -1,8 +1,8 @@
 from algopy import Bytes, Global, Txn, gtxn
-from algopy.arc4 import Address, DynamicBytes, Struct, UInt16, abimethod, emit
+from algopy.arc4 import Address, DynamicArray, DynamicBytes, Struct, UInt16, abimethod, emit
 
 from ....types import ARC4UInt16, ARC4UInt64, Bytes32
-from ..interfaces.IExecutor import IExecutor
+from ..interfaces.IExecutor import ExecutionRequest, IExecutor
 
 
 # Events
@@ -40,3 +40,23 @@ class MockExecutor(IExecutor):
             DynamicBytes(request_bytes),
             DynamicBytes(relay_instructions),
         ))
+
+    @abimethod
+    def request_execution_batch(
+        self,
+        fee_payment: gtxn.PaymentTransaction,
+        requests: DynamicArray[ExecutionRequest],
+    ) -> None:
+        assert fee_payment.sender == Txn.sender, "Fee txn must be from same sender"
+        assert fee_payment.receiver == Global.current_application_address, "Unknown fee payment receiver"
+
+        for request in requests:
+            emit(RequestForExecution(
+                request.amt_paid,
+                request.dst_chain,
+                request.dst_addr.copy(),
+                request.refund_addr,
+                request.signed_quote_bytes.copy(),
+                request.request_bytes.copy(),
+                request.relay_instructions.copy(),
+            ))
@@ -1,7 +1,8 @@
-from algopy import Bytes, Global, Txn, UInt64, gtxn, itxn
-from algopy.arc4 import Address, DynamicBytes, Struct, UInt16, abimethod, emit
+from algopy import Bytes, Global, GlobalState, Txn, UInt64, gtxn, itxn
+from algopy.arc4 import Address, Bool, DynamicBytes, Struct, UInt16, abimethod, emit
 
 from ....types import ARC4UInt16, ARC4UInt64, Bytes32
+from ...libraries import ExecutorRequests
 from ..interfaces.ITokenPaymentExecutor import ITokenPaymentExecutor
 
 
@@ -17,6 +18,18 @@ class RequestForExecution(Struct):
 
 
 class MockTokenPaymentExecutor(ITokenPaymentExecutor):
+    def __init__(self) -> None:
+        self.executor = GlobalState(UInt64)
+        self.accrue_fees = GlobalState(Bool)
+
+    @abimethod
+    def set_executor(self, executor: UInt64) -> None:
+        self.executor.value = executor
+
+    @abimethod
+    def set_accrue_fees(self, accrue_fees: Bool) -> None:
+        self.accrue_fees.value = accrue_fees
+
     @abimethod
     def whitelist_token_for_payment(self, asset_id: UInt64) -> None:
         # ALGO min balance implicitly required
@@ -39,7 +52,8 @@ class MockTokenPaymentExecutor(ITokenPaymentExecutor):
         relay_instructions: Bytes,
     ) -> None:
         assert fee_payment.sender == Txn.sender, "Fee txn must be from same sender"
-        assert fee_payment.asset_receiver == Global.current_application_address, "Unknown fee payment receiver"
+        if fee_payment.asset_receiver != ExecutorRequests.get_payee(signed_quote_bytes):
+            assert fee_payment.asset_receiver == Global.current_application_address, "Unknown fee payment receiver"
 
         emit(RequestForExecution(
             ARC4UInt64(fee_payment.asset_amount),
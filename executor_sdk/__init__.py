@@ -0,0 +1 @@
+__all__ = ["bulk", "codec", "events", "indexer", "metrics", "quotes", "relayer", "templates", "workload"]
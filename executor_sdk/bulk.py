@@ -0,0 +1,254 @@
+"""Vectorised decoding of executor ARC-28 event logs into columnar NumPy arrays.
+
+Requires the ``numpy`` extra. All logs are joined into one shared buffer and every event type is decoded with array
+operations over that buffer. Fixed-width fields become columns of a structured array, dynamic fields become an
+offset and length into the shared buffer.
+"""
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from .events import (
+    NTT_MESSAGE_RECEIVED_SIGNATURE, PAYMENT_IN_TOKEN_SIGNATURE, REQUEST_FOR_EXECUTION_SIGNATURE,
+    REQUEST_FOR_EXECUTION_V2_SIGNATURE, SELECTOR_LENGTH, VAA_MESSAGE_RECEIVED_SIGNATURE, get_event_selector
+)
+
+# Constants
+GATHER_CHUNK_SIZE = 1 << 16
+
+# ARC-4 heads of the events, dynamic fields are 2-byte offsets relative to the start of the head
+_REQUEST_FOR_EXECUTION_HEAD = np.dtype([
+    ("quoter_address", "V20"),
+    ("amt_paid", ">u8"),
+    ("dst_chain", ">u2"),
+    ("dst_addr", "V32"),
+    ("refund_addr", "V32"),
+    ("signed_quote_bytes", ">u2"),
+    ("request_bytes", ">u2"),
+    ("relay_instructions", ">u2"),
+])
+_REQUEST_FOR_EXECUTION_V2_HEAD = np.dtype([
+    ("version", "u1"),
+    ("amt_paid", ">u8"),
+    ("dst_addr", "V32"),
+    ("refund_addr", "V32"),
+    ("signed_quote_bytes", ">u2"),
+    ("request_bytes", ">u2"),
+    ("relay_instructions", ">u2"),
+])
+_PAYMENT_IN_TOKEN_HEAD = np.dtype([
+    ("asset_id", ">u8"),
+    ("amt_paid", ">u8"),
+])
+_MESSAGE_RECEIVED_HEAD = np.dtype([
+    ("request_for_execution_id", "V32"),
+    ("success", "u1"),
+    ("error_reason", ">u2"),
+])
+
+REQUEST_FOR_EXECUTION_DTYPE = np.dtype([
+    ("log_index", "u4"),
+    ("compact", "?"),
+    ("quoter_address", "V20"),
+    ("amt_paid", "u8"),
+    ("dst_chain", "u2"),
+    ("dst_addr", "V32"),
+    ("refund_addr", "V32"),
+    ("request_prefix", "V4"),
+    ("signed_quote_offset", "u8"),
+    ("signed_quote_length", "u2"),
+    ("request_offset", "u8"),
+    ("request_length", "u2"),
+    ("relay_instructions_offset", "u8"),
+    ("relay_instructions_length", "u2"),
+])
+PAYMENT_IN_TOKEN_DTYPE = np.dtype([
+    ("log_index", "u4"),
+    ("asset_id", "u8"),
+    ("amt_paid", "u8"),
+])
+MESSAGE_RECEIVED_DTYPE = np.dtype([
+    ("log_index", "u4"),
+    ("request_for_execution_id", "V32"),
+    ("success", "?"),
+    ("error_reason_offset", "u8"),
+    ("error_reason_length", "u2"),
+])
+
+
+def _selector_value(signature: str) -> int:
+    return int.from_bytes(get_event_selector(signature), "big")
+
+
+@dataclass(frozen=True, slots=True)
+class DecodedLogs:
+    """Columnar events decoded from a batch of logs.
+
+    Rows keep the order of the input logs and ``log_index`` is the index of their log in the input. Logs of other
+    events and malformed logs are skipped, the latter are counted in ``malformed``.
+    """
+
+    buffer: bytes
+    request_for_execution: np.ndarray
+    payment_in_token: np.ndarray
+    ntt_message_received: np.ndarray
+    vaa_message_received: np.ndarray
+    malformed: int
+
+    def get_bytes(self, offset: int, length: int) -> memoryview:
+        """Gets a dynamic field from the shared buffer without copying it."""
+        return memoryview(self.buffer)[offset:offset + length]
+
+
+class _Batch:
+    __slots__ = ("buffer", "data", "starts", "ends", "selectors", "malformed")
+
+    def __init__(self, logs: Sequence[bytes]) -> None:
+        lengths = np.fromiter((len(log) for log in logs), dtype=np.int64, count=len(logs))
+        self.buffer = b"".join(logs)
+        self.data = np.frombuffer(self.buffer, dtype=np.uint8)
+        self.ends = np.cumsum(lengths)
+        self.starts = self.ends - lengths
+        self.malformed = 0
+
+        # logs too short for a selector match no event
+        has_selector = lengths >= SELECTOR_LENGTH
+        selector_bytes = self.gather(np.where(has_selector, self.starts, 0), SELECTOR_LENGTH)
+        selectors = selector_bytes.astype(np.uint32) @ np.array([1 << 24, 1 << 16, 1 << 8, 1], dtype=np.uint32)
+        self.selectors = np.where(has_selector, selectors, 0)
+
+    def gather(self, positions: np.ndarray, width: int) -> np.ndarray:
+        # rows of width bytes starting at each position, positions must be in bounds
+        rows = np.zeros((len(positions), width), dtype=np.uint8)
+        if not len(self.data):
+            return rows
+
+        # gather in chunks to bound the size of the index array
+        columns = np.arange(width)
+        for start in range(0, len(positions), GATHER_CHUNK_SIZE):
+            chunk = positions[start:start + GATHER_CHUNK_SIZE]
+            rows[start:start + len(chunk)] = self.data[chunk[:, None] + columns]
+        return rows
+
+    def select(self, signature: str, head: np.dtype) -> tuple[np.ndarray, np.ndarray]:
+        # indices and decoded heads of logs of the event with a complete head
+        indices = np.flatnonzero(self.selectors == _selector_value(signature))
+        complete = self.ends[indices] - self.starts[indices] >= SELECTOR_LENGTH + head.itemsize
+        self.malformed += int(np.count_nonzero(~complete))
+        indices = indices[complete]
+
+        heads = self.gather(self.starts[indices] + SELECTOR_LENGTH, head.itemsize)
+        return indices, np.ascontiguousarray(heads).view(head).reshape(len(indices))
+
+    def dynamic(self, indices: np.ndarray, head_offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # absolute offset and length of each dynamic field, and whether it lies within its log
+        ends = self.ends[indices]
+        positions = self.starts[indices] + SELECTOR_LENGTH + head_offsets.astype(np.int64)
+        valid = positions + 2 <= ends
+        length_bytes = self.gather(np.where(valid, positions, 0), 2).astype(np.int64)
+        lengths = np.where(valid, length_bytes[:, 0] << 8 | length_bytes[:, 1], 0)
+        valid &= positions + 2 + lengths <= ends
+        return positions + 2, lengths, valid
+
+    def prefixes(self, offsets: np.ndarray, lengths: np.ndarray, width: int) -> np.ndarray:
+        # first width bytes of each dynamic field, zero when the field is shorter
+        present = lengths >= width
+        prefixes = self.gather(np.where(present, offsets, 0), width)
+        return np.where(present[:, None], prefixes, 0).astype(np.uint8)
+
+
+def _decode_request_for_execution(batch: _Batch, compact: bool) -> np.ndarray:
+    signature = REQUEST_FOR_EXECUTION_V2_SIGNATURE if compact else REQUEST_FOR_EXECUTION_SIGNATURE
+    head_dtype = _REQUEST_FOR_EXECUTION_V2_HEAD if compact else _REQUEST_FOR_EXECUTION_HEAD
+    indices, heads = batch.select(signature, head_dtype)
+
+    valid = np.ones(len(indices), dtype=bool)
+    fields = {}
+    for name in ("signed_quote_bytes", "request_bytes", "relay_instructions"):
+        offsets, lengths, field_valid = batch.dynamic(indices, heads[name])
+        fields[name] = (offsets, lengths)
+        valid &= field_valid
+
+    # zero the fields of malformed rows so they are never read past their log
+    for name, (offsets, lengths) in fields.items():
+        fields[name] = (np.where(valid, offsets, 0), np.where(valid, lengths, 0))
+
+    rows = np.zeros(len(indices), dtype=REQUEST_FOR_EXECUTION_DTYPE)
+    rows["log_index"] = indices
+    rows["compact"] = compact
+    rows["amt_paid"] = heads["amt_paid"]
+    rows["dst_addr"] = heads["dst_addr"]
+    rows["refund_addr"] = heads["refund_addr"]
+    for name, column in (
+        ("signed_quote_bytes", "signed_quote"),
+        ("request_bytes", "request"),
+        ("relay_instructions", "relay_instructions"),
+    ):
+        rows[f"{column}_offset"], rows[f"{column}_length"] = fields[name]
+
+    request_offsets, request_lengths = fields["request_bytes"]
+    rows["request_prefix"] = batch.prefixes(request_offsets, request_lengths, 4).view("V4").reshape(len(indices))
+    if compact:
+        # quoter address and destination chain are only in the signed quote header
+        quote_offsets, quote_lengths = fields["signed_quote_bytes"]
+        header = batch.prefixes(quote_offsets, quote_lengths, 60)
+        rows["quoter_address"] = np.ascontiguousarray(header[:, 4:24]).view("V20").reshape(len(indices))
+        rows["dst_chain"] = header[:, 58].astype(np.uint16) << 8 | header[:, 59]
+    else:
+        rows["quoter_address"] = heads["quoter_address"]
+        rows["dst_chain"] = heads["dst_chain"]
+
+    batch.malformed += int(np.count_nonzero(~valid))
+    return rows[valid]
+
+
+def _decode_message_received(batch: _Batch, signature: str) -> np.ndarray:
+    indices, heads = batch.select(signature, _MESSAGE_RECEIVED_HEAD)
+    offsets, lengths, valid = batch.dynamic(indices, heads["error_reason"])
+
+    rows = np.zeros(len(indices), dtype=MESSAGE_RECEIVED_DTYPE)
+    rows["log_index"] = indices
+    rows["request_for_execution_id"] = heads["request_for_execution_id"]
+    rows["success"] = heads["success"] & 0x80 != 0
+    rows["error_reason_offset"] = np.where(valid, offsets, 0)
+    rows["error_reason_length"] = np.where(valid, lengths, 0)
+
+    batch.malformed += int(np.count_nonzero(~valid))
+    return rows[valid]
+
+
+def decode_logs(logs: Sequence[bytes]) -> DecodedLogs:
+    """Decodes the executor and receiver events in a batch of raw logs.
+
+    Both the default and compact (``RequestForExecutionV2``) layouts are decoded into ``request_for_execution``,
+    with the quoter address and destination chain of compact events taken from their signed quote header.
+
+    Args:
+        logs: The raw logs, including their ARC-28 selector.
+
+    Returns:
+        The decoded events and the shared buffer their dynamic fields point into.
+    """
+    batch = _Batch(logs)
+
+    request_for_execution = np.concatenate((
+        _decode_request_for_execution(batch, compact=False),
+        _decode_request_for_execution(batch, compact=True),
+    ))
+    request_for_execution = request_for_execution[np.argsort(request_for_execution["log_index"], kind="stable")]
+
+    indices, heads = batch.select(PAYMENT_IN_TOKEN_SIGNATURE, _PAYMENT_IN_TOKEN_HEAD)
+    payment_in_token = np.zeros(len(indices), dtype=PAYMENT_IN_TOKEN_DTYPE)
+    payment_in_token["log_index"] = indices
+    payment_in_token["asset_id"] = heads["asset_id"]
+    payment_in_token["amt_paid"] = heads["amt_paid"]
+
+    return DecodedLogs(
+        buffer=batch.buffer,
+        request_for_execution=request_for_execution,
+        payment_in_token=payment_in_token,
+        ntt_message_received=_decode_message_received(batch, NTT_MESSAGE_RECEIVED_SIGNATURE),
+        vaa_message_received=_decode_message_received(batch, VAA_MESSAGE_RECEIVED_SIGNATURE),
+        malformed=batch.malformed,
+    )
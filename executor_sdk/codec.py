@@ -0,0 +1,478 @@
+"""Encoders and in-place decoders for signed quotes, execution requests and relay instructions.
+
+Decoders wrap the given buffer in a memoryview and read fields on access, so decoding never copies the input. Byte
+fields are returned as memoryview slices of the original buffer, call ``bytes()`` on them to keep a copy.
+"""
+import hashlib
+import struct
+from typing import Iterable, Iterator, NamedTuple, TypeAlias
+
+BytesLike: TypeAlias = bytes | bytearray | memoryview
+
+# Constants
+NATIVE_FEE_PREFIX = b"EQ01"
+CUSTOM_TOKEN_FEE_PREFIX = b"EQC1"
+QUOTE_HEADER_LENGTH = 68
+QUOTE_SIGNATURE_LENGTH = 65
+NATIVE_FEE_QUOTE_LENGTH = QUOTE_HEADER_LENGTH + 32 + QUOTE_SIGNATURE_LENGTH
+CUSTOM_TOKEN_FEE_QUOTE_LENGTH = NATIVE_FEE_QUOTE_LENGTH + 32
+
+REQ_VAA_V1 = b"ERV1"
+REQ_NTT_V1 = b"ERN1"
+VAA_V1_REQUEST_LENGTH = 46
+NTT_V1_REQUEST_LENGTH = 70
+
+RECV_INST_TYPE_GAS = 1
+RECV_INST_TYPE_DROP_OFF = 2
+GAS_INSTRUCTION_LENGTH = 33
+GAS_DROP_OFF_INSTRUCTION_LENGTH = 49
+
+REQUEST_STATUS_REQUESTED = 1
+REQUEST_STATUS_EXECUTED = 2
+REQUEST_STATUS_FAILED = 3
+INDEXED_REQUEST_LENGTH = 51
+
+_QUOTE_HEADER = struct.Struct(">56xHHQ")
+_QUOTE_BODY = struct.Struct(">68xQQQQ")
+_VAA_V1_REQUEST = struct.Struct(">4xH32xQ")
+_UINT16 = struct.Struct(">H")
+_GAS_INSTRUCTION = struct.Struct(">xQQQQ")
+_GAS_DROP_OFF_INSTRUCTION = struct.Struct(">xQQ32s")
+_INDEXED_REQUEST = struct.Struct(">HQ32sQB")
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _view(data: BytesLike) -> memoryview:
+    view = memoryview(data)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast("B")
+    return view
+
+
+def _uint128(value: int) -> bytes:
+    if not 0 <= value < 1 << 128:
+        raise CodecError("Value must fit in 16 bytes")
+    return value.to_bytes(16, "big")
+
+
+def _fixed(value: BytesLike, length: int, name: str) -> bytes:
+    if len(value) != length:
+        raise CodecError(f"{name} must be {length} bytes")
+    return bytes(value)
+
+
+class SignedQuote:
+    """A signed quote in the ``EQ01`` (native fee) or ``EQC1`` (custom token fee) layout."""
+
+    __slots__ = ("_view",)
+
+    def __init__(self, data: BytesLike) -> None:
+        view = _view(data)
+        prefix = view[:4]
+        if prefix == NATIVE_FEE_PREFIX:
+            expected_length = NATIVE_FEE_QUOTE_LENGTH
+        elif prefix == CUSTOM_TOKEN_FEE_PREFIX:
+            expected_length = CUSTOM_TOKEN_FEE_QUOTE_LENGTH
+        else:
+            raise CodecError("Unknown quote prefix")
+        if len(view) != expected_length:
+            raise CodecError(f"Quote must be {expected_length} bytes")
+        self._view = view
+
+    @property
+    def raw(self) -> memoryview:
+        return self._view
+
+    @property
+    def prefix(self) -> memoryview:
+        return self._view[:4]
+
+    @property
+    def is_custom_token_fee(self) -> bool:
+        return self._view[:4] == CUSTOM_TOKEN_FEE_PREFIX
+
+    @property
+    def quoter_address(self) -> memoryview:
+        return self._view[4:24]
+
+    @property
+    def payee_address(self) -> memoryview:
+        return self._view[24:56]
+
+    @property
+    def src_chain(self) -> int:
+        return _QUOTE_HEADER.unpack_from(self._view)[0]
+
+    @property
+    def dst_chain(self) -> int:
+        return _QUOTE_HEADER.unpack_from(self._view)[1]
+
+    @property
+    def expiry_time(self) -> int:
+        return _QUOTE_HEADER.unpack_from(self._view)[2]
+
+    @property
+    def base_fee(self) -> int:
+        return _QUOTE_BODY.unpack_from(self._view)[0]
+
+    @property
+    def dst_gas_price(self) -> int:
+        return _QUOTE_BODY.unpack_from(self._view)[1]
+
+    @property
+    def src_price(self) -> int:
+        return _QUOTE_BODY.unpack_from(self._view)[2]
+
+    @property
+    def dst_price(self) -> int:
+        return _QUOTE_BODY.unpack_from(self._view)[3]
+
+    @property
+    def token_address(self) -> memoryview | None:
+        """The 32-byte token the fee is priced in, None for native fee quotes."""
+        if not self.is_custom_token_fee:
+            return None
+        return self._view[100:132]
+
+    @property
+    def unsigned(self) -> memoryview:
+        """The quote without its signature, the bytes the quoter signed."""
+        return self._view[:-QUOTE_SIGNATURE_LENGTH]
+
+    @property
+    def signature(self) -> memoryview:
+        return self._view[-QUOTE_SIGNATURE_LENGTH:]
+
+    def header(self) -> tuple[int, int, int]:
+        """Gets the source chain, destination chain and expiry time in a single unpack."""
+        return _QUOTE_HEADER.unpack_from(self._view)
+
+
+class VaaV1Request:
+    """An ``ERV1`` request to relay a VAA."""
+
+    __slots__ = ("_view",)
+
+    def __init__(self, data: BytesLike) -> None:
+        view = _view(data)
+        if len(view) != VAA_V1_REQUEST_LENGTH or view[:4] != REQ_VAA_V1:
+            raise CodecError("Invalid VAA v1 request")
+        self._view = view
+
+    @property
+    def raw(self) -> memoryview:
+        return self._view
+
+    @property
+    def emitter_chain(self) -> int:
+        return _VAA_V1_REQUEST.unpack_from(self._view)[0]
+
+    @property
+    def emitter_address(self) -> memoryview:
+        return self._view[6:38]
+
+    @property
+    def sequence(self) -> int:
+        return _VAA_V1_REQUEST.unpack_from(self._view)[1]
+
+
+class NttV1Request:
+    """An ``ERN1`` request to relay a NTT transfer."""
+
+    __slots__ = ("_view",)
+
+    def __init__(self, data: BytesLike) -> None:
+        view = _view(data)
+        if len(view) != NTT_V1_REQUEST_LENGTH or view[:4] != REQ_NTT_V1:
+            raise CodecError("Invalid NTT v1 request")
+        self._view = view
+
+    @property
+    def raw(self) -> memoryview:
+        return self._view
+
+    @property
+    def src_chain(self) -> int:
+        return _UINT16.unpack_from(self._view, 4)[0]
+
+    @property
+    def src_manager(self) -> memoryview:
+        return self._view[6:38]
+
+    @property
+    def message_id(self) -> memoryview:
+        return self._view[38:70]
+
+
+def decode_request(data: BytesLike) -> VaaV1Request | NttV1Request:
+    """Decodes request bytes according to their prefix.
+
+    Args:
+        data: The request bytes.
+
+    Returns:
+        The decoded request.
+
+    Raises:
+        CodecError: If the prefix is unknown or the length doesn't match.
+    """
+    view = _view(data)
+    prefix = view[:4]
+    if prefix == REQ_VAA_V1:
+        return VaaV1Request(view)
+    if prefix == REQ_NTT_V1:
+        return NttV1Request(view)
+    raise CodecError("Unknown request prefix")
+
+
+class GasInstruction:
+    __slots__ = ("_view",)
+
+    def __init__(self, view: memoryview) -> None:
+        self._view = view
+
+    @property
+    def gas_limit(self) -> int:
+        return int.from_bytes(self._view[1:17], "big")
+
+    @property
+    def msg_value(self) -> int:
+        return int.from_bytes(self._view[17:33], "big")
+
+
+class GasDropOffInstruction:
+    __slots__ = ("_view",)
+
+    def __init__(self, view: memoryview) -> None:
+        self._view = view
+
+    @property
+    def drop_off(self) -> int:
+        return int.from_bytes(self._view[1:17], "big")
+
+    @property
+    def recipient(self) -> memoryview:
+        return self._view[17:49]
+
+
+RelayInstruction: TypeAlias = GasInstruction | GasDropOffInstruction
+
+
+def _iter_relay_instructions(view: memoryview) -> Iterator[tuple[int, int]]:
+    # type and offset of each instruction, checked as the stream is walked
+    if len(view) < 2:
+        raise CodecError("Relay instructions too short")
+    count = _UINT16.unpack_from(view)[0]
+
+    offset = 2
+    for _ in range(count):
+        if offset >= len(view):
+            raise CodecError("Relay instructions too short")
+        instruction_type = view[offset]
+        if instruction_type == RECV_INST_TYPE_GAS:
+            length = GAS_INSTRUCTION_LENGTH
+        elif instruction_type == RECV_INST_TYPE_DROP_OFF:
+            length = GAS_DROP_OFF_INSTRUCTION_LENGTH
+        else:
+            raise CodecError(f"Unknown relay instruction type {instruction_type}")
+        if offset + length > len(view):
+            raise CodecError("Relay instructions too short")
+        yield instruction_type, offset
+        offset += length
+    if offset != len(view):
+        raise CodecError("Relay instructions length mismatch")
+
+
+class RelayInstructions:
+    """Relay instructions prefixed by their 2-byte count.
+
+    The instruction offsets are found and checked on construction, the instruction fields are read on access.
+    """
+
+    __slots__ = ("_view", "_offsets")
+
+    def __init__(self, data: BytesLike) -> None:
+        view = _view(data)
+        self._view = view
+        self._offsets = [offset for _, offset in _iter_relay_instructions(view)]
+
+    @property
+    def raw(self) -> memoryview:
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> RelayInstruction:
+        offset = self._offsets[index]
+        if self._view[offset] == RECV_INST_TYPE_GAS:
+            return GasInstruction(self._view[offset:offset + GAS_INSTRUCTION_LENGTH])
+        return GasDropOffInstruction(self._view[offset:offset + GAS_DROP_OFF_INSTRUCTION_LENGTH])
+
+    def __iter__(self) -> Iterator[RelayInstruction]:
+        for i in range(len(self._offsets)):
+            yield self[i]
+
+
+class RelayTotals(NamedTuple):
+    gas_limit: int
+    msg_value: int
+    drop_offs: dict[bytes, int]  # Total drop-off per recipient, in the order recipients first appear.
+
+
+def aggregate_relay_instructions(data: BytesLike) -> RelayTotals:
+    """Sums repeated gas instructions and the drop-offs to each recipient, as the executor does.
+
+    The stream is walked once and fields are unpacked in place, without an object per instruction.
+
+    Args:
+        data: The relay instructions prefixed by their 2-byte count.
+
+    Returns:
+        The total gas limit and message value, and the total drop-off per recipient.
+
+    Raises:
+        CodecError: If an instruction type is unknown or the stream is truncated or too long.
+    """
+    view = _view(data)
+    gas_limit = msg_value = 0
+    drop_offs: dict[bytes, int] = {}
+    for instruction_type, offset in _iter_relay_instructions(view):
+        if instruction_type == RECV_INST_TYPE_GAS:
+            gas_limit_high, gas_limit_low, msg_value_high, msg_value_low = _GAS_INSTRUCTION.unpack_from(view, offset)
+            gas_limit += gas_limit_high << 64 | gas_limit_low
+            msg_value += msg_value_high << 64 | msg_value_low
+        else:
+            drop_off_high, drop_off_low, recipient = _GAS_DROP_OFF_INSTRUCTION.unpack_from(view, offset)
+            drop_offs[recipient] = drop_offs.get(recipient, 0) + (drop_off_high << 64 | drop_off_low)
+    return RelayTotals(gas_limit, msg_value, drop_offs)
+
+
+def aggregate_relay_instructions_batch(batch: Iterable[BytesLike]) -> Iterator[RelayTotals]:
+    """Lazily aggregates the relay instructions of each request in a batch, see ``aggregate_relay_instructions``."""
+    return map(aggregate_relay_instructions, batch)
+
+
+class IndexedRequest(NamedTuple):
+    """An entry of the ``Executor`` request index, all zero for requests which are not indexed."""
+    dst_chain: int
+    amt_paid: int
+    payee: bytes
+    timestamp: int
+    status: int
+
+
+def get_request_id(sender: BytesLike, quote_digest: BytesLike, request_bytes: BytesLike) -> bytes:
+    """Gets the key of a request in the ``Executor`` request index.
+
+    The key is the sha256 hash of the 32-byte public key of the account calling the ``Executor``, e.g. the NTT manager
+    app address, followed by the quote digest, the keccak256 hash of the signed quote without its signature, and the
+    request bytes.
+    """
+    return hashlib.sha256(
+        _fixed(sender, 32, "Sender") + _fixed(quote_digest, 32, "Quote digest") + bytes(request_bytes)
+    ).digest()
+
+
+def get_delivery_id(app_id: int, vaa: BytesLike) -> bytes:
+    """Gets the key of a VAA in the delivery boxes of the receive contracts.
+
+    The key is the sha256 hash of the 8-byte id of the app executing the VAA, e.g. the NTT manager, followed by the
+    VAA body.
+    """
+    view = _view(vaa)
+    # the body follows the version, guardian set index, signature count and 66 byte signatures
+    body_offset = 6 + 66 * view[5] if len(view) >= 6 else 6
+    if len(view) < body_offset:
+        raise CodecError("VAA shorter than its signatures")
+    return hashlib.sha256(app_id.to_bytes(8, "big") + view[body_offset:]).digest()
+
+
+def decode_indexed_request(data: BytesLike) -> IndexedRequest:
+    """Decodes the return value of ``Executor.get_indexed_request``.
+
+    Raises:
+        CodecError: If the entry is not 51 bytes.
+    """
+    view = _view(data)
+    if len(view) != INDEXED_REQUEST_LENGTH:
+        raise CodecError(f"Indexed request must be {INDEXED_REQUEST_LENGTH} bytes")
+    return IndexedRequest._make(_INDEXED_REQUEST.unpack(view))
+
+
+def decode_indexed_requests(data: BytesLike) -> list[IndexedRequest]:
+    """Decodes the return value of ``Executor.get_indexed_requests``, the entries prefixed by their 2-byte count.
+
+    Raises:
+        CodecError: If the length does not match the count.
+    """
+    view = _view(data)
+    if len(view) < 2 or len(view) != 2 + _UINT16.unpack_from(view)[0] * INDEXED_REQUEST_LENGTH:
+        raise CodecError("Indexed requests length mismatch")
+    return [IndexedRequest._make(entry) for entry in _INDEXED_REQUEST.iter_unpack(view[2:])]
+
+
+def encode_signed_quote(
+    prefix: bytes,
+    quoter_address: BytesLike,
+    payee_address: BytesLike,
+    src_chain: int,
+    dst_chain: int,
+    expiry_time: int,
+    base_fee: int,
+    dst_gas_price: int,
+    src_price: int,
+    dst_price: int,
+    signature: BytesLike,
+    token_address: BytesLike | None = None,
+) -> bytes:
+    """Encodes a signed quote, the token address is required for custom token fee quotes and omitted otherwise.
+
+    Returns:
+        The signed quote bytes.
+    """
+    if (prefix == CUSTOM_TOKEN_FEE_PREFIX) != (token_address is not None):
+        raise CodecError("Token address must be given only for custom token fee quotes")
+    if prefix not in (NATIVE_FEE_PREFIX, CUSTOM_TOKEN_FEE_PREFIX):
+        raise CodecError("Unknown quote prefix")
+    return b"".join((
+        prefix,
+        _fixed(quoter_address, 20, "Quoter address"),
+        _fixed(payee_address, 32, "Payee address"),
+        struct.pack(">HHQQQQQ", src_chain, dst_chain, expiry_time, base_fee, dst_gas_price, src_price, dst_price),
+        b"" if token_address is None else _fixed(token_address, 32, "Token address"),
+        _fixed(signature, QUOTE_SIGNATURE_LENGTH, "Signature"),
+    ))
+
+
+def encode_vaa_v1_request(emitter_chain: int, emitter_address: BytesLike, sequence: int) -> bytes:
+    """Encodes a request as ``ExecutorMessages.make_vaa_v1_request`` does on-chain."""
+    return REQ_VAA_V1 + struct.pack(">H32sQ", emitter_chain, _fixed(emitter_address, 32, "Emitter address"), sequence)
+
+
+def encode_ntt_v1_request(src_chain: int, src_manager: BytesLike, message_id: BytesLike) -> bytes:
+    """Encodes a request as ``ExecutorMessages.make_ntt_v1_request`` does on-chain."""
+    return b"".join((
+        REQ_NTT_V1,
+        _UINT16.pack(src_chain),
+        _fixed(src_manager, 32, "Source manager"),
+        _fixed(message_id, 32, "Message id"),
+    ))
+
+
+def encode_gas_instruction(gas_limit: int, msg_value: int) -> bytes:
+    """Encodes an instruction as ``RelayInstructions.encode_gas`` does on-chain, without the length prefix."""
+    return bytes((RECV_INST_TYPE_GAS,)) + _uint128(gas_limit) + _uint128(msg_value)
+
+
+def encode_gas_drop_off_instruction(drop_off: int, recipient: BytesLike) -> bytes:
+    """Encodes an instruction as ``RelayInstructions.encode_gas_drop_off`` does on-chain, without the length prefix."""
+    return bytes((RECV_INST_TYPE_DROP_OFF,)) + _uint128(drop_off) + _fixed(recipient, 32, "Recipient")
+
+
+def encode_relay_instructions(instructions: list[bytes]) -> bytes:
+    """Encodes the given encoded instructions prefixed by their 2-byte count."""
+    return _UINT16.pack(len(instructions)) + b"".join(instructions)
@@ -0,0 +1,129 @@
+"""Decoding of single executor and receiver ARC-28 event logs."""
+import hashlib
+import re
+from typing import Any, NamedTuple
+
+# Constants
+REQUEST_FOR_EXECUTION_SIGNATURE = "RequestForExecution(byte[20],uint64,uint16,byte[32],address,byte[],byte[],byte[])"
+REQUEST_FOR_EXECUTION_V2_SIGNATURE = "RequestForExecutionV2(uint8,uint64,byte[32],address,byte[],byte[],byte[])"
+REQUEST_FOR_EXECUTION_WITH_QUOTE_ID_SIGNATURE = (
+    "RequestForExecutionWithQuoteId(byte[20],uint64,uint16,byte[32],address,byte[32],byte[],byte[])"
+)
+QUOTE_REGISTERED_SIGNATURE = "QuoteRegistered(byte[32],byte[])"
+FEES_ACCRUED_SIGNATURE = "FeesAccrued(address,uint64,uint64)"
+ACCRUED_FEES_SETTLED_SIGNATURE = "AccruedFeesSettled(address,uint64,uint64)"
+PAYMENT_IN_TOKEN_SIGNATURE = "PaymentInToken(uint64,uint64)"
+NTT_MESSAGE_RECEIVED_SIGNATURE = "NTTMessageReceived(byte[32],bool,byte[])"
+VAA_MESSAGE_RECEIVED_SIGNATURE = "VAAMessageReceived(byte[32],bool,byte[])"
+
+SELECTOR_LENGTH = 4
+
+EVENT_FIELDS = {
+    REQUEST_FOR_EXECUTION_SIGNATURE: (
+        "quoter_address", "amt_paid", "dst_chain", "dst_addr", "refund_addr", "signed_quote_bytes", "request_bytes",
+        "relay_instructions",
+    ),
+    REQUEST_FOR_EXECUTION_V2_SIGNATURE: (
+        "version", "amt_paid", "dst_addr", "refund_addr", "signed_quote_bytes", "request_bytes", "relay_instructions",
+    ),
+    REQUEST_FOR_EXECUTION_WITH_QUOTE_ID_SIGNATURE: (
+        "quoter_address", "amt_paid", "dst_chain", "dst_addr", "refund_addr", "quote_id", "request_bytes",
+        "relay_instructions",
+    ),
+    QUOTE_REGISTERED_SIGNATURE: ("quote_id", "signed_quote_bytes"),
+    FEES_ACCRUED_SIGNATURE: ("payee", "asset_id", "amount"),
+    ACCRUED_FEES_SETTLED_SIGNATURE: ("payee", "asset_id", "amount"),
+    PAYMENT_IN_TOKEN_SIGNATURE: ("asset_id", "amt_paid"),
+    NTT_MESSAGE_RECEIVED_SIGNATURE: ("request_for_execution_id", "success", "error_reason"),
+    VAA_MESSAGE_RECEIVED_SIGNATURE: ("request_for_execution_id", "success", "error_reason"),
+}
+
+_STATIC_BYTES_TYPE = re.compile(r"byte\[(\d+)\]")
+_UINT_TYPE = re.compile(r"uint(\d+)")
+
+
+class Event(NamedTuple):
+    name: str
+    fields: dict[str, Any]
+
+
+class _EventType(NamedTuple):
+    name: str
+    fields: tuple[tuple[str, str], ...]
+
+
+def get_event_selector(signature: str) -> bytes:
+    """Gets the ARC-28 selector which prefixes the logs of an event.
+
+    Args:
+        signature: The event signature, e.g. ``PaymentInToken(uint64,uint64)``.
+
+    Returns:
+        The first 4 bytes of the SHA-512/256 hash of the signature.
+    """
+    return hashlib.new("sha512_256", signature.encode()).digest()[:SELECTOR_LENGTH]
+
+
+def _parse_signature(signature: str, field_names: tuple[str, ...]) -> _EventType:
+    name, types = signature[:-1].split("(")
+    return _EventType(name, tuple(zip(field_names, types.split(","), strict=True)))
+
+
+_EVENT_TYPES = {
+    get_event_selector(signature): _parse_signature(signature, field_names)
+    for signature, field_names in EVENT_FIELDS.items()
+}
+
+
+def _static_size(arc4_type: str) -> int:
+    if arc4_type == "byte[]":
+        return 2
+    if arc4_type == "address":
+        return 32
+    if arc4_type == "bool":
+        return 1
+    if match := _STATIC_BYTES_TYPE.fullmatch(arc4_type):
+        return int(match[1])
+    if match := _UINT_TYPE.fullmatch(arc4_type):
+        return int(match[1]) // 8
+    raise ValueError(f"Unsupported type {arc4_type}")
+
+
+def decode_event(log: bytes) -> Event | None:
+    """Decodes a log if it is one of the executor or receiver events.
+
+    Args:
+        log: The raw log, including its ARC-28 selector.
+
+    Returns:
+        The event name and its fields, None if the log is not a known event.
+
+    Raises:
+        ValueError: If the log has the selector of a known event but is malformed.
+    """
+    event_type = _EVENT_TYPES.get(bytes(log[:SELECTOR_LENGTH]))
+    if event_type is None:
+        return None
+
+    body = memoryview(log)[SELECTOR_LENGTH:]
+    fields: dict[str, Any] = {}
+    position = 0
+    for name, arc4_type in event_type.fields:
+        size = _static_size(arc4_type)
+        if position + size > len(body):
+            raise ValueError(f"{event_type.name} log too short")
+        value = body[position:position + size]
+        if arc4_type == "byte[]":
+            offset = int.from_bytes(value, "big")
+            length = int.from_bytes(body[offset:offset + 2], "big")
+            if offset + 2 + length > len(body):
+                raise ValueError(f"{event_type.name} log too short")
+            fields[name] = bytes(body[offset + 2:offset + 2 + length])
+        elif arc4_type == "bool":
+            fields[name] = bool(value[0] & 0x80)
+        elif arc4_type.startswith("uint"):
+            fields[name] = int.from_bytes(value, "big")
+        else:
+            fields[name] = bytes(value)
+        position += size
+    return Event(event_type.name, fields)
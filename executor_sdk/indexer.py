@@ -0,0 +1,328 @@
+"""Streaming indexer of executor and receiver events with a resumable round checkpoint.
+
+The indexer is a pipeline of generators: blocks are fetched ahead by a background thread into a bounded queue, which
+blocks the fetcher when the consumer falls behind, then app calls to the indexed apps are found in each block,
+including inner transactions, and their logs are decoded into events.
+"""
+import base64
+import json
+import os
+import queue
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, NamedTuple, Protocol, TypeAlias
+
+from .codec import CodecError, SignedQuote
+from .events import Event, decode_event
+from .metrics import (
+    INDEXER_EVENTS_TOTAL, INDEXER_FETCH_SECONDS, INDEXER_QUEUE_DEPTH, INDEXER_REQUESTS_TOTAL, INDEXER_ROUND, Metrics,
+)
+
+# Constants
+DEFAULT_PREFETCH = 16
+DEFAULT_POLL_INTERVAL = 4.0
+DEPLOYMENT_APP_ID_KEYS = (
+    "executorAppId",
+    "tokenPaymentExecutorAppId",
+    "nttManagerWithExecutorAppId",
+    "nttManagerWithTokenPaymentExecutorAppId",
+    "nttV1ReceiveWithGasDropOffAppId",
+    "vaaV1ReceiveWithGasDropOffAppId",
+)
+
+Block: TypeAlias = Mapping[str, Any]
+
+
+class BlockSource(Protocol):
+    def get_block(self, round_number: int) -> Block | None:
+        """Gets a block in the algod block layout, with logs as bytes.
+
+        Returns:
+            The block, or None if the round is not available yet.
+        """
+        ...
+
+
+class AppCall(NamedTuple):
+    round: int
+    path: tuple[int, ...]  # Index of the transaction in its block followed by the index in each inner group.
+    app_id: int
+    logs: list[bytes]
+
+
+class IndexedEvent(NamedTuple):
+    round: int
+    path: tuple[int, ...]
+    app_id: int
+    event: Event
+
+
+class Checkpoint(NamedTuple):
+    round: int  # The round to resume from.
+    events: int  # How many events of the round were already consumed.
+
+
+def load_app_ids(deployment_path: str | os.PathLike) -> set[int]:
+    """Loads the Algorand app ids of a deployment file such as ``deployments/mainnet.json``.
+
+    Args:
+        deployment_path: The deployment file.
+
+    Returns:
+        The ids of the executor, NTT manager and receiver apps.
+    """
+    with open(deployment_path) as f:
+        algorand = json.load(f)["algorand"]
+    return {algorand[key] for key in DEPLOYMENT_APP_ID_KEYS if key in algorand}
+
+
+class MemoryBlockSource:
+    """A block source over blocks held in memory, for tests and replays."""
+
+    def __init__(self, blocks: Iterable[Block]) -> None:
+        self._blocks = {block["rnd"]: block for block in blocks}
+
+    def get_block(self, round_number: int) -> Block | None:
+        return self._blocks.get(round_number)
+
+
+class AlgodBlockSource:
+    """A block source reading the JSON blocks of an algod node."""
+
+    def __init__(self, algod_url: str, algod_token: str = "", timeout: float = 30.0) -> None:
+        self._algod_url = algod_url.rstrip("/")
+        self._headers = {"X-Algo-API-Token": algod_token} if algod_token else {}
+        self._timeout = timeout
+
+    def get_block(self, round_number: int) -> Block | None:
+        request = urllib.request.Request(
+            f"{self._algod_url}/v2/blocks/{round_number}?format=json",
+            headers=self._headers,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                block = json.load(response)["block"]
+        except urllib.error.HTTPError as e:
+            # algod responds not found for rounds it hasn't reached yet
+            if e.code == 404:
+                return None
+            raise
+        for signed_txn in block.get("txns", ()):
+            _decode_logs(signed_txn)
+        return block
+
+
+def _decode_logs(signed_txn: dict[str, Any]) -> None:
+    # logs and inner transactions of json blocks are base64 encoded
+    apply_data = signed_txn.get("dt", {})
+    apply_data["lg"] = [base64.b64decode(log) for log in apply_data.get("lg", ())]
+    for inner_txn in apply_data.get("itx", ()):
+        _decode_logs(inner_txn)
+
+
+class FileCheckpointStore:
+    """Stores the checkpoint as JSON, replacing the file atomically on every save."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self._path = Path(path)
+
+    def load(self) -> Checkpoint | None:
+        try:
+            data = json.loads(self._path.read_text())
+        except FileNotFoundError:
+            return None
+        return Checkpoint(data["round"], data["events"])
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        temp_path.write_text(json.dumps(checkpoint._asdict()))
+        os.replace(temp_path, self._path)
+
+
+def prefetch_blocks(
+    source: BlockSource,
+    start_round: int,
+    prefetch: int = DEFAULT_PREFETCH,
+    follow: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    metrics: Metrics | None = None,
+) -> Iterator[tuple[int, Block]]:
+    """Yields consecutive blocks from the start round, fetched ahead by a background thread.
+
+    At most ``prefetch`` blocks are held at a time, the fetcher waits while the queue is full.
+
+    Args:
+        source: Where to read the blocks from.
+        start_round: The first round to yield.
+        prefetch: The maximum number of blocks fetched ahead of the consumer.
+        follow: Whether to wait for new rounds instead of stopping at the first unavailable round.
+        poll_interval: Seconds to wait before asking again for an unavailable round when following.
+        metrics: Records the time taken to fetch each block and the number of blocks fetched ahead.
+    """
+    blocks: queue.Queue[tuple[int, Block | None | BaseException]] = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item: tuple[int, Block | None | BaseException]) -> bool:
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch() -> None:
+        round_number = start_round
+        try:
+            while not stop.is_set():
+                if metrics is None:
+                    block = source.get_block(round_number)
+                else:
+                    with metrics.time(INDEXER_FETCH_SECONDS):
+                        block = source.get_block(round_number)
+                if block is None:
+                    if not follow:
+                        put((round_number, None))
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                if not put((round_number, block)):
+                    return
+                round_number += 1
+        except BaseException as e:
+            put((round_number, e))
+
+    if metrics is not None:
+        metrics.set_gauge_function(INDEXER_QUEUE_DEPTH, blocks.qsize)
+    fetcher = threading.Thread(target=fetch, name="executor-indexer-prefetch", daemon=True)
+    fetcher.start()
+    try:
+        while True:
+            round_number, block = blocks.get()
+            if block is None:
+                return
+            if isinstance(block, BaseException):
+                raise block
+            yield round_number, block
+    finally:
+        stop.set()
+        fetcher.join()
+        if metrics is not None:
+            metrics.remove_gauge_function(INDEXER_QUEUE_DEPTH)
+
+
+def iter_app_calls(blocks: Iterable[tuple[int, Block]], app_ids: set[int]) -> Iterator[AppCall | int]:
+    """Yields the calls to the given apps with logs in each block, followed by the round once it is complete.
+
+    Args:
+        blocks: The blocks with their round.
+        app_ids: The apps to find the calls of, including inner calls.
+    """
+    for round_number, block in blocks:
+        for i, signed_txn in enumerate(block.get("txns", ())):
+            yield from _iter_app_calls(round_number, (i,), signed_txn, app_ids)
+        yield round_number
+
+
+def _iter_app_calls(
+    round_number: int,
+    path: tuple[int, ...],
+    signed_txn: Mapping[str, Any],
+    app_ids: set[int],
+) -> Iterator[AppCall]:
+    txn = signed_txn.get("txn", {})
+    apply_data = signed_txn.get("dt", {})
+    app_id = txn.get("apid", 0)
+    if txn.get("type") == "appl" and app_id in app_ids and apply_data.get("lg"):
+        yield AppCall(round_number, path, app_id, list(apply_data["lg"]))
+    for i, inner_txn in enumerate(apply_data.get("itx", ())):
+        yield from _iter_app_calls(round_number, path + (i,), inner_txn, app_ids)
+
+
+def iter_events(app_calls: Iterable[AppCall | int]) -> Iterator[IndexedEvent | int]:
+    """Decodes the logs of each app call, passing through the completed rounds.
+
+    Logs which aren't executor or receiver events, such as ABI return values, are skipped.
+    """
+    for app_call in app_calls:
+        if isinstance(app_call, int):
+            yield app_call
+            continue
+        for log in app_call.logs:
+            event = decode_event(log)
+            if event is not None:
+                yield IndexedEvent(app_call.round, app_call.path, app_call.app_id, event)
+
+
+def index_events(
+    source: BlockSource,
+    app_ids: set[int],
+    checkpoints: FileCheckpointStore,
+    start_round: int = 0,
+    prefetch: int = DEFAULT_PREFETCH,
+    follow: bool = False,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    metrics: Metrics | None = None,
+) -> Iterator[IndexedEvent]:
+    """Yields the events of the given apps, resuming from the saved checkpoint.
+
+    An event counts as consumed once the next one is requested. The checkpoint is saved after each round and when the
+    generator is closed, so a restart yields exactly the events which weren't consumed. If the process dies without
+    closing the generator, the events of the last unsaved round are yielded again.
+
+    Args:
+        source: Where to read the blocks from.
+        app_ids: The apps to index.
+        checkpoints: Where the checkpoint is loaded from and saved to.
+        start_round: The round to start from when there is no checkpoint.
+        prefetch: The maximum number of blocks fetched ahead of the consumer.
+        follow: Whether to wait for new rounds instead of stopping at the first unavailable round.
+        poll_interval: Seconds to wait before asking again for an unavailable round when following.
+        metrics: Records the fetching of the blocks, the events by name, the requests for execution by destination
+            chain, quoter and request prefix, and the last completed round.
+    """
+    checkpoint = checkpoints.load() or Checkpoint(start_round, 0)
+    round_number, consumed = checkpoint
+
+    blocks = prefetch_blocks(source, round_number, prefetch, follow, poll_interval, metrics)
+    try:
+        for item in iter_events(iter_app_calls(blocks, app_ids)):
+            if isinstance(item, int):
+                round_number, consumed = item + 1, 0
+                checkpoints.save(Checkpoint(round_number, consumed))
+                if metrics is not None:
+                    metrics.set(INDEXER_ROUND, item)
+                continue
+
+            # skip the events of a partially consumed round which were already yielded
+            if item.round == checkpoint.round and checkpoint.events:
+                checkpoint = Checkpoint(checkpoint.round, checkpoint.events - 1)
+                continue
+
+            if metrics is not None:
+                _record_event(metrics, item.event)
+            yield item
+            consumed += 1
+    finally:
+        blocks.close()
+        checkpoints.save(Checkpoint(round_number, consumed))
+
+
+def _record_event(metrics: Metrics, event: Event) -> None:
+    metrics.inc(INDEXER_EVENTS_TOTAL, event=event.name)
+    fields = event.fields
+    if "request_bytes" not in fields:
+        return
+    if "quoter_address" in fields:
+        quoter_address, dst_chain = fields["quoter_address"], fields["dst_chain"]
+    else:
+        # V2 requests carry the quoter and destination in their signed quote only
+        try:
+            quote = SignedQuote(fields["signed_quote_bytes"])
+            quoter_address, dst_chain = bytes(quote.quoter_address), quote.header()[1]
+        except CodecError:
+            quoter_address, dst_chain = b"", ""
+    prefix = fields["request_bytes"][:4].decode("ascii", "replace")
+    metrics.inc(INDEXER_REQUESTS_TOTAL, dst_chain=dst_chain, quoter=quoter_address.hex(), prefix=prefix)
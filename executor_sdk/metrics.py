@@ -0,0 +1,270 @@
+"""In-process metrics of the relayer and indexer.
+
+The relayer and indexer take an optional ``Metrics`` and record nothing without one, so disabled metrics cost a single
+``None`` check on their hot paths. A ``Metrics`` can be paused and resumed while running by setting ``enabled``, which
+also stops reading the gauge functions and calling the profiling hooks. Profiling hooks added while running receive
+every observation, e.g. to log slow stages. ``collect`` returns the current samples, which an exporter such as
+``to_prometheus`` or ``to_json`` renders.
+"""
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, TypeAlias
+
+# Constants
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# Metrics recorded by the relayer.
+RELAYER_STAGE_SECONDS = "executor_relayer_stage_seconds"
+RELAYER_REQUESTS_TOTAL = "executor_relayer_requests_total"
+RELAYER_SPEND_MICROALGOS_TOTAL = "executor_relayer_spend_microalgos_total"
+RELAYER_QUEUE_DEPTH = "executor_relayer_queue_depth"
+
+# Metrics recorded by the indexer.
+INDEXER_FETCH_SECONDS = "executor_indexer_fetch_seconds"
+INDEXER_EVENTS_TOTAL = "executor_indexer_events_total"
+INDEXER_REQUESTS_TOTAL = "executor_indexer_requests_total"
+INDEXER_ROUND = "executor_indexer_round"
+INDEXER_QUEUE_DEPTH = "executor_indexer_queue_depth"
+
+HELP = {
+    RELAYER_STAGE_SECONDS: "Seconds a request spent in each relayer stage.",
+    RELAYER_REQUESTS_TOTAL: "Relayed requests by request prefix and outcome.",
+    RELAYER_SPEND_MICROALGOS_TOTAL: "MicroALGO spent on transaction fees, gas and drop-off by confirmed groups.",
+    RELAYER_QUEUE_DEPTH: "Jobs waiting for each relayer stage.",
+    INDEXER_FETCH_SECONDS: "Seconds taken to fetch a block.",
+    INDEXER_EVENTS_TOTAL: "Indexed events by name.",
+    INDEXER_REQUESTS_TOTAL: "Indexed requests for execution by destination chain, quoter and request prefix.",
+    INDEXER_ROUND: "The last round the indexer completed.",
+    INDEXER_QUEUE_DEPTH: "Blocks fetched ahead of the indexer.",
+}
+
+Labels: TypeAlias = tuple[tuple[str, str], ...]
+
+
+class HistogramValue(NamedTuple):
+    buckets: tuple[float, ...]  # The upper bounds, followed by infinity.
+    counts: tuple[int, ...]  # The cumulative count of observations up to each bound.
+    sum: float
+    count: int
+
+
+class Sample(NamedTuple):
+    name: str
+    kind: str
+    help: str
+    labels: dict[str, str]
+    value: float | HistogramValue
+
+
+ProfilingHook: TypeAlias = Callable[[str, float, dict[str, str]], None]
+Exporter: TypeAlias = Callable[[Iterable[Sample]], str]
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+def _get_key(name: str, labels: dict[str, Any]) -> tuple[str, Labels]:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+class Metrics:
+    """Counters, gauges and histograms keyed by name and labels, safe to record from several threads.
+
+    Each name holds a single kind of metric. Gauges can also be read from a function when collected, so values such as
+    queue depths cost nothing until they are exported.
+
+    Args:
+        buckets: The upper bounds of the histogram buckets.
+        enabled: Whether observations are recorded and gauge functions read, can be changed while running. Values
+            recorded before the metrics were disabled are still collected.
+        help: The descriptions of the metrics by name, defaults to those of the relayer and indexer metrics.
+    """
+
+    def __init__(
+        self,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        enabled: bool = True,
+        help: dict[str, str] | None = None,
+    ) -> None:
+        self.enabled = enabled
+        self._buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._help = dict(HELP if help is None else help)
+        self._lock = threading.Lock()
+        self._kinds: dict[str, str] = {}
+        self._values: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], _Histogram] = {}
+        self._gauge_functions: dict[tuple[str, Labels], Callable[[], float]] = {}
+        self._hooks: list[ProfilingHook] = []
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Adds to a counter."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._check_kind(name, COUNTER)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Sets a gauge."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._check_kind(name, GAUGE)
+            self._values[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Adds an observation to a histogram and passes it to the profiling hooks."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._check_kind(name, HISTOGRAM)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self._buckets))
+            histogram.counts[bisect.bisect_left(self._buckets, value)] += 1
+            histogram.sum += value
+            hooks = self._hooks
+        for hook in hooks:
+            hook(name, value, dict(key[1]))
+
+    @contextmanager
+    def time(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observes the seconds spent in the block, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def set_gauge_function(self, name: str, function: Callable[[], float], **labels: Any) -> None:
+        """Reads a gauge from the function whenever the metrics are collected."""
+        with self._lock:
+            self._check_kind(name, GAUGE)
+            self._gauge_functions[_get_key(name, labels)] = function
+
+    def remove_gauge_function(self, name: str, **labels: Any) -> None:
+        with self._lock:
+            self._gauge_functions.pop(_get_key(name, labels), None)
+
+    def add_hook(self, hook: ProfilingHook) -> None:
+        """Calls the hook with the name, value and labels of every histogram observation, e.g. every stage timing."""
+        with self._lock:
+            # observations iterate over the list outside the lock, so it is replaced rather than changed
+            self._hooks = [*self._hooks, hook]
+
+    def remove_hook(self, hook: ProfilingHook) -> None:
+        with self._lock:
+            self._hooks = [other for other in self._hooks if other is not hook]
+
+    def collect(self) -> list[Sample]:
+        """Gets the current value of every metric, sorted by name and labels."""
+        with self._lock:
+            values = dict(self._values)
+            histograms = {
+                key: HistogramValue(self._buckets, _accumulate(histogram.counts), histogram.sum, sum(histogram.counts))
+                for key, histogram in self._histograms.items()
+            }
+            gauge_functions = dict(self._gauge_functions) if self.enabled else {}
+            kinds = dict(self._kinds)
+        values.update((key, function()) for key, function in gauge_functions.items())
+
+        samples = []
+        for (name, labels), value in [*values.items(), *histograms.items()]:
+            samples.append(Sample(name, kinds[name], self._help.get(name, ""), dict(labels), value))
+        samples.sort(key=lambda sample: (sample.name, sorted(sample.labels.items())))
+        return samples
+
+    def reset(self) -> None:
+        """Clears the recorded values, keeping the gauge functions and hooks."""
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+
+    def _check_kind(self, name: str, kind: str) -> None:
+        existing = self._kinds.setdefault(name, kind)
+        if existing != kind:
+            raise ValueError(f"Metric {name} is a {existing}")
+
+
+def _accumulate(counts: list[int]) -> tuple[int, ...]:
+    total = 0
+    cumulative = []
+    for count in counts:
+        total += count
+        cumulative.append(total)
+    return tuple(cumulative)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{label}="{_escape_label_value(value)}"' for label, value in labels.items()) + "}"
+
+
+def to_prometheus(samples: Iterable[Sample]) -> str:
+    """Renders the samples in the Prometheus text exposition format."""
+    lines = []
+    described = set()
+    for sample in samples:
+        if sample.name not in described:
+            described.add(sample.name)
+            if sample.help:
+                lines.append(f"# HELP {sample.name} {sample.help}")
+            lines.append(f"# TYPE {sample.name} {sample.kind}")
+        if isinstance(sample.value, HistogramValue):
+            for bound, count in zip(sample.value.buckets, sample.value.counts):
+                labels = _format_labels({**sample.labels, "le": _format_value(bound)})
+                lines.append(f"{sample.name}_bucket{labels} {count}")
+            labels = _format_labels(sample.labels)
+            lines.append(f"{sample.name}_sum{labels} {_format_value(sample.value.sum)}")
+            lines.append(f"{sample.name}_count{labels} {sample.value.count}")
+        else:
+            lines.append(f"{sample.name}{_format_labels(sample.labels)} {_format_value(sample.value)}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(samples: Iterable[Sample]) -> str:
+    """Renders the samples as a JSON array, with the histogram buckets as bound and cumulative count pairs."""
+    data = []
+    for sample in samples:
+        value: Any = sample.value
+        if isinstance(value, HistogramValue):
+            value = {
+                "buckets": [[_format_value(bound), count] for bound, count in zip(value.buckets, value.counts)],
+                "sum": value.sum,
+                "count": value.count,
+            }
+        data.append({"name": sample.name, "kind": sample.kind, "labels": sample.labels, "value": value})
+    return json.dumps(data)
+
+
+EXPORTERS: dict[str, Exporter] = {
+    "prometheus": to_prometheus,
+    "json": to_json,
+}
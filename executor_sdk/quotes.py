@@ -0,0 +1,189 @@
+"""Expiry-aware cache of signed quotes.
+
+Quotes are cached per quoter, route, prefix and fee token until their expiry time less a safety margin, so a cached
+quote is never handed out when it could expire before the request reaches the chain. Quotes which were used are
+fetched again in the background once they come within the refresh margin of their expiry, and concurrent lookups of
+the same key share a single fetch. The quoter service is reached through a pluggable ``QuoteFetcher``.
+"""
+import asyncio
+import functools
+import time
+from typing import Callable, NamedTuple, Protocol
+
+from .codec import NATIVE_FEE_PREFIX, SignedQuote
+
+# Constants
+DEFAULT_SAFETY_MARGIN = 30.0
+DEFAULT_REFRESH_MARGIN = 120.0
+
+
+class QuoteKey(NamedTuple):
+    """Identifies the quotes which are interchangeable for a request.
+
+    ``token_address`` is the 32-byte token the fee is priced in for ``EQC1`` quotes and None for ``EQ01`` quotes.
+    """
+    quoter_address: bytes
+    src_chain: int
+    dst_chain: int
+    prefix: bytes = NATIVE_FEE_PREFIX
+    token_address: bytes | None = None
+
+
+class QuoteFetcher(Protocol):
+    async def fetch_quote(self, key: QuoteKey) -> bytes:
+        """Fetches a new signed quote for the key from the quoter service."""
+        ...
+
+
+class _Entry:
+    __slots__ = ("quote", "used", "refresh_handle", "evict_handle")
+
+    def __init__(self, quote: SignedQuote, refresh_handle: asyncio.TimerHandle, evict_handle: asyncio.TimerHandle):
+        self.quote = quote
+        self.used = False
+        self.refresh_handle = refresh_handle
+        self.evict_handle = evict_handle
+
+    def cancel(self) -> None:
+        self.refresh_handle.cancel()
+        self.evict_handle.cancel()
+
+
+def _matches(key: QuoteKey, quote: SignedQuote) -> bool:
+    token_address = quote.token_address
+    return (
+        quote.prefix == key.prefix
+        and quote.quoter_address == key.quoter_address
+        and quote.header()[:2] == (key.src_chain, key.dst_chain)
+        and (None if token_address is None else bytes(token_address)) == key.token_address
+    )
+
+
+class QuoteCache:
+    """Caches signed quotes until their expiry time less ``safety_margin``.
+
+    Entries are evicted on a timer at the end of their lifetime. An entry which was returned by ``get`` is fetched
+    again in the background when it comes within ``refresh_margin`` of its expiry, so regular lookups keep finding a
+    quote in the cache. If a background fetch fails the current quote is kept and the error is stored in
+    ``last_error``.
+
+    Args:
+        fetcher: Fetches signed quotes from the quoter service.
+        safety_margin: Seconds before its expiry time after which a quote is no longer returned.
+        refresh_margin: Seconds before its expiry time after which a used quote is fetched again.
+        clock: Returns the current unix time in seconds, compared against the quote expiry time.
+
+    Raises:
+        ValueError: If the refresh margin is smaller than the safety margin.
+    """
+
+    def __init__(
+        self,
+        fetcher: QuoteFetcher,
+        safety_margin: float = DEFAULT_SAFETY_MARGIN,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if refresh_margin < safety_margin:
+            raise ValueError("Refresh margin must not be smaller than the safety margin")
+        self._fetcher = fetcher
+        self._safety_margin = safety_margin
+        self._refresh_margin = refresh_margin
+        self._clock = clock
+        self._entries: dict[QuoteKey, _Entry] = {}
+        self._fetches: dict[QuoteKey, asyncio.Task[SignedQuote]] = {}
+        self.last_error: Exception | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def __aenter__(self) -> "QuoteCache":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
+
+    async def get(self, key: QuoteKey) -> SignedQuote:
+        """Gets a quote for the key which is valid for at least the safety margin.
+
+        Args:
+            key: The quoter, route, prefix and fee token of the quote.
+
+        Returns:
+            The cached quote, or a newly fetched quote if none is cached.
+
+        Raises:
+            CodecError: If the fetched quote is malformed.
+            ValueError: If the fetched quote does not match the key or expires within the safety margin.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            remaining = entry.quote.expiry_time - self._clock()
+            if remaining > self._safety_margin:
+                entry.used = True
+                if remaining <= self._refresh_margin:
+                    self._start_fetch(key)
+                return entry.quote
+            self._evict(key)
+        # a cancelled lookup must not cancel the fetch shared with other lookups
+        return await asyncio.shield(self._start_fetch(key))
+
+    def invalidate(self, key: QuoteKey) -> None:
+        """Drops the cached quote for the key, e.g. after it was rejected, so the next lookup fetches a new one."""
+        self._evict(key)
+
+    async def close(self) -> None:
+        """Cancels the timers and pending fetches and clears the cache."""
+        for entry in self._entries.values():
+            entry.cancel()
+        self._entries.clear()
+        fetches = list(self._fetches.values())
+        for fetch in fetches:
+            fetch.cancel()
+        await asyncio.gather(*fetches, return_exceptions=True)
+
+    def _start_fetch(self, key: QuoteKey) -> "asyncio.Task[SignedQuote]":
+        fetch = self._fetches.get(key)
+        if fetch is None:
+            fetch = asyncio.get_running_loop().create_task(self._fetch(key))
+            fetch.add_done_callback(functools.partial(self._fetched, key))
+            self._fetches[key] = fetch
+        return fetch
+
+    async def _fetch(self, key: QuoteKey) -> SignedQuote:
+        quote = SignedQuote(await self._fetcher.fetch_quote(key))
+        if not _matches(key, quote):
+            raise ValueError("Quote does not match its key")
+        lifetime = quote.expiry_time - self._clock()
+        if lifetime <= self._safety_margin:
+            raise ValueError("Quote expires within the safety margin")
+
+        loop = asyncio.get_running_loop()
+        previous = self._entries.get(key)
+        if previous is not None:
+            previous.cancel()
+        self._entries[key] = _Entry(
+            quote,
+            loop.call_later(max(lifetime - self._refresh_margin, 0), self._refresh, key),
+            loop.call_later(lifetime - self._safety_margin, self._evict, key),
+        )
+        return quote
+
+    def _fetched(self, key: QuoteKey, fetch: "asyncio.Task[SignedQuote]") -> None:
+        # a fetch cancelled before it started never runs _fetch, so a finally there would leave it behind and later
+        # lookups of the key would get its CancelledError, the done callback runs either way
+        if self._fetches.get(key) is fetch:
+            del self._fetches[key]
+        # retrieves the error of background fetches no lookup awaits
+        if not fetch.cancelled():
+            self.last_error = fetch.exception()
+
+    def _refresh(self, key: QuoteKey) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.used:
+            self._start_fetch(key)
+
+    def _evict(self, key: QuoteKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.cancel()
@@ -0,0 +1,652 @@
+"""Concurrent relayer delivering execution requests to the AVM receive contracts.
+
+Requires the ``relayer`` extra. Requests flow through build, sign, submit and confirm stages connected by bounded
+queues. Each stage runs a fixed number of workers, so a slow stage holds back the stages before it instead of
+buffering without limit. All algod requests share a pool of keep-alive connections.
+
+Each request is delivered in one group calling ``receive_message`` on ``NttV1ReceiveWithGasDropOff`` or
+``VaaV1ReceiveWithGasDropOff``::
+
+    [deliveries_payment,] gas, verify_sigs, verify_vaa, receive_ntt or execute_vaa, gas_drop_off, receive_message
+
+The Wormhole Core and delivery calls depend on the VAA and are built by a pluggable ``MessageBuilder``. When a
+message cannot be delivered, its failure is recorded on-chain with ``report_error``, or ``report_errors`` for the
+failures queued at the same time, up to ``MAX_REPORTS_PER_CALL`` in one call. A group rejected by algod is only
+reported when a contract rejected it, the relayer's own errors, e.g. overspend, a fee too low or a round range already
+passed, fail the request without a report so it can be retried. For receive contracts tracking
+deliveries, the group starts with a payment funding the delivery box, and requests whose VAA was already delivered are
+skipped once built.
+"""
+import asyncio
+import base64
+import json
+import time
+import urllib.parse
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, NamedTuple, Protocol
+
+from algosdk import account, encoding, logic, transaction
+from algosdk.abi import ABIType, Method
+
+from .codec import CodecError, REQ_NTT_V1, REQ_VAA_V1, aggregate_relay_instructions, get_delivery_id
+from .metrics import (
+    RELAYER_QUEUE_DEPTH, RELAYER_REQUESTS_TOTAL, RELAYER_SPEND_MICROALGOS_TOTAL, RELAYER_STAGE_SECONDS, Metrics,
+)
+
+# Constants
+DEFAULT_POOL_SIZE = 32
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_BUILD_CONCURRENCY = 16
+DEFAULT_SIGN_CONCURRENCY = 4
+DEFAULT_SUBMIT_CONCURRENCY = 16
+DEFAULT_CONFIRM_CONCURRENCY = 64
+DEFAULT_REPORT_CONCURRENCY = 4
+STAGES = ("build", "sign", "submit", "confirm")
+REPORT_STAGE = "report"
+MAX_REPORTS_PER_CALL = 5  # Each report logs up to 173 bytes, of the 1024 bytes a call can log.
+DEFAULT_VALIDITY_ROUNDS = 10
+DEFAULT_PARAMS_TTL = 10.0
+
+ERROR_REASON_TRUNCATION_THRESHOLD = 132  # As RETURN_DATA_TRUNCATION_THRESHOLD of the EVM receivers.
+LOGIC_EVAL_ERROR = "logic eval error"  # In the algod error of a group rejected by a contract.
+
+RECEIVE_MESSAGE_SELECTOR = Method.from_signature("receive_message(pay,appl,appl,appl,pay,byte[32])void").get_selector()
+REPORT_ERROR_SELECTOR = Method.from_signature("report_error(byte[32],byte[])void").get_selector()
+REPORT_ERRORS_SELECTOR = Method.from_signature("report_errors((byte[32],byte[])[])void").get_selector()
+ERROR_REPORTS_TYPE = ABIType.from_string("(byte[32],byte[])[]")
+DELIVERIES_BOX_PREFIX = b"deliveries_"
+DELIVERY_BOX_MIN_BALANCE = 35_700
+
+MAX_UINT64 = 2**64 - 1
+
+
+class AlgodError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"algod responded {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class MessageError(Exception):
+    """A message cannot be delivered, its failure is reported with ``report_error``."""
+
+
+class AlgodPool:
+    """Keep-alive HTTP/1.1 connections to algod, at most ``size`` open at a time.
+
+    The relayer keeps one connection waiting for the next round, so the pool needs at least two.
+    """
+
+    def __init__(
+        self,
+        algod_url: str,
+        algod_token: str = "",
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+    ) -> None:
+        url = urllib.parse.urlsplit(algod_url)
+        self._host = url.hostname or "localhost"
+        self._port = url.port or (443 if url.scheme == "https" else 80)
+        self._ssl = url.scheme == "https"
+        self._base_path = url.path.rstrip("/")
+        self._token = algod_token
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        content_type: str = "application/json",
+    ) -> Any:
+        """Sends a request on an idle connection, or a new one if there is none.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            AlgodError: If algod responds with an error status.
+        """
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await self._connect()
+                try:
+                    status, response_body, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, method, path, body, content_type), self._timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection[1].close()
+                    # the server may have closed an idle connection, retry on a new one
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    connection[1].close()
+                    raise
+                break
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                connection[1].close()
+
+        data = json.loads(response_body) if response_body else {}
+        if status >= 400:
+            raise AlgodError(status, data.get("message", "") if isinstance(data, dict) else "")
+        return data
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self._host, self._port, ssl=self._ssl or None)
+
+    async def _exchange(
+        self,
+        connection: tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        method: str,
+        path: str,
+        body: bytes,
+        content_type: str,
+    ) -> tuple[int, bytes, bool]:
+        reader, writer = connection
+        head = (
+            f"{method} {self._base_path}{path} HTTP/1.1\r\n"
+            f"Host: {self._host}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if self._token:
+            head += f"X-Algo-API-Token: {self._token}\r\n"
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+
+        status = int((await reader.readuntil(b"\r\n")).split()[1])
+        headers = {}
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = headers.get("connection") != "close"
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            response_body = b"".join(chunks)
+        elif "content-length" in headers:
+            response_body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # the body ends when the server closes the connection
+            response_body = await reader.read()
+            keep_alive = False
+        return status, response_body, keep_alive
+
+
+class RelayRequest(NamedTuple):
+    request_for_execution_id: bytes
+    request_bytes: bytes  # ERN1 requests are delivered to the NTT receiver, ERV1 requests to the VAA receiver.
+    relay_instructions: bytes
+
+
+class MessageTransactions(NamedTuple):
+    verify_sigs: transaction.ApplicationCallTxn
+    verify_vaa: transaction.ApplicationCallTxn
+    receive: transaction.ApplicationCallTxn  # The receive_ntt or execute_vaa call.
+
+
+class MessageBuilder(Protocol):
+    async def build(self, request: RelayRequest, params: transaction.SuggestedParams) -> MessageTransactions:
+        """Builds the Wormhole Core calls verifying the VAA of a request and the call delivering it.
+
+        The transactions must be sent by the relayer and pay their own fees.
+
+        Raises:
+            MessageError: If the message cannot be delivered, e.g. its VAA is invalid.
+        """
+        ...
+
+
+class RelayResult(NamedTuple):
+    request_for_execution_id: bytes
+    delivered: bool  # Also set for skipped requests, whose VAA was delivered before and have no txid.
+    reported: bool  # Whether the failure was recorded with report_error.
+    txid: str | None
+    confirmed_round: int | None
+    error_reason: bytes
+
+
+class _Job:
+    __slots__ = ("request", "receiver_app_id", "error_reason", "group", "signed", "txid", "last_valid")
+
+    def __init__(self, request: RelayRequest) -> None:
+        self.request = request
+        self.receiver_app_id = 0
+        self.error_reason: bytes | None = None  # Set when the job reports the failure of its request.
+        self.group: list[transaction.Transaction] = []
+        self.signed = b""
+        self.txid = ""
+        self.last_valid = 0
+
+
+class _AlreadyDelivered(Exception):
+    pass
+
+
+class _FetchDone(NamedTuple):
+    count: int
+    error: BaseException | None
+
+
+def _get_prefix(job: _Job) -> str:
+    return bytes(job.request.request_bytes[:4]).decode("ascii", "replace")
+
+
+def truncate_error_reason(error_reason: bytes) -> bytes:
+    return error_reason[:ERROR_REASON_TRUNCATION_THRESHOLD]
+
+
+class Relayer:
+    """Relays requests through concurrent build, sign, submit and confirm stages.
+
+    Args:
+        algod: The connection pool to algod.
+        private_key: The key of the relayer account sending every transaction.
+        message_builder: Builds the Wormhole Core calls and the delivery call of each request.
+        ntt_receiver_app_id: The ``NttV1ReceiveWithGasDropOff`` app, ERN1 requests fail when not given.
+        vaa_receiver_app_id: The ``VaaV1ReceiveWithGasDropOff`` app, ERV1 requests fail when not given.
+        queue_size: The number of jobs each stage can hold before the previous stage waits.
+        validity_rounds: The number of rounds a group stays valid, after which it is no longer awaited.
+        params_ttl: Seconds the suggested params are reused for.
+        track_deliveries: Whether the receive contracts were created with ``track_deliveries``, in which case the
+            delivery box of each VAA is funded by the relayer and looked up first, skipping the request if present.
+        metrics: Records the time spent in each stage, the outcome of each request by prefix, the queue depths and the
+            ALGO spent. Nothing is recorded when not given.
+    """
+
+    def __init__(
+        self,
+        algod: AlgodPool,
+        private_key: str,
+        message_builder: MessageBuilder,
+        ntt_receiver_app_id: int | None = None,
+        vaa_receiver_app_id: int | None = None,
+        *,
+        build_concurrency: int = DEFAULT_BUILD_CONCURRENCY,
+        sign_concurrency: int = DEFAULT_SIGN_CONCURRENCY,
+        submit_concurrency: int = DEFAULT_SUBMIT_CONCURRENCY,
+        confirm_concurrency: int = DEFAULT_CONFIRM_CONCURRENCY,
+        report_concurrency: int = DEFAULT_REPORT_CONCURRENCY,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        validity_rounds: int = DEFAULT_VALIDITY_ROUNDS,
+        params_ttl: float = DEFAULT_PARAMS_TTL,
+        track_deliveries: bool = False,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self._algod = algod
+        self._private_key = private_key
+        self._sender = account.address_from_private_key(private_key)
+        self._message_builder = message_builder
+        self._receiver_app_ids = {REQ_NTT_V1: ntt_receiver_app_id, REQ_VAA_V1: vaa_receiver_app_id}
+        self._concurrency = (build_concurrency, sign_concurrency, submit_concurrency, confirm_concurrency)
+        self._report_concurrency = report_concurrency
+        self._queue_size = queue_size
+        self._validity_rounds = validity_rounds
+        self._params_ttl = params_ttl
+        self._track_deliveries = track_deliveries
+        self._metrics = metrics
+
+        self._params: transaction.SuggestedParams | None = None
+        self._params_time = 0.0
+        self._params_lock = asyncio.Lock()
+        self._last_round = 0
+        self._new_round = asyncio.Condition()
+        self._results: asyncio.Queue[RelayResult | _FetchDone] = asyncio.Queue()
+        self._reports: asyncio.Queue[_Job] = asyncio.Queue()
+
+    async def run(self, requests: AsyncIterable[RelayRequest] | Iterable[RelayRequest]) -> AsyncIterator[RelayResult]:
+        """Relays the requests, yielding a result per request as each completes.
+
+        Only one run can be in progress at a time.
+        """
+        self._results = asyncio.Queue(self._queue_size)
+        self._reports = asyncio.Queue()
+        queues = [asyncio.Queue(self._queue_size) for _ in range(4)]
+        handlers = (self._build, self._sign, self._submit, self._confirm)
+
+        if self._metrics is not None:
+            for stage, stage_queue in zip((*STAGES, REPORT_STAGE), (*queues, self._reports)):
+                self._metrics.set_gauge_function(RELAYER_QUEUE_DEPTH, stage_queue.qsize, stage=stage)
+
+        self._last_round = (await self._algod.request("GET", "/v2/status"))["last-round"]
+        tasks = [asyncio.create_task(self._fetch(requests, queues[0])), asyncio.create_task(self._watch_rounds())]
+        for i, (stage, handler, concurrency) in enumerate(zip(STAGES, handlers, self._concurrency)):
+            outbox = queues[i + 1] if i + 1 < len(queues) else self._results
+            tasks += [asyncio.create_task(self._work(queues[i], outbox, handler, stage)) for _ in range(concurrency)]
+        tasks += [asyncio.create_task(self._work_reports()) for _ in range(self._report_concurrency)]
+
+        try:
+            count, total = 0, None
+            while count != total:
+                result = await self._results.get()
+                if isinstance(result, _FetchDone):
+                    if result.error is not None:
+                        raise result.error
+                    total = result.count
+                    continue
+                count += 1
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._metrics is not None:
+                for stage in (*STAGES, REPORT_STAGE):
+                    self._metrics.remove_gauge_function(RELAYER_QUEUE_DEPTH, stage=stage)
+
+    async def _fetch(
+        self,
+        requests: AsyncIterable[RelayRequest] | Iterable[RelayRequest],
+        outbox: asyncio.Queue,
+    ) -> None:
+        count = 0
+        try:
+            if isinstance(requests, AsyncIterable):
+                async for request in requests:
+                    await outbox.put(_Job(request))
+                    count += 1
+            else:
+                for request in requests:
+                    await outbox.put(_Job(request))
+                    count += 1
+        except Exception as e:
+            await self._results.put(_FetchDone(count, e))
+            return
+        await self._results.put(_FetchDone(count, None))
+
+    async def _work(
+        self,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        handler: Callable[[_Job], Awaitable[Any]],
+        stage: str,
+    ) -> None:
+        metrics = self._metrics
+        while True:
+            job = await inbox.get()
+            start = time.perf_counter() if metrics is not None else 0.0
+            try:
+                output = await handler(job)
+            except _AlreadyDelivered:
+                output = RelayResult(job.request.request_for_execution_id, True, False, None, None, b"")
+            except MessageError as e:
+                job.error_reason = truncate_error_reason(str(e).encode())
+                self._reports.put_nowait(job)
+                continue
+            except Exception as e:
+                # e.g. algod unreachable, the request can be retried later
+                output = self._failed(job, e)
+            finally:
+                if metrics is not None:
+                    metrics.observe(
+                        RELAYER_STAGE_SECONDS, time.perf_counter() - start, stage=stage, prefix=_get_prefix(job)
+                    )
+            if isinstance(output, RelayResult):
+                await self._put_result(job, output)
+            else:
+                await outbox.put(output)
+
+    async def _work_reports(self) -> None:
+        metrics = self._metrics
+        while True:
+            jobs = self._take_reports(await self._reports.get())
+            start = time.perf_counter() if metrics is not None else 0.0
+            try:
+                job = await self._build_report(jobs)
+                await self._sign(job)
+                await self._submit(job)
+                result = await self._confirm(job)
+            except Exception as e:
+                results = [self._failed(job, e) for job in jobs]
+            else:
+                results = [
+                    result._replace(
+                        request_for_execution_id=job.request.request_for_execution_id, error_reason=job.error_reason
+                    )
+                    for job in jobs
+                ]
+            if metrics is not None:
+                metrics.observe(
+                    RELAYER_STAGE_SECONDS, time.perf_counter() - start, stage=REPORT_STAGE, prefix=_get_prefix(jobs[0])
+                )
+            for job, result in zip(jobs, results):
+                await self._put_result(job, result)
+
+    async def _put_result(self, job: _Job, result: RelayResult) -> None:
+        if self._metrics is not None:
+            if result.delivered:
+                outcome = "delivered" if result.txid is not None else "skipped"
+            else:
+                outcome = "reported" if result.reported else "failed"
+            self._metrics.inc(RELAYER_REQUESTS_TOTAL, prefix=_get_prefix(job), outcome=outcome)
+        await self._results.put(result)
+
+    def _take_reports(self, job: _Job) -> list[_Job]:
+        # the reports queued meanwhile for the same receiver are sent in one call
+        jobs = [job]
+        receiver_app_id = self._get_report_receiver(job)
+        for _ in range(self._reports.qsize()):
+            if len(jobs) == MAX_REPORTS_PER_CALL:
+                break
+            other = self._reports.get_nowait()
+            if self._get_report_receiver(other) == receiver_app_id:
+                jobs.append(other)
+            else:
+                self._reports.put_nowait(other)
+        return jobs
+
+    def _get_report_receiver(self, job: _Job) -> int | None:
+        return job.receiver_app_id or self._receiver_app_ids.get(bytes(job.request.request_bytes[:4]))
+
+    def _failed(self, job: _Job, error: Exception) -> RelayResult:
+        reason = job.error_reason if job.error_reason is not None else truncate_error_reason(str(error).encode())
+        return RelayResult(job.request.request_for_execution_id, False, False, job.txid or None, None, reason)
+
+    async def _suggested_params(self) -> transaction.SuggestedParams:
+        # concurrent builds share one request for the params
+        async with self._params_lock:
+            now = asyncio.get_running_loop().time()
+            if self._params is None or now - self._params_time >= self._params_ttl:
+                params = await self._algod.request("GET", "/v2/transactions/params")
+                self._params = transaction.SuggestedParams(
+                    fee=params["min-fee"],
+                    first=params["last-round"],
+                    last=params["last-round"] + self._validity_rounds,
+                    gh=params["genesis-hash"],
+                    gen=params["genesis-id"],
+                    flat_fee=True,
+                    min_fee=params["min-fee"],
+                )
+                self._params_time = now
+            return self._params
+
+    async def _build(self, job: _Job) -> _Job:
+        request = job.request
+        receiver_app_id = self._receiver_app_ids.get(bytes(request.request_bytes[:4]))
+        if receiver_app_id is None:
+            raise MessageError("Unsupported request")
+        try:
+            totals = aggregate_relay_instructions(request.relay_instructions)
+        except CodecError as e:
+            raise MessageError(str(e)) from e
+        if len(totals.drop_offs) > 1:
+            raise MessageError("Multiple drop-off recipients")
+        recipient, drop_off = next(iter(totals.drop_offs.items()), (None, 0))
+        if totals.msg_value > MAX_UINT64 or drop_off > MAX_UINT64:
+            raise MessageError("Amount too large")
+
+        job.receiver_app_id = receiver_app_id
+        params = await self._suggested_params()
+        message = await self._message_builder.build(request, params)
+        if any(txn.sender != self._sender for txn in message):
+            raise ValueError("Message transactions must be sent by the relayer")
+        boxes = []
+        if self._track_deliveries:
+            # the receiver keys deliveries by the app executing the VAA verified in the group, not by the request id
+            try:
+                delivery_id = get_delivery_id(message.receive.index, message.verify_vaa.app_args[1])
+            except (CodecError, IndexError) as e:
+                raise MessageError("Invalid VAA") from e
+            if await self._is_delivered(receiver_app_id, delivery_id):
+                raise _AlreadyDelivered()
+            boxes.append((0, DELIVERIES_BOX_PREFIX + delivery_id))
+
+        # the gas covers the costs of the delivery call
+        gas = transaction.PaymentTxn(
+            self._sender, params, logic.get_application_address(message.receive.index), totals.msg_value
+        )
+        gas_drop_off = transaction.PaymentTxn(
+            self._sender, params, self._sender if recipient is None else encoding.encode_address(recipient), drop_off
+        )
+        receive_message = transaction.ApplicationCallTxn(
+            self._sender,
+            params,
+            receiver_app_id,
+            transaction.OnComplete.NoOpOC,
+            app_args=[RECEIVE_MESSAGE_SELECTOR, bytes(request.request_for_execution_id)],
+            boxes=boxes,
+        )
+        group = [gas, *message, gas_drop_off, receive_message]
+        if self._track_deliveries:
+            # the receiver takes the box min balance from the transaction directly before the gas
+            deliveries_payment = transaction.PaymentTxn(
+                self._sender, params, logic.get_application_address(receiver_app_id), DELIVERY_BOX_MIN_BALANCE
+            )
+            group.insert(0, deliveries_payment)
+        self._set_group(job, group, params)
+        return job
+
+    async def _build_report(self, jobs: list[_Job]) -> _Job:
+        """Builds one call reporting the errors of the jobs, with ``report_errors`` when there are several.
+
+        Returns:
+            The first job, which holds the call shared by all the jobs.
+        """
+        params = await self._suggested_params()
+        receiver_app_id = self._get_report_receiver(jobs[0])
+        if receiver_app_id is None:
+            raise ValueError("No receiver to report the error to")
+        if len(jobs) == 1:
+            app_args = [
+                REPORT_ERROR_SELECTOR,
+                bytes(jobs[0].request.request_for_execution_id),
+                len(jobs[0].error_reason).to_bytes(2, "big") + jobs[0].error_reason,
+            ]
+        else:
+            reports = [[bytes(job.request.request_for_execution_id), job.error_reason] for job in jobs]
+            app_args = [REPORT_ERRORS_SELECTOR, ERROR_REPORTS_TYPE.encode(reports)]
+        report_errors = transaction.ApplicationCallTxn(
+            self._sender,
+            params,
+            receiver_app_id,
+            transaction.OnComplete.NoOpOC,
+            app_args=app_args,
+        )
+        for job in jobs:
+            self._set_group(job, [report_errors], params)
+        return jobs[0]
+
+    async def _is_delivered(self, receiver_app_id: int, delivery_id: bytes) -> bool:
+        name = urllib.parse.quote(base64.b64encode(DELIVERIES_BOX_PREFIX + delivery_id).decode())
+        try:
+            await self._algod.request("GET", f"/v2/applications/{receiver_app_id}/box?name=b64:{name}")
+        except AlgodError as e:
+            if e.status == 404:
+                return False
+            raise
+        return True
+
+    def _set_group(self, job: _Job, group: list[transaction.Transaction], params: transaction.SuggestedParams) -> None:
+        if len(group) > 1:
+            for txn in group:
+                txn.group = None
+            transaction.assign_group_id(group)
+        job.group = group
+        job.txid = group[-1].get_txid()
+        job.last_valid = params.last
+
+    async def _sign(self, job: _Job) -> _Job:
+        # signing is CPU bound so done off the event loop
+        job.signed = await asyncio.to_thread(self._sign_group, job.group)
+        return job
+
+    def _sign_group(self, group: list[transaction.Transaction]) -> bytes:
+        return b"".join(base64.b64decode(encoding.msgpack_encode(txn.sign(self._private_key))) for txn in group)
+
+    async def _submit(self, job: _Job) -> _Job:
+        try:
+            await self._algod.request("POST", "/v2/transactions", job.signed, "application/x-binary")
+        except AlgodError as e:
+            if e.status == 400:
+                self._check_rejection(job, e.message)
+            raise
+        return job
+
+    async def _confirm(self, job: _Job) -> RelayResult:
+        while True:
+            info = await self._algod.request("GET", f"/v2/transactions/pending/{job.txid}")
+            if info.get("confirmed-round"):
+                if self._metrics is not None:
+                    self._record_spend(job)
+                return RelayResult(
+                    job.request.request_for_execution_id,
+                    job.error_reason is None,
+                    job.error_reason is not None,
+                    job.txid,
+                    info["confirmed-round"],
+                    job.error_reason or b"",
+                )
+            if info.get("pool-error"):
+                self._check_rejection(job, info["pool-error"])
+                raise AlgodError(400, info["pool-error"])
+            if self._last_round >= job.last_valid:
+                raise TimeoutError(f"Transaction {job.txid} not confirmed by round {job.last_valid}")
+            await self._wait_for_round(self._last_round + 1)
+
+    def _check_rejection(self, job: _Job, message: str) -> None:
+        # groups rejected by a contract, e.g. a failed receive, are reported unless this is the report
+        if LOGIC_EVAL_ERROR in message:
+            if job.error_reason is None:
+                raise MessageError(message)
+            return
+        # the others are rejected for the relayer itself, e.g. overspend, fee too low or txn dead, so the request fails
+        # without a report and can be retried, with the params fetched again in case they are stale
+        self._params = None
+
+    def _record_spend(self, job: _Job) -> None:
+        self._metrics.inc(RELAYER_SPEND_MICROALGOS_TOTAL, sum(txn.fee for txn in job.group), kind="fee")
+        # delivery groups end with the gas, the 3 message transactions, the drop-off and the receive_message call
+        if job.error_reason is None:
+            self._metrics.inc(RELAYER_SPEND_MICROALGOS_TOTAL, job.group[-6].amt, kind="gas")
+            self._metrics.inc(RELAYER_SPEND_MICROALGOS_TOTAL, job.group[-2].amt, kind="drop_off")
+
+    async def _watch_rounds(self) -> None:
+        # a single long poll for new rounds wakes every confirmation waiting on it
+        while True:
+            try:
+                status = await self._algod.request("GET", f"/v2/status/wait-for-block-after/{self._last_round}")
+            except (OSError, AlgodError, asyncio.TimeoutError):
+                await asyncio.sleep(1)
+                continue
+            async with self._new_round:
+                self._last_round = max(self._last_round, status["last-round"])
+                self._new_round.notify_all()
+
+    async def _wait_for_round(self, round_number: int) -> None:
+        async with self._new_round:
+            await self._new_round.wait_for(lambda: self._last_round >= round_number)
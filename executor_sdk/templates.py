@@ -0,0 +1,357 @@
+"""Prebuilt transaction groups for transfers through the NTT managers with executor.
+
+Requires the ``relayer`` extra. Every ``NttManagerWithExecutor.transfer`` and
+``NttManagerWithTokenPaymentExecutor.transfer`` group on a route has the same shape::
+
+    ntt_fee_payment, ntt_send_token, ntt_transfer, pay_executor, pay_referrer, transfer
+
+A template derives the selectors, app addresses, resource references and fees of a route once, and builds the
+transactions of the group from the current suggested params. A transfer then copies these transactions and sets only
+the fields which vary.
+"""
+import copy
+import functools
+import hashlib
+import threading
+from typing import Any, Callable, Iterable, Protocol
+
+import msgpack
+from algosdk import constants, encoding, logic, transaction
+from algosdk.abi import Method
+
+from .codec import BytesLike, QUOTE_HEADER_LENGTH
+
+# Constants
+DEFAULT_PARAMS_INTERVAL = 30.0
+ADDRESS_CACHE_SIZE = 4096
+TXID_PREFIX = constants.txid_prefix
+TGID_PREFIX = constants.tgid_prefix
+
+# inner transactions of each step of the transfer call, as the contracts submit them
+NTT_PEER_FETCH_INNER_TXNS = 1  # NttManager.get_ntt_manager_peer app call
+APP_CALL_WITH_PAYMENT_INNER_TXNS = 2  # payment or asset transfer, then the app call
+EXECUTOR_REQUEST_INNER_TXNS = 1  # Executor.request_execution forwards the fee to the payee
+TOKEN_PAYMENT_EXECUTOR_REQUEST_INNER_TXNS = (
+    1  # TokenPaymentExecutor.request_execution_with_token_payment forwards the token to the payee, at most
+    + APP_CALL_WITH_PAYMENT_INNER_TXNS  # zero ALGO payment and Executor.request_execution
+    + EXECUTOR_REQUEST_INNER_TXNS
+)
+
+# inner transactions of the transfer call, which its fee covers
+NTT_MANAGER_WITH_EXECUTOR_INNER_TXNS = (
+    NTT_PEER_FETCH_INNER_TXNS + APP_CALL_WITH_PAYMENT_INNER_TXNS + EXECUTOR_REQUEST_INNER_TXNS
+)
+NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_INNER_TXNS = (
+    NTT_PEER_FETCH_INNER_TXNS + APP_CALL_WITH_PAYMENT_INNER_TXNS + TOKEN_PAYMENT_EXECUTOR_REQUEST_INNER_TXNS
+)
+
+NTT_TRANSFER_SELECTOR = Method.from_signature("transfer(pay,axfer,uint64,uint16,byte[32])byte[32]").get_selector()
+NTT_MANAGER_WITH_EXECUTOR_TRANSFER_SELECTOR = Method.from_signature(
+    "transfer(axfer,appl,pay,axfer,uint64,(address,byte[],byte[]),(uint16,address))void"
+).get_selector()
+NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_TRANSFER_SELECTOR = Method.from_signature(
+    "transfer(axfer,appl,axfer,axfer,uint64,(address,byte[],byte[]),(uint16,address))void"
+).get_selector()
+
+EXECUTOR_ARGS_HEAD_LENGTH = 36  # The refund address and the offsets of the signed quote and relay instructions.
+
+
+class ParamsSource(Protocol):
+    params: transaction.SuggestedParams
+
+
+class SuggestedParamsRefresher:
+    """Holds suggested params fetched again on a background timer.
+
+    If fetching fails the previous params are kept and the error is stored in ``last_error``.
+
+    Args:
+        fetch: Fetches the suggested params, e.g. ``AlgodClient.suggested_params``.
+        interval: Seconds between fetches.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], transaction.SuggestedParams],
+        interval: float = DEFAULT_PARAMS_INTERVAL,
+    ) -> None:
+        self._fetch = fetch
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.params = fetch()
+        self.last_error: Exception | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh, name="executor-params-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SuggestedParamsRefresher":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _refresh(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.params = self._fetch()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _decode_address(address: str) -> bytes:
+    return encoding.decode_address(address)
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _encode_address(public_key: bytes) -> str:
+    return encoding.encode_address(public_key)
+
+
+def _canonical(txn_dict: dict[str, Any]) -> dict[str, Any]:
+    # canonical msgpack has sorted keys and omits zero values, as encoding.msgpack_encode
+    return {
+        key: _canonical(value) if isinstance(value, dict) else value
+        for key, value in sorted(txn_dict.items())
+        if value
+    }
+
+
+def _calculate_group_id(txn_dicts: Iterable[dict[str, Any]]) -> bytes:
+    # as transaction.calculate_group_id, from the encodings of the transactions
+    txids = [
+        hashlib.new("sha512_256", TXID_PREFIX + msgpack.packb(_canonical(txn_dict), use_bin_type=True)).digest()
+        for txn_dict in txn_dicts
+    ]
+    group = msgpack.packb({"txlist": txids}, use_bin_type=True)
+    return hashlib.new("sha512_256", TGID_PREFIX + group).digest()
+
+
+def calculate_fee(amount: int, dbps: int) -> int:
+    """Calculates the referrer fee as ``MathsUtils.calculate_fee`` does on-chain."""
+    q, r = divmod(amount, 100000)
+    return q * dbps + r * dbps // 100000
+
+
+class TransferTemplate:
+    """The transfer group of one route, from a token to a recipient chain through an NTT manager with executor.
+
+    The route pays the executor in ALGO through ``NttManagerWithExecutor`` unless a fee asset is given, in which case
+    it pays in that asset through ``NttManagerWithTokenPaymentExecutor``.
+
+    Args:
+        params_source: Holds the current suggested params, the transactions are rebuilt when they change.
+        ntt_manager_app_id: The NTT manager of the token.
+        manager_app_id: The ``NttManagerWithExecutor`` or ``NttManagerWithTokenPaymentExecutor`` app.
+        executor_app_id: The ``Executor`` or ``TokenPaymentExecutor`` app the manager forwards to.
+        ntt_asset_id: The token transferred.
+        recipient_chain: The destination chain.
+        referrer: The address paid the referrer fee.
+        dbps: The referrer fee in tenths of basis points.
+        fee_asset_id: The asset paying the executor fee, None to pay in ALGO.
+        transfer_foreign_apps: Other apps called by the manager, e.g. the ``Executor`` of a ``TokenPaymentExecutor``.
+        ntt_transfer_foreign_apps: The apps referenced by the NTT manager transfer call.
+        ntt_transfer_foreign_assets: The assets referenced by the NTT manager transfer call.
+        ntt_transfer_accounts: The accounts referenced by the NTT manager transfer call.
+        ntt_transfer_boxes: The boxes referenced by the NTT manager transfer call, as (app id, name) pairs.
+        ntt_transfer_inner_txns: The inner transactions of the NTT manager transfer call, which its fee covers.
+        transfer_inner_txns: The inner transactions of the manager transfer call, which its fee covers.
+    """
+
+    def __init__(
+        self,
+        params_source: ParamsSource,
+        ntt_manager_app_id: int,
+        manager_app_id: int,
+        executor_app_id: int,
+        ntt_asset_id: int,
+        recipient_chain: int,
+        referrer: str,
+        dbps: int,
+        fee_asset_id: int | None = None,
+        *,
+        transfer_foreign_apps: Iterable[int] = (),
+        ntt_transfer_foreign_apps: Iterable[int] = (),
+        ntt_transfer_foreign_assets: Iterable[int] = (),
+        ntt_transfer_accounts: Iterable[str] = (),
+        ntt_transfer_boxes: Iterable[tuple[int, bytes]] = (),
+        ntt_transfer_inner_txns: int = 0,
+        transfer_inner_txns: int | None = None,
+    ) -> None:
+        self._params_source = params_source
+        self._ntt_manager_app_id = ntt_manager_app_id
+        self._manager_app_id = manager_app_id
+        self._ntt_asset_id = ntt_asset_id
+        self._fee_asset_id = fee_asset_id
+        self._dbps = dbps
+
+        self._ntt_manager_address = logic.get_application_address(ntt_manager_app_id)
+        self._manager_address = logic.get_application_address(manager_app_id)
+        self._referrer = referrer
+        self._recipient_chain = recipient_chain.to_bytes(2, "big")
+        self._fee_args = dbps.to_bytes(2, "big") + encoding.decode_address(referrer)
+        if fee_asset_id is None:
+            self._transfer_selector = NTT_MANAGER_WITH_EXECUTOR_TRANSFER_SELECTOR
+            default_inner_txns = NTT_MANAGER_WITH_EXECUTOR_INNER_TXNS
+        else:
+            self._transfer_selector = NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_TRANSFER_SELECTOR
+            default_inner_txns = NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_INNER_TXNS
+
+        self._transfer_foreign_apps = [ntt_manager_app_id, executor_app_id, *transfer_foreign_apps]
+        self._ntt_transfer_foreign_apps = list(ntt_transfer_foreign_apps)
+        self._ntt_transfer_foreign_assets = list(ntt_transfer_foreign_assets)
+        self._ntt_transfer_accounts = list(ntt_transfer_accounts)
+        self._ntt_transfer_boxes = list(ntt_transfer_boxes)
+        self._ntt_transfer_inner_txns = ntt_transfer_inner_txns
+        self._transfer_inner_txns = default_inner_txns if transfer_inner_txns is None else transfer_inner_txns
+
+        self._params: transaction.SuggestedParams | None = None
+        self._txns: tuple[tuple[transaction.Transaction, ...], tuple[dict[str, Any], ...]] = ((), ())
+
+    def build(
+        self,
+        sender: str,
+        amount: int,
+        recipient: BytesLike,
+        signed_quote_bytes: BytesLike,
+        relay_instructions: BytesLike,
+        executor_fee: int,
+        refund_address: str | None = None,
+        ntt_fee: int = 0,
+    ) -> list[transaction.Transaction]:
+        """Builds the transfer group, ready to sign.
+
+        Args:
+            sender: The account sending the tokens and paying the fees.
+            amount: The amount of tokens, including the referrer fee.
+            recipient: The 32-byte recipient on the destination chain.
+            signed_quote_bytes: The signed quote from the executor.
+            relay_instructions: The relay instructions.
+            executor_fee: The executor fee, in ALGO or the fee asset of the route.
+            refund_address: The address refunded on the destination chain, the sender if not given.
+            ntt_fee: The ALGO fee paid to the NTT manager.
+
+        Returns:
+            The grouped transactions.
+
+        Raises:
+            ValueError: If the signed quote is too short.
+        """
+        txns, dicts = self._get_txns()
+        ntt_fee_payment, ntt_send_token, ntt_transfer, pay_executor, pay_referrer, transfer = map(copy.copy, txns)
+        ntt_fee_payment_dict, ntt_send_token_dict, ntt_transfer_dict, pay_executor_dict, pay_referrer_dict, \
+            transfer_dict = map(dict, dicts)
+
+        signed_quote_bytes, relay_instructions = bytes(signed_quote_bytes), bytes(relay_instructions)
+        if len(signed_quote_bytes) < QUOTE_HEADER_LENGTH:
+            raise ValueError("Signed quote too short")
+        payee_key = signed_quote_bytes[24:56]
+        sender_key = _decode_address(sender)
+        referrer_fee = calculate_fee(amount, self._dbps)
+        ntt_amount = amount - referrer_fee
+
+        executor_args = b"".join((
+            sender_key if refund_address is None else _decode_address(refund_address),
+            EXECUTOR_ARGS_HEAD_LENGTH.to_bytes(2, "big"),
+            (EXECUTOR_ARGS_HEAD_LENGTH + 2 + len(signed_quote_bytes)).to_bytes(2, "big"),
+            len(signed_quote_bytes).to_bytes(2, "big"),
+            signed_quote_bytes,
+            len(relay_instructions).to_bytes(2, "big"),
+            relay_instructions,
+        ))
+        ntt_transfer_args = [
+            NTT_TRANSFER_SELECTOR, ntt_amount.to_bytes(8, "big"), self._recipient_chain, bytes(recipient)
+        ]
+        transfer_args = [self._transfer_selector, amount.to_bytes(8, "big"), executor_args, self._fee_args]
+
+        # fill in the variable fields of both the transactions and their encodings
+        for txn, txn_dict in zip(
+            (ntt_fee_payment, ntt_send_token, ntt_transfer, pay_executor, pay_referrer, transfer),
+            (ntt_fee_payment_dict, ntt_send_token_dict, ntt_transfer_dict, pay_executor_dict, pay_referrer_dict,
+             transfer_dict),
+        ):
+            txn.sender = sender
+            txn_dict["snd"] = sender_key
+        ntt_fee_payment.amt = ntt_fee_payment_dict["amt"] = ntt_fee
+        ntt_send_token.amount = ntt_send_token_dict["aamt"] = ntt_amount
+        ntt_transfer.app_args = ntt_transfer_dict["apaa"] = ntt_transfer_args
+        pay_referrer.amount = pay_referrer_dict["aamt"] = referrer_fee
+        transfer.app_args = transfer_dict["apaa"] = transfer_args
+
+        if self._fee_asset_id is None:
+            pay_executor.amt = pay_executor_dict["amt"] = executor_fee
+        else:
+            pay_executor.amount = pay_executor_dict["aamt"] = executor_fee
+        # the payee is paid by the executor or, when it only forwards the fee, by the manager
+        transfer.accounts = [_encode_address(payee_key)]
+        transfer_dict["apat"] = [payee_key]
+
+        group = [ntt_fee_payment, ntt_send_token, ntt_transfer, pay_executor, pay_referrer, transfer]
+        group_id = _calculate_group_id((
+            ntt_fee_payment_dict, ntt_send_token_dict, ntt_transfer_dict, pay_executor_dict, pay_referrer_dict,
+            transfer_dict,
+        ))
+        for txn in group:
+            txn.group = group_id
+        return group
+
+    def _get_txns(self) -> tuple[tuple[transaction.Transaction, ...], tuple[dict[str, Any], ...]]:
+        params = self._params_source.params
+        if params is not self._params:
+            txns = self._make_txns(params)
+            self._txns = txns, tuple(txn.dictify() for txn in txns)
+            self._params = params
+        return self._txns
+
+    def _make_txns(self, params: transaction.SuggestedParams) -> tuple[transaction.Transaction, ...]:
+        # the sender is set on every build, the manager address stands in until then
+        sender = self._manager_address
+        min_fee = params.min_fee or params.fee
+        params = copy.copy(params)
+        params.flat_fee = True
+        params.fee = min_fee
+
+        ntt_transfer_params = copy.copy(params)
+        ntt_transfer_params.fee = min_fee * (1 + self._ntt_transfer_inner_txns)
+        transfer_params = copy.copy(params)
+        transfer_params.fee = min_fee * (1 + self._transfer_inner_txns)
+
+        if self._fee_asset_id is None:
+            pay_executor = transaction.PaymentTxn(sender, params, self._manager_address, 0)
+        else:
+            pay_executor = transaction.AssetTransferTxn(sender, params, self._manager_address, 0, self._fee_asset_id)
+        return (
+            transaction.PaymentTxn(sender, params, self._ntt_manager_address, 0),
+            transaction.AssetTransferTxn(sender, params, self._ntt_manager_address, 0, self._ntt_asset_id),
+            transaction.ApplicationCallTxn(
+                sender,
+                ntt_transfer_params,
+                self._ntt_manager_app_id,
+                transaction.OnComplete.NoOpOC,
+                foreign_apps=self._ntt_transfer_foreign_apps,
+                foreign_assets=self._ntt_transfer_foreign_assets,
+                accounts=self._ntt_transfer_accounts,
+                boxes=self._ntt_transfer_boxes,
+            ),
+            pay_executor,
+            transaction.AssetTransferTxn(sender, params, self._referrer, 0, self._ntt_asset_id),
+            transaction.ApplicationCallTxn(
+                sender,
+                transfer_params,
+                self._manager_app_id,
+                transaction.OnComplete.NoOpOC,
+                foreign_apps=self._transfer_foreign_apps,
+                foreign_assets=None if self._fee_asset_id is None else [self._fee_asset_id],
+            ),
+        )
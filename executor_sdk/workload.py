@@ -0,0 +1,525 @@
+"""Synthetic executor traffic for load tests of the indexer, decoders and relayer.
+
+Requires the ``numpy`` extra. Records are generated a chunk at a time with vectorised random draws: each record layout
+is a packed big-endian structured array whose bytes are the encoded records, and records of different layouts are
+scattered into one shared buffer. ``write_workload`` streams the chunks to files, so a workload is bounded by disk
+rather than memory. The same seed, count, parameters and chunk size always give the same workload.
+
+Generate a workload from the repository root::
+
+    python3 -m executor_sdk.workload COUNT OUT_DIR [--seed SEED] [--chunk-size N]
+"""
+import argparse
+import struct
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from .codec import (
+    CUSTOM_TOKEN_FEE_PREFIX, NATIVE_FEE_PREFIX, QUOTE_SIGNATURE_LENGTH, RECV_INST_TYPE_DROP_OFF, RECV_INST_TYPE_GAS,
+    REQ_NTT_V1, REQ_VAA_V1
+)
+from .events import (
+    NTT_MESSAGE_RECEIVED_SIGNATURE, REQUEST_FOR_EXECUTION_SIGNATURE, VAA_MESSAGE_RECEIVED_SIGNATURE, get_event_selector
+)
+
+# Constants
+DEFAULT_CHUNK_SIZE = 8192
+
+VAA_VERSION = 1
+VAA_CONSISTENCY_LEVEL = 15
+GUARDIAN_SIGNATURE_LENGTH = 65
+ERROR_REASON = b"logic eval error: assert failed pc=412"
+
+WORKLOAD_FILES = {
+    "request_for_execution_ids": "request_for_execution_ids.bin",
+    "quotes": "quotes.bin",
+    "requests": "requests.bin",
+    "relay_instructions": "relay_instructions.bin",
+    "vaas": "vaas.bin",
+    "logs": "logs.bin",
+}
+
+_RECORD_LENGTH = struct.Struct(">I")
+
+_NATIVE_FEE_QUOTE = [
+    ("prefix", ">u4"),
+    ("quoter_address", "V20"),
+    ("payee_address", "V32"),
+    ("src_chain", ">u2"),
+    ("dst_chain", ">u2"),
+    ("expiry_time", ">u8"),
+    ("base_fee", ">u8"),
+    ("dst_gas_price", ">u8"),
+    ("src_price", ">u8"),
+    ("dst_price", ">u8"),
+]
+NATIVE_FEE_QUOTE_DTYPE = np.dtype([*_NATIVE_FEE_QUOTE, ("signature", f"V{QUOTE_SIGNATURE_LENGTH}")])
+CUSTOM_TOKEN_FEE_QUOTE_DTYPE = np.dtype([
+    *_NATIVE_FEE_QUOTE, ("token_address", "V32"), ("signature", f"V{QUOTE_SIGNATURE_LENGTH}")
+])
+VAA_V1_REQUEST_DTYPE = np.dtype([
+    ("prefix", ">u4"),
+    ("emitter_chain", ">u2"),
+    ("emitter_address", "V32"),
+    ("sequence", ">u8"),
+])
+NTT_V1_REQUEST_DTYPE = np.dtype([
+    ("prefix", ">u4"),
+    ("src_chain", ">u2"),
+    ("src_manager", "V32"),
+    ("message_id", "V32"),
+])
+# uint128 fields are split into their high and low 8 bytes
+GAS_INSTRUCTION_DTYPE = np.dtype([
+    ("type", "u1"),
+    ("gas_limit_high", ">u8"),
+    ("gas_limit", ">u8"),
+    ("msg_value_high", ">u8"),
+    ("msg_value", ">u8"),
+])
+GAS_DROP_OFF_INSTRUCTION_DTYPE = np.dtype([
+    ("type", "u1"),
+    ("drop_off_high", ">u8"),
+    ("drop_off", ">u8"),
+    ("recipient", "V32"),
+])
+GUARDIAN_SIGNATURE_DTYPE = np.dtype([
+    ("guardian_index", "u1"),
+    ("signature", f"V{GUARDIAN_SIGNATURE_LENGTH}"),
+])
+
+# ARC-28 logs up to their first dynamic field, dynamic fields are 2-byte offsets relative to the start of the head
+_REQUEST_FOR_EXECUTION_LOG_HEAD = np.dtype([
+    ("selector", ">u4"),
+    ("quoter_address", "V20"),
+    ("amt_paid", ">u8"),
+    ("dst_chain", ">u2"),
+    ("dst_addr", "V32"),
+    ("refund_addr", "V32"),
+    ("signed_quote_bytes", ">u2"),
+    ("request_bytes", ">u2"),
+    ("relay_instructions", ">u2"),
+    ("signed_quote_length", ">u2"),
+])
+_MESSAGE_RECEIVED_LOG_HEAD = np.dtype([
+    ("selector", ">u4"),
+    ("request_for_execution_id", "V32"),
+    ("success", "u1"),
+    ("error_reason", ">u2"),
+    ("error_reason_length", ">u2"),
+])
+_LENGTH_DTYPE = np.dtype(">u2")
+
+
+def _selector_value(signature: str) -> int:
+    return int.from_bytes(get_event_selector(signature), "big")
+
+
+class WorkloadParams(NamedTuple):
+    """The mix of the generated traffic, the ratios are the expected share of the records."""
+    src_chain: int = 8
+    dst_chains: tuple[int, ...] = (2, 6, 23, 30)
+    quoters: int = 4
+    tokens: int = 4  # The fee tokens of custom token fee quotes.
+    emitters: int = 64  # The emitters of the VAAs, also used as NTT managers.
+    custom_token_fee_ratio: float = 0.25
+    ntt_ratio: float = 0.5
+    max_gas_instructions: int = 2
+    drop_off_ratio: float = 0.3
+    guardian_signatures: int = 13
+    guardian_set_index: int = 4
+    vaa_payload_length: int = 100
+    failure_ratio: float = 0.05
+    start_time: int = 1_700_000_000
+    requests_per_second: int = 10
+
+
+@dataclass(frozen=True, slots=True)
+class Records:
+    """Variable-length records back to back in one buffer.
+
+    ``offsets`` holds the start of each record in ``data`` followed by the end of the last record.
+    """
+
+    data: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+    def __iter__(self) -> Iterator[bytes]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+@dataclass(frozen=True, slots=True)
+class WorkloadChunk:
+    """Consecutive records of a workload, the records at the same index belong to the same request.
+
+    ``logs`` holds two logs per request: its ``RequestForExecution`` log followed by the ``NTTMessageReceived`` or
+    ``VAAMessageReceived`` log of its delivery, which fails for the requests where ``delivered`` is False.
+    """
+
+    start: int
+    request_for_execution_ids: Records
+    quotes: Records
+    requests: Records
+    relay_instructions: Records
+    vaas: Records
+    logs: Records
+    delivered: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+
+class _Pools(NamedTuple):
+    # the values shared by the requests of a workload
+    quoter_addresses: np.ndarray
+    payee_addresses: np.ndarray
+    token_addresses: np.ndarray
+    emitter_addresses: np.ndarray
+
+
+def _random_bytes(rng: np.random.Generator, count: int, width: int) -> np.ndarray:
+    return np.frombuffer(rng.bytes(count * width), dtype=f"V{width}")
+
+
+def _from_rows(rows: np.ndarray) -> Records:
+    data = np.ascontiguousarray(rows).view(np.uint8).reshape(-1)
+    return Records(data, np.arange(len(rows) + 1, dtype=np.int64) * rows.dtype.itemsize)
+
+
+def _repeat(value: bytes, count: int) -> Records:
+    return _from_rows(np.full(count, np.void(value), dtype=f"V{len(value)}") if value else np.zeros(count, "V0"))
+
+
+def _with_lengths(records: Records, length_dtype: np.dtype = _LENGTH_DTYPE) -> Records:
+    return _concat(_from_rows(records.lengths.astype(length_dtype)), records)
+
+
+def _scatter(data: np.ndarray, starts: np.ndarray, part: Records) -> None:
+    # copies each record of the part to its start in data
+    shifts = np.repeat(starts - part.offsets[:-1], part.lengths)
+    data[np.arange(len(part.data)) + shifts] = part.data
+
+
+def _to_offsets(lengths: np.ndarray) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _concat(*parts: Records) -> Records:
+    """Joins the records at the same index of each part."""
+    lengths = sum(part.lengths for part in parts)
+    offsets = _to_offsets(lengths)
+    data = np.empty(offsets[-1], dtype=np.uint8)
+    starts = offsets[:-1].copy()
+    for part in parts:
+        _scatter(data, starts, part)
+        starts += part.lengths
+    return Records(data, offsets)
+
+
+def _mix(choices: np.ndarray, parts: list[Records]) -> Records:
+    """Takes the records of ``parts[k]`` in order for the indices where ``choices`` is k."""
+    indices = [np.flatnonzero(choices == k) for k in range(len(parts))]
+    lengths = np.zeros(len(choices), dtype=np.int64)
+    for part_indices, part in zip(indices, parts):
+        lengths[part_indices] = part.lengths
+    offsets = _to_offsets(lengths)
+    data = np.empty(offsets[-1], dtype=np.uint8)
+    for part_indices, part in zip(indices, parts):
+        _scatter(data, offsets[part_indices], part)
+    return Records(data, offsets)
+
+
+def _make_pools(params: WorkloadParams, seed: int) -> _Pools:
+    rng = np.random.default_rng([seed, 0])
+    return _Pools(
+        _random_bytes(rng, params.quoters, 20),
+        _random_bytes(rng, params.quoters, 32),
+        _random_bytes(rng, params.tokens, 32),
+        _random_bytes(rng, params.emitters, 32),
+    )
+
+
+def _make_quotes(
+    rng: np.random.Generator,
+    params: WorkloadParams,
+    pools: _Pools,
+    quoters: np.ndarray,
+    dst_chains: np.ndarray,
+    timestamps: np.ndarray,
+) -> Records:
+    custom_token_fee = rng.random(len(quoters)) < params.custom_token_fee_ratio
+    parts = []
+    for is_custom_token_fee in (False, True):
+        selected = custom_token_fee == is_custom_token_fee
+        count = int(np.count_nonzero(selected))
+        rows = np.empty(count, dtype=CUSTOM_TOKEN_FEE_QUOTE_DTYPE if is_custom_token_fee else NATIVE_FEE_QUOTE_DTYPE)
+        prefix = CUSTOM_TOKEN_FEE_PREFIX if is_custom_token_fee else NATIVE_FEE_PREFIX
+        rows["prefix"] = int.from_bytes(prefix, "big")
+        rows["quoter_address"] = pools.quoter_addresses[quoters[selected]]
+        rows["payee_address"] = pools.payee_addresses[quoters[selected]]
+        rows["src_chain"] = params.src_chain
+        rows["dst_chain"] = dst_chains[selected]
+        rows["expiry_time"] = timestamps[selected] + rng.integers(300, 3600, count)
+        rows["base_fee"] = rng.integers(1_000, 100_000, count)
+        rows["dst_gas_price"] = rng.integers(1, 10**11, count)
+        rows["src_price"] = rng.integers(10**8, 10**12, count)
+        rows["dst_price"] = rng.integers(10**8, 10**12, count)
+        if is_custom_token_fee:
+            rows["token_address"] = pools.token_addresses[rng.integers(0, params.tokens, count)]
+        rows["signature"] = _random_bytes(rng, count, QUOTE_SIGNATURE_LENGTH)
+        parts.append(_from_rows(rows))
+    return _mix(custom_token_fee.astype(np.int64), parts)
+
+
+def _make_requests(
+    rng: np.random.Generator,
+    params: WorkloadParams,
+    pools: _Pools,
+    ntt: np.ndarray,
+    emitters: np.ndarray,
+    sequences: np.ndarray,
+) -> Records:
+    vaa_rows = np.empty(int(np.count_nonzero(~ntt)), dtype=VAA_V1_REQUEST_DTYPE)
+    vaa_rows["prefix"] = int.from_bytes(REQ_VAA_V1, "big")
+    vaa_rows["emitter_chain"] = params.src_chain
+    vaa_rows["emitter_address"] = pools.emitter_addresses[emitters[~ntt]]
+    vaa_rows["sequence"] = sequences[~ntt]
+
+    ntt_rows = np.empty(int(np.count_nonzero(ntt)), dtype=NTT_V1_REQUEST_DTYPE)
+    ntt_rows["prefix"] = int.from_bytes(REQ_NTT_V1, "big")
+    ntt_rows["src_chain"] = params.src_chain
+    ntt_rows["src_manager"] = pools.emitter_addresses[emitters[ntt]]
+    ntt_rows["message_id"] = _random_bytes(rng, len(ntt_rows), 32)
+    return _mix(ntt.astype(np.int64), [_from_rows(vaa_rows), _from_rows(ntt_rows)])
+
+
+def _make_relay_instructions(rng: np.random.Generator, params: WorkloadParams, count: int) -> Records:
+    # one layout per number of gas instructions, with or without a drop-off
+    gas_instructions = rng.integers(1, params.max_gas_instructions + 1, count)
+    drop_offs = (rng.random(count) < params.drop_off_ratio).astype(np.int64)
+    layouts = (gas_instructions - 1) * 2 + drop_offs
+    parts = []
+    for layout in range(params.max_gas_instructions * 2):
+        layout_gas_instructions, layout_drop_offs = layout // 2 + 1, layout % 2
+        rows = np.zeros(int(np.count_nonzero(layouts == layout)), dtype=[
+            ("count", ">u2"),
+            ("gas", GAS_INSTRUCTION_DTYPE, (layout_gas_instructions,)),
+            ("drop_off", GAS_DROP_OFF_INSTRUCTION_DTYPE, (layout_drop_offs,)),
+        ])
+        shape = (len(rows), layout_gas_instructions)
+        rows["count"] = layout_gas_instructions + layout_drop_offs
+        rows["gas"]["type"] = RECV_INST_TYPE_GAS
+        rows["gas"]["gas_limit"] = rng.integers(100_000, 1_000_000, shape)
+        rows["gas"]["msg_value"] = np.where(rng.random(shape) < 0.1, rng.integers(1, 10**9, shape), 0)
+        if layout_drop_offs:
+            rows["drop_off"]["type"] = RECV_INST_TYPE_DROP_OFF
+            rows["drop_off"]["drop_off"] = rng.integers(1, 10**7, (len(rows), 1))
+            rows["drop_off"]["recipient"] = _random_bytes(rng, len(rows), 32).reshape(-1, 1)
+        parts.append(_from_rows(rows))
+    return _mix(layouts, parts)
+
+
+def _make_vaas(
+    rng: np.random.Generator,
+    params: WorkloadParams,
+    pools: _Pools,
+    emitters: np.ndarray,
+    sequences: np.ndarray,
+    timestamps: np.ndarray,
+) -> Records:
+    count, signatures = len(emitters), params.guardian_signatures
+    rows = np.empty(count, dtype=[
+        ("version", "u1"),
+        ("guardian_set_index", ">u4"),
+        ("signature_count", "u1"),
+        ("signatures", GUARDIAN_SIGNATURE_DTYPE, (signatures,)),
+        ("timestamp", ">u4"),
+        ("nonce", ">u4"),
+        ("emitter_chain", ">u2"),
+        ("emitter_address", "V32"),
+        ("sequence", ">u8"),
+        ("consistency_level", "u1"),
+        ("payload", "u1", (params.vaa_payload_length,)),
+    ])
+    rows["version"] = VAA_VERSION
+    rows["guardian_set_index"] = params.guardian_set_index
+    rows["signature_count"] = signatures
+    rows["signatures"]["guardian_index"] = np.arange(signatures)
+    rows["signatures"]["signature"] = _random_bytes(rng, count * signatures, GUARDIAN_SIGNATURE_LENGTH).reshape(
+        count, signatures
+    )
+    rows["timestamp"] = timestamps
+    rows["nonce"] = rng.integers(0, 1 << 32, count)
+    rows["emitter_chain"] = params.src_chain
+    rows["emitter_address"] = pools.emitter_addresses[emitters]
+    rows["sequence"] = sequences
+    rows["consistency_level"] = VAA_CONSISTENCY_LEVEL
+    rows["payload"] = rng.integers(0, 256, (count, params.vaa_payload_length), dtype=np.uint8)
+    return _from_rows(rows)
+
+
+def _make_logs(
+    rng: np.random.Generator,
+    pools: _Pools,
+    ids: np.ndarray,
+    quoters: np.ndarray,
+    dst_chains: np.ndarray,
+    ntt: np.ndarray,
+    delivered: np.ndarray,
+    quotes: Records,
+    requests: Records,
+    relay_instructions: Records,
+) -> Records:
+    count = len(ids)
+    heads = np.empty(count, dtype=_REQUEST_FOR_EXECUTION_LOG_HEAD)
+    head_length = heads.dtype.itemsize - 6
+    heads["selector"] = _selector_value(REQUEST_FOR_EXECUTION_SIGNATURE)
+    heads["quoter_address"] = pools.quoter_addresses[quoters]
+    heads["amt_paid"] = rng.integers(10_000, 10_000_000, count)
+    heads["dst_chain"] = dst_chains
+    heads["dst_addr"] = _random_bytes(rng, count, 32)
+    heads["refund_addr"] = _random_bytes(rng, count, 32)
+    heads["signed_quote_bytes"] = head_length
+    heads["request_bytes"] = head_length + 2 + quotes.lengths
+    heads["relay_instructions"] = head_length + 4 + quotes.lengths + requests.lengths
+    heads["signed_quote_length"] = quotes.lengths
+    request_logs = _concat(_from_rows(heads), quotes, _with_lengths(requests), _with_lengths(relay_instructions))
+
+    received = np.empty(count, dtype=_MESSAGE_RECEIVED_LOG_HEAD)
+    received["selector"] = np.where(
+        ntt, _selector_value(NTT_MESSAGE_RECEIVED_SIGNATURE), _selector_value(VAA_MESSAGE_RECEIVED_SIGNATURE)
+    )
+    received["request_for_execution_id"] = ids
+    received["success"] = np.where(delivered, 0x80, 0)
+    received["error_reason"] = received.dtype.itemsize - 6
+    received["error_reason_length"] = np.where(delivered, 0, len(ERROR_REASON))
+    failed = (~delivered).astype(np.int64)
+    error_reasons = _mix(failed, [_repeat(b"", count - int(failed.sum())), _repeat(ERROR_REASON, int(failed.sum()))])
+    received_logs = _concat(_from_rows(received), error_reasons)
+
+    # the logs of each request are adjacent
+    return _mix(np.tile(np.arange(2), count), [request_logs, received_logs])
+
+
+def generate_chunk(
+    start: int,
+    count: int,
+    seed: int = 0,
+    params: WorkloadParams = WorkloadParams(),
+) -> WorkloadChunk:
+    """Generates the records of a workload from the start index, independently of the other chunks.
+
+    Args:
+        start: The index of the first record in the workload.
+        count: The number of records.
+        seed: The seed of the workload.
+        params: The mix of the traffic.
+
+    Returns:
+        The records, with every request referring to its quote, VAA and logs.
+    """
+    pools = _make_pools(params, seed)
+    rng = np.random.default_rng([seed, 1, start])
+
+    sequences = np.arange(start, start + count, dtype=np.uint64)
+    timestamps = params.start_time + sequences // params.requests_per_second
+    ids = _random_bytes(rng, count, 32)
+    quoters = rng.integers(0, params.quoters, count)
+    dst_chains = np.asarray(params.dst_chains, dtype=np.uint16)[rng.integers(0, len(params.dst_chains), count)]
+    emitters = rng.integers(0, params.emitters, count)
+    ntt = rng.random(count) < params.ntt_ratio
+    delivered = rng.random(count) >= params.failure_ratio
+
+    quotes = _make_quotes(rng, params, pools, quoters, dst_chains, timestamps)
+    requests = _make_requests(rng, params, pools, ntt, emitters, sequences)
+    relay_instructions = _make_relay_instructions(rng, params, count)
+    return WorkloadChunk(
+        start=start,
+        request_for_execution_ids=_from_rows(ids),
+        quotes=quotes,
+        requests=requests,
+        relay_instructions=relay_instructions,
+        vaas=_make_vaas(rng, params, pools, emitters, sequences, timestamps),
+        logs=_make_logs(rng, pools, ids, quoters, dst_chains, ntt, delivered, quotes, requests, relay_instructions),
+        delivered=delivered,
+    )
+
+
+def iter_workload(
+    count: int,
+    seed: int = 0,
+    params: WorkloadParams = WorkloadParams(),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[WorkloadChunk]:
+    """Yields the records of a workload a chunk at a time, so only one chunk is held in memory."""
+    for start in range(0, count, chunk_size):
+        yield generate_chunk(start, min(chunk_size, count - start), seed, params)
+
+
+def write_workload(
+    directory: str | Path,
+    count: int,
+    seed: int = 0,
+    params: WorkloadParams = WorkloadParams(),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[str, Path]:
+    """Writes a workload to one file per kind of record, each record prefixed by its 4-byte big-endian length.
+
+    Returns:
+        The path of the file of each kind of record, see ``WORKLOAD_FILES``.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {kind: directory / name for kind, name in WORKLOAD_FILES.items()}
+    with ExitStack() as stack:
+        files = {kind: stack.enter_context(path.open("wb")) for kind, path in paths.items()}
+        for chunk in iter_workload(count, seed, params, chunk_size):
+            for kind, file in files.items():
+                file.write(_with_lengths(getattr(chunk, kind), np.dtype(">u4")).data)
+    return paths
+
+
+def read_records(path: str | Path) -> Iterator[bytes]:
+    """Streams the records of a file written by ``write_workload``."""
+    with Path(path).open("rb") as file:
+        while header := file.read(_RECORD_LENGTH.size):
+            length = _RECORD_LENGTH.unpack(header)[0]
+            yield file.read(length)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int, help="requests to generate")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="requests generated at a time")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    paths = write_workload(args.out_dir, args.count, args.seed, chunk_size=args.chunk_size)
+    size = sum(path.stat().st_size for path in paths.values())
+    print(f"Generated {args.count} requests ({size / 2**20:.1f} MiB) in {time.monotonic() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
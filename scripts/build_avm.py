@@ -0,0 +1,337 @@
+"""Incremental build of the AVM contracts.
+
+Each module under ``executor_contracts/avm`` defining a contract is compiled on its own, and its TEAL, ARC-56 and
+TypeScript client are cached under a hash of its import closure: the contents of every local module it imports,
+directly or not, the versions of the packages it imports from and of the compiler, and the compile options. Unchanged
+contracts reuse their cached artifacts, while the others are compiled in parallel. The artifacts of all contracts are
+then copied to ``specs/teal``, ``specs/arc56`` and ``specs/client``.
+
+Run from the repository root::
+
+    python3 scripts/build_avm.py [--jobs N] [--force] [--prune]
+"""
+import argparse
+import ast
+import concurrent.futures
+import functools
+import hashlib
+import importlib.metadata
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
+
+# Constants
+CACHE_VERSION = 1
+
+SOURCE_ROOT = Path(".")
+CONTRACTS_DIR = Path("executor_contracts/avm")
+SPECS_DIR = Path("specs")
+CACHE_DIR = Path(".build-cache/avm")
+TMP_PREFIX = ".tmp-"
+
+COMPILE_OPTIONS = (
+    "--target-avm-version", "11",
+    "--optimization-level", "2",
+    "--no-output-source-map",
+    "--no-output-client",
+    "--no-output-arc32",
+    "--output-arc56",
+    "--output-teal",
+)
+TOOLCHAIN_DISTRIBUTIONS = ("puyapy", "algokit")
+
+ARTIFACT_PATTERNS = {
+    "teal": "*.teal",
+    "arc56": "*.arc56.json",
+    "client": "*.client.ts",
+}
+
+# Base classes of the modules which do not define a contract to compile.
+NON_CONTRACT_BASES = frozenset(("Struct", "ABC"))
+
+
+class Module(NamedTuple):
+    name: str
+    path: Path
+    is_package: bool
+
+
+class BuildResult(NamedTuple):
+    compiled: list[str]
+    reused: list[str]
+
+
+Compiler = Callable[[Path, Path], None]
+
+
+def find_modules(contracts_dir: Path, source_root: Path = SOURCE_ROOT) -> dict[str, Module]:
+    """Finds the modules under the contracts directory by their dotted name relative to the source root."""
+    modules = {}
+    for path in sorted(contracts_dir.rglob("*.py")):
+        parts = path.relative_to(source_root).with_suffix("").parts
+        is_package = parts[-1] == "__init__"
+        if is_package:
+            parts = parts[:-1]
+        name = ".".join(parts)
+        modules[name] = Module(name, path, is_package)
+    # the packages above the contracts directory are imported as well
+    for parent in contracts_dir.relative_to(source_root).parents:
+        init_path = source_root / parent / "__init__.py"
+        if parent.parts and init_path.exists():
+            name = ".".join(parent.parts)
+            modules[name] = Module(name, init_path, True)
+    return modules
+
+
+def _imported_names(module: Module) -> Iterable[str]:
+    tree = ast.parse(module.path.read_bytes(), str(module.path))
+    package = module.name if module.is_package else module.name.rpartition(".")[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{base}.{node.module}" if node.module else base
+            else:
+                base = node.module or ""
+            yield base
+            # the imported names may be submodules
+            yield from (f"{base}.{alias.name}" for alias in node.names)
+
+
+def import_closure(name: str, modules: dict[str, Module]) -> tuple[set[str], set[str]]:
+    """Gets the local modules a module imports, directly or not, and the top-level names of the other imports.
+
+    Importing a module also imports the packages it is in, so those are part of the closure too.
+
+    Returns:
+        The names of the local modules including the module itself, and the top-level names of the other imports.
+    """
+    local_roots = {module_name.partition(".")[0] for module_name in modules}
+    local, external = set(), set()
+    pending = [name]
+    while pending:
+        name = pending.pop()
+        if name in local:
+            continue
+        local.add(name)
+        parent = name.rpartition(".")[0]
+        if parent in modules:
+            pending.append(parent)
+        for imported in _imported_names(modules[name]):
+            if imported in modules:
+                pending.append(imported)
+            elif imported.partition(".")[0] not in local_roots:
+                external.add(imported.partition(".")[0])
+    return local, external
+
+
+def is_contract_module(module: Module) -> bool:
+    """Whether a module defines a class which is neither a struct nor abstract, the classes puyapy compiles."""
+    tree = ast.parse(module.path.read_bytes(), str(module.path))
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.bases:
+            base_names = {base.id if isinstance(base, ast.Name) else getattr(base, "attr", "") for base in node.bases}
+            if not base_names & NON_CONTRACT_BASES:
+                return True
+    return False
+
+
+@functools.cache
+def _get_packages_distributions() -> dict[str, list[str]]:
+    return importlib.metadata.packages_distributions()
+
+
+def get_distribution_versions(names: Iterable[str]) -> list[str]:
+    """Gets ``distribution==version`` of the installed distributions providing the top-level import names.
+
+    Names which no distribution provides, such as the standard library, are left out.
+    """
+    distributions = _get_packages_distributions()
+    versions = set()
+    for name in names:
+        for distribution in distributions.get(name, ()):
+            versions.add(f"{distribution}=={importlib.metadata.version(distribution)}")
+    return sorted(versions)
+
+
+def get_toolchain() -> list[str]:
+    """Gets the versions of the compiler and client generator, part of every contract hash."""
+    versions = []
+    for distribution in TOOLCHAIN_DISTRIBUTIONS:
+        try:
+            versions.append(f"{distribution}=={importlib.metadata.version(distribution)}")
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f"{distribution}==")
+    return versions
+
+
+def hash_contract(name: str, modules: dict[str, Module], toolchain: Iterable[str]) -> str:
+    """Hashes the import closure of a contract module with the toolchain versions and compile options.
+
+    Returns:
+        The hex digest keying the cached artifacts of the contract.
+    """
+    local, external = import_closure(name, modules)
+    digest = hashlib.sha256()
+
+    def update(*fields: str | bytes) -> None:
+        for field in fields:
+            data = field.encode() if isinstance(field, str) else field
+            digest.update(len(data).to_bytes(8, "big") + data)
+
+    update(str(CACHE_VERSION), name, *COMPILE_OPTIONS, *toolchain, *get_distribution_versions(external))
+    for module_name in sorted(local):
+        update(module_name, modules[module_name].path.read_bytes())
+    return digest.hexdigest()
+
+
+def compile_contract(path: Path, out_dir: Path) -> None:
+    """Compiles a contract module with puyapy and generates the clients of its ARC-56 specs.
+
+    Writes the artifacts to the ``teal``, ``arc56`` and ``client`` directories of the output directory.
+
+    Raises:
+        subprocess.CalledProcessError: If the compiler or client generator fails.
+    """
+    build_dir = out_dir / "build"
+    _run("algokit", "compile", "py", str(path), *COMPILE_OPTIONS, "--out-dir", str(build_dir.absolute()))
+    for kind in ("teal", "arc56"):
+        for artifact in build_dir.rglob(ARTIFACT_PATTERNS[kind]):
+            destination = out_dir / kind / artifact.relative_to(build_dir)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            artifact.replace(destination)
+    for spec in (out_dir / "arc56").rglob(ARTIFACT_PATTERNS["arc56"]):
+        _run(
+            "algokit", "generate", "client", str(spec),
+            "--output", str(out_dir / "client" / "{contract_name}.client.ts"),
+            "--language", "typescript",
+        )
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def _run(*args: str) -> None:
+    result = subprocess.run(args, capture_output=True, text=True)
+    if result.returncode:
+        raise subprocess.CalledProcessError(result.returncode, args, result.stdout, result.stderr)
+
+
+def _build_entry(module: Module, entry_dir: Path, compiler: Compiler) -> None:
+    # compile next to the cache entry then move it in place, so an interrupted build leaves no partial entry
+    tmp_dir = Path(tempfile.mkdtemp(prefix=TMP_PREFIX, dir=entry_dir.parent))
+    try:
+        compiler(module.path, tmp_dir)
+        for kind in ARTIFACT_PATTERNS:
+            (tmp_dir / kind).mkdir(exist_ok=True)
+        try:
+            tmp_dir.replace(entry_dir)
+        except OSError:
+            # a concurrent build stored the same entry
+            if not entry_dir.is_dir():
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _install(entry_dirs: Iterable[Path], specs_dir: Path) -> None:
+    for kind in ARTIFACT_PATTERNS:
+        shutil.rmtree(specs_dir / kind, ignore_errors=True)
+        (specs_dir / kind).mkdir(parents=True)
+    for entry_dir in entry_dirs:
+        for kind in ARTIFACT_PATTERNS:
+            shutil.copytree(entry_dir / kind, specs_dir / kind, dirs_exist_ok=True)
+
+
+def build(
+    contracts_dir: Path = CONTRACTS_DIR,
+    specs_dir: Path = SPECS_DIR,
+    cache_dir: Path = CACHE_DIR,
+    jobs: int | None = None,
+    force: bool = False,
+    prune: bool = False,
+    source_root: Path = SOURCE_ROOT,
+    compiler: Compiler = compile_contract,
+    toolchain: Iterable[str] | None = None,
+) -> BuildResult:
+    """Builds the contracts, compiling only those whose import closure changed since they were cached.
+
+    Args:
+        contracts_dir: The directory of the contract modules.
+        specs_dir: The directory the artifacts of all contracts are copied to.
+        cache_dir: The directory of the cached artifacts, one entry per contract hash.
+        jobs: The number of contracts compiled at a time, defaults to the number of cores.
+        force: Compile every contract, replacing its cached artifacts.
+        prune: Remove the cache entries no contract uses after the build.
+        source_root: The directory the module names are relative to.
+        compiler: Compiles a contract module into the ``teal``, ``arc56`` and ``client`` directories of a directory.
+        toolchain: The toolchain versions added to every hash, defaults to the installed ones.
+
+    Returns:
+        The names of the compiled contract modules and of those which reused their cached artifacts.
+
+    Raises:
+        subprocess.CalledProcessError: If a contract fails to compile, after the other contracts finished.
+    """
+    modules = find_modules(contracts_dir, source_root)
+    toolchain = get_toolchain() if toolchain is None else list(toolchain)
+    contracts = [module for module in modules.values() if is_contract_module(module)]
+    entry_dirs = {module.name: cache_dir / hash_contract(module.name, modules, toolchain) for module in contracts}
+
+    if force:
+        for entry_dir in entry_dirs.values():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+    stale = [module for module in contracts if not entry_dirs[module.name].is_dir()]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with concurrent.futures.ThreadPoolExecutor(jobs or os.cpu_count()) as executor:
+        futures = [executor.submit(_build_entry, module, entry_dirs[module.name], compiler) for module in stale]
+    for future in futures:
+        future.result()
+
+    _install(entry_dirs.values(), specs_dir)
+    if prune:
+        for entry_dir in set(cache_dir.iterdir()) - set(entry_dirs.values()):
+            # leave the entries other builds are still compiling
+            if not entry_dir.name.startswith(TMP_PREFIX):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+
+    stale_names = {module.name for module in stale}
+    return BuildResult(
+        [name for name in entry_dirs if name in stale_names],
+        [name for name in entry_dirs if name not in stale_names],
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, help="contracts compiled at a time, defaults to the number of cores")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--specs-dir", type=Path, default=SPECS_DIR)
+    parser.add_argument("--force", action="store_true", help="compile every contract, ignoring the cache")
+    parser.add_argument("--prune", action="store_true", help="remove cache entries no contract uses")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    try:
+        result = build(
+            specs_dir=args.specs_dir, cache_dir=args.cache_dir, jobs=args.jobs, force=args.force, prune=args.prune
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"{' '.join(e.cmd)} failed:\n{e.stdout}{e.stderr}", file=sys.stderr)
+        return 1
+    for name in result.compiled:
+        print(f"compiled {name}")
+    print(
+        f"Built {len(result.compiled) + len(result.reused)} contracts in {time.monotonic() - start:.1f}s, "
+        f"{len(result.compiled)} compiled and {len(result.reused)} reused from {args.cache_dir}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
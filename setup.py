@@ -21,10 +21,16 @@ setuptools.setup(
         "algorand-python>=3.2.0,<4",
         "puyapy>=5.5.0,<6",
     ],
+    extras_require={
+        "numpy": ["numpy>=1.26"],
+        "relayer": ["py-algorand-sdk>=2.11.1,<3"],
+    },
     packages=setuptools.find_packages(
         include=(
             "executor_contracts",
             "executor_contracts.*",
+            "executor_sdk",
+            "executor_sdk.*",
         )
     ),
     python_requires=">=3.12",
@@ -1,6 +1,7 @@
 import { describe, it, before } from "node:test";
 
 import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
+import { sha256 } from "@noble/hashes/sha2";
 import { getApplicationAddress, OnApplicationComplete } from "algosdk";
 import { expect } from "chai";
 
@@ -9,6 +10,7 @@ import { MockNttV1ReceiverFactory } from "../../../../specs/client/MockNttV1Rece
 import { NttV1ReceiveWithGasDropOffFactory } from "../../../../specs/client/NttV1ReceiveWithGasDropOff.client.js";
 import { convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
 import { deployWormholeCore } from "../../utils/contract.js";
+import { advancePrevBlockTimestamp } from "../../utils/time.js";
 
 import type { FakeNttV1ReceiverClient } from "../../../../specs/client/FakeNttV1Receiver.client.js";
 import type { MockNttV1ReceiverClient } from "../../../../specs/client/MockNttV1Receiver.client.js";
@@ -17,40 +19,51 @@ import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils
 import type { AlgorandFixture } from "@algorandfoundation/algokit-utils/types/testing";
 import type { Account, Address } from "algosdk";
 
+const generateVaa = (body: Uint8Array) =>
+  // version, guardian set index and a single signature before the body
+  Uint8Array.from([1, ...convertNumberToBytes(0, 4), 1, ...new Uint8Array(66), ...body]);
+
 const generateTxnArgs = async (
   localnet: AlgorandFixture,
   wormholeCoreAppId: bigint,
   nttV1ReceiverClient: MockNttV1ReceiverClient,
   executor: Address & Account & TransactionSignerAccount,
-  dropOffTo: Address & Account & TransactionSignerAccount
+  dropOffTo: Address & Account & TransactionSignerAccount,
+  note?: Uint8Array,
+  vaa: Uint8Array = generateVaa(getRandomBytes(50))
 ) => {
   const gasPaymentTxn = await localnet.algorand.createTransaction.payment({
     sender: executor,
     receiver: getApplicationAddress(nttV1ReceiverClient.appId),
     amount: (1).algo(),
+    note,
   });
   const verifySigsTxn = await localnet.algorand.createTransaction.appCall({
     sender: executor,
     appId: wormholeCoreAppId,
     onComplete: OnApplicationComplete.NoOpOC,
     args: [enc.encode("verifySigs")],
+    note,
   });
   const verifyVAATxn = await localnet.algorand.createTransaction.appCall({
     sender: executor,
     appId: wormholeCoreAppId,
     onComplete: OnApplicationComplete.NoOpOC,
-    args: [enc.encode("verifyVAA")],
+    args: [enc.encode("verifyVAA"), vaa],
+    note,
   });
   const {
     transactions: [, receiveNttTxn],
   } = await nttV1ReceiverClient.createTransaction.receiveMessage({
     sender: executor,
     args: [verifyVAATxn],
+    note,
   });
   const gasDropOffTxn = await localnet.algorand.createTransaction.payment({
     sender: executor,
     receiver: dropOffTo.toString(),
     amount: (5).algo(),
+    note,
   });
   return { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn };
 };
@@ -76,6 +89,7 @@ describe("NttV1ReceiveWithGasDropOff", () => {
   let executor: Address & Account & TransactionSignerAccount;
   let user: Address & Account & TransactionSignerAccount;
 
+  const ERROR_REASON_TRUNCATION_THRESHOLD = 132;
   const requestForExecutionId = getRandomBytes(32);
 
   before(
@@ -130,11 +144,13 @@ describe("NttV1ReceiveWithGasDropOff", () => {
 
   describe("creation", () => {
     it("deploys with correct state", async () => {
-      const { appClient, result } = await factory.deploy({ createParams: { sender: creator } });
+      const { appClient, result } = await factory.send.create.create({ sender: creator, args: [wormholeCoreAppId, false] });
       appId = result.appId;
       client = appClient;
 
       expect(appId).not.to.equal(0n);
+      expect(await client.state.global.wormholeCore()).to.equal(wormholeCoreAppId);
+      expect(await client.state.global.trackDeliveries()).to.equal(false);
     });
   });
 
@@ -449,6 +465,60 @@ describe("NttV1ReceiveWithGasDropOff", () => {
       }
     });
 
+    it("fails when verify vaa call is to incorrect method", async () => {
+      const { gasPaymentTxn, verifySigsTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+      const verifyVAATxn = await localnet.algorand.createTransaction.appCall({
+        sender: executor,
+        appId: wormholeCoreAppId,
+        onComplete: OnApplicationComplete.NoOpOC,
+        args: [enc.encode("verifySigs")],
+        note: enc.encode("incorrect"),
+      });
+      const {
+        transactions: [, receiveNttTxn],
+      } = await nttV1ReceiverClient.createTransaction.receiveMessage({
+        sender: executor,
+        args: [verifyVAATxn],
+      });
+
+      try {
+        await client.send.receiveMessage({
+          sender: user,
+          args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn, requestForExecutionId],
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect verify vaa method");
+      }
+    });
+
+    it("fails when verify vaa call is to unknown app", async () => {
+      const decoyCoreAppId = await deployWormholeCore(localnet, creator);
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        decoyCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+
+      try {
+        await client.send.receiveMessage({
+          sender: user,
+          args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn, requestForExecutionId],
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown verify vaa app");
+      }
+    });
+
     it("succeeds", async () => {
       const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
         localnet,
@@ -470,6 +540,396 @@ describe("NttV1ReceiveWithGasDropOff", () => {
     });
   });
 
+  describe("receive messages", () => {
+    it("fails when gas index isn't payment", async () => {
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 1,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("transaction type is pay");
+      }
+    });
+
+    it("fails when verify sigs index isn't app call", async () => {
+      const { gasPaymentTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+      const paymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: executor,
+        receiver: user.toString(),
+        amount: (0).algo(),
+      });
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(paymentTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("transaction type is appl");
+      }
+    });
+
+    it("fails when group indices aren't increasing", async () => {
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId: getRandomBytes(32),
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Group indices out of order");
+      }
+    });
+
+    it("fails when verify sigs aren't directly before verify vaa", async () => {
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 2,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Verify sigs not before verify vaa");
+      }
+    });
+
+    it("fails when verify sigs call is to incorrect method", async () => {
+      const { gasPaymentTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+      const verifySigsTxn = await localnet.algorand.createTransaction.appCall({
+        sender: executor,
+        appId: wormholeCoreAppId,
+        onComplete: OnApplicationComplete.NoOpOC,
+        args: [enc.encode("verifyVAA")],
+        note: enc.encode("incorrect"),
+      });
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect verify sigs method");
+      }
+    });
+
+    it("fails when verify vaa call is to incorrect method", async () => {
+      const { gasPaymentTxn, verifySigsTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+      const verifyVAATxn = await localnet.algorand.createTransaction.appCall({
+        sender: executor,
+        appId: wormholeCoreAppId,
+        onComplete: OnApplicationComplete.NoOpOC,
+        args: [enc.encode("verifySigs")],
+        note: enc.encode("incorrect"),
+      });
+      const {
+        transactions: [, receiveNttTxn],
+      } = await nttV1ReceiverClient.createTransaction.receiveMessage({
+        sender: executor,
+        args: [verifyVAATxn],
+      });
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect verify vaa method");
+      }
+    });
+
+    it("fails when gas recipient is not ntt receiver app address", async () => {
+      const { verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+      const gasPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: executor,
+        receiver: user.toString(),
+        amount: (1).algo(),
+      });
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn)
+          .receiveMessages({
+            sender: user,
+            args: [
+              [
+                {
+                  gas: 0,
+                  verifySigs: 1,
+                  verifySigsCount: 1,
+                  verifyVaa: 2,
+                  receiveNtt: 3,
+                  gasDropOff: 4,
+                  requestForExecutionId,
+                },
+              ],
+            ],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Gas receiver unknown");
+      }
+    });
+
+    it("succeeds with multiple messages and verify sigs", async () => {
+      const otherRequestForExecutionId = getRandomBytes(32);
+      const first = await generateTxnArgs(localnet, wormholeCoreAppId, nttV1ReceiverClient, executor, user);
+      const extraVerifySigsTxn = await localnet.algorand.createTransaction.appCall({
+        sender: executor,
+        appId: wormholeCoreAppId,
+        onComplete: OnApplicationComplete.NoOpOC,
+        args: [enc.encode("verifySigs")],
+        note: enc.encode("extra"),
+      });
+      const second = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user,
+        enc.encode("second")
+      );
+
+      const res = await client
+        .newGroup()
+        .addTransaction(first.gasPaymentTxn)
+        .addTransaction(first.verifySigsTxn)
+        .addTransaction(extraVerifySigsTxn)
+        .addTransaction(first.verifyVAATxn)
+        .addTransaction(first.receiveNttTxn)
+        .addTransaction(first.gasDropOffTxn)
+        .addTransaction(second.gasPaymentTxn)
+        .addTransaction(second.verifySigsTxn)
+        .addTransaction(second.verifyVAATxn)
+        .addTransaction(second.receiveNttTxn)
+        .addTransaction(second.gasDropOffTxn)
+        .receiveMessages({
+          sender: user,
+          args: [
+            [
+              {
+                gas: 0,
+                verifySigs: 1,
+                verifySigsCount: 2,
+                verifyVaa: 3,
+                receiveNtt: 4,
+                gasDropOff: 5,
+                requestForExecutionId,
+              },
+              {
+                gas: 6,
+                verifySigs: 7,
+                verifySigsCount: 1,
+                verifyVaa: 8,
+                receiveNtt: 9,
+                gasDropOff: 10,
+                requestForExecutionId: otherRequestForExecutionId,
+              },
+            ],
+          ],
+        })
+        .send();
+
+      // logs
+      expect(res.confirmations[11].logs?.length).to.equal(2);
+      expect(res.confirmations[11].logs?.[0]).to.deep.equal(
+        getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [requestForExecutionId, true, enc.encode("")])
+      );
+      expect(res.confirmations[11].logs?.[1]).to.deep.equal(
+        getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [otherRequestForExecutionId, true, enc.encode("")])
+      );
+    });
+  });
+
   describe("report error", () => {
     for (const { requestForExecutionIdLength, errorReasonLengthDelta, arg } of [
       { requestForExecutionIdLength: 30, errorReasonLengthDelta: 0, arg: "arc4.static_array<arc4.uint8, 32>" },
@@ -514,5 +974,314 @@ describe("NttV1ReceiveWithGasDropOff", () => {
         getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [requestForExecutionId, false, errorReason])
       );
     });
+
+    it("succeeds and truncates error reason", async () => {
+      const errorReason = getRandomBytes(200);
+      const res = await client.send.reportError({
+        sender: user,
+        args: [requestForExecutionId, errorReason],
+      });
+
+      // logs
+      expect(res.confirmations[0].logs?.[0]).to.deep.equal(
+        getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [
+          requestForExecutionId,
+          false,
+          errorReason.slice(0, ERROR_REASON_TRUNCATION_THRESHOLD),
+        ])
+      );
+    });
+  });
+
+  describe("report errors", () => {
+    it("succeeds with error reason per request", async () => {
+      const reports = [
+        { requestForExecutionId: getRandomBytes(32), errorReason: enc.encode("underflow") },
+        { requestForExecutionId: getRandomBytes(32), errorReason: getRandomBytes(200) },
+        { requestForExecutionId: getRandomBytes(32), errorReason: enc.encode("") },
+      ];
+      const res = await client.send.reportErrors({ sender: user, args: [reports] });
+
+      // logs
+      expect(res.confirmations[0].logs).to.deep.equal(
+        reports.map(({ requestForExecutionId, errorReason }) =>
+          getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [
+            requestForExecutionId,
+            false,
+            errorReason.slice(0, ERROR_REASON_TRUNCATION_THRESHOLD),
+          ])
+        )
+      );
+    });
+
+    it("succeeds with shared error reason", async () => {
+      const requestForExecutionIds = [getRandomBytes(32), getRandomBytes(32), getRandomBytes(32)];
+      const errorReason = getRandomBytes(140);
+      const res = await client.send.reportErrorsWithReason({
+        sender: user,
+        args: [requestForExecutionIds, errorReason],
+      });
+
+      // logs
+      expect(res.confirmations[0].logs).to.deep.equal(
+        requestForExecutionIds.map((id) =>
+          getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [
+            id,
+            false,
+            errorReason.slice(0, ERROR_REASON_TRUNCATION_THRESHOLD),
+          ])
+        )
+      );
+    });
+  });
+
+  describe("delivery tracking mode", () => {
+    const DELIVERY_BOX_MIN_BALANCE = 35_700;
+    const DELIVERY_RETENTION = 86_400;
+
+    let trackingClient: NttV1ReceiveWithGasDropOffClient;
+    let trackingAppId: bigint;
+
+    const getDeliveryId = (vaaBody: Uint8Array) =>
+      sha256(Uint8Array.from([...convertNumberToBytes(nttV1ReceiverClient.appId, 8), ...vaaBody]));
+
+    const deliveredVaaBody = getRandomBytes(50);
+    let deliveryId: Uint8Array;
+
+    const generateDeliveriesPaymentTxn = (amount: number) =>
+      localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(trackingAppId),
+        amount: amount.microAlgos(),
+      });
+
+    const receiveMessage = async (
+      vaaBody: Uint8Array,
+      deliveriesPaymentAmount = DELIVERY_BOX_MIN_BALANCE,
+      id = getRandomBytes(32)
+    ) => {
+      const deliveriesPaymentTxn = await generateDeliveriesPaymentTxn(deliveriesPaymentAmount);
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user,
+        undefined,
+        generateVaa(vaaBody)
+      );
+      return trackingClient
+        .newGroup()
+        .addTransaction(deliveriesPaymentTxn)
+        .receiveMessage({
+          sender: user,
+          args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn, id],
+        })
+        .send();
+    };
+
+    const receiveMessages = async (vaaBodies: Uint8Array[], deliveriesPaymentAmount: number) => {
+      let group = trackingClient.newGroup();
+      const messages = [];
+      for (const [i, vaaBody] of vaaBodies.entries()) {
+        const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+          localnet,
+          wormholeCoreAppId,
+          nttV1ReceiverClient,
+          executor,
+          user,
+          convertNumberToBytes(i, 1),
+          generateVaa(vaaBody)
+        );
+        group = group
+          .addTransaction(gasPaymentTxn)
+          .addTransaction(verifySigsTxn)
+          .addTransaction(verifyVAATxn)
+          .addTransaction(receiveNttTxn)
+          .addTransaction(gasDropOffTxn);
+        messages.push({
+          gas: 5 * i,
+          verifySigs: 1 + 5 * i,
+          verifySigsCount: 1,
+          verifyVaa: 2 + 5 * i,
+          receiveNtt: 3 + 5 * i,
+          gasDropOff: 4 + 5 * i,
+          requestForExecutionId: getRandomBytes(32),
+        });
+      }
+      // deliveries payment directly precedes the call
+      return group
+        .addTransaction(await generateDeliveriesPaymentTxn(deliveriesPaymentAmount))
+        .receiveMessages({ sender: user, args: [messages] })
+        .send();
+    };
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({ sender: creator, args: [wormholeCoreAppId, true] });
+      trackingAppId = result.appId;
+      trackingClient = appClient;
+      deliveryId = getDeliveryId(deliveredVaaBody);
+
+      // fund account min balance, box min balances are funded per delivery
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(trackingAppId),
+        amount: (100_000).microAlgos(),
+      });
+
+      expect(await trackingClient.state.global.trackDeliveries()).to.equal(true);
+    });
+
+    it("receive message fails without deliveries payment", async () => {
+      const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+        localnet,
+        wormholeCoreAppId,
+        nttV1ReceiverClient,
+        executor,
+        user
+      );
+
+      try {
+        await trackingClient
+          .newGroup()
+          .addTransaction(
+            await localnet.algorand.createTransaction.payment({
+              sender: user,
+              receiver: user,
+              amount: DELIVERY_BOX_MIN_BALANCE.microAlgos(),
+            })
+          )
+          .receiveMessage({
+            sender: user,
+            args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn, getRandomBytes(32)],
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown deliveries payment receiver");
+      }
+    });
+
+    it("receive message fails when deliveries payment is incorrect amount", async () => {
+      try {
+        await receiveMessage(getRandomBytes(50), DELIVERY_BOX_MIN_BALANCE - 1);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect deliveries payment amount");
+      }
+    });
+
+    it("receive message fails when deliveries payment is shared between calls", async () => {
+      const deliveriesPaymentTxn = await generateDeliveriesPaymentTxn(DELIVERY_BOX_MIN_BALANCE);
+      let group = trackingClient.newGroup().addTransaction(deliveriesPaymentTxn);
+      for (const i of [0, 1]) {
+        const { gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn } = await generateTxnArgs(
+          localnet,
+          wormholeCoreAppId,
+          nttV1ReceiverClient,
+          executor,
+          user,
+          convertNumberToBytes(i, 1),
+          generateVaa(getRandomBytes(50))
+        );
+        group = group.receiveMessage({
+          sender: user,
+          args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, receiveNttTxn, gasDropOffTxn, getRandomBytes(32)],
+        });
+      }
+
+      try {
+        await group.send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        // second call finds the previous call's transaction before its gas
+        expect((e as Error).message).to.include("transaction type is pay");
+      }
+    });
+
+    it("receive message marks vaa delivered", async () => {
+      const res = await receiveMessage(deliveredVaaBody, DELIVERY_BOX_MIN_BALANCE, requestForExecutionId);
+
+      // logs
+      expect(res.confirmations[6].logs?.[0]).to.deep.equal(
+        getEventBytes("NTTMessageReceived(byte[32],bool,byte[])", [requestForExecutionId, true, enc.encode("")])
+      );
+      expect(await trackingClient.isDelivered({ args: [[deliveryId, getRandomBytes(32)]] })).to.deep.equal([
+        true,
+        false,
+      ]);
+      const delivery = await trackingClient.state.box.deliveries.value(deliveryId);
+      expect(delivery?.funder).to.equal(user.toString());
+    });
+
+    it("receive message fails when vaa already delivered", async () => {
+      try {
+        await receiveMessage(deliveredVaaBody);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Already delivered");
+      }
+    });
+
+    it("receive messages fails when vaa repeated in batch", async () => {
+      const vaaBody = getRandomBytes(50);
+
+      try {
+        await receiveMessages([vaaBody, vaaBody], 2 * DELIVERY_BOX_MIN_BALANCE);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Already delivered");
+      }
+      expect(await trackingClient.isDelivered({ args: [[getDeliveryId(vaaBody)]] })).to.deep.equal([false]);
+    });
+
+    it("receive messages fails when deliveries payment is incorrect amount", async () => {
+      try {
+        await receiveMessages([getRandomBytes(50), getRandomBytes(50)], DELIVERY_BOX_MIN_BALANCE);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect deliveries payment amount");
+      }
+    });
+
+    it("receive messages marks each vaa delivered", async () => {
+      const vaaBodies = [getRandomBytes(50), getRandomBytes(50)];
+      await receiveMessages(vaaBodies, 2 * DELIVERY_BOX_MIN_BALANCE);
+      expect(await trackingClient.isDelivered({ args: [vaaBodies.map((vaaBody) => getDeliveryId(vaaBody))] })).to.deep.equal([
+        true,
+        true,
+      ]);
+    });
+
+    it("report error does not check deliveries", async () => {
+      await trackingClient.send.reportError({ sender: user, args: [getRandomBytes(32), enc.encode("underflow")] });
+    });
+
+    it("prune skips delivery which is retained", async () => {
+      await trackingClient.send.pruneDeliveries({ sender: creator, args: [[deliveryId, getRandomBytes(32)]] });
+      expect(await trackingClient.isDelivered({ args: [[deliveryId]] })).to.deep.equal([true]);
+    });
+
+    it("prune deletes delivery after retention and refunds funder", async () => {
+      // balances before
+      const { balance: userBalanceBefore } = await localnet.algorand.account.getInformation(user);
+
+      await advancePrevBlockTimestamp(localnet, DELIVERY_RETENTION);
+      const res = await trackingClient.send.pruneDeliveries({
+        sender: creator,
+        args: [[deliveryId]],
+        extraFee: (1000).microAlgos(),
+      });
+      expect(await trackingClient.isDelivered({ args: [[deliveryId]] })).to.deep.equal([false]);
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(BigInt(DELIVERY_BOX_MIN_BALANCE));
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(user.toString());
+
+      // balances after
+      const { balance: userBalanceAfter } = await localnet.algorand.account.getInformation(user);
+      expect(userBalanceAfter.microAlgos).to.equal(userBalanceBefore.microAlgos + BigInt(DELIVERY_BOX_MIN_BALANCE));
+    });
   });
 });
@@ -0,0 +1,233 @@
+import { describe, it, before } from "node:test";
+
+import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
+import { getApplicationAddress, OnApplicationComplete } from "algosdk";
+import { expect } from "chai";
+
+import { MockVaaV1ReceiverFactory } from "../../../../specs/client/MockVaaV1Receiver.client.js";
+import { VaaV1ReceiveWithGasDropOffFactory } from "../../../../specs/client/VaaV1ReceiveWithGasDropOff.client.js";
+import { BenchRecorder, getApprovalHash } from "../../utils/bench.js";
+import { enc, getRandomBytes } from "../../utils/bytes.js";
+import { deployWormholeCore } from "../../utils/contract.js";
+
+import type { MockVaaV1ReceiverClient } from "../../../../specs/client/MockVaaV1Receiver.client.js";
+import type {
+  VaaV1MessageGroupIndices,
+  VaaV1ReceiveWithGasDropOffClient,
+} from "../../../../specs/client/VaaV1ReceiveWithGasDropOff.client.js";
+import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils/types/account";
+import type { Account, Address, Transaction } from "algosdk";
+
+describe("VaaV1ReceiveWithGasDropOff bench", () => {
+  const localnet = algorandFixture();
+
+  let wormholeCoreAppId: bigint;
+  let vaaV1ReceiverClient: MockVaaV1ReceiverClient;
+
+  let client: VaaV1ReceiveWithGasDropOffClient;
+  let trackingClient: VaaV1ReceiveWithGasDropOffClient;
+  let recorder: BenchRecorder;
+
+  let creator: Address & Account & TransactionSignerAccount;
+  let executor: Address & Account & TransactionSignerAccount;
+  let user: Address & Account & TransactionSignerAccount;
+
+  // transactions of a single message, notes keep transactions of different messages distinct
+  const generateMessageTxns = async (verifySigsCount: number, note: Uint8Array) => {
+    const gasPaymentTxn = await localnet.algorand.createTransaction.payment({
+      sender: executor,
+      receiver: getApplicationAddress(vaaV1ReceiverClient.appId),
+      amount: (1).algo(),
+      note,
+    });
+    const verifySigsTxns: Array<Transaction> = [];
+    for (let i = 0; i < verifySigsCount; i++) {
+      verifySigsTxns.push(
+        await localnet.algorand.createTransaction.appCall({
+          sender: executor,
+          appId: wormholeCoreAppId,
+          onComplete: OnApplicationComplete.NoOpOC,
+          args: [enc.encode("verifySigs")],
+          note: Uint8Array.from([...note, i]),
+        })
+      );
+    }
+    // a single signature and a random body so each VAA is distinct
+    const vaa = Uint8Array.from([1, 0, 0, 0, 0, 1, ...new Uint8Array(66), ...getRandomBytes(50)]);
+    const verifyVAATxn = await localnet.algorand.createTransaction.appCall({
+      sender: executor,
+      appId: wormholeCoreAppId,
+      onComplete: OnApplicationComplete.NoOpOC,
+      args: [enc.encode("verifyVAA"), vaa],
+      note,
+    });
+    const {
+      transactions: [, executeVaaTxn],
+    } = await vaaV1ReceiverClient.createTransaction.executeVaaV1({
+      sender: executor,
+      args: [verifyVAATxn],
+      note,
+    });
+    const gasDropOffTxn = await localnet.algorand.createTransaction.payment({
+      sender: executor,
+      receiver: user.toString(),
+      amount: (5).algo(),
+      note,
+    });
+    return [gasPaymentTxn, ...verifySigsTxns, verifyVAATxn, executeVaaTxn, gasDropOffTxn];
+  };
+
+  before(
+    async () => {
+      await localnet.newScope();
+      const { algorand, generateAccount } = localnet.context;
+
+      creator = await generateAccount({ initialFunds: (100).algo() });
+      executor = await generateAccount({ initialFunds: (100).algo() });
+      user = await generateAccount({ initialFunds: (100).algo() });
+
+      wormholeCoreAppId = await deployWormholeCore(localnet, creator);
+
+      // deploy vaa v1 receiver
+      {
+        const vaaV1ReceiverFactory = algorand.client.getTypedAppFactory(MockVaaV1ReceiverFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { appClient } = await vaaV1ReceiverFactory.deploy();
+        vaaV1ReceiverClient = appClient;
+      }
+
+      // deploy vaa v1 receive with gas drop off
+      {
+        const factory = algorand.client.getTypedAppFactory(VaaV1ReceiveWithGasDropOffFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { appClient } = await factory.send.create.create({ sender: creator, args: [wormholeCoreAppId, false] });
+        client = appClient;
+      }
+
+      // deploy with delivery tracking and fund account min balance, box min balances are funded per delivery
+      {
+        const factory = algorand.client.getTypedAppFactory(VaaV1ReceiveWithGasDropOffFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { appClient } = await factory.send.create.create({ sender: creator, args: [wormholeCoreAppId, true] });
+        trackingClient = appClient;
+        await algorand.send.payment({
+          sender: creator,
+          receiver: getApplicationAddress(trackingClient.appId),
+          amount: (100_000).microAlgos(),
+        });
+      }
+
+      const approvalHash = await getApprovalHash(localnet, client.appId);
+      recorder = new BenchRecorder("VaaV1ReceiveWithGasDropOff", approvalHash, approvalHash);
+    },
+    { timeout: 20_000 }
+  );
+
+  it("receive message", async () => {
+    const [gasPaymentTxn, verifySigsTxn, verifyVAATxn, executeVaaTxn, gasDropOffTxn] = await generateMessageTxns(
+      1,
+      enc.encode("receive message")
+    );
+    await recorder.record(
+      "receive_message",
+      "1 verify sigs",
+      client.newGroup().receiveMessage({
+        sender: user,
+        args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, executeVaaTxn, gasDropOffTxn, getRandomBytes(32)],
+      })
+    );
+  });
+
+  it("receive message with delivery tracking", async () => {
+    const [gasPaymentTxn, verifySigsTxn, verifyVAATxn, executeVaaTxn, gasDropOffTxn] = await generateMessageTxns(
+      1,
+      enc.encode("receive message with delivery tracking")
+    );
+    await recorder.record(
+      "receive_message",
+      "1 verify sigs, delivery tracking",
+      trackingClient
+        .newGroup()
+        .addTransaction(
+          await localnet.algorand.createTransaction.payment({
+            sender: user,
+            receiver: getApplicationAddress(trackingClient.appId),
+            amount: (35_700).microAlgos(),
+          })
+        )
+        .receiveMessage({
+          sender: user,
+          args: [gasPaymentTxn, verifySigsTxn, verifyVAATxn, executeVaaTxn, gasDropOffTxn, getRandomBytes(32)],
+        })
+    );
+  });
+
+  it("receive messages", async () => {
+    for (const verifySigsCounts of [[1], [2], [1, 1], [3, 3]]) {
+      const group = client.newGroup();
+      const messages: Array<VaaV1MessageGroupIndices> = [];
+      for (const [i, verifySigsCount] of verifySigsCounts.entries()) {
+        const txns = await generateMessageTxns(verifySigsCount, enc.encode(`message ${i}`));
+        const start = messages.reduce((count, message) => count + message.verifySigsCount + 4, 0);
+        messages.push({
+          gas: start,
+          verifySigs: start + 1,
+          verifySigsCount,
+          verifyVaa: start + 1 + verifySigsCount,
+          executeVaa: start + 2 + verifySigsCount,
+          gasDropOff: start + 3 + verifySigsCount,
+          requestForExecutionId: getRandomBytes(32),
+        });
+        for (const txn of txns) group.addTransaction(txn);
+      }
+      await recorder.record(
+        "receive_messages",
+        `${verifySigsCounts.length} messages, ${verifySigsCounts.join("+")} verify sigs`,
+        group.receiveMessages({ sender: user, args: [messages] })
+      );
+    }
+  });
+
+  it("report error", async () => {
+    for (const errorReasonLength of [0, 32, 132]) {
+      await recorder.record(
+        "report_error",
+        `${errorReasonLength} byte error reason`,
+        client.newGroup().reportError({ sender: user, args: [getRandomBytes(32), getRandomBytes(errorReasonLength)] })
+      );
+    }
+  });
+
+  it("report errors", async () => {
+    for (const count of [1, 8]) {
+      const reports = Array.from({ length: count }, () => ({
+        requestForExecutionId: getRandomBytes(32),
+        errorReason: getRandomBytes(132),
+      }));
+      await recorder.record(
+        "report_errors",
+        `${count} reports, 132 byte error reasons`,
+        client.newGroup().reportErrors({ sender: user, args: [reports] })
+      );
+      await recorder.record(
+        "report_errors_with_reason",
+        `${count} reports, 132 byte error reason`,
+        client.newGroup().reportErrorsWithReason({
+          sender: user,
+          args: [reports.map(({ requestForExecutionId }) => requestForExecutionId), getRandomBytes(132)],
+        })
+      );
+    }
+  });
+
+  it("has no regressions against baseline", () => {
+    const regressions = recorder.writeAndCompare();
+    expect(regressions, regressions.join("\n")).to.be.empty;
+  });
+});
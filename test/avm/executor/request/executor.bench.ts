@@ -0,0 +1,287 @@
+import { describe, it, before } from "node:test";
+
+import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
+import { getApplicationAddress } from "algosdk";
+import { expect } from "chai";
+import { hexToBytes, keccak256, sha256 } from "viem";
+import { generatePrivateKey, privateKeyToAddress } from "viem/accounts";
+
+import { ExecutorFactory } from "../../../../specs/client/Executor.client.js";
+import { BenchRecorder, getApprovalHash } from "../../utils/bench.js";
+import { enc, getRandomBytes } from "../../utils/bytes.js";
+import {
+  encodedSignedQuoteBody,
+  encodeGasDropOffInstruction,
+  encodeGasInstruction,
+  encodeNttV1Request,
+  encodeRelayInstructions,
+  encodeSignedQuote,
+  encodeSignedQuoteHeader,
+  encodeVaaV1Request,
+  signQuote,
+} from "../../utils/quote.js";
+import { getPrevBlockTimestamp } from "../../utils/time.js";
+
+import type { ExecutionRequest, ExecutorClient } from "../../../../specs/client/Executor.client.js";
+import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils/types/account";
+import type { Account, Address } from "algosdk";
+
+describe("Executor bench", () => {
+  const localnet = algorandFixture();
+
+  let factory: ExecutorFactory;
+  let client: ExecutorClient;
+  let compactClient: ExecutorClient;
+  let accrualClient: ExecutorClient;
+  let verifyingClient: ExecutorClient;
+  let indexingClient: ExecutorClient;
+  let recorder: BenchRecorder;
+
+  let creator: Address & Account & TransactionSignerAccount;
+  let user: Address & Account & TransactionSignerAccount;
+  let payee: Address & Account & TransactionSignerAccount;
+  let otherPayee: Address & Account & TransactionSignerAccount;
+
+  const OUR_CHAIN = 8;
+  const AMOUNT = 1_000_000n;
+
+  const prefix = enc.encode("EQ01");
+  const quoterAddress = getRandomBytes(20);
+  const destinationChain = 6;
+  const destinationAddress = getRandomBytes(32);
+
+  const REQUESTS = {
+    ERV1: encodeVaaV1Request(OUR_CHAIN, getRandomBytes(32), 1n),
+    ERN1: encodeNttV1Request(OUR_CHAIN, getRandomBytes(32), getRandomBytes(32)),
+  };
+  const RELAY_INSTRUCTIONS = {
+    none: encodeRelayInstructions([]),
+    gas: encodeRelayInstructions([encodeGasInstruction(250_000n, 0n)]),
+    "gas+drop off": encodeRelayInstructions([
+      encodeGasInstruction(250_000n, 0n),
+      encodeGasDropOffInstruction(1_000_000n, getRandomBytes(32)),
+    ]),
+  };
+
+  const getSignedQuoteBytes = async (quotePayee: Address & Account) =>
+    encodeSignedQuote(
+      encodeSignedQuoteHeader(
+        prefix,
+        quoterAddress,
+        quotePayee.publicKey,
+        OUR_CHAIN,
+        destinationChain,
+        (await getPrevBlockTimestamp(localnet)) + 3600n
+      ),
+      encodedSignedQuoteBody()
+    );
+
+  const getRequestExecutionGroup = async (
+    executorClient: ExecutorClient,
+    requestBytes: Uint8Array,
+    relayInstructions: Uint8Array,
+    signedQuoteBytes?: Uint8Array
+  ) => {
+    const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+      sender: user,
+      receiver: getApplicationAddress(executorClient.appId),
+      amount: AMOUNT.microAlgos(),
+    });
+    return executorClient.newGroup().requestExecution({
+      sender: user,
+      args: [
+        feePaymentTxn,
+        destinationChain,
+        destinationAddress,
+        user.toString(),
+        signedQuoteBytes ?? (await getSignedQuoteBytes(payee)),
+        requestBytes,
+        relayInstructions,
+      ],
+      extraFee: (signedQuoteBytes ? 8000 : 1000).microAlgos(),
+    });
+  };
+
+  before(
+    async () => {
+      await localnet.newScope();
+      const { algorand, generateAccount } = localnet.context;
+
+      creator = await generateAccount({ initialFunds: (100).algo() });
+      user = await generateAccount({ initialFunds: (100).algo() });
+      payee = await generateAccount({ initialFunds: (100).algo() });
+      otherPayee = await generateAccount({ initialFunds: (100).algo() });
+
+      factory = algorand.client.getTypedAppFactory(ExecutorFactory, {
+        defaultSender: creator,
+        defaultSigner: creator.signer,
+      });
+
+      // deploy executor in each mode
+      for (const [accrueFees, compactEvents, verifyQuoteSignatures, indexRequests] of [
+        [false, false, false, false],
+        [false, true, false, false],
+        [true, false, false, false],
+        [false, false, true, false],
+        [false, false, false, true],
+      ]) {
+        const { appClient } = await factory.send.create.create({
+          sender: creator,
+          args: [OUR_CHAIN, accrueFees, compactEvents, verifyQuoteSignatures, indexRequests],
+        });
+        await localnet.algorand.send.payment({
+          sender: creator,
+          receiver: getApplicationAddress(appClient.appId),
+          amount: (1).algo(),
+        });
+        if (indexRequests) indexingClient = appClient;
+        else if (verifyQuoteSignatures) verifyingClient = appClient;
+        else if (accrueFees) accrualClient = appClient;
+        else if (compactEvents) compactClient = appClient;
+        else client = appClient;
+      }
+
+      const version = (await client.state.global.executorVersion()) ?? "unknown";
+      recorder = new BenchRecorder("Executor", version, await getApprovalHash(localnet, client.appId));
+    },
+    { timeout: 20_000 }
+  );
+
+  it("request execution", async () => {
+    for (const [requestType, requestBytes] of Object.entries(REQUESTS)) {
+      for (const [relayType, relayInstructions] of Object.entries(RELAY_INSTRUCTIONS)) {
+        await recorder.record(
+          "request_execution",
+          `${requestType}, ${relayType} relay instructions`,
+          await getRequestExecutionGroup(client, requestBytes, relayInstructions)
+        );
+        await recorder.record(
+          "request_execution",
+          `${requestType}, ${relayType} relay instructions, compact events`,
+          await getRequestExecutionGroup(compactClient, requestBytes, relayInstructions)
+        );
+        await recorder.record(
+          "request_execution",
+          `${requestType}, ${relayType} relay instructions, accrue fees`,
+          await getRequestExecutionGroup(accrualClient, requestBytes, relayInstructions)
+        );
+      }
+    }
+  });
+
+  it("request execution with quote signature verification", async () => {
+    const quoterPrivateKey = generatePrivateKey();
+    const unsignedQuoteBytes = Uint8Array.from([
+      ...encodeSignedQuoteHeader(
+        prefix,
+        hexToBytes(privateKeyToAddress(quoterPrivateKey)),
+        payee.publicKey,
+        OUR_CHAIN,
+        destinationChain,
+        (await getPrevBlockTimestamp(localnet)) + 3600n
+      ),
+      ...encodedSignedQuoteBody().slice(0, 32),
+    ]);
+    const signedQuoteBytes = await signQuote(unsignedQuoteBytes, quoterPrivateKey);
+
+    const getGroup = () =>
+      getRequestExecutionGroup(verifyingClient, REQUESTS.ERV1, RELAY_INSTRUCTIONS.gas, signedQuoteBytes);
+    await recorder.record("request_execution", "ERV1, gas relay instructions, uncached quote", await getGroup());
+    await verifyingClient.send.verifyQuote({
+      sender: user,
+      args: [
+        await localnet.algorand.createTransaction.payment({
+          sender: user,
+          receiver: getApplicationAddress(verifyingClient.appId),
+          amount: (37_700).microAlgos(),
+        }),
+        signedQuoteBytes,
+      ],
+      extraFee: (6000).microAlgos(),
+    });
+    await recorder.record("request_execution", "ERV1, gas relay instructions, cached quote", await getGroup());
+  });
+
+  it("request execution with request index", async () => {
+    await recorder.record(
+      "request_execution",
+      "ERV1, gas relay instructions, index request",
+      await getRequestExecutionGroup(indexingClient, REQUESTS.ERV1, RELAY_INSTRUCTIONS.gas)
+    );
+
+    const requestIds: Uint8Array[] = [];
+    const signedQuoteBytes = await getSignedQuoteBytes(payee);
+    const quoteDigest = hexToBytes(keccak256(signedQuoteBytes.slice(0, -65)));
+    for (let i = 0; i < 8; i++) {
+      const requestBytes = encodeVaaV1Request(OUR_CHAIN, getRandomBytes(32), BigInt(i));
+      await (
+        await getRequestExecutionGroup(indexingClient, requestBytes, RELAY_INSTRUCTIONS.gas, signedQuoteBytes)
+      ).send();
+      requestIds.push(hexToBytes(sha256(Uint8Array.from([...user.publicKey, ...quoteDigest, ...requestBytes]))));
+    }
+    await recorder.record(
+      "get_indexed_requests",
+      "8 requests",
+      indexingClient.newGroup().getIndexedRequests({ sender: user, args: [requestIds] })
+    );
+  });
+
+  it("request execution batch", async () => {
+    for (const { size, payees } of [
+      { size: 1, payees: 1 },
+      { size: 4, payees: 1 },
+      { size: 4, payees: 2 },
+      { size: 8, payees: 2 },
+    ]) {
+      const requests: Array<ExecutionRequest> = [];
+      for (let i = 0; i < size; i++) {
+        requests.push({
+          amtPaid: AMOUNT,
+          dstChain: destinationChain,
+          dstAddr: destinationAddress,
+          refundAddr: user.toString(),
+          signedQuoteBytes: await getSignedQuoteBytes(i % payees === 0 ? payee : otherPayee),
+          requestBytes: encodeVaaV1Request(OUR_CHAIN, getRandomBytes(32), BigInt(i)),
+          relayInstructions: RELAY_INSTRUCTIONS.gas,
+        });
+      }
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(client.appId),
+        amount: (AMOUNT * BigInt(size)).microAlgos(),
+      });
+      await recorder.record(
+        "request_execution_batch",
+        `${size} ERV1 requests, ${payees} payees`,
+        client.newGroup().requestExecutionBatch({
+          sender: user,
+          args: [feePaymentTxn, requests],
+          extraFee: (1000 * payees).microAlgos(),
+        })
+      );
+    }
+  });
+
+  it("settle accrued fees", async () => {
+    await (await getRequestExecutionGroup(accrualClient, REQUESTS.ERV1, RELAY_INSTRUCTIONS.none)).send();
+    await recorder.record(
+      "settle_accrued_fees",
+      "single payee",
+      accrualClient.newGroup().settleAccruedFees({
+        sender: user,
+        args: [payee.toString()],
+        extraFee: (1000).microAlgos(),
+      })
+    );
+    await recorder.record(
+      "get_accrued_fees",
+      "single payee",
+      accrualClient.newGroup().getAccruedFees({ sender: user, args: [otherPayee.toString()] })
+    );
+  });
+
+  it("has no regressions against baseline", () => {
+    const regressions = recorder.writeAndCompare();
+    expect(regressions, regressions.join("\n")).to.be.empty;
+  });
+});
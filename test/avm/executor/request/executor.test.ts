@@ -1,16 +1,23 @@
 import { describe, it, before } from "node:test";
 
 import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
-import { getApplicationAddress, OnApplicationComplete } from "algosdk";
+import { ALGORAND_ZERO_ADDRESS_STRING, getApplicationAddress, OnApplicationComplete } from "algosdk";
 import { expect } from "chai";
+import { hexToBytes, keccak256, sha256 } from "viem";
+import { generatePrivateKey, privateKeyToAddress } from "viem/accounts";
 
 import { ExecutorFactory } from "../../../../specs/client/Executor.client.js";
-import { convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
-import { encodedSignedQuoteBody, encodeSignedQuote, encodeSignedQuoteHeader } from "../../utils/quote.js";
-import { getPrevBlockTimestamp } from "../../utils/time.js";
+import { convertBytesToNumber, convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
+import {
+  encodedSignedQuoteBody,
+  encodeSignedQuote,
+  encodeSignedQuoteHeader,
+  signQuote,
+} from "../../utils/quote.js";
+import { advancePrevBlockTimestamp, getPrevBlockTimestamp } from "../../utils/time.js";
 import { getRandomUInt } from "../../utils/uint.js";
 
-import type { ExecutorClient } from "../../../../specs/client/Executor.client.js";
+import type { ExecutionRequest, ExecutorClient } from "../../../../specs/client/Executor.client.js";
 import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils/types/account";
 import type { Account, Address } from "algosdk";
 
@@ -25,6 +32,7 @@ describe("Executor", () => {
   let user: Address & Account & TransactionSignerAccount;
   let refundTo: Address & Account & TransactionSignerAccount;
   let payee: Address & Account & TransactionSignerAccount;
+  let otherPayee: Address & Account & TransactionSignerAccount;
 
   const EXECUTOR_VERSION = "Executor-0.0.1";
   const OUR_CHAIN = 8;
@@ -43,6 +51,7 @@ describe("Executor", () => {
       user = await generateAccount({ initialFunds: (100).algo() });
       refundTo = await generateAccount({ initialFunds: (100).algo() });
       payee = await generateAccount({ initialFunds: (100).algo() });
+      otherPayee = await generateAccount({ initialFunds: (100).algo() });
 
       factory = algorand.client.getTypedAppFactory(ExecutorFactory, {
         defaultSender: creator,
@@ -58,7 +67,7 @@ describe("Executor", () => {
         createParams: {
           sender: creator,
           method: "create",
-          args: [OUR_CHAIN],
+          args: [OUR_CHAIN, false, false, false, false],
         },
       });
       appId = result.appId;
@@ -67,6 +76,10 @@ describe("Executor", () => {
       expect(appId).not.to.equal(0n);
       expect(await client.state.global.executorVersion()).to.equal(EXECUTOR_VERSION);
       expect(await client.state.global.ourChain()).to.equal(OUR_CHAIN);
+      expect(await client.state.global.accrueFees()).to.equal(false);
+      expect(await client.state.global.compactEvents()).to.equal(false);
+      expect(await client.state.global.verifyQuoteSignatures()).to.equal(false);
+      expect(await client.state.global.indexRequests()).to.equal(false);
     });
   });
 
@@ -537,5 +550,1321 @@ describe("Executor", () => {
       const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(payee);
       expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + estimatedCost.microAlgos);
     });
+
+    it("succeeds when fee paid directly to payee", async () => {
+      // prepare bytes
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const estimatedCost = getRandomUInt(10).algo();
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      // balances before
+      const { balance: payeeBalanceBefore } = await localnet.algorand.account.getInformation(payee);
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: payee.toString(),
+        amount: estimatedCost,
+      });
+      const res = await client.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ],
+      });
+
+      // logs
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("RequestForExecution(byte[20],uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+          quoterAddress,
+          estimatedCost.microAlgos,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ])
+      );
+
+      // no inner txns
+      expect(res.confirmations[1].innerTxns ?? []).to.be.empty;
+
+      // balances after
+      const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(payee);
+      expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + estimatedCost.microAlgos);
+    });
+  });
+
+  describe("request execution batch", () => {
+    const generateExecutionRequest = async (
+      requestPayee: Address,
+      amtPaid: bigint,
+      expiryOffset = 60n
+    ): Promise<ExecutionRequest> => {
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + expiryOffset;
+      const header = encodeSignedQuoteHeader(
+        prefix,
+        quoterAddress,
+        requestPayee.publicKey,
+        OUR_CHAIN,
+        destinationChain,
+        expiryTime
+      );
+      return {
+        amtPaid,
+        dstChain: destinationChain,
+        dstAddr: destinationAddress,
+        refundAddr: refundTo.toString(),
+        signedQuoteBytes: encodeSignedQuote(header, encodedSignedQuoteBody()),
+        requestBytes: getRandomBytes(46),
+        relayInstructions: getRandomBytes(33),
+      };
+    };
+
+    it("fails when fee sender is different", async () => {
+      const requests = [await generateExecutionRequest(payee, 1_000n)];
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: creator,
+        receiver: getApplicationAddress(appId),
+        amount: (1_000).microAlgos(),
+      });
+
+      try {
+        await client.send.requestExecutionBatch({
+          sender: user,
+          args: [feePaymentTxn, requests],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Fee txn must be from same sender");
+      }
+    });
+
+    it("fails when fee recipient is not app address", async () => {
+      const requests = [await generateExecutionRequest(payee, 1_000n)];
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: user.toString(),
+        amount: (1_000).microAlgos(),
+      });
+
+      try {
+        await client.send.requestExecutionBatch({
+          sender: user,
+          args: [feePaymentTxn, requests],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown fee payment receiver");
+      }
+    });
+
+    it("fails when any quote expired", async () => {
+      const requests = [
+        await generateExecutionRequest(payee, 1_000n),
+        await generateExecutionRequest(payee, 1_000n, 0n),
+      ];
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: (2_000).microAlgos(),
+      });
+
+      try {
+        await client.send.requestExecutionBatch({
+          sender: user,
+          args: [feePaymentTxn, requests],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote expired");
+      }
+    });
+
+    for (const { name, offset } of [
+      { name: "too low", offset: -1n },
+      { name: "too high", offset: 1n },
+    ]) {
+      it(`fails when fee payment amount is ${name}`, async () => {
+        const requests = [
+          await generateExecutionRequest(payee, 1_000n),
+          await generateExecutionRequest(payee, 2_000n),
+        ];
+        const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+          sender: user,
+          receiver: getApplicationAddress(appId),
+          amount: (3_000n + offset).microAlgos(),
+        });
+
+        try {
+          await client.send.requestExecutionBatch({
+            sender: user,
+            args: [feePaymentTxn, requests],
+            extraFee: (1000).microAlgos(),
+          });
+          expect.fail("Expected function to throw");
+        } catch (e) {
+          expect((e as Error).message).to.include("Incorrect fee payment amount");
+        }
+      });
+    }
+
+    it("succeeds", async () => {
+      const requests = [
+        await generateExecutionRequest(payee, getRandomUInt(1_000_000)),
+        await generateExecutionRequest(otherPayee, getRandomUInt(1_000_000)),
+        await generateExecutionRequest(payee, getRandomUInt(1_000_000)),
+      ];
+      const payeeAmount = requests[0].amtPaid + requests[2].amtPaid;
+      const otherPayeeAmount = requests[1].amtPaid;
+
+      // balances before
+      const { balance: payeeBalanceBefore } = await localnet.algorand.account.getInformation(payee);
+      const { balance: otherPayeeBalanceBefore } = await localnet.algorand.account.getInformation(otherPayee);
+
+      // request execution batch
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: (payeeAmount + otherPayeeAmount).microAlgos(),
+      });
+      const res = await client.send.requestExecutionBatch({
+        sender: user,
+        args: [feePaymentTxn, requests],
+        extraFee: (2000).microAlgos(),
+      });
+
+      // logs
+      expect(res.confirmations[1].logs?.length).to.equal(requests.length);
+      for (const [i, request] of requests.entries()) {
+        expect(res.confirmations[1].logs?.[i]).to.deep.equal(
+          getEventBytes("RequestForExecution(byte[20],uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+            quoterAddress,
+            request.amtPaid,
+            request.dstChain,
+            request.dstAddr,
+            request.refundAddr,
+            request.signedQuoteBytes,
+            request.requestBytes,
+            request.relayInstructions,
+          ])
+        );
+      }
+
+      // inner txns
+      expect(res.confirmations[1].innerTxns?.length).to.equal(2);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(payeeAmount);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(payee.toString());
+      expect(res.confirmations[1].innerTxns?.[1].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[1].innerTxns?.[1].txn.txn.payment?.amount).to.equal(otherPayeeAmount);
+      expect(res.confirmations[1].innerTxns?.[1].txn.txn.payment?.receiver.toString()).to.equal(
+        otherPayee.toString()
+      );
+
+      // balances after
+      const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(payee);
+      const { balance: otherPayeeBalanceAfter } = await localnet.algorand.account.getInformation(otherPayee);
+      expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + payeeAmount);
+      expect(otherPayeeBalanceAfter.microAlgos).to.equal(otherPayeeBalanceBefore.microAlgos + otherPayeeAmount);
+    });
+
+    it("fails when fee paid directly but payees differ", async () => {
+      const requests = [
+        await generateExecutionRequest(payee, 1_000n),
+        await generateExecutionRequest(otherPayee, 1_000n),
+      ];
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: payee.toString(),
+        amount: (2_000).microAlgos(),
+      });
+
+      try {
+        await client.send.requestExecutionBatch({
+          sender: user,
+          args: [feePaymentTxn, requests],
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown fee payment receiver");
+      }
+    });
+
+    it("succeeds when fee paid directly to shared payee", async () => {
+      const requests = [
+        await generateExecutionRequest(payee, getRandomUInt(1_000_000)),
+        await generateExecutionRequest(payee, getRandomUInt(1_000_000)),
+      ];
+      const payeeAmount = requests[0].amtPaid + requests[1].amtPaid;
+
+      // balances before
+      const { balance: payeeBalanceBefore } = await localnet.algorand.account.getInformation(payee);
+
+      // request execution batch
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: payee.toString(),
+        amount: payeeAmount.microAlgos(),
+      });
+      const res = await client.send.requestExecutionBatch({
+        sender: user,
+        args: [feePaymentTxn, requests],
+      });
+
+      // logs and no inner txns
+      expect(res.confirmations[1].logs?.length).to.equal(requests.length);
+      expect(res.confirmations[1].innerTxns ?? []).to.be.empty;
+
+      // balances after
+      const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(payee);
+      expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + payeeAmount);
+    });
+  });
+
+  describe("accrual mode", () => {
+    let accrualClient: ExecutorClient;
+    let accrualAppId: bigint;
+
+    let accruedAmount: bigint;
+
+    const ACCRUED_FEES_BOX_MIN_BALANCE = 26_900n;
+
+    const requestExecution = async (to: Address & Account, amount: bigint) => {
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, to.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(accrualAppId),
+        amount: amount.microAlgo(),
+      });
+      return accrualClient.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          getRandomBytes(46),
+          getRandomBytes(33),
+        ],
+      });
+    };
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [OUR_CHAIN, true, false, false, false],
+      });
+      accrualAppId = result.appId;
+      accrualClient = appClient;
+
+      // fund app min balance, box min balance is reserved from the accrued fees
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(accrualAppId),
+        amount: (100_000).microAlgos(),
+      });
+
+      expect(await accrualClient.state.global.accrueFees()).to.equal(true);
+    });
+
+    it("request execution accrues fees", async () => {
+      // prepare bytes
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const estimatedCost = (getRandomUInt(9) + 1n).algo();
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(accrualAppId),
+        amount: estimatedCost,
+      });
+      const res = await accrualClient.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ],
+      });
+      accruedAmount = estimatedCost.microAlgos;
+
+      // logs
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("FeesAccrued(address,uint64,uint64)", [payee.toString(), 0, accruedAmount])
+      );
+      expect(res.confirmations[1].logs?.[1]).to.deep.equal(
+        getEventBytes("RequestForExecution(byte[20],uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+          quoterAddress,
+          accruedAmount,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ])
+      );
+
+      // inner txns
+      expect(res.confirmations[1].innerTxns).to.be.undefined;
+
+      // accrued fees
+      expect(await accrualClient.getAccruedFees({ args: [payee.toString()] })).to.equal(accruedAmount);
+    });
+
+    it("settle fails when no fees accrued", async () => {
+      try {
+        await accrualClient.send.settleAccruedFees({
+          sender: user,
+          args: [otherPayee.toString()],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("No accrued fees");
+      }
+    });
+
+    it("settle succeeds", async () => {
+      // balances before
+      const { balance: payeeBalanceBefore } = await localnet.algorand.account.getInformation(payee);
+
+      // settle
+      const res = await accrualClient.send.settleAccruedFees({
+        sender: user,
+        args: [payee.toString()],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // logs
+      expect(res.confirmations[0].logs?.[0]).to.deep.equal(
+        getEventBytes("AccruedFeesSettled(address,uint64,uint64)", [payee.toString(), 0, accruedAmount])
+      );
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(accruedAmount);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(payee.toString());
+
+      // balances after
+      const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(payee);
+      expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + accruedAmount);
+      expect(await accrualClient.getAccruedFees({ args: [payee.toString()] })).to.equal(0n);
+
+      expect(await accrualClient.state.box.accruedFees.getMap()).to.be.empty;
+    });
+
+    it("request execution fails when first accrual is below box min balance", async () => {
+      try {
+        await requestExecution(otherPayee, ACCRUED_FEES_BOX_MIN_BALANCE - 1n);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Fee below accrued fees box min balance");
+      }
+    });
+
+    it("settle succeeds after several accruals", async () => {
+      // balances before
+      const { balance: appBalanceBefore } = await localnet.algorand.account.getInformation(
+        getApplicationAddress(accrualAppId)
+      );
+      const { balance: payeeBalanceBefore } = await localnet.algorand.account.getInformation(otherPayee);
+
+      // accrue, only the first accrual needs to cover the box min balance
+      const amounts = [ACCRUED_FEES_BOX_MIN_BALANCE, 1n, getRandomUInt(1_000_000n) + 1n];
+      for (const amount of amounts) {
+        await requestExecution(otherPayee, amount);
+      }
+      const totalAmount = amounts.reduce((sum, amount) => sum + amount, 0n);
+      expect(await accrualClient.getAccruedFees({ args: [otherPayee.toString()] })).to.equal(totalAmount);
+
+      // settle
+      const res = await accrualClient.send.settleAccruedFees({
+        sender: user,
+        args: [otherPayee.toString()],
+        extraFee: (1000).microAlgos(),
+      });
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(totalAmount);
+
+      // balances after, the app is left with what it held before
+      const { balance: appBalanceAfter } = await localnet.algorand.account.getInformation(
+        getApplicationAddress(accrualAppId)
+      );
+      const { balance: payeeBalanceAfter } = await localnet.algorand.account.getInformation(otherPayee);
+      expect(appBalanceAfter.microAlgos).to.equal(appBalanceBefore.microAlgos);
+      expect(payeeBalanceAfter.microAlgos).to.equal(payeeBalanceBefore.microAlgos + totalAmount);
+      expect(await accrualClient.state.box.accruedFees.getMap()).to.be.empty;
+    });
+  });
+
+  describe("compact events mode", () => {
+    let compactClient: ExecutorClient;
+    let compactAppId: bigint;
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [OUR_CHAIN, false, true, false, false],
+      });
+      compactAppId = result.appId;
+      compactClient = appClient;
+
+      expect(await compactClient.state.global.compactEvents()).to.equal(true);
+    });
+
+    it("request execution emits compact event", async () => {
+      // prepare bytes
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const estimatedCost = getRandomUInt(10).algo();
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(compactAppId),
+        amount: estimatedCost,
+      });
+      const res = await compactClient.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // logs
+      expect(res.confirmations[1].logs?.length).to.equal(1);
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("RequestForExecutionV2(uint8,uint64,byte[32],address,byte[],byte[],byte[])", [
+          2,
+          estimatedCost.microAlgos,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ])
+      );
+    });
+
+    it("request execution with quote id fails", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(compactClient.appId),
+        amount: getRandomUInt(10).algo(),
+      });
+      try {
+        await compactClient.send.requestExecutionWithQuoteId({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            getRandomBytes(32),
+            getRandomBytes(46),
+            getRandomBytes(33),
+          ],
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote id requests not supported with compact events");
+      }
+    });
+  });
+
+  describe("verify quote signatures mode", () => {
+    let verifyingClient: ExecutorClient;
+    let verifyingAppId: bigint;
+
+    const quoterPrivateKey = generatePrivateKey();
+    const quoterEvmAddress = hexToBytes(privateKeyToAddress(quoterPrivateKey));
+
+    const VERIFIED_QUOTE_BOX_MIN_BALANCE = 37_700;
+
+    let signedQuoteBytes: Uint8Array;
+    let quoteDigest: Uint8Array;
+
+    const verifyQuote = async (quoteBytes: Uint8Array, mbrPaymentAmount = VERIFIED_QUOTE_BOX_MIN_BALANCE) => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(verifyingAppId),
+        amount: mbrPaymentAmount.microAlgos(),
+      });
+      return verifyingClient.send.verifyQuote({
+        sender: user,
+        args: [mbrPaymentTxn, quoteBytes],
+        extraFee: (6000).microAlgos(),
+      });
+    };
+
+    const requestExecution = async (quoteBytes: Uint8Array, extraFee = 7000) => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(verifyingAppId),
+        amount: getRandomUInt(10).algo(),
+      });
+      return verifyingClient.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          quoteBytes,
+          getRandomBytes(46),
+          getRandomBytes(33),
+        ],
+        extraFee: extraFee.microAlgos(),
+      });
+    };
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [OUR_CHAIN, false, false, true, false],
+      });
+      verifyingAppId = result.appId;
+      verifyingClient = appClient;
+
+      // fund account min balance, box min balances are funded per verified quote
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(verifyingAppId),
+        amount: (100_000).microAlgos(),
+      });
+
+      // sign quote
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const unsignedQuoteBytes = Uint8Array.from([
+        ...encodeSignedQuoteHeader(prefix, quoterEvmAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        ...encodedSignedQuoteBody().slice(0, 32),
+      ]);
+      signedQuoteBytes = await signQuote(unsignedQuoteBytes, quoterPrivateKey);
+      quoteDigest = hexToBytes(keccak256(unsignedQuoteBytes));
+
+      expect(await verifyingClient.state.global.verifyQuoteSignatures()).to.equal(true);
+    });
+
+    it("fails when quote signature recovery id is invalid", async () => {
+      const invalidQuoteBytes = Uint8Array.from([...signedQuoteBytes.slice(0, -1), 30]);
+      try {
+        await requestExecution(invalidQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Invalid quote signature");
+      }
+    });
+
+    it("fails when quote signed by different quoter", async () => {
+      const otherQuoteBytes = await signQuote(signedQuoteBytes.slice(0, -65), generatePrivateKey());
+      try {
+        await requestExecution(otherQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Invalid quote signature");
+      }
+    });
+
+    it("succeeds without caching verified quote", async () => {
+      await requestExecution(signedQuoteBytes);
+      expect(await verifyingClient.isQuoteVerified({ args: [quoteDigest] })).to.equal(false);
+    });
+
+    it("verify quote fails when quote expiry too far", async () => {
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 86_400n + 60n;
+      const farQuoteBytes = await signQuote(
+        Uint8Array.from([
+          ...encodeSignedQuoteHeader(prefix, quoterEvmAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+          ...encodedSignedQuoteBody().slice(0, 32),
+        ]),
+        quoterPrivateKey
+      );
+      try {
+        await verifyQuote(farQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote expiry too far");
+      }
+    });
+
+    it("verify quote fails when quote signature is invalid", async () => {
+      const otherQuoteBytes = await signQuote(signedQuoteBytes.slice(0, -65), generatePrivateKey());
+      try {
+        await verifyQuote(otherQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Invalid quote signature");
+      }
+    });
+
+    it("verify quote fails when min balance payment is incorrect amount", async () => {
+      try {
+        await verifyQuote(signedQuoteBytes, VERIFIED_QUOTE_BOX_MIN_BALANCE - 1);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Incorrect min balance payment amount");
+      }
+    });
+
+    it("verify quote caches verified quote", async () => {
+      expect(await verifyingClient.isQuoteVerified({ args: [quoteDigest] })).to.equal(false);
+
+      const res = await verifyQuote(signedQuoteBytes);
+
+      expect(res.return).to.deep.equal(quoteDigest);
+      expect(await verifyingClient.isQuoteVerified({ args: [quoteDigest] })).to.equal(true);
+      const verifiedQuote = await verifyingClient.state.box.verifiedQuotes.value(quoteDigest);
+      expect(verifiedQuote?.funder).to.equal(user.toString());
+      expect(verifiedQuote?.expiryTime).to.equal(convertBytesToNumber(signedQuoteBytes.slice(60, 68)));
+    });
+
+    it("verify quote fails when quote already verified", async () => {
+      try {
+        await verifyQuote(signedQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote already verified");
+      }
+    });
+
+    it("succeeds without op up when quote already verified", async () => {
+      const res = await requestExecution(signedQuoteBytes, 1000);
+      expect(res.confirmations[1].innerTxns?.length).to.equal(1);
+    });
+
+    it("prune skips quote which hasn't expired", async () => {
+      await verifyingClient.send.pruneVerifiedQuotes({ sender: user, args: [[quoteDigest, getRandomBytes(32)]] });
+      expect(await verifyingClient.isQuoteVerified({ args: [quoteDigest] })).to.equal(true);
+    });
+
+    it("prune deletes expired quote and refunds funder", async () => {
+      await advancePrevBlockTimestamp(localnet, 120);
+      const res = await verifyingClient.send.pruneVerifiedQuotes({
+        sender: creator,
+        args: [[quoteDigest]],
+        extraFee: (1000).microAlgos(),
+      });
+      expect(await verifyingClient.isQuoteVerified({ args: [quoteDigest] })).to.equal(false);
+      expect(await verifyingClient.state.box.verifiedQuotes.getMap()).to.be.empty;
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(
+        BigInt(VERIFIED_QUOTE_BOX_MIN_BALANCE)
+      );
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(user.toString());
+    });
+
+    it("request execution with quote id verifies registered quote", async () => {
+      // sign and register quote
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const quoteBytes = await signQuote(
+        Uint8Array.from([
+          ...encodeSignedQuoteHeader(prefix, quoterEvmAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+          ...encodedSignedQuoteBody().slice(0, 32),
+        ]),
+        quoterPrivateKey
+      );
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(verifyingAppId),
+        amount: (40_100 + 400 * quoteBytes.length).microAlgos(),
+      });
+      const quoteId = hexToBytes(keccak256(quoteBytes.slice(0, -65)));
+      await verifyingClient.send.registerQuote({
+        sender: user,
+        args: [mbrPaymentTxn, quoteBytes],
+        extraFee: (6000).microAlgos(),
+      });
+
+      // request execution, op ups used to verify the uncached quote
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(verifyingAppId),
+        amount: getRandomUInt(10).algo(),
+      });
+      const res = await verifyingClient.send.requestExecutionWithQuoteId({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          quoteId,
+          getRandomBytes(46),
+          getRandomBytes(33),
+        ],
+        extraFee: (7000).microAlgos(),
+      });
+      expect(res.confirmations[1].innerTxns?.length).to.be.greaterThan(1);
+    });
+  });
+
+  describe("request index mode", () => {
+    let indexingClient: ExecutorClient;
+    let indexingAppId: bigint;
+
+    const REQUEST_STATUS_REQUESTED = 1;
+    const REQUEST_STATUS_EXECUTED = 2;
+    const INDEXED_REQUEST_BOX_MIN_BALANCE = 41_300n;
+
+    const requestBytes = getRandomBytes(46);
+    let requestId: Uint8Array;
+    let indexedSignedQuoteBytes: Uint8Array;
+    let indexedTimestamp: bigint;
+    let amtPaid: bigint;
+    let batchRequestIds: Array<Uint8Array>;
+
+    const getRequestId = (sender: Address, quoteBytes: Uint8Array, requestBytes: Uint8Array) =>
+      hexToBytes(
+        sha256(
+          Uint8Array.from([...sender.publicKey, ...hexToBytes(keccak256(quoteBytes.slice(0, -65))), ...requestBytes])
+        )
+      );
+
+    const getSignedQuoteBytes = async () =>
+      encodeSignedQuote(
+        encodeSignedQuoteHeader(
+          prefix,
+          quoterAddress,
+          payee.publicKey,
+          OUR_CHAIN,
+          destinationChain,
+          (await getPrevBlockTimestamp(localnet)) + 60n
+        ),
+        encodedSignedQuoteBody()
+      );
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [OUR_CHAIN, false, false, false, true],
+      });
+      indexingAppId = result.appId;
+      indexingClient = appClient;
+
+      // fund app min balance
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: (200_000).microAlgos(),
+      });
+
+      expect(await indexingClient.state.global.indexRequests()).to.equal(true);
+    });
+
+    it("get fails when request unknown", async () => {
+      try {
+        await indexingClient.getIndexedRequest({ args: [getRandomBytes(32)] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown request");
+      }
+    });
+
+    it("request execution fails when fee below box min balance", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: (INDEXED_REQUEST_BOX_MIN_BALANCE - 1n).microAlgo(),
+      });
+      try {
+        await indexingClient.send.requestExecution({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            await getSignedQuoteBytes(),
+            requestBytes,
+            getRandomBytes(33),
+          ],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Fee below request index box min balance");
+      }
+    });
+
+    it("request execution fails when fee paid directly to payee", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: payee,
+        amount: (1).algo(),
+      });
+      try {
+        await indexingClient.send.requestExecution({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            await getSignedQuoteBytes(),
+            requestBytes,
+            getRandomBytes(33),
+          ],
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Fee must be paid to executor to index request");
+      }
+    });
+
+    it("request execution indexes request", async () => {
+      const estimatedCost = (getRandomUInt(10) + 1n).algo();
+      const signedQuoteBytes = await getSignedQuoteBytes();
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: estimatedCost,
+      });
+      indexedTimestamp = await getPrevBlockTimestamp(localnet);
+      amtPaid = estimatedCost.microAlgos;
+      indexedSignedQuoteBytes = signedQuoteBytes;
+      requestId = getRequestId(user, signedQuoteBytes, requestBytes);
+      const res = await indexingClient.send.requestExecution({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          getRandomBytes(33),
+        ],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // box min balance held back from payee
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(
+        amtPaid - INDEXED_REQUEST_BOX_MIN_BALANCE
+      );
+
+      expect(await indexingClient.getIndexedRequest({ args: [requestId] })).to.deep.equal({
+        dstChain: destinationChain,
+        amtPaid,
+        payee: payee.toString(),
+        timestamp: indexedTimestamp,
+        status: REQUEST_STATUS_REQUESTED,
+      });
+    });
+
+    it("request execution fails when request already indexed", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: (1).algo(),
+      });
+      try {
+        await indexingClient.send.requestExecution({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            indexedSignedQuoteBytes,
+            requestBytes,
+            getRandomBytes(33),
+          ],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Request already indexed");
+      }
+    });
+
+    it("request execution indexes same request bytes from another sender separately", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: refundTo,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: (1).algo(),
+      });
+      await indexingClient.send.requestExecution({
+        sender: refundTo,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          indexedSignedQuoteBytes,
+          requestBytes,
+          getRandomBytes(33),
+        ],
+        extraFee: (1000).microAlgos(),
+      });
+
+      const otherRequestId = getRequestId(refundTo, indexedSignedQuoteBytes, requestBytes);
+      expect(otherRequestId).not.to.deep.equal(requestId);
+      expect((await indexingClient.getIndexedRequest({ args: [otherRequestId] })).amtPaid).to.equal(1_000_000n);
+      expect((await indexingClient.getIndexedRequest({ args: [requestId] })).amtPaid).to.equal(amtPaid);
+    });
+
+    it("request execution batch indexes each request", async () => {
+      const requests: Array<ExecutionRequest> = [];
+      for (let i = 0; i < 2; i++) {
+        requests.push({
+          amtPaid: BigInt(i + 1) * 100_000n,
+          dstChain: destinationChain,
+          dstAddr: destinationAddress,
+          refundAddr: refundTo.toString(),
+          signedQuoteBytes: await getSignedQuoteBytes(),
+          requestBytes: getRandomBytes(46),
+          relayInstructions: getRandomBytes(33),
+        });
+      }
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(indexingAppId),
+        amount: (300_000).microAlgos(),
+      });
+      const timestamp = await getPrevBlockTimestamp(localnet);
+      const res = await indexingClient.send.requestExecutionBatch({
+        sender: user,
+        args: [feePaymentTxn, requests],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // box min balance held back from payee for each request
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(
+        300_000n - 2n * INDEXED_REQUEST_BOX_MIN_BALANCE
+      );
+
+      // unknown requests are returned zeroed
+      batchRequestIds = requests.map(({ signedQuoteBytes, requestBytes }) =>
+        getRequestId(user, signedQuoteBytes, requestBytes)
+      );
+      const indexedRequests = await indexingClient.getIndexedRequests({
+        args: [[...batchRequestIds, getRandomBytes(32), requestId]],
+      });
+      expect(indexedRequests).to.deep.equal([
+        ...requests.map(({ amtPaid }) => ({
+          dstChain: destinationChain,
+          amtPaid,
+          payee: payee.toString(),
+          timestamp,
+          status: REQUEST_STATUS_REQUESTED,
+        })),
+        { dstChain: 0, amtPaid: 0n, payee: ALGORAND_ZERO_ADDRESS_STRING, timestamp: 0n, status: 0 },
+        {
+          dstChain: destinationChain,
+          amtPaid,
+          payee: payee.toString(),
+          timestamp: indexedTimestamp,
+          status: REQUEST_STATUS_REQUESTED,
+        },
+      ]);
+    });
+
+    it("update request status fails when caller isn't payee", async () => {
+      try {
+        await indexingClient.send.updateRequestStatus({ sender: user, args: [requestId, REQUEST_STATUS_EXECUTED] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Caller must be payee");
+      }
+    });
+
+    it("update request status fails when status invalid", async () => {
+      try {
+        await indexingClient.send.updateRequestStatus({ sender: payee, args: [requestId, REQUEST_STATUS_REQUESTED] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Invalid request status");
+      }
+    });
+
+    it("update request status succeeds", async () => {
+      await indexingClient.send.updateRequestStatus({ sender: payee, args: [requestId, REQUEST_STATUS_EXECUTED] });
+      expect((await indexingClient.getIndexedRequest({ args: [requestId] })).status).to.equal(REQUEST_STATUS_EXECUTED);
+    });
+
+    it("remove indexed requests fails when request pending", async () => {
+      const pendingRequestIds = batchRequestIds.slice(0, 1);
+      try {
+        await indexingClient.send.removeIndexedRequests({ sender: payee, args: [pendingRequestIds] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Request pending");
+      }
+    });
+
+    it("remove indexed requests fails when caller isn't payee", async () => {
+      try {
+        await indexingClient.send.removeIndexedRequests({ sender: user, args: [[requestId]] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Caller must be payee");
+      }
+    });
+
+    it("remove indexed requests succeeds", async () => {
+      const res = await indexingClient.send.removeIndexedRequests({
+        sender: payee,
+        args: [[requestId]],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // box min balance paid out to payee
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(INDEXED_REQUEST_BOX_MIN_BALANCE);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(payee.toString());
+
+      expect((await indexingClient.getIndexedRequests({ args: [[requestId]] }))[0].status).to.equal(0);
+    });
+
+    it("default mode doesn't index requests", async () => {
+      expect(await client.state.global.indexRequests()).to.equal(false);
+      expect(await client.state.box.requestIndex.getMap()).to.be.empty;
+    });
+  });
+
+  describe("quote registry", () => {
+    let signedQuoteBytes: Uint8Array;
+    let quoteId: Uint8Array;
+    let quoteBoxMinBalance: bigint;
+
+    const registerQuote = async (quoteBytes: Uint8Array, amount = 40_100n + 400n * BigInt(quoteBytes.length)) => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: amount.microAlgo(),
+      });
+      return client.send.registerQuote({ sender: user, args: [mbrPaymentTxn, quoteBytes] });
+    };
+
+    before(async () => {
+      // fund app min balance
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(appId),
+        amount: (200_000).microAlgos(),
+      });
+
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      quoteId = hexToBytes(keccak256(signedQuoteBytes.slice(0, -65)));
+      quoteBoxMinBalance = 40_100n + 400n * BigInt(signedQuoteBytes.length);
+    });
+
+    it("register fails when quote expired", async () => {
+      const expiryTime = await getPrevBlockTimestamp(localnet);
+      const expiredQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      try {
+        await registerQuote(expiredQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote expired");
+      }
+    });
+
+    it("register fails when source chain mismatches", async () => {
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const quoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN + 1, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      try {
+        await registerQuote(quoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote source chain mismatch");
+      }
+    });
+
+    it("register fails when quote expiry too far", async () => {
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 86_400n + 3600n;
+      const quoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedSignedQuoteBody()
+      );
+      try {
+        await registerQuote(quoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote expiry too far");
+      }
+    });
+
+    it("register fails when min balance payment insufficient", async () => {
+      try {
+        await registerQuote(signedQuoteBytes, quoteBoxMinBalance - 1n);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Insufficient min balance payment");
+      }
+    });
+
+    it("request execution with quote id fails when quote unknown", async () => {
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: getRandomUInt(10).algo(),
+      });
+      try {
+        await client.send.requestExecutionWithQuoteId({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            quoteId,
+            getRandomBytes(46),
+            getRandomBytes(33),
+          ],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown quote");
+      }
+    });
+
+    it("register succeeds", async () => {
+      const res = await registerQuote(signedQuoteBytes);
+
+      expect(res.return).to.deep.equal(quoteId);
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("QuoteRegistered(byte[32],byte[])", [quoteId, signedQuoteBytes])
+      );
+      expect(await client.getRegisteredQuote({ args: [quoteId] })).to.deep.equal(signedQuoteBytes);
+    });
+
+    it("register fails when quote already registered", async () => {
+      try {
+        await registerQuote(signedQuoteBytes);
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Quote already registered");
+      }
+    });
+
+    it("request execution with quote id succeeds", async () => {
+      const estimatedCost = getRandomUInt(10).algo();
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      const feePaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: estimatedCost,
+      });
+      const res = await client.send.requestExecutionWithQuoteId({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          quoteId,
+          requestBytes,
+          relayInstructions,
+        ],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // logs
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes(
+          "RequestForExecutionWithQuoteId(byte[20],uint64,uint16,byte[32],address,byte[32],byte[],byte[])",
+          [
+            quoterAddress,
+            estimatedCost.microAlgos,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            quoteId,
+            requestBytes,
+            relayInstructions,
+          ]
+        )
+      );
+
+      // inner txns
+      expect(res.confirmations[1].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(estimatedCost.microAlgos);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(payee.toString());
+    });
+
+    it("prune deletes expired quote and refunds funder", async () => {
+      await client.send.pruneRegisteredQuotes({ sender: creator, args: [[quoteId]] });
+      expect(await client.getRegisteredQuote({ args: [quoteId] })).to.deep.equal(signedQuoteBytes);
+
+      // balances before
+      const { balance: userBalanceBefore } = await localnet.algorand.account.getInformation(user);
+
+      await advancePrevBlockTimestamp(localnet, 120);
+      const res = await client.send.pruneRegisteredQuotes({
+        sender: creator,
+        args: [[quoteId]],
+        extraFee: (1000).microAlgos(),
+      });
+      expect(await client.state.box.registeredQuotes.getMap()).to.be.empty;
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.amount).to.equal(quoteBoxMinBalance);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.payment?.receiver.toString()).to.equal(user.toString());
+
+      // balances after
+      const { balance: userBalanceAfter } = await localnet.algorand.account.getInformation(user);
+      expect(userBalanceAfter.microAlgos).to.equal(userBalanceBefore.microAlgos + quoteBoxMinBalance);
+    });
   });
 });
@@ -0,0 +1,191 @@
+import { describe, it, before } from "node:test";
+
+import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
+import { getApplicationAddress } from "algosdk";
+import { expect } from "chai";
+
+import { MockExecutorFactory } from "../../../../specs/client/MockExecutor.client.js";
+import { MockNttManagerFactory } from "../../../../specs/client/MockNttManager.client.js";
+import { NttManagerWithExecutorFactory } from "../../../../specs/client/NttManagerWithExecutor.client.js";
+import { BenchRecorder, getApprovalHash } from "../../utils/bench.js";
+import { getRandomBytes } from "../../utils/bytes.js";
+import { encodeGasInstruction, encodeRelayInstructions } from "../../utils/quote.js";
+
+import type { MockNttManagerClient } from "../../../../specs/client/MockNttManager.client.js";
+import type {
+  ExecutorArgs,
+  FeeArgs,
+  NttManagerWithExecutorClient,
+} from "../../../../specs/client/NttManagerWithExecutor.client.js";
+import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils/types/account";
+import type { Account, Address } from "algosdk";
+
+describe("NttManagerWithExecutor bench", () => {
+  const localnet = algorandFixture();
+
+  let nttAssetId: bigint;
+  let executorAppId: bigint;
+
+  let nttManagerClient: MockNttManagerClient;
+  let nttManagerAppId: bigint;
+
+  let client: NttManagerWithExecutorClient;
+  let recorder: BenchRecorder;
+
+  let creator: Address & Account & TransactionSignerAccount;
+  let user: Address & Account & TransactionSignerAccount;
+  let referrer: Address & Account & TransactionSignerAccount;
+
+  const OUR_CHAIN = 8;
+  const PEER_CHAIN = 16;
+  const PEER_CONTRACT = getRandomBytes(32);
+  const PEER_DECIMALS = 8;
+
+  const EXECUTOR_ARGS: ExecutorArgs = {
+    refundAddress: "NYMNQ7BFWNKTNJE6U6EGTNSBQIAAERDRHD3VIEINQYFHGSMJXE7CIP6GI4",
+    signedQuoteBytes: getRandomBytes(165),
+    relayInstructions: encodeRelayInstructions([encodeGasInstruction(250_000n, 0n)]),
+  };
+
+  const getTransferGroup = async (referrerAmount: bigint) => {
+    const totalAmount = 10_000_000n;
+    const nttAmount = totalAmount - referrerAmount;
+    const feeArgs: FeeArgs = { dbps: Number((referrerAmount * 100_000n) / totalAmount), payee: referrer.toString() };
+
+    const nttFeePaymentTxn = await localnet.algorand.createTransaction.payment({
+      sender: user,
+      receiver: getApplicationAddress(nttManagerAppId),
+      amount: (0).algo(),
+    });
+    const nttSendTokenTxn = await localnet.algorand.createTransaction.assetTransfer({
+      sender: user,
+      assetId: nttAssetId,
+      receiver: getApplicationAddress(nttManagerAppId),
+      amount: nttAmount,
+    });
+    const { transactions } = await nttManagerClient.createTransaction.transfer({
+      sender: user,
+      args: [nttFeePaymentTxn, nttSendTokenTxn, nttAmount, PEER_CHAIN, getRandomBytes(32)],
+    });
+    const payExecutorTxn = await localnet.algorand.createTransaction.payment({
+      sender: user,
+      receiver: getApplicationAddress(client.appId),
+      amount: (1).algo(),
+    });
+    const payReferrerTxn = await localnet.algorand.createTransaction.assetTransfer({
+      sender: user,
+      assetId: nttAssetId,
+      receiver: referrer,
+      amount: referrerAmount,
+    });
+    return client
+      .newGroup()
+      .addTransaction(nttFeePaymentTxn)
+      .transfer({
+        sender: user,
+        args: [nttSendTokenTxn, transactions[2], payExecutorTxn, payReferrerTxn, totalAmount, EXECUTOR_ARGS, feeArgs],
+        extraFee: (3000).microAlgos(),
+      });
+  };
+
+  before(
+    async () => {
+      await localnet.newScope();
+      const { algorand, generateAccount } = localnet.context;
+
+      creator = await generateAccount({ initialFunds: (100).algo() });
+      user = await generateAccount({ initialFunds: (100).algo() });
+      referrer = await generateAccount({ initialFunds: (100).algo() });
+
+      // create ntt asset, opt in user and referrer and fund user
+      {
+        const res = await localnet.algorand.send.assetCreate({
+          sender: creator,
+          total: 50_000_000_000_000n,
+          decimals: 6,
+          assetName: "Folks Finance",
+          unitName: "FOLKS",
+        });
+        nttAssetId = res.assetId;
+      }
+      await localnet.algorand.send.assetOptIn({ sender: user, assetId: nttAssetId });
+      await localnet.algorand.send.assetOptIn({ sender: referrer, assetId: nttAssetId });
+      await localnet.algorand.send.assetTransfer({
+        sender: creator,
+        receiver: user,
+        assetId: nttAssetId,
+        amount: BigInt(100e6),
+      });
+
+      // deploy executor
+      {
+        const executorFactory = algorand.client.getTypedAppFactory(MockExecutorFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { result } = await executorFactory.deploy();
+        executorAppId = result.appId;
+      }
+
+      // deploy ntt manager, whitelist ntt asset and set peer
+      {
+        const nttManagerFactory = algorand.client.getTypedAppFactory(MockNttManagerFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { appClient, result } = await nttManagerFactory.deploy();
+        nttManagerAppId = result.appId;
+        nttManagerClient = appClient;
+
+        const fundingTxn = await localnet.algorand.createTransaction.payment({
+          sender: creator,
+          receiver: getApplicationAddress(nttManagerAppId),
+          amount: (200_000).microAlgos(),
+        });
+        await nttManagerClient
+          .newGroup()
+          .addTransaction(fundingTxn)
+          .whitelistTokenForTransfer({
+            sender: creator,
+            args: [nttAssetId],
+            extraFee: (1000).microAlgos(),
+          })
+          .send();
+        await nttManagerClient.send.setNttManagerPeer({ sender: creator, args: [PEER_CONTRACT, PEER_DECIMALS] });
+        await nttManagerClient.send.setMessageId({ sender: creator, args: [getRandomBytes(32)] });
+      }
+
+      // deploy ntt manager with executor
+      {
+        const factory = algorand.client.getTypedAppFactory(NttManagerWithExecutorFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { appClient } = await factory.send.create.create({
+          sender: creator,
+          args: [OUR_CHAIN, executorAppId],
+        });
+        client = appClient;
+        await localnet.algorand.send.payment({
+          sender: creator,
+          receiver: getApplicationAddress(client.appId),
+          amount: (1).algo(),
+        });
+      }
+
+      const version = (await client.state.global.executorVersion()) ?? "unknown";
+      recorder = new BenchRecorder("NttManagerWithExecutor", version, await getApprovalHash(localnet, client.appId));
+    },
+    { timeout: 20_000 }
+  );
+
+  it("transfer", async () => {
+    await recorder.record("transfer", "no referrer fee", await getTransferGroup(0n));
+    await recorder.record("transfer", "referrer fee", await getTransferGroup(1_000n));
+  });
+
+  it("has no regressions against baseline", () => {
+    const regressions = recorder.writeAndCompare();
+    expect(regressions, regressions.join("\n")).to.be.empty;
+  });
+});
@@ -8,8 +8,14 @@ import { FakeNttManagerFactory } from "../../../../specs/client/FakeNttManager.c
 import { MockExecutorFactory } from "../../../../specs/client/MockExecutor.client.js";
 import { MockNttManagerFactory } from "../../../../specs/client/MockNttManager.client.js";
 import { NttManagerWithExecutorFactory } from "../../../../specs/client/NttManagerWithExecutor.client.js";
-import { convertNumberToBytes, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
-import { encodeNttV1Request } from "../../utils/quote.js";
+import { convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
+import {
+  encodedSignedQuoteBody,
+  encodeNttV1Request,
+  encodeSignedQuote,
+  encodeSignedQuoteHeader,
+} from "../../utils/quote.js";
+import { getPrevBlockTimestamp } from "../../utils/time.js";
 import { getRandomUInt, MAX_UINT16, MAX_UINT64 } from "../../utils/uint.js";
 
 import type { FakeNttManagerClient } from "../../../../specs/client/FakeNttManager.client.js";
@@ -1042,5 +1048,115 @@ describe("NttManagerWithExecutor", () => {
         ])
       );
     });
+
+    it("fails when executor paid directly to quote payee", async () => {
+      const totalAmount = getRandomUInt(10_000_000);
+      const feeArgs: FeeArgs = { dbps: 0, payee: referrer.toString() };
+
+      // quote paid to referrer
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const executorArgs: ExecutorArgs = {
+        ...EXECUTOR_ARGS,
+        signedQuoteBytes: encodeSignedQuote(
+          encodeSignedQuoteHeader(
+            enc.encode("EQ01"),
+            getRandomBytes(20),
+            referrer.publicKey,
+            OUR_CHAIN,
+            PEER_CHAIN,
+            expiryTime
+          ),
+          encodedSignedQuoteBody()
+        ),
+      };
+
+      // transfer
+      const { nttFeePaymentTxn, nttSendTokenTxn, nttTransferTxn, payReferrerTxn } = await generateTxnArgs(
+        localnet,
+        appId,
+        nttManagerClient,
+        user,
+        referrer,
+        nttAssetId,
+        PEER_CHAIN,
+        totalAmount
+      );
+      const payExecutorTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: referrer,
+        amount: getRandomUInt(10_000_000n).microAlgo(),
+      });
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(nttFeePaymentTxn)
+          .transfer({
+            sender: user,
+            args: [nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn, totalAmount, executorArgs, feeArgs],
+            extraFee: (3000).microAlgos(),
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown pay executor receiver");
+      }
+    });
+
+    it("succeeds when ntt manager peer changes", async () => {
+      const totalAmount = getRandomUInt(10_000_000);
+      const feeArgs: FeeArgs = { dbps: 0, payee: referrer.toString() };
+      const executorAmount = getRandomUInt(10_000_000n).microAlgo();
+
+      // update peer
+      const newPeerContract = getRandomBytes(32);
+      await nttManagerClient.send.setNttManagerPeer({
+        sender: creator,
+        args: [newPeerContract, PEER_DECIMALS],
+      });
+
+      // transfer
+      const { nttFeePaymentTxn, nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn } =
+        await generateTxnArgs(
+          localnet,
+          appId,
+          nttManagerClient,
+          user,
+          referrer,
+          nttAssetId,
+          PEER_CHAIN,
+          totalAmount,
+          0n,
+          executorAmount
+        );
+      const res = await client
+        .newGroup()
+        .addTransaction(nttFeePaymentTxn)
+        .transfer({
+          sender: user,
+          args: [nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn, totalAmount, EXECUTOR_ARGS, feeArgs],
+          extraFee: (3000).microAlgos(),
+        })
+        .send();
+
+      // logs
+      expect(res.confirmations[5].innerTxns?.[2].logs?.[0]).to.deep.equal(
+        getEventBytes("RequestForExecution(uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+          executorAmount.microAlgos,
+          PEER_CHAIN,
+          newPeerContract,
+          EXECUTOR_ARGS.refundAddress,
+          EXECUTOR_ARGS.signedQuoteBytes,
+          encodeNttV1Request(OUR_CHAIN, convertNumberToBytes(nttManagerAppId, 32), MESSAGE_ID),
+          EXECUTOR_ARGS.relayInstructions,
+        ])
+      );
+
+      // restore peer
+      await nttManagerClient.send.setNttManagerPeer({
+        sender: creator,
+        args: [PEER_CONTRACT, PEER_DECIMALS],
+      });
+    });
   });
 });
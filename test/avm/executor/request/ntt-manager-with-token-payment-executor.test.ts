@@ -5,11 +5,18 @@ import { getApplicationAddress, OnApplicationComplete } from "algosdk";
 import { expect } from "chai";
 
 import { FakeNttManagerFactory } from "../../../../specs/client/FakeNttManager.client.js";
+import { MockExecutorFactory } from "../../../../specs/client/MockExecutor.client.js";
 import { MockNttManagerFactory } from "../../../../specs/client/MockNttManager.client.js";
 import { MockTokenPaymentExecutorFactory } from "../../../../specs/client/MockTokenPaymentExecutor.client.js";
 import { NttManagerWithTokenPaymentExecutorFactory } from "../../../../specs/client/NttManagerWithTokenPaymentExecutor.client.js";
-import { convertNumberToBytes, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
-import { encodeNttV1Request } from "../../utils/quote.js";
+import { convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
+import {
+  encodedTokenPaymentSignedQuoteBody,
+  encodeNttV1Request,
+  encodeSignedQuote,
+  encodeSignedQuoteHeader,
+} from "../../utils/quote.js";
+import { getPrevBlockTimestamp } from "../../utils/time.js";
 import { getRandomUInt, MAX_UINT16, MAX_UINT64 } from "../../utils/uint.js";
 
 import type { FakeNttManagerClient } from "../../../../specs/client/FakeNttManager.client.js";
@@ -84,6 +91,9 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
   const TOKEN_PAYMENT_UNIT_NAME = "USDC";
   let tokenPaymentAssetId: bigint;
 
+  let underlyingExecutorFactory: MockExecutorFactory;
+  let underlyingExecutorAppId: bigint;
+
   let executorFactory: MockTokenPaymentExecutorFactory;
   let executorClient: MockTokenPaymentExecutorClient;
   let executorAppId: bigint;
@@ -105,6 +115,7 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
 
   const EXECUTOR_VERSION = "NttManagerWithTokenPaymentExecutor-0.0.1";
   const OUR_CHAIN = 8;
+  const WHITELIST_DEPOSIT = 128_900n;
   const PEER_CHAIN = 16;
   const PEER_CONTRACT = getRandomBytes(32);
   const PEER_DECIMALS = 8;
@@ -192,6 +203,18 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
         amount: BigInt(100e6),
       });
 
+      // deploy underlying executor
+      {
+        underlyingExecutorFactory = localnet.algorand.client.getTypedAppFactory(MockExecutorFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { result } = await underlyingExecutorFactory.deploy();
+        underlyingExecutorAppId = result.appId;
+
+        expect(underlyingExecutorAppId).not.to.equal(0n);
+      }
+
       // deploy executor
       {
         executorFactory = localnet.algorand.client.getTypedAppFactory(MockTokenPaymentExecutorFactory, {
@@ -220,6 +243,9 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
             extraFee: (1000).microAlgos(),
           })
           .send();
+
+        // set underlying executor
+        await executorClient.send.setExecutor({ sender: creator, args: [underlyingExecutorAppId] });
       }
 
       // deploy ntt manager
@@ -303,21 +329,38 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
   });
 
   describe("whitelist token for payment", () => {
+    before(async () => {
+      // fund account min balance, the asset and box min balance is deposited by the caller
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(appId),
+        amount: (100_000).microAlgos(),
+      });
+    });
+
     for (const { assetIdLength, arg } of [
       { assetIdLength: 4, arg: "arc4.uint64" },
       { assetIdLength: 16, arg: "arc4.uint64" },
     ]) {
       it(`fails when asset id is ${assetIdLength} bytes`, async () => {
         try {
-          await localnet.algorand.send.appCall({
-            sender: user,
-            appId,
-            onComplete: OnApplicationComplete.NoOpOC,
-            args: [
-              client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
-              convertNumberToBytes(0, assetIdLength),
-            ],
-          });
+          await localnet.algorand
+            .newGroup()
+            .addPayment({
+              sender: user,
+              receiver: getApplicationAddress(appId),
+              amount: WHITELIST_DEPOSIT.microAlgos(),
+            })
+            .addAppCall({
+              sender: user,
+              appId,
+              onComplete: OnApplicationComplete.NoOpOC,
+              args: [
+                client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
+                convertNumberToBytes(0, assetIdLength),
+              ],
+            })
+            .send();
           expect.fail("Expected function to throw");
         } catch (e) {
           expect((e as Error).message).to.include(`invalid number of bytes for ${arg}`);
@@ -325,22 +368,67 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
       });
     }
 
-    it("succeeds", async () => {
-      const APP_MIN_BALANCE = (200_000).microAlgos();
-      const fundingTxn = await localnet.algorand.createTransaction.payment({
-        sender: creator,
+    it("fails without min balance payment", async () => {
+      const assetCreateTxn = await localnet.algorand.createTransaction.assetCreate({
+        sender: user,
+        total: 1n,
+        decimals: 6,
+        assetName: "",
+        unitName: "",
+      });
+
+      try {
+        await localnet.algorand
+          .newGroup()
+          .addTransaction(assetCreateTxn)
+          .addAppCall({
+            sender: user,
+            appId,
+            onComplete: OnApplicationComplete.NoOpOC,
+            args: [
+              client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
+              convertNumberToBytes(tokenPaymentAssetId, 8),
+            ],
+            extraFee: (1000).microAlgos(),
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("transaction type is pay");
+      }
+      expect(await client.isWhitelistedForPayment({ args: [[tokenPaymentAssetId]] })).to.deep.equal([false]);
+    });
+
+    it("fails when min balance payment is insufficient", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
         receiver: getApplicationAddress(appId),
-        amount: APP_MIN_BALANCE,
+        amount: (WHITELIST_DEPOSIT - 1n).microAlgos(),
       });
-      const { confirmations } = await client
-        .newGroup()
-        .addTransaction(fundingTxn)
-        .whitelistTokenForPayment({
+
+      try {
+        await client.send.whitelistTokenForPayment({
           sender: user,
-          args: [tokenPaymentAssetId],
+          args: [mbrPaymentTxn, tokenPaymentAssetId],
           extraFee: (1000).microAlgos(),
-        })
-        .send();
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Insufficient min balance payment");
+      }
+    });
+
+    it("succeeds", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+      const { confirmations } = await client.send.whitelistTokenForPayment({
+        sender: user,
+        args: [mbrPaymentTxn, tokenPaymentAssetId],
+        extraFee: (1000).microAlgos(),
+      });
 
       expect(confirmations.length).to.equal(2);
       expect(confirmations[1].innerTxns).to.not.be.undefined;
@@ -356,6 +444,47 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
       );
       expect(confirmations[1].innerTxns?.[0].txn.txn.assetTransfer?.closeRemainderTo).to.be.undefined;
     });
+
+    it("batch succeeds and unwhitelist returns deposit to funder", async () => {
+      const { assetId } = await localnet.algorand.send.assetCreate({
+        sender: creator,
+        total: 1n,
+        decimals: 0,
+        assetName: "",
+        unitName: "",
+      });
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+
+      // token payment asset is already whitelisted so skipped
+      const { confirmations } = await client.send.whitelistTokensForPayment({
+        sender: user,
+        args: [mbrPaymentTxn, [tokenPaymentAssetId, assetId]],
+        extraFee: (2000).microAlgos(),
+      });
+      expect(confirmations[1].innerTxns?.length).to.equal(1);
+      expect(confirmations[1].innerTxns?.[0].txn.txn.assetTransfer?.assetIndex).to.equal(assetId);
+      expect(await client.isWhitelistedForPayment({ args: [[tokenPaymentAssetId, assetId]] })).to.deep.equal([
+        true,
+        true,
+      ]);
+
+      const res = await client.send.unwhitelistTokensForPayment({
+        sender: user,
+        args: [[assetId]],
+        extraFee: (2000).microAlgos(),
+      });
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.closeRemainderTo).to.deep.equal(creator.addr);
+      expect(res.confirmations[0].innerTxns?.[1].txn.txn.payment?.receiver).to.deep.equal(user.addr);
+      expect(res.confirmations[0].innerTxns?.[1].txn.txn.payment?.amount).to.equal(WHITELIST_DEPOSIT);
+      expect(await client.isWhitelistedForPayment({ args: [[tokenPaymentAssetId, assetId]] })).to.deep.equal([
+        true,
+        false,
+      ]);
+    });
   });
 
   describe("transfer", () => {
@@ -1200,5 +1329,190 @@ describe("NttManagerWithTokenPaymentExecutor", () => {
         ])
       );
     });
+
+    it("fails when executor paid directly to quote payee", async () => {
+      const { nttFeePaymentTxn, nttSendTokenTxn, nttTransferTxn, payReferrerTxn } = await generateTxnArgs(
+        localnet,
+        appId,
+        nttManagerClient,
+        user,
+        referrer,
+        tokenPaymentAssetId,
+        nttAssetId,
+        PEER_CHAIN
+      );
+      const payExecutorTxn = await localnet.algorand.createTransaction.assetTransfer({
+        sender: user,
+        assetId: tokenPaymentAssetId,
+        receiver: referrer,
+        amount: 0n,
+      });
+      const feeArgs: FeeArgs = { dbps: 0, payee: referrer.toString() };
+      const executorArgs: ExecutorArgs = {
+        ...EXECUTOR_ARGS,
+        signedQuoteBytes: encodeSignedQuote(
+          encodeSignedQuoteHeader(
+            enc.encode("EQC1"),
+            getRandomBytes(20),
+            referrer.publicKey,
+            OUR_CHAIN,
+            PEER_CHAIN,
+            (await getPrevBlockTimestamp(localnet)) + 60n
+          ),
+          encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(tokenPaymentAssetId, 32))
+        ),
+      };
+
+      try {
+        await client
+          .newGroup()
+          .addTransaction(nttFeePaymentTxn)
+          .transfer({
+            sender: user,
+            args: [nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn, 5_000_000n, executorArgs, feeArgs],
+            extraFee: (3000).microAlgos(),
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown pay executor receiver");
+      }
+    });
+
+    it("succeeds and pays quote payee directly when token payment executor forwards fees", async () => {
+      const totalAmount = getRandomUInt(10_000_000);
+      const nttTransferAmount = totalAmount;
+      const executorAmount = getRandomUInt(10_000_000n);
+      const feeArgs: FeeArgs = { dbps: 0, payee: referrer.toString() };
+
+      // quote paid in token payment asset to referrer
+      await localnet.algorand.send.assetOptIn({ sender: referrer, assetId: tokenPaymentAssetId });
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const quoterAddress = getRandomBytes(20);
+      const executorArgs: ExecutorArgs = {
+        ...EXECUTOR_ARGS,
+        signedQuoteBytes: encodeSignedQuote(
+          encodeSignedQuoteHeader(
+            enc.encode("EQC1"),
+            quoterAddress,
+            referrer.publicKey,
+            OUR_CHAIN,
+            PEER_CHAIN,
+            expiryTime
+          ),
+          encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(tokenPaymentAssetId, 32))
+        ),
+      };
+
+      // token payment executor forwards fees instead of accruing them
+      await executorClient.send.setAccrueFees({ sender: creator, args: [false] });
+
+      // transfer
+      const { nttFeePaymentTxn, nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn } =
+        await generateTxnArgs(
+          localnet,
+          appId,
+          nttManagerClient,
+          user,
+          referrer,
+          tokenPaymentAssetId,
+          nttAssetId,
+          PEER_CHAIN,
+          nttTransferAmount,
+          0n,
+          executorAmount
+        );
+      const res = await client
+        .newGroup()
+        .addTransaction(nttFeePaymentTxn)
+        .transfer({
+          sender: user,
+          args: [nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn, totalAmount, executorArgs, feeArgs],
+          extraFee: (3000).microAlgos(),
+        })
+        .send();
+
+      // inner txns, the fee is paid to the quote payee and the request made through the token payment executor
+      expect(res.confirmations[5].innerTxns?.length).to.equal(3);
+      expect(res.confirmations[5].innerTxns?.[1].txn.txn.type).to.equal("axfer");
+      expect(res.confirmations[5].innerTxns?.[1].txn.txn.assetTransfer?.assetIndex).to.equal(tokenPaymentAssetId);
+      expect(res.confirmations[5].innerTxns?.[1].txn.txn.assetTransfer?.amount).to.equal(executorAmount);
+      expect(res.confirmations[5].innerTxns?.[1].txn.txn.assetTransfer?.receiver).to.deep.equal(referrer.addr);
+      expect(res.confirmations[5].innerTxns?.[2].txn.txn.type).to.equal("appl");
+      expect(res.confirmations[5].innerTxns?.[2].txn.txn.applicationCall?.appIndex).to.equal(executorAppId);
+
+      // logs
+      expect(res.confirmations[5].innerTxns?.[2].logs?.[0]).to.deep.equal(
+        getEventBytes("RequestForExecution(uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+          executorAmount,
+          PEER_CHAIN,
+          PEER_CONTRACT,
+          executorArgs.refundAddress,
+          executorArgs.signedQuoteBytes,
+          encodeNttV1Request(OUR_CHAIN, convertNumberToBytes(nttManagerAppId, 32), MESSAGE_ID),
+          executorArgs.relayInstructions,
+        ])
+      );
+
+      // restore routing the fee through the token payment executor
+      await executorClient.send.setAccrueFees({ sender: creator, args: [true] });
+    });
+
+    it("succeeds when ntt manager peer changes", async () => {
+      const totalAmount = getRandomUInt(10_000_000);
+      const feeArgs: FeeArgs = { dbps: 0, payee: referrer.toString() };
+      const executorAmount = getRandomUInt(10_000_000n);
+
+      // update peer
+      const newPeerContract = getRandomBytes(32);
+      await nttManagerClient.send.setNttManagerPeer({
+        sender: creator,
+        args: [newPeerContract, PEER_DECIMALS],
+      });
+
+      // transfer
+      const { nttFeePaymentTxn, nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn } =
+        await generateTxnArgs(
+          localnet,
+          appId,
+          nttManagerClient,
+          user,
+          referrer,
+          tokenPaymentAssetId,
+          nttAssetId,
+          PEER_CHAIN,
+          totalAmount,
+          0n,
+          executorAmount
+        );
+      const res = await client
+        .newGroup()
+        .addTransaction(nttFeePaymentTxn)
+        .transfer({
+          sender: user,
+          args: [nttSendTokenTxn, nttTransferTxn, payExecutorTxn, payReferrerTxn, totalAmount, EXECUTOR_ARGS, feeArgs],
+          extraFee: (3000).microAlgos(),
+        })
+        .send();
+
+      // logs
+      expect(res.confirmations[5].innerTxns?.[2].logs?.[0]).to.deep.equal(
+        getEventBytes("RequestForExecution(uint64,uint16,byte[32],address,byte[],byte[],byte[])", [
+          executorAmount,
+          PEER_CHAIN,
+          newPeerContract,
+          EXECUTOR_ARGS.refundAddress,
+          EXECUTOR_ARGS.signedQuoteBytes,
+          encodeNttV1Request(OUR_CHAIN, convertNumberToBytes(nttManagerAppId, 32), MESSAGE_ID),
+          EXECUTOR_ARGS.relayInstructions,
+        ])
+      );
+
+      // restore peer
+      await nttManagerClient.send.setNttManagerPeer({
+        sender: creator,
+        args: [PEER_CONTRACT, PEER_DECIMALS],
+      });
+    });
   });
 });
@@ -0,0 +1,174 @@
+import { describe, it, before } from "node:test";
+
+import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
+import { getApplicationAddress } from "algosdk";
+import { expect } from "chai";
+
+import { ExecutorFactory } from "../../../../specs/client/Executor.client.js";
+import { TokenPaymentExecutorFactory } from "../../../../specs/client/TokenPaymentExecutor.client.js";
+import { BenchRecorder, getApprovalHash } from "../../utils/bench.js";
+import { convertNumberToBytes, enc, getRandomBytes } from "../../utils/bytes.js";
+import {
+  encodedTokenPaymentSignedQuoteBody,
+  encodeGasInstruction,
+  encodeNttV1Request,
+  encodeRelayInstructions,
+  encodeSignedQuote,
+  encodeSignedQuoteHeader,
+  encodeVaaV1Request,
+} from "../../utils/quote.js";
+import { getPrevBlockTimestamp } from "../../utils/time.js";
+
+import type { TokenPaymentExecutorClient } from "../../../../specs/client/TokenPaymentExecutor.client.js";
+import type { TransactionSignerAccount } from "@algorandfoundation/algokit-utils/types/account";
+import type { Account, Address } from "algosdk";
+
+describe("TokenPaymentExecutor bench", () => {
+  const localnet = algorandFixture();
+
+  let assetId: bigint;
+  let executorAppId: bigint;
+
+  let clients: Record<string, TokenPaymentExecutorClient>;
+  let recorder: BenchRecorder;
+
+  let creator: Address & Account & TransactionSignerAccount;
+  let user: Address & Account & TransactionSignerAccount;
+  let payee: Address & Account & TransactionSignerAccount;
+
+  const OUR_CHAIN = 8;
+  const AMOUNT = 1_000_000n;
+
+  const prefix = enc.encode("EQC1");
+  const quoterAddress = getRandomBytes(20);
+  const destinationChain = 6;
+  const destinationAddress = getRandomBytes(32);
+
+  const REQUESTS = {
+    ERV1: encodeVaaV1Request(OUR_CHAIN, getRandomBytes(32), 1n),
+    ERN1: encodeNttV1Request(OUR_CHAIN, getRandomBytes(32), getRandomBytes(32)),
+  };
+  const RELAY_INSTRUCTIONS = encodeRelayInstructions([encodeGasInstruction(250_000n, 0n)]);
+
+  before(
+    async () => {
+      await localnet.newScope();
+      const { algorand, generateAccount } = localnet.context;
+
+      creator = await generateAccount({ initialFunds: (100).algo() });
+      user = await generateAccount({ initialFunds: (100).algo() });
+      payee = await generateAccount({ initialFunds: (100).algo() });
+
+      // create asset, opt in payee and fund user
+      {
+        const res = await localnet.algorand.send.assetCreate({
+          sender: creator,
+          total: 50_000_000_000_000n,
+          decimals: 6,
+          assetName: "Folks Finance",
+          unitName: "FOLKS",
+        });
+        assetId = res.assetId;
+      }
+      await localnet.algorand.send.assetOptIn({ sender: payee, assetId });
+      await localnet.algorand.send.assetOptIn({ sender: user, assetId });
+      await localnet.algorand.send.assetTransfer({ sender: creator, receiver: user, assetId, amount: BigInt(100e6) });
+
+      // deploy executor
+      {
+        const executorFactory = algorand.client.getTypedAppFactory(ExecutorFactory, {
+          defaultSender: creator,
+          defaultSigner: creator.signer,
+        });
+        const { result } = await executorFactory.send.create.create({
+          sender: creator,
+          args: [OUR_CHAIN, false, false, false, false],
+        });
+        executorAppId = result.appId;
+        await localnet.algorand.send.payment({
+          sender: creator,
+          receiver: getApplicationAddress(executorAppId),
+          amount: (1).algo(),
+        });
+      }
+
+      // deploy token payment executor in each mode and whitelist asset
+      const factory = algorand.client.getTypedAppFactory(TokenPaymentExecutorFactory, {
+        defaultSender: creator,
+        defaultSigner: creator.signer,
+      });
+      clients = {};
+      for (const [mode, accrueFees] of [
+        ["default", false],
+        ["accrue fees", true],
+      ] as const) {
+        const { appClient } = await factory.send.create.create({
+          sender: creator,
+          args: [executorAppId, accrueFees],
+        });
+        await localnet.algorand.send.payment({
+          sender: creator,
+          receiver: getApplicationAddress(appClient.appId),
+          amount: (1).algo(),
+        });
+        const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+          sender: creator,
+          receiver: getApplicationAddress(appClient.appId),
+          amount: (128_900).microAlgos(),
+        });
+        await appClient.send.whitelistTokenForPayment({
+          sender: creator,
+          args: [mbrPaymentTxn, assetId],
+          extraFee: (1000).microAlgos(),
+        });
+        clients[mode] = appClient;
+      }
+
+      const client = clients.default;
+      const version = (await client.state.global.executorVersion()) ?? "unknown";
+      recorder = new BenchRecorder("TokenPaymentExecutor", version, await getApprovalHash(localnet, client.appId));
+    },
+    { timeout: 20_000 }
+  );
+
+  it("request execution with token payment", async () => {
+    for (const [mode, client] of Object.entries(clients)) {
+      for (const [requestType, requestBytes] of Object.entries(REQUESTS)) {
+        const expiryTime = (await getPrevBlockTimestamp(localnet)) + 3600n;
+        const signedQuoteBytes = encodeSignedQuote(
+          encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+          encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(assetId, 32))
+        );
+        const feePaymentTxn = await localnet.algorand.createTransaction.assetTransfer({
+          sender: user,
+          receiver: getApplicationAddress(client.appId),
+          assetId,
+          amount: AMOUNT,
+        });
+        await recorder.record(
+          "request_execution_with_token_payment",
+          `${requestType}, ${mode}`,
+          client.newGroup().requestExecutionWithTokenPayment({
+            sender: user,
+            args: [
+              feePaymentTxn,
+              destinationChain,
+              destinationAddress,
+              user.toString(),
+              signedQuoteBytes,
+              requestBytes,
+              RELAY_INSTRUCTIONS,
+            ],
+            appReferences: [executorAppId],
+            extraFee: (3000).microAlgos(),
+          })
+        );
+      }
+    }
+  });
+
+  it("has no regressions against baseline", () => {
+    const regressions = recorder.writeAndCompare();
+    expect(regressions, regressions.join("\n")).to.be.empty;
+  });
+});
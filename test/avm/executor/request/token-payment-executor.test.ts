@@ -4,6 +4,7 @@ import { algorandFixture } from "@algorandfoundation/algokit-utils/testing";
 import { getApplicationAddress, OnApplicationComplete } from "algosdk";
 import { expect } from "chai";
 
+import { ExecutorFactory } from "../../../../specs/client/Executor.client.js";
 import { MockExecutorFactory } from "../../../../specs/client/MockExecutor.client.js";
 import { TokenPaymentExecutorFactory } from "../../../../specs/client/TokenPaymentExecutor.client.js";
 import { convertNumberToBytes, enc, getEventBytes, getRandomBytes } from "../../utils/bytes.js";
@@ -39,6 +40,7 @@ describe("TokenPaymentExecutor", () => {
 
   const EXECUTOR_VERSION = "TokenPaymentExecutor-0.0.1";
   const OUR_CHAIN = 8n;
+  const WHITELIST_DEPOSIT = 128_900n;
 
   const prefix = enc.encode("EQC1");
   const quoterAddress = getRandomBytes(20);
@@ -113,12 +115,30 @@ describe("TokenPaymentExecutor", () => {
   );
 
   describe("creation", () => {
+    it("fails when executor indexes requests", async () => {
+      const indexingExecutorFactory = localnet.algorand.client.getTypedAppFactory(ExecutorFactory, {
+        defaultSender: creator,
+        defaultSigner: creator.signer,
+      });
+      const { result } = await indexingExecutorFactory.send.create.create({
+        sender: creator,
+        args: [OUR_CHAIN, false, false, false, true],
+      });
+
+      try {
+        await factory.send.create.create({ sender: creator, args: [result.appId, false] });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Executor indexes requests");
+      }
+    });
+
     it("deploys with correct state", async () => {
       const { appClient, result } = await factory.deploy({
         createParams: {
           sender: creator,
           method: "create",
-          args: [executorAppId],
+          args: [executorAppId, false],
         },
       });
       appId = result.appId;
@@ -127,25 +147,43 @@ describe("TokenPaymentExecutor", () => {
       expect(appId).not.to.equal(0n);
       expect(await client.state.global.executorVersion()).to.equal(EXECUTOR_VERSION);
       expect(await client.state.global.executor()).to.equal(executorAppId);
+      expect(await client.state.global.accrueFees()).to.equal(false);
     });
   });
 
   describe("whitelist token for payment", () => {
+    before(async () => {
+      // fund account min balance, the asset and box min balance is deposited by the caller
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(appId),
+        amount: (100_000).microAlgos(),
+      });
+    });
+
     for (const { assetIdLength, arg } of [
       { assetIdLength: 4, arg: "arc4.uint64" },
       { assetIdLength: 16, arg: "arc4.uint64" },
     ]) {
       it(`fails when asset id is ${assetIdLength} bytes`, async () => {
         try {
-          await localnet.algorand.send.appCall({
-            sender: user,
-            appId,
-            onComplete: OnApplicationComplete.NoOpOC,
-            args: [
-              client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
-              convertNumberToBytes(0, assetIdLength),
-            ],
-          });
+          await localnet.algorand
+            .newGroup()
+            .addPayment({
+              sender: user,
+              receiver: getApplicationAddress(appId),
+              amount: WHITELIST_DEPOSIT.microAlgos(),
+            })
+            .addAppCall({
+              sender: user,
+              appId,
+              onComplete: OnApplicationComplete.NoOpOC,
+              args: [
+                client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
+                convertNumberToBytes(0, assetIdLength),
+              ],
+            })
+            .send();
           expect.fail("Expected function to throw");
         } catch (e) {
           expect((e as Error).message).to.include(`invalid number of bytes for ${arg}`);
@@ -153,25 +191,108 @@ describe("TokenPaymentExecutor", () => {
       });
     }
 
-    it("succeeds", async () => {
-      const APP_MIN_BALANCE = (200_000).microAlgos();
-      const fundingTxn = await localnet.algorand.createTransaction.payment({
+    it("fails without min balance payment", async () => {
+      const assetCreateTxn = await localnet.algorand.createTransaction.assetCreate({
+        sender: user,
+        total: 1n,
+        decimals: 6,
+        assetName: "",
+        unitName: "",
+      });
+
+      try {
+        await localnet.algorand
+          .newGroup()
+          .addTransaction(assetCreateTxn)
+          .addAppCall({
+            sender: user,
+            appId,
+            onComplete: OnApplicationComplete.NoOpOC,
+            args: [
+              client.appClient.getABIMethod("whitelist_token_for_payment").getSelector(),
+              convertNumberToBytes(assetId, 8),
+            ],
+            extraFee: (1000).microAlgos(),
+          })
+          .send();
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("transaction type is pay");
+      }
+      expect(await client.isWhitelistedForPayment({ args: [[assetId]] })).to.deep.equal([false]);
+    });
+
+    it("fails when min balance payment is from another sender", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
         sender: creator,
         receiver: getApplicationAddress(appId),
-        amount: APP_MIN_BALANCE,
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+
+      try {
+        await client.send.whitelistTokenForPayment({
+          sender: user,
+          args: [mbrPaymentTxn, assetId],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Min balance txn must be from same sender");
+      }
+    });
+
+    it("fails when min balance payment receiver is unknown", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: creator,
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+
+      try {
+        await client.send.whitelistTokenForPayment({
+          sender: user,
+          args: [mbrPaymentTxn, assetId],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Unknown min balance payment receiver");
+      }
+    });
+
+    it("fails when min balance payment is insufficient", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: (WHITELIST_DEPOSIT - 1n).microAlgos(),
       });
-      const { confirmations } = await client
-        .newGroup()
-        .addTransaction(fundingTxn)
-        .whitelistTokenForPayment({
+
+      try {
+        await client.send.whitelistTokenForPayment({
           sender: user,
-          args: [assetId],
+          args: [mbrPaymentTxn, assetId],
           extraFee: (1000).microAlgos(),
-        })
-        .send();
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Insufficient min balance payment");
+      }
+    });
+
+    it("succeeds and returns excess min balance payment", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(appId),
+        amount: (WHITELIST_DEPOSIT + 1000n).microAlgos(),
+      });
+      const { confirmations } = await client.send.whitelistTokenForPayment({
+        sender: user,
+        args: [mbrPaymentTxn, assetId],
+        extraFee: (2000).microAlgos(),
+      });
 
       expect(confirmations.length).to.equal(2);
-      expect(confirmations[1].innerTxns).to.not.be.undefined;
+      expect(confirmations[1].innerTxns?.length).to.equal(2);
       const optIntoAssetTx = confirmations[1].innerTxns?.[0];
       expect(optIntoAssetTx?.txn.txn.type).to.equal("axfer");
       expect(optIntoAssetTx?.txn.txn.sender).to.deep.equal(getApplicationAddress(appId));
@@ -183,6 +304,9 @@ describe("TokenPaymentExecutor", () => {
         getApplicationAddress(appId)
       );
       expect(confirmations[1].innerTxns?.[0].txn.txn.assetTransfer?.closeRemainderTo).to.be.undefined;
+      expect(confirmations[1].innerTxns?.[1].txn.txn.payment?.receiver).to.deep.equal(user.addr);
+      expect(confirmations[1].innerTxns?.[1].txn.txn.payment?.amount).to.equal(1000n);
+      expect(await client.isWhitelistedForPayment({ args: [[assetId]] })).to.deep.equal([true]);
     });
   });
 
@@ -561,11 +685,10 @@ describe("TokenPaymentExecutor", () => {
       const relayInstructions = getRandomBytes(33);
 
       // request execution
-      const APP_MIN_BALANCE = (100_000).microAlgos();
-      const fundingTxn = await localnet.algorand.createTransaction.payment({
-        sender: creator,
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
         receiver: getApplicationAddress(appId),
-        amount: APP_MIN_BALANCE,
+        amount: WHITELIST_DEPOSIT.microAlgos(),
       });
       const feePaymentTxn = await localnet.algorand.createTransaction.assetTransfer({
         sender: user,
@@ -577,10 +700,9 @@ describe("TokenPaymentExecutor", () => {
       try {
         await client
           .newGroup()
-          .addTransaction(fundingTxn)
           .whitelistTokenForPayment({
             sender: user,
-            args: [fakeAssetId],
+            args: [mbrPaymentTxn, fakeAssetId],
             extraFee: (1000).microAlgos(),
           })
           .requestExecutionWithTokenPayment({
@@ -669,5 +791,350 @@ describe("TokenPaymentExecutor", () => {
         ])
       );
     });
+
+    it("succeeds when fee paid directly to payee", async () => {
+      // prepare bytes
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const estimatedCost = getRandomUInt(1_000_000);
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(assetId, 32))
+      );
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.assetTransfer({
+        sender: user,
+        receiver: payee,
+        assetId,
+        amount: estimatedCost,
+      });
+      const res = await client.send.requestExecutionWithTokenPayment({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ],
+        extraFee: (2000).microAlgos(),
+      });
+
+      // inner txns, token payment is not forwarded
+      expect(res.confirmations[1].innerTxns?.length).to.equal(2);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(0n);
+      expect(res.confirmations[1].innerTxns?.[1].txn.txn.type).to.equal("appl");
+
+      // logs
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("PaymentInToken(uint64,uint64)", [assetId, estimatedCost])
+      );
+    });
+  });
+
+  describe("accrual mode", () => {
+    let accrualClient: TokenPaymentExecutorClient;
+    let accrualAppId: bigint;
+
+    let accruedAmount: bigint;
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [executorAppId, true],
+      });
+      accrualAppId = result.appId;
+      accrualClient = appClient;
+
+      // fund account and accrued fees box min balance, then whitelist asset
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(accrualAppId),
+        amount: (200_000).microAlgos(),
+      });
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: creator,
+        receiver: getApplicationAddress(accrualAppId),
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+      await accrualClient.send.whitelistTokenForPayment({
+        sender: creator,
+        args: [mbrPaymentTxn, assetId],
+        extraFee: (1000).microAlgos(),
+      });
+
+      expect(await accrualClient.state.global.accrueFees()).to.equal(true);
+    });
+
+    it("request execution with token payment fails when payee not opted into asset", async () => {
+      // prepare bytes
+      const unknownPayee = await localnet.context.generateAccount({ initialFunds: (1).algo() });
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, unknownPayee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(assetId, 32))
+      );
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.assetTransfer({
+        sender: user,
+        receiver: getApplicationAddress(accrualAppId),
+        assetId,
+        amount: getRandomUInt(1_000_000),
+      });
+      try {
+        await accrualClient.send.requestExecutionWithTokenPayment({
+          sender: user,
+          args: [
+            feePaymentTxn,
+            destinationChain,
+            destinationAddress,
+            refundTo.toString(),
+            signedQuoteBytes,
+            getRandomBytes(46),
+            getRandomBytes(33),
+          ],
+          extraFee: (2000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Payee not opted into asset");
+      }
+    });
+
+    it("request execution with token payment accrues fees", async () => {
+      // prepare bytes
+      const expiryTime = (await getPrevBlockTimestamp(localnet)) + 60n;
+      const estimatedCost = getRandomUInt(1_000_000);
+      const signedQuoteBytes = encodeSignedQuote(
+        encodeSignedQuoteHeader(prefix, quoterAddress, payee.publicKey, OUR_CHAIN, destinationChain, expiryTime),
+        encodedTokenPaymentSignedQuoteBody(convertNumberToBytes(assetId, 32))
+      );
+      const requestBytes = getRandomBytes(46);
+      const relayInstructions = getRandomBytes(33);
+
+      // request execution
+      const feePaymentTxn = await localnet.algorand.createTransaction.assetTransfer({
+        sender: user,
+        receiver: getApplicationAddress(accrualAppId),
+        assetId,
+        amount: estimatedCost,
+      });
+      const res = await accrualClient.send.requestExecutionWithTokenPayment({
+        sender: user,
+        args: [
+          feePaymentTxn,
+          destinationChain,
+          destinationAddress,
+          refundTo.toString(),
+          signedQuoteBytes,
+          requestBytes,
+          relayInstructions,
+        ],
+        extraFee: (2000).microAlgos(),
+      });
+      accruedAmount = estimatedCost;
+
+      // inner txns
+      expect(res.confirmations[1].innerTxns?.length).to.equal(2);
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[1].innerTxns?.[0].txn.txn.payment?.amount).to.equal(0n);
+
+      // logs
+      expect(res.confirmations[1].logs?.[0]).to.deep.equal(
+        getEventBytes("FeesAccrued(address,uint64,uint64)", [payee.toString(), assetId, accruedAmount])
+      );
+      expect(res.confirmations[1].logs?.[1]).to.deep.equal(
+        getEventBytes("PaymentInToken(uint64,uint64)", [assetId, accruedAmount])
+      );
+
+      // accrued fees
+      expect(await accrualClient.getAccruedFees({ args: [payee.toString(), assetId] })).to.equal(accruedAmount);
+    });
+
+    it("settle fails when no fees accrued", async () => {
+      try {
+        await accrualClient.send.settleAccruedFees({
+          sender: user,
+          args: [payee.toString(), fakeAssetId],
+          extraFee: (1000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("No accrued fees");
+      }
+    });
+
+    it("settle succeeds", async () => {
+      const res = await accrualClient.send.settleAccruedFees({
+        sender: user,
+        args: [payee.toString(), assetId],
+        extraFee: (1000).microAlgos(),
+      });
+
+      // logs
+      expect(res.confirmations[0].logs?.[0]).to.deep.equal(
+        getEventBytes("AccruedFeesSettled(address,uint64,uint64)", [payee.toString(), assetId, accruedAmount])
+      );
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(1);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.type).to.equal("axfer");
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.assetIndex).to.equal(assetId);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.amount).to.equal(accruedAmount);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.receiver).to.deep.equal(payee.addr);
+
+      // accrued fees
+      expect(await accrualClient.getAccruedFees({ args: [payee.toString(), assetId] })).to.equal(0n);
+    });
+  });
+
+  describe("whitelist tokens for payment", () => {
+    let registryClient: TokenPaymentExecutorClient;
+    let registryAppId: bigint;
+
+    const assetIds: Array<bigint> = [];
+
+    before(async () => {
+      const { appClient, result } = await factory.send.create.create({
+        sender: creator,
+        args: [executorAppId, false],
+      });
+      registryAppId = result.appId;
+      registryClient = appClient;
+
+      // fund account min balance
+      await localnet.algorand.send.payment({
+        sender: creator,
+        receiver: getApplicationAddress(registryAppId),
+        amount: (100_000).microAlgos(),
+      });
+
+      for (let i = 0; i < 2; i++) {
+        const res = await localnet.algorand.send.assetCreate({
+          sender: creator,
+          total: TOTAL,
+          decimals: DECIMALS,
+          assetName: ASSET_NAME,
+          unitName: UNIT_NAME,
+        });
+        assetIds.push(res.assetId);
+      }
+    });
+
+    it("fails when min balance payment doesn't cover every token", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(registryAppId),
+        amount: WHITELIST_DEPOSIT.microAlgos(),
+      });
+
+      try {
+        await registryClient.send.whitelistTokensForPayment({
+          sender: user,
+          args: [mbrPaymentTxn, assetIds],
+          extraFee: (2000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Insufficient min balance payment");
+      }
+    });
+
+    it("succeeds and skips tokens already whitelisted", async () => {
+      const mbrPaymentTxn = await localnet.algorand.createTransaction.payment({
+        sender: user,
+        receiver: getApplicationAddress(registryAppId),
+        amount: (2n * WHITELIST_DEPOSIT).microAlgos(),
+      });
+      const { confirmations } = await registryClient.send.whitelistTokensForPayment({
+        sender: user,
+        args: [mbrPaymentTxn, [...assetIds, assetIds[0]]],
+        extraFee: (2000).microAlgos(),
+      });
+
+      // inner txns
+      expect(confirmations[1].innerTxns?.length).to.equal(2);
+      for (const [i, assetId] of assetIds.entries()) {
+        expect(confirmations[1].innerTxns?.[i].txn.txn.assetTransfer?.assetIndex).to.equal(assetId);
+        expect(confirmations[1].innerTxns?.[i].txn.txn.assetTransfer?.receiver).to.deep.equal(
+          getApplicationAddress(registryAppId)
+        );
+      }
+      expect(await registryClient.isWhitelistedForPayment({ args: [[...assetIds, fakeAssetId]] })).to.deep.equal([
+        true,
+        true,
+        false,
+      ]);
+    });
+
+    it("unwhitelist fails when caller isn't funder", async () => {
+      try {
+        await registryClient.send.unwhitelistTokensForPayment({
+          sender: creator,
+          args: [[assetIds[0]]],
+          extraFee: (2000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Caller must be funder");
+      }
+    });
+
+    it("unwhitelist fails when token in use", async () => {
+      await localnet.algorand.send.assetTransfer({
+        sender: creator,
+        receiver: getApplicationAddress(registryAppId),
+        assetId: assetIds[1],
+        amount: 1n,
+      });
+
+      try {
+        await registryClient.send.unwhitelistTokensForPayment({
+          sender: user,
+          args: [[assetIds[1]]],
+          extraFee: (2000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Token in use");
+      }
+    });
+
+    it("unwhitelist succeeds and returns deposit to funder", async () => {
+      const res = await registryClient.send.unwhitelistTokensForPayment({
+        sender: user,
+        args: [[assetIds[0]]],
+        extraFee: (2000).microAlgos(),
+      });
+
+      // inner txns
+      expect(res.confirmations[0].innerTxns?.length).to.equal(2);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.assetIndex).to.equal(assetIds[0]);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.amount).to.equal(0n);
+      expect(res.confirmations[0].innerTxns?.[0].txn.txn.assetTransfer?.closeRemainderTo).to.deep.equal(creator.addr);
+      expect(res.confirmations[0].innerTxns?.[1].txn.txn.type).to.equal("pay");
+      expect(res.confirmations[0].innerTxns?.[1].txn.txn.payment?.receiver).to.deep.equal(user.addr);
+      expect(res.confirmations[0].innerTxns?.[1].txn.txn.payment?.amount).to.equal(WHITELIST_DEPOSIT);
+      expect(await registryClient.isWhitelistedForPayment({ args: [assetIds] })).to.deep.equal([false, true]);
+    });
+
+    it("unwhitelist fails when token not whitelisted", async () => {
+      try {
+        await registryClient.send.unwhitelistTokensForPayment({
+          sender: user,
+          args: [[assetIds[0]]],
+          extraFee: (2000).microAlgos(),
+        });
+        expect.fail("Expected function to throw");
+      } catch (e) {
+        expect((e as Error).message).to.include("Token not whitelisted");
+      }
+    });
   });
 });
@@ -0,0 +1,115 @@
+import { existsSync, mkdirSync, readFileSync, writeFileSync } from "node:fs";
+import { join } from "node:path";
+
+import { sha512_256 } from "@noble/hashes/sha2";
+
+import type { AlgorandFixture } from "@algorandfoundation/algokit-utils/types/testing";
+import type { modelsv2 } from "algosdk";
+
+export const BENCH_REPORT_DIR = process.env.BENCH_REPORT_DIR ?? "bench/reports";
+export const BENCH_BASELINE_DIR = process.env.BENCH_BASELINE_DIR ?? "bench/baseline";
+export const BENCH_THRESHOLD = Number(process.env.BENCH_THRESHOLD ?? "0.05");
+
+const MIN_TXN_FEE = 1000;
+
+export type BenchMetrics = {
+  opcodeBudget: number;
+  innerTxns: number;
+  minFee: number;
+  logBytes: number;
+};
+
+export type BenchEntry = BenchMetrics & {
+  method: string;
+  case: string;
+};
+
+export type BenchReport = {
+  contract: string;
+  version: string;
+  approvalHash: string;
+  entries: Array<BenchEntry>;
+};
+
+type Simulatable = {
+  simulate(options: {
+    allowUnnamedResources?: boolean;
+    skipSignatures?: boolean;
+  }): Promise<{ simulateResponse: modelsv2.SimulateResponse }>;
+};
+
+function countInnerTxns(txn: modelsv2.PendingTransactionResponse): number {
+  return (txn.innerTxns ?? []).reduce((count, inner) => count + 1 + countInnerTxns(inner), 0);
+}
+
+function countLogBytes(txn: modelsv2.PendingTransactionResponse): number {
+  const logBytes = (txn.logs ?? []).reduce((sum, log) => sum + log.length, 0);
+  return (txn.innerTxns ?? []).reduce((sum, inner) => sum + countLogBytes(inner), logBytes);
+}
+
+export async function measure(composer: Simulatable): Promise<BenchMetrics> {
+  const { simulateResponse } = await composer.simulate({ allowUnnamedResources: true, skipSignatures: true });
+  const [group] = simulateResponse.txnGroups;
+  if (group.failureMessage) throw Error(group.failureMessage);
+
+  const txnResults = group.txnResults.map(({ txnResult }) => txnResult);
+  const innerTxns = txnResults.reduce((count, txn) => count + countInnerTxns(txn), 0);
+  return {
+    opcodeBudget: Number(group.appBudgetConsumed ?? 0),
+    innerTxns,
+    minFee: (txnResults.length + innerTxns) * MIN_TXN_FEE,
+    logBytes: txnResults.reduce((sum, txn) => sum + countLogBytes(txn), 0),
+  };
+}
+
+export async function getApprovalHash(localnet: AlgorandFixture, appId: bigint): Promise<string> {
+  const { approvalProgram } = await localnet.algorand.app.getById(appId);
+  return Buffer.from(sha512_256(approvalProgram)).toString("hex").slice(0, 16);
+}
+
+export class BenchRecorder {
+  private readonly entries: Array<BenchEntry> = [];
+
+  constructor(
+    private readonly contract: string,
+    private readonly version: string,
+    private readonly approvalHash: string
+  ) {}
+
+  async record(method: string, name: string, composer: Simulatable): Promise<BenchMetrics> {
+    const metrics = await measure(composer);
+    this.entries.push({ method, case: name, ...metrics });
+    return metrics;
+  }
+
+  getReport(): BenchReport {
+    return { contract: this.contract, version: this.version, approvalHash: this.approvalHash, entries: this.entries };
+  }
+
+  // write report and return the regressions against the baseline with the same version, if any
+  writeAndCompare(): Array<string> {
+    const report = this.getReport();
+    const fileName = `${report.contract}-${report.version}.json`;
+    mkdirSync(BENCH_REPORT_DIR, { recursive: true });
+    writeFileSync(join(BENCH_REPORT_DIR, fileName), JSON.stringify(report, null, 2) + "\n");
+
+    const baselinePath = join(BENCH_BASELINE_DIR, fileName);
+    if (!existsSync(baselinePath)) return [];
+    const baseline = JSON.parse(readFileSync(baselinePath).toString()) as BenchReport;
+    return compareReports(baseline, report, BENCH_THRESHOLD);
+  }
+}
+
+export function compareReports(baseline: BenchReport, report: BenchReport, threshold: number): Array<string> {
+  const regressions: Array<string> = [];
+  for (const entry of report.entries) {
+    const base = baseline.entries.find((e) => e.method === entry.method && e.case === entry.case);
+    if (base === undefined) continue;
+    for (const metric of ["opcodeBudget", "innerTxns", "minFee", "logBytes"] as const) {
+      if (entry[metric] > base[metric] * (1 + threshold)) {
+        regressions.push(`${entry.method} (${entry.case}): ${metric} ${base[metric]} -> ${entry[metric]}`);
+      }
+    }
+  }
+  return regressions;
+}
@@ -1,3 +1,6 @@
+import { keccak256 } from "viem";
+import { sign } from "viem/accounts";
+
 import { convertNumberToBytes, enc, getRandomBytes } from "./bytes.js";
 import { getRandomUInt } from "./uint.js";
 
@@ -59,6 +62,11 @@ export function encodeSignedQuote(header: Uint8Array, body: Uint8Array) {
   return Uint8Array.from([...header, ...body]);
 }
 
+export async function signQuote(unsignedQuote: Uint8Array, privateKey: `0x${string}`) {
+  const signature = await sign({ hash: keccak256(unsignedQuote), privateKey, to: "bytes" });
+  return Uint8Array.from([...unsignedQuote, ...signature]);
+}
+
 export function encodeVaaV1Request(emitterChain: number | bigint, emitterAddress: Uint8Array, sequence: bigint) {
   if (emitterAddress.length !== 32) throw Error("Emitter address must be 32 bytes");
   return Uint8Array.from([
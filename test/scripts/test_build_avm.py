@@ -0,0 +1,99 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parents[2] / "scripts"))
+
+from build_avm import build, find_modules, import_closure, is_contract_module
+
+SOURCES = {
+    "contracts/__init__.py": "",
+    "contracts/avm/__init__.py": "",
+    "contracts/avm/types.py": "from algopy.arc4 import Struct\n",
+    "contracts/avm/libraries/__init__.py": "",
+    "contracts/avm/libraries/Maths.py": "from algopy import subroutine\n",
+    "contracts/avm/interfaces/__init__.py": "",
+    "contracts/avm/interfaces/IExecutor.py": (
+        "from abc import ABC\nfrom algopy import ARC4Contract\nfrom ..types import Struct\n\n"
+        "class Event(Struct):\n    pass\n\nclass IExecutor(ARC4Contract, ABC):\n    pass\n"
+    ),
+    "contracts/avm/Executor.py": (
+        "from .interfaces.IExecutor import IExecutor\nfrom .libraries import Maths\n\n"
+        "class Executor(IExecutor):\n    pass\n"
+    ),
+    "contracts/avm/Receiver.py": "import algopy\n\nclass Receiver(algopy.ARC4Contract):\n    pass\n",
+}
+
+
+class CompilerStandIn:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.compiled = []
+
+    def __call__(self, path, out_dir):
+        self.compiled.append(path.stem)
+        if path.stem in self.failing:
+            raise subprocess.CalledProcessError(1, ["algokit", "compile", "py", str(path)])
+        contents = path.read_text()
+        for kind, suffix in (("teal", ".approval.teal"), ("arc56", ".arc56.json"), ("client", ".client.ts")):
+            (out_dir / kind).mkdir()
+            (out_dir / kind / f"{path.stem}{suffix}").write_text(contents)
+
+
+@pytest.fixture
+def root(tmp_path):
+    for name, source in SOURCES.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(source)
+    return tmp_path
+
+
+def run_build(root, compiler, **kwargs):
+    return build(
+        root / "contracts/avm", root / "specs", root / "cache", source_root=root, compiler=compiler,
+        toolchain=["puyapy==5.5.0"], **kwargs
+    )
+
+
+def test_import_closure(root):
+    modules = find_modules(root / "contracts/avm", root)
+    assert [name for name, module in modules.items() if is_contract_module(module)] == [
+        "contracts.avm.Executor", "contracts.avm.Receiver"
+    ]
+    local, external = import_closure("contracts.avm.Executor", modules)
+    assert local == {
+        "contracts", "contracts.avm", "contracts.avm.Executor", "contracts.avm.types", "contracts.avm.interfaces",
+        "contracts.avm.interfaces.IExecutor", "contracts.avm.libraries", "contracts.avm.libraries.Maths",
+    }
+    assert external == {"abc", "algopy"}
+
+
+def test_compiles_only_changed_contracts(root):
+    compiler = CompilerStandIn()
+    assert run_build(root, compiler) == (["contracts.avm.Executor", "contracts.avm.Receiver"], [])
+    assert sorted(path.name for path in (root / "specs/teal").iterdir()) == [
+        "Executor.approval.teal", "Receiver.approval.teal"
+    ]
+
+    # a change to an imported module invalidates the contracts importing it
+    (root / "contracts/avm/libraries/Maths.py").write_text("from algopy import UInt64, subroutine\n")
+    assert run_build(root, compiler) == (["contracts.avm.Executor"], ["contracts.avm.Receiver"])
+    assert run_build(root, compiler) == ([], ["contracts.avm.Executor", "contracts.avm.Receiver"])
+    assert sorted(compiler.compiled) == ["Executor", "Executor", "Receiver"]
+    assert (root / "specs/client/Executor.client.ts").read_text() == SOURCES["contracts/avm/Executor.py"]
+
+    # reverting the change reuses the first artifacts, until they are pruned
+    (root / "contracts/avm/libraries/Maths.py").write_text(SOURCES["contracts/avm/libraries/Maths.py"])
+    assert run_build(root, compiler, prune=True).compiled == []
+    assert len(list((root / "cache").iterdir())) == 2
+    assert run_build(root, compiler, force=True).compiled == ["contracts.avm.Executor", "contracts.avm.Receiver"]
+
+
+def test_keeps_cache_of_contracts_which_compiled(root):
+    with pytest.raises(subprocess.CalledProcessError):
+        run_build(root, CompilerStandIn(failing=["Executor"]))
+    # the failed compile leaves no partial entry behind
+    assert len(list((root / "cache").iterdir())) == 1
+    assert run_build(root, CompilerStandIn()) == (["contracts.avm.Executor"], ["contracts.avm.Receiver"])
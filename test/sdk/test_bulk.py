@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from executor_sdk.bulk import decode_logs
+from executor_sdk.events import (
+    NTT_MESSAGE_RECEIVED_SIGNATURE, PAYMENT_IN_TOKEN_SIGNATURE, REQUEST_FOR_EXECUTION_SIGNATURE,
+    REQUEST_FOR_EXECUTION_V2_SIGNATURE, VAA_MESSAGE_RECEIVED_SIGNATURE, get_event_selector
+)
+from executor_sdk.codec import (
+    encode_gas_instruction, encode_relay_instructions, encode_signed_quote, encode_vaa_v1_request
+)
+from utils import encode_event
+
+QUOTER = os.urandom(20)
+DST_ADDR = os.urandom(32)
+REFUND_ADDR = os.urandom(32)
+SIGNED_QUOTE = encode_signed_quote(b"EQ01", QUOTER, os.urandom(32), 8, 6, 1_700_000_000, 1, 2, 3, 4, os.urandom(65))
+REQUEST = encode_vaa_v1_request(8, os.urandom(32), 1)
+RELAY_INSTRUCTIONS = encode_relay_instructions([encode_gas_instruction(250_000, 0)])
+
+
+def request_for_execution_log(amt_paid):
+    head = QUOTER + amt_paid.to_bytes(8, "big") + (6).to_bytes(2, "big") + DST_ADDR + REFUND_ADDR
+    return encode_event(REQUEST_FOR_EXECUTION_SIGNATURE, head, SIGNED_QUOTE, REQUEST, RELAY_INSTRUCTIONS)
+
+
+def request_for_execution_v2_log(amt_paid):
+    head = b"\x02" + amt_paid.to_bytes(8, "big") + DST_ADDR + REFUND_ADDR
+    return encode_event(REQUEST_FOR_EXECUTION_V2_SIGNATURE, head, SIGNED_QUOTE, REQUEST, RELAY_INSTRUCTIONS)
+
+
+def message_received_log(signature, request_for_execution_id, success, error_reason):
+    head = request_for_execution_id + (b"\x80" if success else b"\x00")
+    return encode_event(signature, head, error_reason)
+
+
+def test_get_event_selector():
+    assert get_event_selector(PAYMENT_IN_TOKEN_SIGNATURE) == bytes.fromhex("a11a59f6")
+
+
+def test_decodes_request_for_execution_in_both_layouts():
+    logs = [request_for_execution_log(1_000), b"other", request_for_execution_v2_log(2_000)]
+    decoded = decode_logs(logs)
+
+    rows = decoded.request_for_execution
+    assert len(rows) == 2
+    assert rows["log_index"].tolist() == [0, 2]
+    assert rows["compact"].tolist() == [False, True]
+    assert rows["amt_paid"].tolist() == [1_000, 2_000]
+    assert rows["dst_chain"].tolist() == [6, 6]
+    for row in rows:
+        assert row["quoter_address"].tobytes() == QUOTER
+        assert row["dst_addr"].tobytes() == DST_ADDR
+        assert row["refund_addr"].tobytes() == REFUND_ADDR
+        assert row["request_prefix"].tobytes() == b"ERV1"
+        assert decoded.get_bytes(row["signed_quote_offset"], row["signed_quote_length"]) == SIGNED_QUOTE
+        assert decoded.get_bytes(row["request_offset"], row["request_length"]) == REQUEST
+        assert decoded.get_bytes(
+            row["relay_instructions_offset"], row["relay_instructions_length"]
+        ) == RELAY_INSTRUCTIONS
+    assert decoded.malformed == 0
+
+
+def test_decodes_payment_in_token():
+    log = get_event_selector(PAYMENT_IN_TOKEN_SIGNATURE) + (31566704).to_bytes(8, "big") + (5).to_bytes(8, "big")
+    decoded = decode_logs([b"", log])
+
+    assert decoded.payment_in_token.tolist() == [(1, 31566704, 5)]
+
+
+def test_decodes_message_received():
+    ids = [os.urandom(32) for _ in range(3)]
+    logs = [
+        message_received_log(NTT_MESSAGE_RECEIVED_SIGNATURE, ids[0], True, b""),
+        message_received_log(VAA_MESSAGE_RECEIVED_SIGNATURE, ids[1], False, b"Out of gas"),
+        message_received_log(NTT_MESSAGE_RECEIVED_SIGNATURE, ids[2], False, b"Invalid VAA"),
+    ]
+    decoded = decode_logs(logs)
+
+    ntt_rows = decoded.ntt_message_received
+    assert ntt_rows["log_index"].tolist() == [0, 2]
+    assert ntt_rows["success"].tolist() == [True, False]
+    assert [row["request_for_execution_id"].tobytes() for row in ntt_rows] == [ids[0], ids[2]]
+    assert decoded.get_bytes(ntt_rows[1]["error_reason_offset"], ntt_rows[1]["error_reason_length"]) == b"Invalid VAA"
+
+    vaa_rows = decoded.vaa_message_received
+    assert vaa_rows["log_index"].tolist() == [1]
+    assert decoded.get_bytes(vaa_rows[0]["error_reason_offset"], vaa_rows[0]["error_reason_length"]) == b"Out of gas"
+
+
+def test_skips_malformed_logs():
+    truncated_head = request_for_execution_log(1_000)[:50]
+    truncated_tail = request_for_execution_log(1_000)[:-1]
+    decoded = decode_logs([truncated_head, truncated_tail, request_for_execution_log(3_000)])
+
+    assert decoded.request_for_execution["log_index"].tolist() == [2]
+    assert decoded.malformed == 2
+
+
+def test_decodes_empty_batch():
+    decoded = decode_logs([])
+    assert len(decoded.request_for_execution) == 0
+    assert len(decoded.payment_in_token) == 0
+    assert decoded.malformed == 0
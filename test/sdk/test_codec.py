@@ -0,0 +1,213 @@
+import hashlib
+import os
+
+import pytest
+
+from executor_sdk.codec import (
+    REQUEST_STATUS_REQUESTED, CodecError, GasDropOffInstruction, GasInstruction, IndexedRequest, NttV1Request,
+    RelayInstructions, RelayTotals, SignedQuote, VaaV1Request, aggregate_relay_instructions,
+    aggregate_relay_instructions_batch, decode_indexed_request, decode_indexed_requests, decode_request,
+    encode_gas_drop_off_instruction, encode_gas_instruction, encode_ntt_v1_request, encode_relay_instructions,
+    encode_signed_quote, encode_vaa_v1_request, get_delivery_id, get_request_id
+)
+
+QUOTER = os.urandom(20)
+PAYEE = os.urandom(32)
+TOKEN = (1234).to_bytes(32, "big")
+SIGNATURE = os.urandom(65)
+
+
+def make_quote(prefix=b"EQ01", token_address=None):
+    return encode_signed_quote(prefix, QUOTER, PAYEE, 8, 6, 1_700_000_000, 1, 2, 3, 4, SIGNATURE, token_address)
+
+
+def test_native_fee_quote_round_trip():
+    quote_bytes = make_quote()
+    assert len(quote_bytes) == 165
+    assert quote_bytes[56:58] == (8).to_bytes(2, "big")
+    assert quote_bytes[60:68] == (1_700_000_000).to_bytes(8, "big")
+
+    quote = SignedQuote(quote_bytes)
+    assert quote.prefix == b"EQ01"
+    assert not quote.is_custom_token_fee
+    assert quote.quoter_address == QUOTER
+    assert quote.payee_address == PAYEE
+    assert quote.header() == (8, 6, 1_700_000_000)
+    assert (quote.src_chain, quote.dst_chain, quote.expiry_time) == (8, 6, 1_700_000_000)
+    assert (quote.base_fee, quote.dst_gas_price, quote.src_price, quote.dst_price) == (1, 2, 3, 4)
+    assert quote.token_address is None
+    assert quote.signature == SIGNATURE
+    assert bytes(quote.unsigned) + bytes(quote.signature) == quote_bytes
+
+
+def test_custom_token_fee_quote_round_trip():
+    quote_bytes = make_quote(b"EQC1", TOKEN)
+    assert len(quote_bytes) == 197
+
+    quote = SignedQuote(quote_bytes)
+    assert quote.is_custom_token_fee
+    assert quote.token_address == TOKEN
+    assert quote.signature == SIGNATURE
+
+
+def test_quote_decoding_does_not_copy():
+    buffer = bytearray(make_quote())
+    quote = SignedQuote(buffer)
+    buffer[24] ^= 0xFF
+    assert quote.payee_address[0] == buffer[24]
+
+
+@pytest.mark.parametrize("quote_bytes", [make_quote()[:-1], b"EQ02" + make_quote()[4:], b""])
+def test_quote_fails_when_invalid(quote_bytes):
+    with pytest.raises(CodecError):
+        SignedQuote(quote_bytes)
+
+
+def test_quote_encoding_fails_when_token_address_mismatches_prefix():
+    with pytest.raises(CodecError):
+        make_quote(b"EQ01", TOKEN)
+    with pytest.raises(CodecError):
+        make_quote(b"EQC1")
+
+
+def test_vaa_v1_request_round_trip():
+    emitter_address = os.urandom(32)
+    request_bytes = encode_vaa_v1_request(8, emitter_address, 2**64 - 1)
+    assert request_bytes == b"ERV1" + (8).to_bytes(2, "big") + emitter_address + (2**64 - 1).to_bytes(8, "big")
+
+    request = decode_request(request_bytes)
+    assert isinstance(request, VaaV1Request)
+    assert (request.emitter_chain, request.emitter_address, request.sequence) == (8, emitter_address, 2**64 - 1)
+
+
+def test_ntt_v1_request_round_trip():
+    src_manager, message_id = os.urandom(32), os.urandom(32)
+    request_bytes = encode_ntt_v1_request(8, src_manager, message_id)
+    assert request_bytes == b"ERN1" + (8).to_bytes(2, "big") + src_manager + message_id
+
+    request = decode_request(request_bytes)
+    assert isinstance(request, NttV1Request)
+    assert (request.src_chain, request.src_manager, request.message_id) == (8, src_manager, message_id)
+
+
+@pytest.mark.parametrize("request_bytes", [b"ERV2" + bytes(42), b"ERV1" + bytes(41), b"ERN1" + bytes(67)])
+def test_request_fails_when_invalid(request_bytes):
+    with pytest.raises(CodecError):
+        decode_request(request_bytes)
+
+
+def test_relay_instructions_round_trip():
+    recipient = os.urandom(32)
+    relay_instructions_bytes = encode_relay_instructions([
+        encode_gas_instruction(250_000, 2**128 - 1),
+        encode_gas_drop_off_instruction(1_000_000, recipient),
+    ])
+    assert len(relay_instructions_bytes) == 2 + 33 + 49
+
+    relay_instructions = RelayInstructions(relay_instructions_bytes)
+    assert len(relay_instructions) == 2
+    gas, gas_drop_off = relay_instructions
+    assert isinstance(gas, GasInstruction)
+    assert (gas.gas_limit, gas.msg_value) == (250_000, 2**128 - 1)
+    assert isinstance(gas_drop_off, GasDropOffInstruction)
+    assert (gas_drop_off.drop_off, gas_drop_off.recipient) == (1_000_000, recipient)
+
+
+def test_empty_relay_instructions():
+    assert len(RelayInstructions(encode_relay_instructions([]))) == 0
+
+
+INVALID_RELAY_INSTRUCTIONS = [
+    b"",
+    b"\x00\x01",
+    b"\x00\x01\x03" + bytes(32),
+    b"\x00\x01" + encode_gas_instruction(1, 1)[:-1],
+    b"\x00\x00" + encode_gas_instruction(1, 1),
+]
+
+
+@pytest.mark.parametrize("relay_instructions_bytes", INVALID_RELAY_INSTRUCTIONS)
+def test_relay_instructions_fail_when_invalid(relay_instructions_bytes):
+    with pytest.raises(CodecError):
+        RelayInstructions(relay_instructions_bytes)
+
+
+def test_uint128_encoding_fails_when_too_large():
+    with pytest.raises(CodecError):
+        encode_gas_instruction(2**128, 0)
+
+
+def test_aggregates_repeated_relay_instructions():
+    first, second = os.urandom(32), os.urandom(32)
+    relay_instructions_bytes = encode_relay_instructions([
+        encode_gas_drop_off_instruction(5, second),
+        encode_gas_instruction(250_000, 2**128 - 1),
+        encode_gas_drop_off_instruction(1_000_000, first),
+        encode_gas_instruction(50_000, 1),
+        encode_gas_drop_off_instruction(7, second),
+    ])
+
+    totals = aggregate_relay_instructions(relay_instructions_bytes)
+    assert totals == RelayTotals(300_000, 2**128, {second: 12, first: 1_000_000})
+    assert list(totals.drop_offs) == [second, first]
+    assert aggregate_relay_instructions(encode_relay_instructions([])) == RelayTotals(0, 0, {})
+
+
+def test_aggregates_batch_of_relay_instructions():
+    recipient = os.urandom(32)
+    batch = [
+        encode_relay_instructions([encode_gas_instruction(1, 2)]),
+        bytearray(encode_relay_instructions([encode_gas_drop_off_instruction(3, recipient)])),
+    ]
+    assert list(aggregate_relay_instructions_batch(batch)) == [
+        RelayTotals(1, 2, {}),
+        RelayTotals(0, 0, {recipient: 3}),
+    ]
+
+
+@pytest.mark.parametrize("relay_instructions_bytes", INVALID_RELAY_INSTRUCTIONS)
+def test_aggregate_relay_instructions_fails_when_invalid(relay_instructions_bytes):
+    with pytest.raises(CodecError):
+        aggregate_relay_instructions(relay_instructions_bytes)
+
+
+def test_decodes_indexed_requests():
+    request_bytes = encode_vaa_v1_request(8, os.urandom(32), 1)
+    sender, quote_digest = os.urandom(32), os.urandom(32)
+    assert get_request_id(sender, quote_digest, request_bytes) == hashlib.sha256(
+        sender + quote_digest + request_bytes
+    ).digest()
+    with pytest.raises(CodecError):
+        get_request_id(sender[:31], quote_digest, request_bytes)
+
+    entry = (6).to_bytes(2, "big") + (5).to_bytes(8, "big") + PAYEE + (1_700_000_000).to_bytes(8, "big") + b"\x01"
+    indexed_request = IndexedRequest(6, 5, PAYEE, 1_700_000_000, REQUEST_STATUS_REQUESTED)
+    assert decode_indexed_request(entry) == indexed_request
+    assert decode_indexed_requests((2).to_bytes(2, "big") + entry + bytes(51)) == [
+        indexed_request, IndexedRequest(0, 0, bytes(32), 0, 0)
+    ]
+    assert decode_indexed_requests(bytes(2)) == []
+
+
+@pytest.mark.parametrize("data", [b"", bytes(50), bytes(52)])
+def test_indexed_request_fails_when_invalid(data):
+    with pytest.raises(CodecError):
+        decode_indexed_request(data)
+    with pytest.raises(CodecError):
+        decode_indexed_requests((1).to_bytes(2, "big") + data)
+
+
+def test_gets_delivery_id():
+    body = os.urandom(100)
+    app_id = (1234).to_bytes(8, "big")
+    assert get_delivery_id(1234, bytes([1, 0, 0, 0, 4, 2]) + os.urandom(132) + body) == hashlib.sha256(
+        app_id + body
+    ).digest()
+    assert get_delivery_id(1234, bytes(6) + body) == hashlib.sha256(app_id + body).digest()
+    assert get_delivery_id(1235, bytes(6) + body) != get_delivery_id(1234, bytes(6) + body)
+
+
+@pytest.mark.parametrize("vaa", [b"", bytes(5), bytes([1, 0, 0, 0, 0, 2]) + bytes(131)])
+def test_get_delivery_id_fails_when_invalid(vaa):
+    with pytest.raises(CodecError):
+        get_delivery_id(1234, vaa)
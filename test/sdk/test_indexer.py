@@ -0,0 +1,158 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from executor_sdk.events import (
+    NTT_MESSAGE_RECEIVED_SIGNATURE, PAYMENT_IN_TOKEN_SIGNATURE, REQUEST_FOR_EXECUTION_SIGNATURE, decode_event
+)
+from executor_sdk.codec import encode_signed_quote, encode_vaa_v1_request
+from executor_sdk.indexer import (
+    Checkpoint, FileCheckpointStore, MemoryBlockSource, index_events, load_app_ids, prefetch_blocks
+)
+from executor_sdk.metrics import (
+    INDEXER_EVENTS_TOTAL, INDEXER_FETCH_SECONDS, INDEXER_REQUESTS_TOTAL, INDEXER_ROUND, Metrics
+)
+from utils import encode_event
+
+EXECUTOR_APP_ID = 1001
+RECEIVER_APP_ID = 1002
+OTHER_APP_ID = 1003
+APP_IDS = {EXECUTOR_APP_ID, RECEIVER_APP_ID}
+
+
+def payment_in_token_log(amt_paid):
+    return encode_event(PAYMENT_IN_TOKEN_SIGNATURE, (31566704).to_bytes(8, "big") + amt_paid.to_bytes(8, "big"))
+
+
+def app_call(app_id, logs, inner_txns=()):
+    return {"txn": {"type": "appl", "apid": app_id}, "dt": {"lg": logs, "itx": list(inner_txns)}}
+
+
+def make_blocks():
+    signed_quote = encode_signed_quote(b"EQ01", os.urandom(20), os.urandom(32), 8, 6, 1, 1, 2, 3, 4, os.urandom(65))
+    head = os.urandom(20) + (5).to_bytes(8, "big") + (6).to_bytes(2, "big") + os.urandom(64)
+    request_for_execution = encode_event(
+        REQUEST_FOR_EXECUTION_SIGNATURE, head, signed_quote, encode_vaa_v1_request(8, os.urandom(32), 1), b"\x00\x00"
+    )
+    message_received = encode_event(NTT_MESSAGE_RECEIVED_SIGNATURE, os.urandom(32) + b"\x80", b"")
+    return [
+        {"rnd": 10, "txns": [
+            {"txn": {"type": "pay"}},
+            app_call(EXECUTOR_APP_ID, [payment_in_token_log(1), request_for_execution, b"\x15\x1f\x7c\x75"]),
+        ]},
+        {"rnd": 11, "txns": []},
+        {"rnd": 12, "txns": [
+            # the manager calls the executor in an inner transaction
+            app_call(OTHER_APP_ID, [payment_in_token_log(99)], [app_call(EXECUTOR_APP_ID, [payment_in_token_log(2)])]),
+            app_call(RECEIVER_APP_ID, [message_received]),
+            app_call(EXECUTOR_APP_ID, [payment_in_token_log(3)]),
+        ]},
+    ]
+
+
+def test_load_app_ids():
+    deployment_path = Path(__file__).parents[2] / "deployments" / "mainnet.json"
+    assert load_app_ids(deployment_path) == {
+        3278916379, 3278916525, 3278916601, 3278916723, 3278916778, 3278916846
+    }
+
+
+def test_indexes_events_of_the_apps(tmp_path):
+    events = list(index_events(
+        MemoryBlockSource(make_blocks()), APP_IDS, FileCheckpointStore(tmp_path / "checkpoint.json"), start_round=10
+    ))
+
+    assert [(event.round, event.path, event.app_id, event.event.name) for event in events] == [
+        (10, (1,), EXECUTOR_APP_ID, "PaymentInToken"),
+        (10, (1,), EXECUTOR_APP_ID, "RequestForExecution"),
+        (12, (0, 0), EXECUTOR_APP_ID, "PaymentInToken"),
+        (12, (1,), RECEIVER_APP_ID, "NTTMessageReceived"),
+        (12, (2,), EXECUTOR_APP_ID, "PaymentInToken"),
+    ]
+    assert events[0].event.fields == {"asset_id": 31566704, "amt_paid": 1}
+    assert events[3].event.fields["success"]
+    assert FileCheckpointStore(tmp_path / "checkpoint.json").load() == Checkpoint(13, 0)
+
+
+@pytest.mark.parametrize("consumed", range(6))
+def test_resumes_exactly_after_close(tmp_path, consumed):
+    blocks = make_blocks()
+    checkpoints = FileCheckpointStore(tmp_path / "checkpoint.json")
+    expected = list(index_events(MemoryBlockSource(blocks), APP_IDS, FileCheckpointStore(tmp_path / "all.json"), 10))
+
+    first_run = index_events(MemoryBlockSource(blocks), APP_IDS, checkpoints, start_round=10)
+    first_events = [event for _, event in zip(range(consumed), first_run)]
+    # an event counts as consumed once the next one is requested
+    if consumed:
+        first_events.pop()
+    first_run.close()
+
+    second_events = list(index_events(MemoryBlockSource(blocks), APP_IDS, checkpoints, start_round=10))
+    assert first_events + second_events == expected
+
+
+def test_resumes_from_the_round_after_the_last_complete_round(tmp_path):
+    blocks = make_blocks()
+    checkpoints = FileCheckpointStore(tmp_path / "checkpoint.json")
+    assert len(list(index_events(MemoryBlockSource(blocks[:1]), APP_IDS, checkpoints, start_round=10))) == 2
+    assert checkpoints.load() == Checkpoint(11, 0)
+
+    events = list(index_events(MemoryBlockSource(blocks), APP_IDS, checkpoints))
+    assert [event.round for event in events] == [12, 12, 12]
+
+
+def test_prefetch_is_bounded():
+    requested = []
+
+    class Source:
+        def get_block(self, round_number):
+            requested.append(round_number)
+            return {"rnd": round_number, "txns": []} if round_number < 100 else None
+
+    blocks = prefetch_blocks(Source(), 0, prefetch=4)
+    assert next(blocks)[0] == 0
+    time.sleep(0.2)
+    # the consumed block, the queued blocks and the block waiting to be queued
+    assert len(requested) <= 6
+    assert [round_number for round_number, _ in blocks] == list(range(1, 100))
+
+
+def test_prefetch_raises_source_errors():
+    class Source:
+        def get_block(self, round_number):
+            if round_number == 2:
+                raise OSError("algod unavailable")
+            return {"rnd": round_number, "txns": []}
+
+    blocks = prefetch_blocks(Source(), 0)
+    assert [next(blocks)[0], next(blocks)[0]] == [0, 1]
+    with pytest.raises(OSError):
+        next(blocks)
+
+
+def test_skips_unknown_logs_and_fails_on_malformed_events():
+    assert decode_event(b"\x00\x01\x02\x03") is None
+    assert decode_event(b"") is None
+    with pytest.raises(ValueError):
+        decode_event(payment_in_token_log(1)[:-1])
+
+
+def test_records_metrics(tmp_path):
+    blocks = make_blocks()
+    metrics = Metrics()
+
+    events = list(index_events(
+        MemoryBlockSource(blocks), APP_IDS, FileCheckpointStore(tmp_path / "checkpoint.json"), 10, metrics=metrics
+    ))
+
+    samples = {(sample.name, tuple(sorted(sample.labels.items()))): sample.value for sample in metrics.collect()}
+    assert samples[(INDEXER_EVENTS_TOTAL, (("event", "PaymentInToken"),))] == 3
+    assert samples[(INDEXER_EVENTS_TOTAL, (("event", "NTTMessageReceived"),))] == 1
+    quoter_address = events[1].event.fields["quoter_address"]
+    request_labels = (("dst_chain", "6"), ("prefix", "ERV1"), ("quoter", quoter_address.hex()))
+    assert samples[(INDEXER_REQUESTS_TOTAL, request_labels)] == 1
+    assert samples[(INDEXER_ROUND, ())] == 12
+    # the fetch of the first unavailable round is timed too
+    assert samples[(INDEXER_FETCH_SECONDS, ())].count == 4
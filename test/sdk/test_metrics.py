@@ -0,0 +1,132 @@
+import json
+import math
+import threading
+
+import pytest
+
+from executor_sdk.metrics import EXPORTERS, HistogramValue, Metrics, Sample, to_json, to_prometheus
+
+
+def test_records_counters_gauges_and_histograms():
+    metrics = Metrics(buckets=[1, 0.1], help={"requests": "Requests."})
+    metrics.inc("requests", outcome="delivered")
+    metrics.inc("requests", 2, outcome="delivered")
+    metrics.inc("requests", outcome="failed")
+    metrics.set("round", 10)
+    metrics.set("round", 12)
+    for value in (0.05, 0.1, 0.5, 3):
+        metrics.observe("seconds", value, stage="build")
+
+    assert metrics.collect() == [
+        Sample("requests", "counter", "Requests.", {"outcome": "delivered"}, 3),
+        Sample("requests", "counter", "Requests.", {"outcome": "failed"}, 1),
+        Sample("round", "gauge", "", {}, 12),
+        Sample("seconds", "histogram", "", {"stage": "build"}, HistogramValue((0.1, 1, math.inf), (2, 3, 4), 3.65, 4)),
+    ]
+    with pytest.raises(ValueError):
+        metrics.set("requests", 1)
+
+    metrics.reset()
+    assert metrics.collect() == []
+
+
+def test_counts_from_several_threads():
+    metrics = Metrics()
+
+    def count():
+        for _ in range(1000):
+            metrics.inc("requests")
+
+    threads = [threading.Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [sample.value for sample in metrics.collect()] == [8000]
+
+
+def test_records_nothing_while_disabled():
+    metrics = Metrics(enabled=False)
+    observations = []
+    metrics.add_hook(lambda *observation: observations.append(observation))
+    gauge_reads = []
+
+    def read_depth():
+        gauge_reads.append(None)
+        return 1
+
+    metrics.set_gauge_function("depth", read_depth)
+    with metrics.time("seconds"):
+        metrics.inc("requests")
+    assert metrics.collect() == [] and observations == [] and gauge_reads == []
+
+    # metrics can be turned on while running
+    metrics.enabled = True
+    metrics.inc("requests")
+    assert [sample.name for sample in metrics.collect()] == ["depth", "requests"]
+    assert len(gauge_reads) == 1
+
+
+def test_profiling_hooks_receive_observations():
+    metrics = Metrics()
+    observations = []
+
+    def hook(name, value, labels):
+        observations.append((name, value, labels))
+
+    metrics.add_hook(hook)
+    with pytest.raises(RuntimeError):
+        with metrics.time("seconds", stage="sign"):
+            raise RuntimeError
+    metrics.remove_hook(hook)
+    metrics.observe("seconds", 1.0, stage="sign")
+
+    [(name, value, labels)] = observations
+    assert (name, labels) == ("seconds", {"stage": "sign"}) and 0 <= value < 1
+    assert metrics.collect()[0].value.count == 2
+
+
+def test_reads_gauge_functions_when_collected():
+    metrics = Metrics()
+    depth = [3]
+    metrics.set_gauge_function("depth", lambda: depth[0], stage="build")
+    depth[0] = 5
+    assert [(sample.labels, sample.value) for sample in metrics.collect()] == [({"stage": "build"}, 5)]
+
+    metrics.reset()
+    assert len(metrics.collect()) == 1
+    metrics.remove_gauge_function("depth", stage="build")
+    assert metrics.collect() == []
+
+
+def test_exports_prometheus_text():
+    metrics = Metrics(buckets=[0.5], help={"seconds": "Stage seconds."})
+    metrics.observe("seconds", 0.25, stage="build")
+    metrics.observe("seconds", 1.5, stage="build")
+    metrics.inc("requests", prefix='E"\\1')
+
+    assert to_prometheus(metrics.collect()) == "\n".join([
+        '# TYPE requests counter',
+        'requests{prefix="E\\"\\\\1"} 1',
+        '# HELP seconds Stage seconds.',
+        '# TYPE seconds histogram',
+        'seconds_bucket{stage="build",le="0.5"} 1',
+        'seconds_bucket{stage="build",le="+Inf"} 2',
+        'seconds_sum{stage="build"} 1.75',
+        'seconds_count{stage="build"} 2',
+    ]) + "\n"
+
+
+def test_exports_json():
+    metrics = Metrics(buckets=[0.5])
+    metrics.observe("seconds", 0.25)
+    metrics.set("round", 12)
+
+    assert json.loads(EXPORTERS["json"](metrics.collect())) == [
+        {"name": "round", "kind": "gauge", "labels": {}, "value": 12},
+        {
+            "name": "seconds", "kind": "histogram", "labels": {},
+            "value": {"buckets": [["0.5", 1], ["+Inf", 1]], "sum": 0.25, "count": 1},
+        },
+    ]
+    assert to_json([]) == "[]"
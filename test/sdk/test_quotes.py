@@ -0,0 +1,183 @@
+import asyncio
+import os
+
+import pytest
+
+from executor_sdk.codec import CUSTOM_TOKEN_FEE_PREFIX, CodecError, encode_signed_quote
+from executor_sdk.quotes import QuoteCache, QuoteKey
+
+NOW = 1_700_000_000
+QUOTER = os.urandom(20)
+KEY = QuoteKey(QUOTER, 8, 6)
+TOKEN_KEY = QuoteKey(QUOTER, 8, 6, CUSTOM_TOKEN_FEE_PREFIX, os.urandom(32))
+
+
+class Clock:
+    def __init__(self):
+        self.now = float(NOW)
+
+    def __call__(self):
+        return self.now
+
+
+class QuoterStandIn:
+    """Signs a new quote for every fetch, with a base fee counting the fetches of its key."""
+
+    def __init__(self, clock, lifetime=600, delay=0.0, quote_for=None):
+        self.clock = clock
+        self.lifetime = lifetime
+        self.delay = delay
+        self.quote_for = quote_for
+        self.error = None
+        self.fetches = []
+
+    async def fetch_quote(self, key):
+        self.fetches.append(key)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        quoted_key = self.quote_for or key
+        return encode_signed_quote(
+            quoted_key.prefix, quoted_key.quoter_address, os.urandom(32), quoted_key.src_chain, quoted_key.dst_chain,
+            int(self.clock()) + self.lifetime, self.fetches.count(key), 1, 2, 3, os.urandom(65),
+            quoted_key.token_address,
+        )
+
+
+def run(test):
+    async def run_with_cache():
+        clock = Clock()
+        return await test(clock)
+    return asyncio.run(run_with_cache())
+
+
+def test_coalesces_concurrent_lookups():
+    async def test(clock):
+        quoter = QuoterStandIn(clock, delay=0.05)
+        async with QuoteCache(quoter, clock=clock) as cache:
+            quotes = await asyncio.gather(*(cache.get(key) for key in [KEY, TOKEN_KEY] * 10))
+            assert [quote.raw for quote in quotes[:2]] == [quote.raw for quote in quotes[2:4]]
+            assert bytes(quotes[1].token_address) == TOKEN_KEY.token_address
+            assert sorted(quoter.fetches) == [KEY, TOKEN_KEY]
+
+            # a cancelled lookup leaves the shared fetch to the others
+            cancelled, kept = (asyncio.ensure_future(cache.get(KEY._replace(dst_chain=2))) for _ in range(2))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            assert (await kept).dst_chain == 2
+
+    run(test)
+
+
+def test_fetches_again_within_the_safety_margin():
+    async def test(clock):
+        quoter = QuoterStandIn(clock)
+        async with QuoteCache(quoter, clock=clock) as cache:
+            first = await cache.get(KEY)
+            clock.now = first.expiry_time - 31
+            assert (await cache.get(KEY)).raw == first.raw
+            clock.now = first.expiry_time - 30
+            second = await cache.get(KEY)
+            assert second.base_fee == 2 and second.expiry_time > first.expiry_time
+
+            cache.invalidate(KEY)
+            assert (await cache.get(KEY)).base_fee == 3
+
+    run(test)
+
+
+def test_refreshes_used_quotes_before_expiry():
+    async def test(clock):
+        quoter = QuoterStandIn(clock, lifetime=200)
+        # the refresh timers fire 50ms after the fetch
+        async with QuoteCache(quoter, safety_margin=30, refresh_margin=199.95, clock=clock) as cache:
+            await cache.get(KEY)
+            await cache.get(KEY._replace(src_chain=1))
+            await cache.get(KEY)
+            await asyncio.sleep(0.1)
+            assert quoter.fetches == [KEY, KEY._replace(src_chain=1), KEY]
+            assert (await cache.get(KEY)).base_fee == 2
+            assert len(quoter.fetches) == 3
+
+    run(test)
+
+
+def test_evicts_expired_quotes():
+    async def test(clock):
+        quoter = QuoterStandIn(clock, lifetime=1)
+        async with QuoteCache(quoter, safety_margin=0.95, refresh_margin=0.95, clock=clock) as cache:
+            await cache.get(KEY)
+            assert len(cache) == 1
+            await asyncio.sleep(0.1)
+            assert len(cache) == 0
+
+    run(test)
+
+
+def test_keeps_quote_when_background_refresh_fails():
+    async def test(clock):
+        quoter = QuoterStandIn(clock)
+        async with QuoteCache(quoter, clock=clock) as cache:
+            first = await cache.get(KEY)
+            quoter.error = OSError("quoter unavailable")
+            clock.now = first.expiry_time - 60
+            assert (await cache.get(KEY)).raw == first.raw
+            await asyncio.sleep(0.01)
+            assert isinstance(cache.last_error, OSError)
+            assert (await cache.get(KEY)).raw == first.raw
+
+            # with the quote evicted the lookup fails, and the failure is not cached
+            clock.now = first.expiry_time
+            with pytest.raises(OSError):
+                await cache.get(KEY)
+            quoter.error = None
+            assert (await cache.get(KEY)).expiry_time > first.expiry_time
+
+    run(test)
+
+
+def test_fetches_again_after_cancelled_fetch():
+    async def test(clock):
+        quoter = QuoterStandIn(clock)
+        async with QuoteCache(quoter, clock=clock) as cache:
+            lookup = asyncio.ensure_future(cache.get(KEY))
+            await asyncio.sleep(0)
+            # the fetch is cancelled before it starts
+            await cache.close()
+            await asyncio.gather(lookup, return_exceptions=True)
+            assert quoter.fetches == []
+
+            assert (await cache.get(KEY)).dst_chain == KEY.dst_chain
+            assert quoter.fetches == [KEY]
+
+    run(test)
+
+
+@pytest.mark.parametrize("quoter_kwargs", [
+    {"quote_for": TOKEN_KEY},
+    {"quote_for": KEY._replace(dst_chain=2)},
+    {"lifetime": 30},
+])
+def test_rejects_quotes_not_valid_for_the_key(quoter_kwargs):
+    async def test(clock):
+        async with QuoteCache(QuoterStandIn(clock, **quoter_kwargs), clock=clock) as cache:
+            with pytest.raises(ValueError):
+                await cache.get(KEY)
+            assert len(cache) == 0
+
+    run(test)
+
+
+def test_rejects_malformed_quotes():
+    class Fetcher:
+        async def fetch_quote(self, key):
+            return b"EQ01"
+
+    async def test(clock):
+        async with QuoteCache(Fetcher(), clock=clock) as cache:
+            with pytest.raises(CodecError):
+                await cache.get(KEY)
+
+    run(test)
+    with pytest.raises(ValueError):
+        QuoteCache(Fetcher(), safety_margin=60, refresh_margin=30)
@@ -0,0 +1,392 @@
+import asyncio
+import base64
+import json
+import os
+import urllib.parse
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+import msgpack
+from algosdk import account, encoding, logic, transaction
+
+from executor_sdk.codec import (
+    encode_gas_drop_off_instruction, encode_gas_instruction, encode_ntt_v1_request, encode_relay_instructions,
+    encode_vaa_v1_request, get_delivery_id
+)
+from executor_sdk.metrics import (
+    RELAYER_QUEUE_DEPTH, RELAYER_REQUESTS_TOTAL, RELAYER_SPEND_MICROALGOS_TOTAL, RELAYER_STAGE_SECONDS, Metrics
+)
+from executor_sdk.relayer import (
+    DELIVERIES_BOX_PREFIX, DELIVERY_BOX_MIN_BALANCE, ERROR_REASON_TRUNCATION_THRESHOLD, ERROR_REPORTS_TYPE, MAX_REPORTS_PER_CALL,
+    RECEIVE_MESSAGE_SELECTOR, REPORT_ERROR_SELECTOR, REPORT_ERRORS_SELECTOR, AlgodPool, MessageError,
+    MessageTransactions, RelayRequest, Relayer
+)
+
+WORMHOLE_CORE_APP_ID = 1001
+NTT_RECEIVER_APP_ID = 1002
+NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID = 1003
+VAA_RECEIVE_WITH_GAS_DROP_OFF_APP_ID = 1004
+PRIVATE_KEY, SENDER = account.generate_account()
+LOGIC_ERROR = "logic eval error: " + "x" * 200
+
+
+class AlgodStandIn:
+    """Serves the algod endpoints used by the relayer, confirming accepted groups in the next round."""
+
+    def __init__(self, rejected_ids=(), delivered_ids=(), rejection=LOGIC_ERROR):
+        self.rejected_ids = set(rejected_ids)
+        self.rejection = rejection
+        self.delivered_ids = set(delivered_ids)
+        self.box_lookups = 0
+        self.round = 100
+        self.groups = []
+        self.pending = {}
+        self.submitting = 0
+        self.max_submitting = 0
+        self.connections = 0
+        self.handlers = set()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        for handler in self.handlers:
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+    async def serve(self, reader, writer):
+        self.connections += 1
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        try:
+            while request_line := await reader.readline():
+                method, path, _ = request_line.decode().split()
+                headers = {}
+                while (line := await reader.readline()) != b"\r\n":
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, response = await self.handle(method, path, body)
+                response_body = json.dumps(response).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nContent-Length: {len(response_body)}\r\n\r\n".encode() + response_body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # closing the stand-in ends its handlers
+            pass
+        finally:
+            self.handlers.discard(handler)
+            writer.close()
+
+    async def handle(self, method, path, body):
+        if path == "/v2/status":
+            return 200, {"last-round": self.round}
+        if path.startswith("/v2/status/wait-for-block-after/"):
+            await asyncio.sleep(0.01)
+            if self.round <= int(path.rsplit("/", 1)[1]):
+                self.round += 1
+                for txid, confirmed_round in self.pending.items():
+                    self.pending[txid] = confirmed_round or self.round
+            return 200, {"last-round": self.round}
+        if path == "/v2/transactions/params":
+            return 200, {
+                "min-fee": 1000, "last-round": self.round, "genesis-id": "standin-v1",
+                "genesis-hash": base64.b64encode(bytes(32)).decode(), "consensus-version": "future",
+            }
+        if path.startswith("/v2/transactions/pending/"):
+            confirmed_round = self.pending.get(path.rsplit("/", 1)[1])
+            if confirmed_round is None:
+                return 404, {"message": "txn does not exist"}
+            return 200, {"confirmed-round": confirmed_round, "pool-error": ""}
+        if path.startswith(f"/v2/applications/{NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID}/box?name=b64:"):
+            self.box_lookups += 1
+            name = base64.b64decode(urllib.parse.unquote(path.partition("b64:")[2]))
+            if name.removeprefix(DELIVERIES_BOX_PREFIX) not in self.delivered_ids:
+                return 404, {"message": "box not found"}
+            return 200, {"name": base64.b64encode(name).decode(), "value": "AAAAAAAAAGQ=", "round": self.round}
+        if method == "POST" and path == "/v2/transactions":
+            return await self.submit(body)
+        return 404, {"message": "not found"}
+
+    async def submit(self, body):
+        group = self.decode_group(body)
+
+        self.submitting += 1
+        self.max_submitting = max(self.max_submitting, self.submitting)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.submitting -= 1
+
+        last_txn = group[-1].transaction
+        if last_txn.app_args[0] == RECEIVE_MESSAGE_SELECTOR and last_txn.app_args[1] in self.rejected_ids:
+            return 400, {"message": self.rejection}
+        self.groups.append([signed_txn.transaction for signed_txn in group])
+        self.pending[last_txn.get_txid()] = 0
+        return 200, {"txId": group[0].transaction.get_txid()}
+
+    @staticmethod
+    def decode_group(body):
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(body)
+        return [transaction.SignedTransaction.undictify(signed_txn) for signed_txn in unpacker]
+
+
+class StandInMessageBuilder:
+    def __init__(self, failing_ids=()):
+        self.failing_ids = set(failing_ids)
+
+    async def build(self, request, params):
+        if request.request_for_execution_id in self.failing_ids:
+            raise MessageError("VAA not found")
+        verify_sigs, verify_vaa = (
+            transaction.ApplicationCallTxn(
+                SENDER, params, WORMHOLE_CORE_APP_ID, transaction.OnComplete.NoOpOC, app_args=app_args
+            )
+            for app_args in ([b"verifySigs"], [b"verifyVAA", make_vaa(request)])
+        )
+        receive_ntt = transaction.ApplicationCallTxn(
+            SENDER, params, NTT_RECEIVER_APP_ID, transaction.OnComplete.NoOpOC, app_args=[b"receive_message"]
+        )
+        return MessageTransactions(verify_sigs, verify_vaa, receive_ntt)
+
+
+def make_vaa(request):
+    # a single signature and a body unique to the request
+    return bytes([1, 0, 0, 0, 0, 1]) + bytes(66) + request.request_for_execution_id
+
+
+def make_request(relay_instructions=None, request_bytes=None):
+    if relay_instructions is None:
+        relay_instructions = [encode_gas_instruction(250_000, 100_000), encode_gas_instruction(0, 20_000)]
+    return RelayRequest(
+        os.urandom(32),
+        request_bytes or encode_ntt_v1_request(8, os.urandom(32), os.urandom(32)),
+        encode_relay_instructions(relay_instructions),
+    )
+
+
+def relay(algod, requests, message_builder=None, **kwargs):
+    async def run():
+        pool = AlgodPool(algod.url, "token", size=8)
+        relayer = Relayer(
+            pool,
+            PRIVATE_KEY,
+            message_builder or StandInMessageBuilder(),
+            NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID,
+            **kwargs,
+        )
+        try:
+            return [result async for result in relayer.run(requests)]
+        finally:
+            await pool.close()
+    return run()
+
+
+def run_with_algod(test, **kwargs):
+    async def run():
+        async with AlgodStandIn(**kwargs) as algod:
+            return await test(algod)
+    return asyncio.run(run())
+
+
+def test_delivers_requests_concurrently():
+    recipient = os.urandom(32)
+    requests = [make_request() for _ in range(40)]
+    requests.append(make_request([encode_gas_drop_off_instruction(5_000, recipient)]))
+
+    async def test(algod):
+        results = await relay(algod, requests)
+        return algod, results
+
+    algod, results = run_with_algod(test)
+
+    assert sorted(result.request_for_execution_id for result in results) == sorted(
+        request.request_for_execution_id for request in requests
+    )
+    assert all(result.delivered and result.confirmed_round > 100 for result in results)
+    assert algod.max_submitting > 1
+    assert algod.connections <= 8
+
+    groups = {group[-1].app_args[1]: group for group in algod.groups}
+    gas, verify_sigs, verify_vaa, receive_ntt, gas_drop_off, receive_message = groups[requests[0][0]]
+    assert len({txn.group for txn in groups[requests[0][0]]}) == 1
+    assert gas.receiver == logic.get_application_address(NTT_RECEIVER_APP_ID)
+    assert gas.amt == 120_000
+    assert (verify_sigs.app_args, verify_vaa.app_args) == ([b"verifySigs"], [b"verifyVAA", make_vaa(requests[0])])
+    assert (gas_drop_off.receiver, gas_drop_off.amt) == (SENDER, 0)
+    assert receive_message.index == NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID
+    assert receive_message.app_args == [RECEIVE_MESSAGE_SELECTOR, requests[0][0]]
+    assert receive_message.boxes == []
+
+    gas_drop_off = groups[requests[-1][0]][4]
+    assert (gas_drop_off.receiver, gas_drop_off.amt) == (encoding.encode_address(recipient), 5_000)
+
+
+def test_reports_rejected_groups():
+    rejected, delivered = make_request(), make_request()
+
+    async def test(algod):
+        return algod, await relay(algod, [rejected, delivered])
+
+    algod, results = run_with_algod(test, rejected_ids=[rejected.request_for_execution_id])
+
+    results = {result.request_for_execution_id: result for result in results}
+    assert results[delivered.request_for_execution_id].delivered
+    result = results[rejected.request_for_execution_id]
+    assert not result.delivered and result.reported
+    assert result.error_reason == LOGIC_ERROR.encode()[:ERROR_REASON_TRUNCATION_THRESHOLD]
+
+    [[report_error]] = [group for group in algod.groups if len(group) == 1]
+    assert report_error.app_args[0] == REPORT_ERROR_SELECTOR
+    assert report_error.index == NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID
+    assert report_error.app_args[1] == rejected.request_for_execution_id
+    assert report_error.app_args[2] == (ERROR_REASON_TRUNCATION_THRESHOLD).to_bytes(2, "big") + result.error_reason
+
+
+@pytest.mark.parametrize("rejection", [
+    "TransactionPool.Remember: transaction ABC: overspend (account XYZ, data {_struct:{} Status:Offline})",
+    "TransactionPool.Remember: transaction ABC: fee 1000 below threshold 2000",
+    "TransactionPool.Remember: txn dead: round 120 outside of 100--110",
+])
+def test_fails_without_report_when_rejected_for_relayer(rejection):
+    rejected, delivered = make_request(), make_request()
+
+    async def test(algod):
+        return algod, await relay(algod, [rejected, delivered])
+
+    algod, results = run_with_algod(test, rejected_ids=[rejected.request_for_execution_id], rejection=rejection)
+
+    results = {result.request_for_execution_id: result for result in results}
+    assert results[delivered.request_for_execution_id].delivered
+    result = results[rejected.request_for_execution_id]
+    assert not result.delivered and not result.reported
+    assert rejection.encode()[:32] in result.error_reason
+    assert all(len(group) > 1 for group in algod.groups)
+
+
+@pytest.mark.parametrize("request_kwargs, error_reason", [
+    ({"relay_instructions": [
+        encode_gas_drop_off_instruction(1, os.urandom(32)), encode_gas_drop_off_instruction(1, os.urandom(32))
+    ]}, b"Multiple drop-off recipients"),
+    ({"relay_instructions": [encode_gas_instruction(0, 2**64)]}, b"Amount too large"),
+])
+def test_reports_undeliverable_requests(request_kwargs, error_reason):
+    request = make_request(**request_kwargs)
+    results = run_with_algod(lambda algod: relay(algod, [request]))
+    assert [(result.delivered, result.reported, result.error_reason) for result in results] == [
+        (False, True, error_reason)
+    ]
+
+
+def test_reports_message_builder_failures():
+    request = make_request()
+    results = run_with_algod(
+        lambda algod: relay(algod, [request], StandInMessageBuilder([request.request_for_execution_id]))
+    )
+    assert [(result.delivered, result.reported, result.error_reason) for result in results] == [
+        (False, True, b"VAA not found")
+    ]
+
+
+def test_fails_without_report_when_no_receiver_for_request():
+    request = make_request(request_bytes=encode_vaa_v1_request(8, os.urandom(32), 1))
+    results = run_with_algod(lambda algod: relay(algod, [request]))
+    assert [(result.delivered, result.reported) for result in results] == [(False, False)]
+
+
+def test_batches_queued_reports():
+    requests = [make_request() for _ in range(20)]
+    message_builder = StandInMessageBuilder([request.request_for_execution_id for request in requests])
+
+    async def test(algod):
+        return algod, await relay(algod, requests, message_builder, report_concurrency=1)
+
+    algod, results = run_with_algod(test)
+
+    assert sorted((result.request_for_execution_id, result.reported) for result in results) == sorted(
+        (request.request_for_execution_id, True) for request in requests
+    )
+    reported_ids = []
+    for [call] in algod.groups:
+        if call.app_args[0] == REPORT_ERRORS_SELECTOR:
+            reports = ERROR_REPORTS_TYPE.decode(call.app_args[1])
+            assert 1 < len(reports) <= MAX_REPORTS_PER_CALL and call.boxes == []
+            assert all(bytes(error_reason) == b"VAA not found" for _, error_reason in reports)
+            reported_ids += [bytes(request_for_execution_id) for request_for_execution_id, _ in reports]
+        else:
+            reported_ids.append(call.app_args[1])
+    assert len(algod.groups) < len(requests)
+    assert sorted(reported_ids) == sorted(request.request_for_execution_id for request in requests)
+
+
+def test_tracks_deliveries():
+    delivered, pending = make_request(), make_request()
+
+    async def test(algod):
+        return algod, await relay(algod, [delivered, pending], track_deliveries=True)
+
+    algod, results = run_with_algod(test, delivered_ids=[get_delivery_id(NTT_RECEIVER_APP_ID, make_vaa(delivered))])
+
+    results = {result.request_for_execution_id: result for result in results}
+    assert results[delivered.request_for_execution_id][1:] == (True, False, None, None, b"")
+    assert results[pending.request_for_execution_id].txid is not None
+    assert algod.box_lookups == 2
+
+    # only the pending request is sent, funding and referencing the delivery box of its VAA
+    [group] = algod.groups
+    deliveries_payment, receive_message = group[0], group[-1]
+    assert len(group) == 7
+    assert deliveries_payment.receiver == logic.get_application_address(NTT_RECEIVE_WITH_GAS_DROP_OFF_APP_ID)
+    assert deliveries_payment.amt == DELIVERY_BOX_MIN_BALANCE
+    assert receive_message.app_args[1] == pending.request_for_execution_id
+    assert [(box.app_index, box.name) for box in receive_message.boxes] == [
+        (0, DELIVERIES_BOX_PREFIX + get_delivery_id(NTT_RECEIVER_APP_ID, make_vaa(pending)))
+    ]
+
+
+def test_reports_invalid_vaa_when_tracking_deliveries():
+    class TruncatedVaaMessageBuilder(StandInMessageBuilder):
+        async def build(self, request, params):
+            message = await super().build(request, params)
+            message.verify_vaa.app_args[1] = message.verify_vaa.app_args[1][:40]
+            return message
+
+    request = make_request()
+    results = run_with_algod(
+        lambda algod: relay(algod, [request], TruncatedVaaMessageBuilder(), track_deliveries=True)
+    )
+    assert [(result.delivered, result.reported, result.error_reason) for result in results] == [
+        (False, True, b"Invalid VAA")
+    ]
+
+
+def test_records_metrics():
+    recipient = os.urandom(32)
+    delivered = make_request(
+        [encode_gas_instruction(250_000, 100_000), encode_gas_drop_off_instruction(5_000, recipient)]
+    )
+    rejected = make_request()
+    metrics = Metrics()
+
+    run_with_algod(
+        lambda algod: relay(algod, [delivered, rejected], metrics=metrics, track_deliveries=True),
+        rejected_ids=[rejected.request_for_execution_id],
+    )
+
+    samples = {(sample.name, tuple(sorted(sample.labels.items()))): sample.value for sample in metrics.collect()}
+    assert samples[(RELAYER_REQUESTS_TOTAL, (("outcome", "delivered"), ("prefix", "ERN1")))] == 1
+    assert samples[(RELAYER_REQUESTS_TOTAL, (("outcome", "reported"), ("prefix", "ERN1")))] == 1
+    assert samples[(RELAYER_SPEND_MICROALGOS_TOTAL, (("kind", "gas"),))] == 100_000
+    assert samples[(RELAYER_SPEND_MICROALGOS_TOTAL, (("kind", "drop_off"),))] == 5_000
+    assert samples[(RELAYER_SPEND_MICROALGOS_TOTAL, (("kind", "fee"),))] > 0
+    for stage in ("build", "sign", "submit", "confirm", "report"):
+        assert samples[(RELAYER_STAGE_SECONDS, (("prefix", "ERN1"), ("stage", stage)))].count >= 1
+    # the queue depth gauges are removed once the relayer stops
+    assert not any(name == RELAYER_QUEUE_DEPTH for name, _ in samples)
@@ -0,0 +1,165 @@
+import base64
+import copy
+import os
+import time
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding, logic, transaction
+from algosdk.abi import ABIType
+
+from executor_sdk.codec import encode_gas_instruction, encode_relay_instructions, encode_signed_quote
+from executor_sdk.templates import (
+    NTT_MANAGER_WITH_EXECUTOR_INNER_TXNS, NTT_MANAGER_WITH_EXECUTOR_TRANSFER_SELECTOR,
+    NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_INNER_TXNS, NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_TRANSFER_SELECTOR,
+    NTT_TRANSFER_SELECTOR, SuggestedParamsRefresher, TransferTemplate, calculate_fee
+)
+
+NTT_MANAGER_APP_ID = 2001
+MANAGER_APP_ID = 2002
+EXECUTOR_APP_ID = 2003
+NTT_ASSET_ID = 3001
+FEE_ASSET_ID = 3002
+RECIPIENT_CHAIN = 16
+_, SENDER = account.generate_account()
+_, REFERRER = account.generate_account()
+PAYEE = os.urandom(32)
+RECIPIENT = os.urandom(32)
+SIGNED_QUOTE = encode_signed_quote(b"EQ01", os.urandom(20), PAYEE, 8, RECIPIENT_CHAIN, 1, 1, 2, 3, 4, os.urandom(65))
+RELAY_INSTRUCTIONS = encode_relay_instructions([encode_gas_instruction(250_000, 0)])
+
+
+def make_params(first=100):
+    return transaction.SuggestedParams(
+        1000, first, first + 1000, base64.b64encode(bytes(32)).decode(), "test-v1", flat_fee=True, min_fee=1000
+    )
+
+
+class Params:
+    def __init__(self):
+        self.params = make_params()
+
+
+def make_template(params_source=None, fee_asset_id=None):
+    return TransferTemplate(
+        params_source or Params(),
+        NTT_MANAGER_APP_ID,
+        MANAGER_APP_ID,
+        EXECUTOR_APP_ID,
+        NTT_ASSET_ID,
+        RECIPIENT_CHAIN,
+        REFERRER,
+        dbps=250,
+        fee_asset_id=fee_asset_id,
+        ntt_transfer_foreign_apps=[4001],
+        ntt_transfer_inner_txns=2,
+    )
+
+
+def assert_group_id(group):
+    # the group id is computed over the filled in transactions
+    ungrouped = [copy.copy(txn) for txn in group]
+    for txn in ungrouped:
+        txn.group = None
+    assert all(txn.group == transaction.calculate_group_id(ungrouped) for txn in group)
+
+
+def test_calculate_fee():
+    assert calculate_fee(5_000_000, 250) == 12_500
+    assert calculate_fee(99_999, 100_000) == 99_999
+    assert calculate_fee(2**64 - 1, 3) == (2**64 - 1) // 100000 * 3 + (2**64 - 1) % 100000 * 3 // 100000
+
+
+def test_builds_transfer_group():
+    group = make_template().build(SENDER, 5_000_000, RECIPIENT, SIGNED_QUOTE, RELAY_INSTRUCTIONS, 10_000)
+    ntt_fee_payment, ntt_send_token, ntt_transfer, pay_executor, pay_referrer, transfer = group
+
+    assert all(txn.sender == SENDER for txn in group)
+    assert len({txn.group for txn in group}) == 1
+
+    ntt_manager_address = logic.get_application_address(NTT_MANAGER_APP_ID)
+    assert (ntt_fee_payment.receiver, ntt_fee_payment.amt) == (ntt_manager_address, 0)
+    assert (ntt_send_token.receiver, ntt_send_token.amount, ntt_send_token.index) == (
+        ntt_manager_address, 4_987_500, NTT_ASSET_ID
+    )
+    assert ntt_transfer.index == NTT_MANAGER_APP_ID
+    assert ntt_transfer.app_args == [
+        NTT_TRANSFER_SELECTOR, (4_987_500).to_bytes(8, "big"), RECIPIENT_CHAIN.to_bytes(2, "big"), RECIPIENT
+    ]
+    assert ntt_transfer.foreign_apps == [4001]
+    assert ntt_transfer.fee == 3000
+    assert (pay_executor.receiver, pay_executor.amt) == (logic.get_application_address(MANAGER_APP_ID), 10_000)
+    assert (pay_referrer.receiver, pay_referrer.amount, pay_referrer.index) == (REFERRER, 12_500, NTT_ASSET_ID)
+
+    assert transfer.index == MANAGER_APP_ID
+    assert transfer.fee == 5000
+    assert transfer.foreign_apps == [NTT_MANAGER_APP_ID, EXECUTOR_APP_ID]
+    assert transfer.accounts == [encoding.encode_address(PAYEE)]
+    selector, amount, executor_args, fee_args = transfer.app_args
+    assert selector == NTT_MANAGER_WITH_EXECUTOR_TRANSFER_SELECTOR
+    assert amount == (5_000_000).to_bytes(8, "big")
+    assert ABIType.from_string("(address,byte[],byte[])").decode(executor_args) == [
+        SENDER, list(SIGNED_QUOTE), list(RELAY_INSTRUCTIONS)
+    ]
+    assert ABIType.from_string("(uint16,address)").decode(fee_args) == [250, REFERRER]
+
+    assert_group_id(group)
+
+
+def test_builds_token_payment_transfer_group():
+    group = make_template(fee_asset_id=FEE_ASSET_ID).build(
+        SENDER, 1_000, RECIPIENT, SIGNED_QUOTE, RELAY_INSTRUCTIONS, 77, refund_address=REFERRER, ntt_fee=5
+    )
+    ntt_fee_payment, _, _, pay_executor, _, transfer = group
+
+    assert ntt_fee_payment.amt == 5
+    assert isinstance(pay_executor, transaction.AssetTransferTxn)
+    assert (pay_executor.receiver, pay_executor.amount, pay_executor.index) == (
+        logic.get_application_address(MANAGER_APP_ID), 77, FEE_ASSET_ID
+    )
+    assert transfer.app_args[0] == NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_TRANSFER_SELECTOR
+    assert transfer.app_args[2][:32] == encoding.decode_address(REFERRER)
+    assert transfer.foreign_assets == [FEE_ASSET_ID]
+    assert transfer.accounts == [encoding.encode_address(PAYEE)]
+    assert transfer.fee == 8000
+    assert_group_id(group)
+
+
+def test_inner_txns_of_transfer_calls():
+    # peer fetch, pay and call executor, executor pays payee
+    assert NTT_MANAGER_WITH_EXECUTOR_INNER_TXNS == 4
+    # peer fetch, transfer and call token payment executor, it pays payee, pays and calls executor, executor pays payee
+    assert NTT_MANAGER_WITH_TOKEN_PAYMENT_EXECUTOR_INNER_TXNS == 7
+
+
+def test_builds_independent_groups_and_follows_params():
+    params_source = Params()
+    template = make_template(params_source)
+    first = template.build(SENDER, 1_000, RECIPIENT, SIGNED_QUOTE, RELAY_INSTRUCTIONS, 1)
+    second = template.build(REFERRER, 2_000, RECIPIENT, SIGNED_QUOTE, RELAY_INSTRUCTIONS, 2)
+    assert first[0].sender == SENDER and first[5].app_args[1] == (1_000).to_bytes(8, "big")
+    assert first[0].group != second[0].group
+
+    params_source.params = make_params(first=500)
+    third = template.build(SENDER, 1_000, RECIPIENT, SIGNED_QUOTE, RELAY_INSTRUCTIONS, 1)
+    assert {(txn.first_valid_round, txn.last_valid_round) for txn in third} == {(500, 1500)}
+    assert {txn.first_valid_round for txn in first} == {100}
+
+
+def test_build_fails_when_quote_too_short():
+    with pytest.raises(ValueError):
+        make_template().build(SENDER, 1_000, RECIPIENT, SIGNED_QUOTE[:60], RELAY_INSTRUCTIONS, 1)
+
+
+def test_params_refresher():
+    fetched = iter(range(100, 10_000))
+    refresher = SuggestedParamsRefresher(lambda: make_params(next(fetched)), interval=0.01)
+    assert refresher.params.first == 100
+    with refresher:
+        for _ in range(100):
+            if refresher.params.first > 100:
+                break
+            time.sleep(0.01)
+    assert refresher.params.first > 100
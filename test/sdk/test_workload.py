@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from executor_sdk.bulk import decode_logs
+from executor_sdk.codec import (
+    CUSTOM_TOKEN_FEE_PREFIX, NATIVE_FEE_PREFIX, NttV1Request, SignedQuote, VaaV1Request, aggregate_relay_instructions,
+    decode_request
+)
+from executor_sdk.events import decode_event
+from executor_sdk.workload import (
+    ERROR_REASON, WORKLOAD_FILES, WorkloadParams, generate_chunk, iter_workload, main, read_records, write_workload
+)
+
+PARAMS = WorkloadParams(guardian_signatures=3, vaa_payload_length=10)
+
+
+def test_generates_decodable_requests():
+    chunk = generate_chunk(100, 500, seed=1, params=PARAMS)
+    assert len(chunk) == 500
+
+    quotes = [SignedQuote(quote) for quote in chunk.quotes]
+    assert {bytes(quote.prefix) for quote in quotes} == {NATIVE_FEE_PREFIX, CUSTOM_TOKEN_FEE_PREFIX}
+    assert {quote.header()[0] for quote in quotes} == {PARAMS.src_chain}
+    assert {quote.header()[1] for quote in quotes} == set(PARAMS.dst_chains)
+    assert len({bytes(quote.quoter_address) for quote in quotes}) == PARAMS.quoters
+
+    requests = [decode_request(request) for request in chunk.requests]
+    assert {type(request) for request in requests} == {VaaV1Request, NttV1Request}
+
+    for relay_instructions in chunk.relay_instructions:
+        totals = aggregate_relay_instructions(relay_instructions)
+        assert 100_000 <= totals.gas_limit < 1_000_000 * PARAMS.max_gas_instructions
+        assert len(totals.drop_offs) <= 1
+
+    # each VAA is emitted by the emitter of its request, with the sequence of its index in the workload
+    for i, (vaa, request) in enumerate(zip(chunk.vaas, requests)):
+        assert len(vaa) == 6 + 66 * 3 + 51 + 10
+        assert vaa[:6] == bytes((1, 0, 0, 0, 4, 3)) and vaa[6::66][:3] == bytes((0, 1, 2))
+        body = vaa[6 + 66 * 3:]
+        emitter_address = request.emitter_address if isinstance(request, VaaV1Request) else request.src_manager
+        assert body[10:42] == emitter_address
+        assert int.from_bytes(body[42:50], "big") == 100 + i
+
+
+def test_generates_matching_event_logs():
+    chunk = generate_chunk(0, 500, seed=2, params=PARAMS)
+    logs = list(chunk.logs)
+    assert len(logs) == 2 * len(chunk)
+
+    for i in range(len(chunk)):
+        request_event, received_event = decode_event(logs[2 * i]), decode_event(logs[2 * i + 1])
+        assert request_event.name == "RequestForExecution"
+        assert request_event.fields["signed_quote_bytes"] == chunk.quotes[i]
+        assert request_event.fields["request_bytes"] == chunk.requests[i]
+        assert request_event.fields["relay_instructions"] == chunk.relay_instructions[i]
+        assert request_event.fields["quoter_address"] == bytes(SignedQuote(chunk.quotes[i]).quoter_address)
+
+        is_ntt = chunk.requests[i][:4] == b"ERN1"
+        assert received_event.name == ("NTTMessageReceived" if is_ntt else "VAAMessageReceived")
+        assert received_event.fields["request_for_execution_id"] == chunk.request_for_execution_ids[i]
+        assert received_event.fields["success"] == chunk.delivered[i]
+        assert received_event.fields["error_reason"] == (b"" if chunk.delivered[i] else ERROR_REASON)
+
+    decoded = decode_logs(logs)
+    assert decoded.malformed == 0
+    assert len(decoded.request_for_execution) == len(chunk)
+    assert len(decoded.ntt_message_received) + len(decoded.vaa_message_received) == len(chunk)
+    assert not chunk.delivered.all() and chunk.delivered.any()
+
+
+def test_is_reproducible():
+    first, second = (list(iter_workload(300, seed=3, params=PARAMS, chunk_size=128)) for _ in range(2))
+    assert [chunk.start for chunk in first] == [0, 128, 256]
+    assert [len(chunk) for chunk in first] == [128, 128, 44]
+    for kind in WORKLOAD_FILES:
+        assert [list(getattr(chunk, kind)) for chunk in first] == [list(getattr(chunk, kind)) for chunk in second]
+    assert list(generate_chunk(0, 10, seed=4).logs) != list(generate_chunk(0, 10, seed=3).logs)
+
+
+def test_streams_workload_to_files(tmp_path, capsys):
+    paths = write_workload(tmp_path, 300, seed=5, params=PARAMS, chunk_size=128)
+    chunks = list(iter_workload(300, seed=5, params=PARAMS, chunk_size=128))
+    for kind, path in paths.items():
+        assert list(read_records(path)) == [record for chunk in chunks for record in getattr(chunk, kind)]
+
+    assert main(["10", str(tmp_path / "cli")]) == 0
+    assert len(list(read_records(tmp_path / "cli" / WORKLOAD_FILES["logs"]))) == 20
+    assert "Generated 10 requests" in capsys.readouterr().out
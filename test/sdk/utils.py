@@ -0,0 +1,11 @@
+from executor_sdk.events import get_event_selector
+
+
+def encode_event(signature, head, *dynamic_fields):
+    # arc4 tuple of the static head followed by dynamic fields
+    head_length = len(head) + 2 * len(dynamic_fields)
+    offsets, tails = b"", b""
+    for field in dynamic_fields:
+        offsets += (head_length + len(tails)).to_bytes(2, "big")
+        tails += len(field).to_bytes(2, "big") + field
+    return get_event_selector(signature) + head + offsets + tails